@@ -0,0 +1,470 @@
+# Builds the rig templates against the fake maya in benchmarks/fake_maya and reports how long each build phase and
+# each component took, along with how many cmds/API calls they made.  The fake doesn't cost what maya does per call,
+# so the call counts say more about a real build than the timings do.  Run from the repo root with:
+#
+#   python -m benchmarks.build_benchmark
+#
+import collections
+import logging
+import math
+import os
+import tempfile
+import time
+import traceback
+
+from benchmarks import fake_maya
+
+fake_maya.install()
+
+import maya.api.OpenMaya as om2
+
+from src import bind_positions, constants
+from src.crig_maya import maya_controller
+from src.crig_maya.utilities import command_batch, position_snapshot, python_utils
+
+# template -> saved bind joint positions
+BUILDS = [
+    ('test_rig.yaml', 'root_positions.json'),
+    ('eskah_rig.yaml', 'eskah_root_positions.json'),
+]
+# template, saved positions, then a component var edit to rebuild just the components it touches:
+# (component, var, new value)
+REBUILDS = [
+    ('eskah_rig.yaml', 'eskah_root_positions.json', ('C_tailtail', 'numJoints', 21)),
+]
+CONTROL_DATA = os.path.join(constants.CONTROLS_PATH, 'custom_curves.json')
+# What runs after the component rigs are made, in the order generateJoints() runs them.
+POST_PHASES = ['handleParentConnections', 'refreshCopiedAttrs', 'propagateLimits', 'activateParentAttrs',
+    'updateControlCurves', 'createDrivenKeys', 'setSavedAttrs', 'handleSpecialBindOps', 'setControlColors']
+
+
+def timeIt(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+class BuildProfile():
+
+    def __init__(self, scene):
+        self.scene = scene
+        # name -> [seconds, Counter of calls]
+        self.phases = collections.OrderedDict()
+        self.components = collections.OrderedDict()
+
+    def wrap(self, store, name, function):
+        def timed(*args):
+            calls_before = collections.Counter(self.scene.calls)
+            seconds, result = timeIt(function, *args)
+            entry = store.setdefault(name(*args) if callable(name) else name, [0.0, collections.Counter()])
+            entry[0] += seconds
+            entry[1].update(self.scene.calls - calls_before)
+            return result
+        return timed
+
+    def wrapPhase(self, controller, name):
+        setattr(controller, name, self.wrap(self.phases, name, getattr(controller, name)))
+
+    def wrapComponentPass(self, controller, name):
+        component_name = lambda component: '{0}_{1}'.format(component.prefix, component.name)
+        per_component = self.wrap(self.components, component_name, getattr(controller, name))
+        setattr(controller, name, self.wrap(self.phases, name, per_component))
+
+
+# What the templates expect to already be in the scene: the top level groups, the curves and meshes named in the
+# component vars, and whatever the special bind ops attach to.
+def createSceneGeometry(scene, components):
+    geometry_group = scene.createNode('transform', constants.DEFAULT_GROUPS.geometry)
+    scene.createNode('transform', constants.DEFAULT_GROUPS.rig)
+    for component in components:
+        names = []
+        for value in component.componentVars.values():
+            names.extend(value if isinstance(value, list) else [value])
+        for name in [x for x in names if isinstance(x, str) and not scene.exists(x)]:
+            if name.endswith('_CRV'):
+                points = [(15.0 * math.cos(i * math.pi / 4.0), 95.0, 15.0 * math.sin(i * math.pi / 4.0)) for i in range(8)]
+                scene.createCurve(name, points, 3, parent=geometry_group, periodic=True)
+            elif name.endswith('_GEO'):
+                side = -1.0 if name.startswith('R_') else 1.0
+                points = [(side * 8.0 + x, 60.0 + y, z) for x in (-3.0, 3.0) for y in (-25.0, 25.0) for z in (-3.0, 3.0)]
+                scene.createMesh(name, points, geometry_group)
+        for bind in component.geomData:
+            name = '{0}_{1}'.format(component.prefix, bind['bindGeo'])
+            if not scene.exists(name):
+                scene.createNode('transform', name)
+
+
+def loadTemplate(controller, template, positions, edit=None):
+    controller.importModules(os.path.join(constants.TEMPLATES_PATH, template))
+    controller.duplicateLRComponents()
+    if edit:
+        component_name, var, value = edit
+        component = next(x for x in controller.components if x.getFullName() == component_name)
+        component.componentVars[var] = value
+    controller.buildComponentGraph()
+    controller.importBindJointPositions(os.path.join(constants.POSITIONS_PATH, positions))
+    controller.importControlData(CONTROL_DATA)
+
+
+# Batches get recorded and replayed through the fake commands unless another backend is given.
+def newController(backend=None):
+    fake_maya.commands.file(new=True, force=True)
+    fake_maya.scene.calls.clear()
+    command_batch.cmds.commands = fake_maya.cmds
+    command_batch.cmds.backend = backend or command_batch.RecordingBackend(fake_maya.cmds)
+    return maya_controller.MayaController()
+
+
+def buildTemplate(template, positions, edit=None, backend=None):
+    scene = fake_maya.scene
+    controller = newController(backend)
+    profile = BuildProfile(scene)
+    for name in ['importModules', 'duplicateLRComponents', 'buildComponentGraph', 'importBindJointPositions',
+            'importControlData', 'generateLocs', 'generateJoints'] + POST_PHASES:
+        profile.wrapPhase(controller, name)
+    profile.wrapComponentPass(controller, 'callCreateBindJoints')
+    profile.wrapComponentPass(controller, 'callControlRigAndConnect')
+
+    loadTemplate(controller, template, positions, edit)
+    createSceneGeometry(scene, controller.components)
+    seconds, result = timeIt(lambda: (controller.generateLocs(), controller.generateJoints()))
+    return controller, profile, seconds
+
+
+def callSummary(calls, top=3):
+    return ', '.join('{0} {1}'.format(name.split('.', 1)[-1], count) for name, count in calls.most_common(top))
+
+
+def printProfile(template, controller, profile, seconds):
+    scene = fake_maya.scene
+    print('{0}: {1} components, {2} nodes, {3:.1f} ms, {4} calls, {5} batches'.format(
+        template, len(controller.components), len(scene.nodes), seconds * 1000, sum(scene.calls.values()),
+        len(command_batch.cmds.backend.batches)))
+    print('  {0:<28} {1:>10} {2:>8}  {3}'.format('phase', 'ms', 'calls', 'most called'))
+    for name, (phase_seconds, calls) in profile.phases.items():
+        print('  {0:<28} {1:>10.1f} {2:>8}  {3}'.format(name, phase_seconds * 1000, sum(calls.values()), callSummary(calls)))
+    print('  {0:<28} {1:>10} {2:>8}  {3}'.format('component', 'ms', 'calls', 'most called'))
+    for name, (component_seconds, calls) in sorted(profile.components.items(), key=lambda x: -x[1][0]):
+        print('  {0:<28} {1:>10.1f} {2:>8}  {3}'.format(name, component_seconds * 1000, sum(calls.values()), callSummary(calls)))
+    print('')
+
+
+# Builds the whole template, makes the edit and rebuilds just what changed, then checks that the scene ends up with
+# the same nodes a full build with the edit makes.
+def runRebuildBenchmark(rebuilds=REBUILDS):
+    for template, positions, edit in rebuilds:
+        controller, profile, seconds = buildTemplate(template, positions)
+        loadTemplate(controller, template, positions, edit)
+        rebuild_seconds, result = timeIt(controller.rebuildChangedComponents)
+        rebuilt_nodes = collections.Counter(x.fullPath() for x in fake_maya.scene.nodes)
+
+        controller, profile, full_seconds = buildTemplate(template, positions, edit)
+        full_nodes = collections.Counter(x.fullPath() for x in fake_maya.scene.nodes)
+        print('{0} with {1}.{2} = {3}: rebuild {4:.1f} ms, full build {5:.1f} ms'.format(template, edit[0], edit[1], edit[2], rebuild_seconds * 1000, full_seconds * 1000))
+        print('  nodes after rebuild {0}, after full build {1}, only after rebuild {2}, only after full build {3}'.format(
+            sum(rebuilt_nodes.values()), sum(full_nodes.values()), sum((rebuilt_nodes - full_nodes).values()), sum((full_nodes - rebuilt_nodes).values())))
+        print('')
+
+
+# Saves the control data off of a built template, which is what "Save Data" spends most of its time on.
+def runSaveBenchmark(builds=BUILDS[1:]):
+    for template, positions in builds:
+        controller, profile, seconds = buildTemplate(template, positions)
+        fake_maya.scene.calls.clear()
+        with tempfile.TemporaryDirectory() as directory:
+            save_seconds, result = timeIt(controller.saveControlData, os.path.join(directory, 'controls.json'))
+        calls = fake_maya.scene.calls
+        print('{0}: saveControlData {1:.1f} ms, {2} calls, most called: {3}'.format(template, save_seconds * 1000, sum(calls.values()), callSummary(calls, 6)))
+        print('')
+
+
+# What "updateControlCurves" used to do, one ls and one new function set per curve.
+def legacyUpdateControlCurves(controller):
+    cmds = fake_maya.cmds
+    for component, component_data in controller.controlsData['curves'].items():
+        for name in component_data:
+            if cmds.ls(name):
+                curve = om2.MFnNurbsCurve(python_utils.getDagPath(name))
+                curve.setCVPositions(component_data[name]['points'])
+                curve.setKnots(component_data[name]['knots'], 0 , len(component_data[name]['knots']) - 1)
+                curve.updateCurve()
+
+
+def curveShapes():
+    return {x.fullPath(): (x.data['cvs'], x.data['knots']) for x in fake_maya.scene.nodes if x.type == 'nurbsCurve'}
+
+
+# Moves every saved control curve out of its saved shape.
+def offsetControlCurves(controller):
+    for component_data in controller.controlsData['curves'].values():
+        for name in [x for x in component_data if fake_maya.scene.exists(x)]:
+            shape = fake_maya.scene.geometryNode(fake_maya.scene.findNode(name))
+            shape.data['cvs'] = [(x + 1.0, y, z) for x, y, z in shape.data['cvs']]
+
+
+# Applies the saved control shapes to a built template the old way and the new way, then again once they're all
+# already there, which is what a rebuild does to every component it didn't touch.
+def runCurveBenchmark(builds=BUILDS[1:]):
+    for template, positions in builds:
+        controller, profile, seconds = buildTemplate(template, positions)
+        built_shapes = curveShapes()
+        offsetControlCurves(controller)
+        fake_maya.scene.calls.clear()
+        legacy_seconds, result = timeIt(legacyUpdateControlCurves, controller)
+        legacy_calls = sum(fake_maya.scene.calls.values())
+        assert curveShapes() == built_shapes, 'The legacy control curves don\'t match the built ones'
+
+        offsetControlCurves(controller)
+        controller.controlCurveTables = {}
+        fake_maya.scene.calls.clear()
+        cold_seconds, result = timeIt(controller.updateControlCurves)
+        cold_calls = sum(fake_maya.scene.calls.values())
+        assert curveShapes() == built_shapes, 'The applied control curves don\'t match the built ones'
+        fake_maya.scene.calls.clear()
+        again_seconds, result = timeIt(controller.updateControlCurves)
+        print('{0}: updateControlCurves legacy {1:.1f} ms ({2} calls), new {3:.1f} ms ({4} calls), already applied {5:.1f} ms ({6} calls)'.format(
+            template, legacy_seconds * 1000, legacy_calls, cold_seconds * 1000, cold_calls, again_seconds * 1000, sum(fake_maya.scene.calls.values())))
+        print('')
+
+
+# What "saveBindJointPositions" used to gather, a listRelatives per deform group and a getAttr per attr per node.
+def legacyPositions(controller):
+    cmds = fake_maya.cmds
+    position_dict = {}
+    for component in controller.components:
+        children = cmds.listRelatives(component.baseGroups['deform_group'], allDescendents=True, type='transform')
+        if children:
+            position_dict['{0}_{1}'.format(component.prefix, component.name)] = python_utils.dictionizeAttrs(children, constants.POSITION_SAVE_ATTRS)
+    return position_dict
+
+
+# Saves the bind joint positions off of a built template the old way and as a snapshot, checks they hold the same
+# values and that the snapshot file reads back the same.
+def runPositionsBenchmark(builds=BUILDS[1:]):
+    for template, positions in builds:
+        controller, profile, seconds = buildTemplate(template, positions)
+        fake_maya.scene.calls.clear()
+        legacy_seconds, legacy = timeIt(legacyPositions, controller)
+        legacy_calls = sum(fake_maya.scene.calls.values())
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = os.path.join(directory, 'positions.json')
+            snapshot_path = os.path.join(directory, 'positions' + bind_positions.SNAPSHOT_EXTENSION)
+            controller.saveJSON(json_path, legacy)
+            fake_maya.scene.calls.clear()
+            snapshot_seconds, result = timeIt(controller.saveBindJointPositions, snapshot_path)
+            snapshot_calls = sum(fake_maya.scene.calls.values())
+            changes = bind_positions.PositionSnapshot.fromDict(legacy).diff(bind_positions.PositionSnapshot.read(snapshot_path))
+            assert not changes, 'The snapshot doesn\'t match the legacy positions: {0}'.format(changes[:5])
+            sizes = os.path.getsize(json_path), os.path.getsize(snapshot_path)
+        print('{0}: saveBindJointPositions legacy {1:.1f} ms ({2} calls, {3} bytes of JSON), snapshot {4:.1f} ms ({5} calls, {6} bytes)'.format(
+            template, legacy_seconds * 1000, legacy_calls, sizes[0], snapshot_seconds * 1000, snapshot_calls, sizes[1]))
+        print('')
+
+
+# Every saved node's translate, rotate, scale and radius, as the scene has them.
+def savedNodeValues(controller):
+    scene = fake_maya.scene
+    values = {}
+    for data in controller.bindPositionData.values():
+        for name in data:
+            if scene.exists(name):
+                node = scene.findNode(name)
+                values[name] = [scene.getValue(node, x) for x in constants.POSITION_SAVE_ATTRS if scene.attributeExists(node, x)]
+    return values
+
+
+def offsetSavedNodes(controller):
+    scene = fake_maya.scene
+    for name in savedNodeValues(controller):
+        node = scene.findNode(name)
+        for attr in ['translateX', 'rotateY', 'scaleZ']:
+            scene.setValue(node, attr, [scene.getValue(node, attr) + 1.0])
+
+
+def valuesMatch(a, b, tolerance=1e-9):
+    return a.keys() == b.keys() and all(len(a[x]) == len(b[x]) and all(abs(i - j) <= tolerance for i, j in zip(a[x], b[x])) for x in a)
+
+
+# What "setSavedPositions" used to do for each saved node, a setAttr per attr.
+def legacySetNodesFromDict(node_dict):
+    cmds = command_batch.cmds
+    for name, attrs in node_dict.items():
+        for attr, data in attrs.items():
+            try:
+                cmds.setAttr('{0}.{1}'.format(name, attr), data)
+            except:
+                constants.RIGGER_LOG.info('attr {0}.{1} could not be set from saved positions.'.format(name, attr))
+
+
+# Puts the saved positions back on a template's freshly made bind joints the old way, a setAttr per attr, and through
+# the one restore, and checks they leave the joints the same.
+def runRestoreBenchmark(builds=BUILDS[1:]):
+    for template, positions in builds:
+        controller = newController()
+        loadTemplate(controller, template, positions)
+        createSceneGeometry(fake_maya.scene, controller.components)
+        controller.generateLocs()
+        restored_values = savedNodeValues(controller)
+
+        offsetSavedNodes(controller)
+        fake_maya.scene.calls.clear()
+        def legacy():
+            for data in controller.bindPositionData.values():
+                legacySetNodesFromDict(data)
+            command_batch.cmds.flushBatch()
+        legacy_seconds, result = timeIt(legacy)
+        legacy_calls = sum(fake_maya.scene.calls.values())
+        assert valuesMatch(savedNodeValues(controller), restored_values), 'The legacy positions don\'t match the restored ones'
+
+        offsetSavedNodes(controller)
+        fake_maya.scene.calls.clear()
+        restore_seconds, result = timeIt(position_snapshot.restorePositions, {x: y for data in controller.bindPositionData.values() for x, y in data.items()})
+        restore_calls = sum(fake_maya.scene.calls.values())
+        assert valuesMatch(savedNodeValues(controller), restored_values), 'The restored positions don\'t match the legacy ones'
+        print('{0}: saved positions for {1} nodes, legacy {2:.1f} ms ({3} calls), restorePositions {4:.1f} ms ({5} calls, {6} missing, {7} blocked)'.format(
+            template, len(restored_values), legacy_seconds * 1000, legacy_calls, restore_seconds * 1000, restore_calls, len(result[1]), len(result[2])))
+        print('')
+
+
+# How many bind joints get moved between saves.
+LIVE_MOVES = [1, 10, 100]
+
+
+# Turns on live positions for a template's bind joints, moves some of them and saves, against saving every position.
+# The file and its journal, as they'd be found after maya went down, have to load back as where the joints are.
+def runLivePositionsBenchmark(builds=BUILDS[1:], moves=LIVE_MOVES):
+    for template, positions in builds:
+        controller = newController()
+        loadTemplate(controller, template, positions)
+        createSceneGeometry(fake_maya.scene, controller.components)
+        controller.generateLocs()
+        with tempfile.TemporaryDirectory() as directory:
+            live_path = os.path.join(directory, 'live' + bind_positions.SNAPSHOT_EXTENSION)
+            full_path = os.path.join(directory, 'full' + bind_positions.SNAPSHOT_EXTENSION)
+            controller.startLivePositions(live_path)
+            joints = sorted(x[1] for x in controller.livePositions.handles)
+            print('{0}: live positions watching {1} nodes'.format(template, len(joints)))
+            for count in moves:
+                for joint in joints[:count]:
+                    fake_maya.cmds.setAttr('{0}.translateY'.format(joint), fake_maya.cmds.getAttr('{0}.translateY'.format(joint)) + 0.5)
+                fake_maya.scene.fireEvent('idle')
+                fake_maya.scene.calls.clear()
+                live_seconds, result = timeIt(controller.saveBindJointPositions, live_path)
+                live_calls = sum(fake_maya.scene.calls.values())
+                fake_maya.scene.calls.clear()
+                full_seconds, result = timeIt(controller.saveBindJointPositions, full_path)
+                full_calls = sum(fake_maya.scene.calls.values())
+                changes = bind_positions.PositionSnapshot.fromDict(bind_positions.loadPositions(live_path)).diff(bind_positions.PositionSnapshot.read(full_path))
+                assert not changes, 'The live positions don\'t match the scene: {0}'.format(changes[:5])
+                print('  {0} moved: save {1:.1f} ms ({2} calls), full save {3:.1f} ms ({4} calls), journal {5} bytes'.format(
+                    count, live_seconds * 1000, live_calls, full_seconds * 1000, full_calls, os.path.getsize(bind_positions.journalPath(live_path))))
+            controller.stopLivePositions()
+            assert not os.path.exists(bind_positions.journalPath(live_path)), 'The journal is still there after stopping'
+            changes = bind_positions.PositionSnapshot.read(live_path).diff(bind_positions.PositionSnapshot.read(full_path))
+            assert not changes, 'The stopped live positions don\'t match the scene: {0}'.format(changes[:5])
+        print('')
+
+
+def sceneValue(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(sceneValue(x) for x in value)
+    if isinstance(value, (bool, int, float)):
+        return round(float(value), 9)
+    return value
+
+
+# Every node with its type, values and incoming connections.  Numbers are compared as floats, a modifier sets an int or
+# a bool where cmds.setAttr keeps whatever it's given.
+def sceneState():
+    state = collections.Counter()
+    for node in fake_maya.scene.nodes:
+        values = tuple(sorted((x, sceneValue(y)) for x, y in node.values.items()))
+        inputs = tuple(sorted((x, y[0].fullPath(), y[1]) for x, y in node.inputs.items()))
+        state[(node.fullPath(), node.type, values, inputs)] += 1
+    return state
+
+
+class LogRecords(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+# Builds a template with its batches run through DAG modifiers instead of being replayed through cmds, and checks it
+# makes the same scene.  Then checks a batch can be undone, and that a batch that fails part way through is taken
+# back to before the failing command and the failure is put down to that command.
+def runModifierBenchmark(builds=BUILDS[1:]):
+    for template, positions in builds:
+        controller, profile, replay_seconds = buildTemplate(template, positions)
+        replayed = sceneState()
+        replay_calls = sum(fake_maya.scene.calls.values())
+        controller, profile, modifier_seconds = buildTemplate(template, positions, backend=command_batch.ModifierBackend())
+        modified = sceneState()
+        assert modified == replayed, 'The modifier build doesn\'t match the replayed one: {0} nodes differ'.format(
+            sum(((modified - replayed) + (replayed - modified)).values()))
+        calls = fake_maya.scene.calls
+        print('{0}: replayed through cmds {1:.1f} ms ({2} calls), through modifiers {3:.1f} ms ({4} calls, {5} modifiers)'.format(
+            template, replay_seconds * 1000, replay_calls, modifier_seconds * 1000, sum(calls.values()), calls['om2.MDGModifier.doIt']))
+
+    cmds = command_batch.cmds
+    newController(command_batch.ModifierBackend())
+    before = sceneState()
+    with cmds.commandBatch('undo'):
+        cmds.createNode('transform', name='batch_GRP')
+        cmds.createNode('multiplyDivide', name='batch_MD')
+        cmds.setAttr('batch_GRP.translateX', 2.0)
+        cmds.connectAttr('batch_GRP.translateX', 'batch_MD.input1X')
+    assert fake_maya.scene.exists('batch_MD') and fake_maya.scene.getValue(fake_maya.scene.findNode('batch_GRP'), 'translateX') == 2.0
+    fake_maya.cmds.undo()
+    assert sceneState() == before, 'Undoing the batch didn\'t take it back'
+
+    fake_maya.cmds.createNode('transform', name='locked_GRP')
+    fake_maya.cmds.setAttr('locked_GRP.translateY', lock=True)
+    before = sceneState()
+    records = LogRecords()
+    constants.RIGGER_LOG.addHandler(records)
+    try:
+        with cmds.commandBatch('fail'):
+            cmds.createNode('transform', name='failed_GRP')
+            cmds.setAttr('failed_GRP.translateX', 1.0)
+            cmds.setAttr('locked_GRP.translateY', 1.0)
+            cmds.setAttr('failed_GRP.translateZ', 1.0)
+        raise AssertionError('Setting a locked attribute in a batch didn\'t fail')
+    except RuntimeError as error:
+        failure = str(error)
+    finally:
+        constants.RIGGER_LOG.removeHandler(records)
+    # What came before the locked attribute was made again by cmds, what came after wasn't made at all.
+    after = sceneState()
+    assert fake_maya.scene.exists('failed_GRP') and fake_maya.scene.getValue(fake_maya.scene.findNode('failed_GRP'), 'translateZ') == 0.0
+    assert sum((after - before).values()) == 1, 'The failed batch left more than the commands before the failure'
+    assert [x.getMessage() for x in records.records] == ['setAttr(\'locked_GRP.translateY\', 1.0) failed in the fail batch.'], records.records
+    print('A batch that fails on a locked attribute: {0}'.format(failure))
+    print('')
+
+
+def runBuildBenchmark(builds=BUILDS):
+    for template, positions in builds:
+        try:
+            controller, profile, seconds = buildTemplate(template, positions)
+        except Exception:
+            # One template that's fallen behind the modules shouldn't stop the rest from being measured.
+            print('{0}: build failed, {1}'.format(template, traceback.format_exc().strip().splitlines()[-1]))
+            print('')
+            continue
+        printProfile(template, controller, profile, seconds)
+
+
+if __name__ == '__main__':
+    runBuildBenchmark()
+    runRebuildBenchmark()
+    runSaveBenchmark()
+    runCurveBenchmark()
+    runPositionsBenchmark()
+    runRestoreBenchmark()
+    runLivePositionsBenchmark()
+    runModifierBenchmark()
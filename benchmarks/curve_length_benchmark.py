@@ -0,0 +1,120 @@
+# Placing things along a curve by length the old way (an MFnNurbsCurve, a length() and a findParamFromLength() for
+# every point) against one arc length table per curve, and finding the joints either side of each rough spline joint
+# with a scan over every joint's parameter against a binary search.  Runs against the fake maya in
+# benchmarks/fake_maya, from the repo root with:
+#
+#   python -m benchmarks.curve_length_benchmark
+#
+import math
+import random
+import time
+
+from benchmarks import fake_maya
+
+fake_maya.install()
+
+import maya.api.OpenMaya as om2
+
+from src import curve_lengths
+from src.crig_maya.utilities import python_utils
+
+# (name, degree, cv count, periodic)
+CURVES = [('lid', 3, 7, False), ('lip', 1, 24, False), ('spine', 3, 40, False), ('ring', 3, 12, True)]
+# How many points get placed along each curve.
+POINT_COUNTS = [5, 50]
+# Placed points can be this far apart (as a fraction of the curve's length), maya's own length() has a 0.001 tolerance.
+TOLERANCE = 1.0e-3
+# (joint parameters, lookups)
+BRACKET_SIZES = [(40, 8), (2000, 500)]
+
+
+def timeIt(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def createCurve(name, degree, count, periodic):
+    points = []
+    for i in range(count):
+        angle = 2.0 * math.pi * i / count if periodic else math.pi * i / (count - 1)
+        points.append((10.0 * math.cos(angle), 2.0 * math.sin(3.0 * angle), 6.0 * math.sin(angle) + i * (0.0 if periodic else 0.5)))
+    return fake_maya.cmds.curve(name=name, point=points, degree=degree, periodic=periodic)
+
+
+# What getPointAlongCurve() used to do.
+def legacyPointAlongCurve(fakeParam, curve):
+    curve = om2.MFnNurbsCurve(python_utils.getDagPath(curve))
+    curveLen = curve.length()
+    actualParam = curve.findParamFromLength(curveLen * fakeParam)
+    return curve.getPointAtParam(actualParam, space=om2.MSpace.kWorld)
+
+
+def legacyPlace(curve, count):
+    return [legacyPointAlongCurve(i / (count - 1), curve) for i in range(count)]
+
+
+def tablePlace(curve, count):
+    table = python_utils.getCurveLengthTable(curve)
+    return [python_utils.getPointAlongCurve(i / (count - 1), table) for i in range(count)]
+
+
+# What find_bracketing_joints() used to do.
+def legacyBracket(transformParam, paramList, maxCurveParam):
+    min = 0
+    min_idx = 0
+    max = maxCurveParam
+    max_idx = len(paramList) - 1
+    for idx in range(len(paramList)):
+        if paramList[idx] > min and paramList[idx] < transformParam:
+            min = paramList[idx]
+            min_idx = idx
+        if paramList[idx] < max and paramList[idx] > transformParam:
+            max = paramList[idx]
+            max_idx = idx
+    return min_idx, max_idx
+
+
+def scanBrackets(transformParams, paramList, maxCurveParam):
+    return [legacyBracket(x, paramList, maxCurveParam) for x in transformParams]
+
+
+# The brackets only get sorted once, the same as the spline module does.
+def searchBrackets(transformParams, paramList, maxCurveParam):
+    brackets = curve_lengths.ParamBrackets(paramList)
+    return [brackets.bracket(x, maxCurveParam) for x in transformParams]
+
+
+def runCurveLengthBenchmark(curves=CURVES, pointCounts=POINT_COUNTS):
+    fake_maya.commands.file(new=True, force=True)
+    for name, degree, count, periodic in curves:
+        curve = createCurve(name, degree, count, periodic)
+        length = om2.MFnNurbsCurve(python_utils.getDagPath(curve)).length()
+        print('{0}: degree {1}, {2} CVs{3}, length {4:.2f}'.format(name, degree, count, ' periodic' if periodic else '', length))
+        for point_count in pointCounts:
+            fake_maya.scene.calls.clear()
+            legacy_seconds, legacy_points = timeIt(legacyPlace, curve, point_count)
+            legacy_calls = sum(fake_maya.scene.calls.values())
+            fake_maya.scene.calls.clear()
+            table_seconds, table_points = timeIt(tablePlace, curve, point_count)
+            table_calls = sum(fake_maya.scene.calls.values())
+            error = max(a.distanceTo(b) for a, b in zip(legacy_points, table_points)) / length
+            assert error < TOLERANCE, '{0} is {1} of its length off of the legacy points'.format(name, error)
+            print('  {0} points: legacy {1:.1f} ms ({2} calls), table {3:.1f} ms ({4} calls), off by {5:.1e} of the length'.format(
+                point_count, legacy_seconds * 1000, legacy_calls, table_seconds * 1000, table_calls, error))
+    print('')
+
+    rand = random.Random(0)
+    for param_count, lookups in BRACKET_SIZES:
+        max_param = 4.0
+        params = sorted(rand.uniform(0.0, max_param) for i in range(param_count))
+        params[0] = 0.0
+        transform_params = [rand.uniform(0.0, max_param) for i in range(lookups)]
+        legacy_seconds, legacy = timeIt(scanBrackets, transform_params, params, max_param)
+        search_seconds, search = timeIt(searchBrackets, transform_params, params, max_param)
+        assert search == legacy, 'The binary search doesn\'t bracket the same joints as the scan'
+        print('{0} joints, {1} lookups: scan {2:.2f} ms, binary search {3:.2f} ms'.format(param_count, lookups, legacy_seconds * 1000, search_seconds * 1000))
+
+
+if __name__ == '__main__':
+    runCurveLengthBenchmark()
@@ -0,0 +1,175 @@
+# Benchmarks for a face's worth of driven keys against the fake maya in benchmarks/fake_maya:
+#   mirroring - the old one curve at a time way vs building a plan for all of them and running it as one batch
+#   replaying saved keys - setDrivenKeyframe/keyTangent per key vs making the curves in one batch and keying them
+#     through the API
+# Run from the repo root with:
+#
+#   python -m benchmarks.driven_key_benchmark
+#
+import time
+
+from benchmarks import fake_maya
+
+fake_maya.install()
+
+from src import driven_keys
+from src.crig_maya.utilities import command_batch, driven_key_mirror, driven_key_replay, python_utils
+
+# joints per side, attrs keyed on each joint, keys on each curve
+SIZES = [(20, 3, 3), (80, 6, 5)]
+KEYED_ATTRS = ['translateX', 'translateY', 'translateZ', 'rotateX', 'rotateY', 'rotateZ']
+
+
+def timeIt(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def makeFace(numJoints, numAttrs, numKeys):
+    cmds = fake_maya.cmds
+    cmds.file(new=True, force=True)
+    command_batch.cmds.commands = cmds
+    command_batch.cmds.backend = command_batch.RecordingBackend(cmds)
+    joints = []
+    for i in range(numJoints):
+        for prefix in ['L', 'R']:
+            cmds.createNode('transform', name='{0}_face_brow{1}_CTL_CRV'.format(prefix, i))
+            cmds.createNode('joint', name='{0}_face_brow{1}_KEY_JNT'.format(prefix, i))
+        joint = 'L_face_brow{0}_KEY_JNT'.format(i)
+        driver = 'L_face_brow{0}_CTL_CRV.translateY'.format(i)
+        for attr in KEYED_ATTRS[:numAttrs]:
+            for key in range(numKeys):
+                cmds.setDrivenKeyframe('{0}.{1}'.format(joint, attr), currentDriver=driver, driverValue=float(key), value=key * 0.5)
+        joints.append(joint)
+    fake_maya.scene.calls.clear()
+    return joints
+
+
+# What "mirrorDrivenKeys" used to do, re-parsing names and querying connections for every curve.
+def legacyMirror(selected):
+    cmds = fake_maya.cmds
+    for node in selected:
+        prefix, component_name, joint_name, node_purpose, node_type = python_utils.getNodeNameParts(node)
+        opposite_prefix = 'L' if prefix == 'R' else 'R'
+        if not cmds.ls('{0}_{1}_{2}_{3}_{4}'.format(opposite_prefix, component_name, joint_name, node_purpose, node_type)):
+            continue
+        for attr in cmds.setDrivenKeyframe(node, query=True, driven=True) or []:
+            for driver in cmds.listConnections(attr, source=True, type='animCurve'):
+                driver_split = list(python_utils.getNodeNameParts(driver))
+                d_connections = cmds.listConnections(driver, destination=False, connections=True, plugs=True)
+                s_connections = cmds.listConnections(driver, source=False, connections=True, plugs=True)
+                cmds.duplicate(driver, name='{0}_{1}_{2}_{3}_{4}'.format(opposite_prefix, *driver_split[1:]))
+                for connections, is_source in [(d_connections, True), (s_connections, False)]:
+                    for i in range(0, len(connections), 2):
+                        curve_connection = list(python_utils.getNodeNameParts(connections[i]))
+                        other_connection = list(python_utils.getNodeNameParts(connections[i + 1]))
+                        other_connection[0] = {'L': 'R', 'R': 'L'}.get(other_connection[0], other_connection[0])
+                        curve_plug = '{0}_{1}_{2}_{3}_{4}'.format(opposite_prefix, *curve_connection[1:])
+                        other_plug = '_'.join(other_connection)
+                        cmds.connectAttr(*([other_plug, curve_plug] if is_source else [curve_plug, other_plug]))
+
+
+def plannedMirror(selected):
+    plan = driven_key_mirror.buildMirrorPlan(driven_key_mirror.getDrivenKeyCurves(selected))
+    driven_key_mirror.applyMirrorPlan(plan)
+    return plan
+
+
+# Every R_ curve with its keys and connections, to check both ways end up with the same thing.
+def mirroredState():
+    cmds = fake_maya.cmds
+    state = {}
+    for curve in sorted(cmds.ls('R_*', type=driven_key_mirror.DRIVEN_KEY_CURVE_TYPES)):
+        connections = cmds.listConnections(curve, connections=True, plugs=True) or []
+        state[curve] = (fake_maya.scene.findNodes(curve)[0].data.get('keys'), sorted(zip(connections[::2], connections[1::2])))
+    return state
+
+
+def runMirrorBenchmark():
+    print('Driven key mirroring, legacy vs planned batch')
+    # The batched renames/connections get replayed through the fake commands, in maya they'd be one modifier.
+    row = '  {0:>22} {1:>10} {2:>12} {3:>8} {4:>10} {5:>8}'
+    print(row.format('joints x attrs x keys', 'legacy ms', 'legacy cmds', 'plan ms', 'plan cmds', 'batched'))
+    for size in SIZES:
+        selected = makeFace(*size)
+        legacy_seconds, _ = timeIt(legacyMirror, selected)
+        legacy_calls = sum(fake_maya.scene.calls.values())
+        legacy_state = mirroredState()
+
+        selected = makeFace(*size)
+        batched_before = command_batch.cmds.batchedCount
+        plan_seconds, plan = timeIt(plannedMirror, selected)
+        batched = command_batch.cmds.batchedCount - batched_before
+        plan_calls = sum(fake_maya.scene.calls.values()) - batched
+        assert mirroredState() == legacy_state, 'The planned mirror doesn\'t match the legacy one'
+        assert not plan.skipped and len(plan.curves) == size[0] * size[1]
+        print(row.format(' x '.join(str(x) for x in size), '{0:.1f}'.format(legacy_seconds * 1000), legacy_calls,
+            '{0:.1f}'.format(plan_seconds * 1000), plan_calls, batched))
+
+    # A curve driven through a node without a side gets skipped, rather than its copy being driven by the same node.
+    selected = makeFace(1, 1, 2)
+    curve = driven_key_mirror.getDrivenKeyCurves(selected)[0]
+    conversion = fake_maya.cmds.createNode('unitConversion')
+    fake_maya.cmds.connectAttr('L_face_brow0_CTL_CRV.rotateY', '{0}.input'.format(conversion))
+    fake_maya.cmds.connectAttr('{0}.output'.format(conversion), '{0}.input'.format(curve), force=True)
+    plan = driven_key_mirror.buildMirrorPlan([curve])
+    assert not plan.curves and plan.skipped[0]['reason'].endswith('which has no side'), plan.skipped
+
+
+# The saved keys for every keyed attr on the L_ side, the same as saveControlData() would write them.
+def saveFaceKeys(joints):
+    cmds = fake_maya.cmds
+    nodes = {}
+    for joint in joints:
+        for attr in cmds.setDrivenKeyframe(joint, query=True, driven=True) or []:
+            curve = cmds.listConnections(attr, source=True, type='animCurve')[0]
+            driver = cmds.listConnections('{0}.input'.format(curve), source=True, plugs=True)[0]
+            nodes.setdefault(joint, {})[attr] = {driver: {
+                'keyframes': cmds.keyframe(curve, query=True, floatChange=True, valueChange=True),
+                'keytangents': cmds.keyTangent(curve, query=True, inAngle=True, outAngle=True, inTangentType=True, outTangentType=True),
+                'infinites': ['Constant', 'Linear'],
+            }}
+    return driven_keys.DrivenKeyTable.fromNodeDict(nodes)
+
+
+# The keys and connections of every curve on the L_ side.
+def replayedState():
+    state = {}
+    for curve in sorted(fake_maya.cmds.ls('L_*', type=driven_key_mirror.DRIVEN_KEY_CURVE_TYPES)):
+        node = fake_maya.scene.findNodes(curve)[0]
+        keys = [[x[0], round(x[1], 9)] + x[4:] for x in node.data.get('keys', [])]
+        connections = fake_maya.cmds.listConnections(curve, connections=True, plugs=True) or []
+        state[curve] = (keys, sorted(zip(connections[::2], connections[1::2])), node.values.get('postInfinity'))
+    return state
+
+
+def clearFaceKeys():
+    fake_maya.cmds.delete(fake_maya.cmds.ls('L_*', type=driven_key_mirror.DRIVEN_KEY_CURVE_TYPES))
+    fake_maya.scene.calls.clear()
+
+
+def runReplayBenchmark():
+    print('Replaying saved driven keys, per key commands vs batched curves')
+    row = '  {0:>22} {1:>10} {2:>12} {3:>8} {4:>10} {5:>8}'
+    print(row.format('joints x attrs x keys', 'legacy ms', 'legacy cmds', 'new ms', 'new cmds', 'batched'))
+    for size in SIZES:
+        table = saveFaceKeys(makeFace(*size))
+        clearFaceKeys()
+        legacy_seconds, _ = timeIt(lambda: [driven_key_replay.setDrivenKeysByCommand(table, i) for i in range(table.curveCount)])
+        legacy_calls = sum(fake_maya.scene.calls.values())
+        legacy_state = replayedState()
+
+        clearFaceKeys()
+        batched_before = command_batch.cmds.batchedCount
+        seconds, _ = timeIt(driven_key_replay.createDrivenKeys, table)
+        batched = command_batch.cmds.batchedCount - batched_before
+        calls = sum(fake_maya.scene.calls.values()) - batched
+        assert replayedState() == legacy_state, 'The replayed keys don\'t match the legacy ones'
+        print(row.format(' x '.join(str(x) for x in size), '{0:.1f}'.format(legacy_seconds * 1000), legacy_calls,
+            '{0:.1f}'.format(seconds * 1000), calls, batched))
+
+
+if __name__ == '__main__':
+    runMirrorBenchmark()
+    runReplayBenchmark()
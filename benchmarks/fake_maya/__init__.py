@@ -0,0 +1,128 @@
+# A pure-python stand-in for the parts of maya the rigger uses, so a whole template can be built (and timed) outside
+# of maya.  It keeps track of nodes, attributes, connections, the DAG hierarchy and names, and works out transform
+# matrices, but doesn't evaluate anything else.  Call install() before anything under src.crig_maya is imported:
+#
+#   from benchmarks import fake_maya
+#   fake_maya.install()
+#
+import sys
+import types
+
+from . import api, math_types
+from .commands import FakeCommands
+from .scene import Scene
+
+# Commands that are just for the UI or the undo queue, they aren't worth counting.
+UNCOUNTED_COMMANDS = set(['undoInfo', 'refresh'])
+
+
+# maya.cmds, every command call goes through here so it can be counted.
+class CountingCommands():
+
+    def __init__(self, commands):
+        self._commands = commands
+
+    def __getattr__(self, name):
+        function = getattr(self._commands, name)
+        calls = self._commands.scene.calls
+        counted = name not in UNCOUNTED_COMMANDS
+
+        def command(*args, **kwargs):
+            if counted:
+                calls['cmds.{0}'.format(name)] += 1
+            return function(*args, **kwargs)
+        setattr(self, name, command)
+        return command
+
+
+# maya.mel, only the handful of mel procedures the rigger calls.
+class FakeMel():
+
+    def __init__(self, commands):
+        self.commands = commands
+
+    @property
+    def scene(self):
+        return self.commands.scene
+
+    def eval(self, script):
+        self.scene.calls['mel.eval'] += 1
+        script = script.strip().rstrip(';')
+        if script.startswith('findRelatedSkinCluster'):
+            return self.findRelatedSkinCluster(script.split()[-1])
+        if script == 'cMuscle_makeMuscle(0)':
+            return self.makeMuscle()
+        if script == 'cMuscle_rigKeepOutSel()':
+            return self.rigKeepOut()
+        raise RuntimeError('The fake mel doesn\'t know how to run: {0}'.format(script))
+
+    def findRelatedSkinCluster(self, name):
+        node = self.scene.geometryNode(self.scene.findNode(name))
+        source = node.inputs.get('inMesh') or node.inputs.get('create')
+        if source is not None and source[0].type == 'skinCluster':
+            return source[0].name
+        return ''
+
+    def selected(self):
+        return [x for x in self.scene.selection if not isinstance(x, str)]
+
+    # Turns the selected geometry into a muscle object, and hands back the muscle shape.
+    def makeMuscle(self):
+        result = []
+        for node in self.selected():
+            shape = self.scene.createNode('cMuscleObject', '{0}_cMuscleObjectShape'.format(node.name), node)
+            self.scene.connect((self.scene.geometryNode(node), 'worldMesh[0]'), (shape, 'meshIn'))
+            result.append(self.scene.shortestName(shape))
+        return result
+
+    # Puts a keep out under the selected transform: [keep out transform, keep out shape, keep out group]
+    def rigKeepOut(self):
+        node = self.selected()[0]
+        group = self.scene.createNode('transform', 'grpKeepOut{0}'.format(node.name), node.parent)
+        self.scene.setWorldMatrix(group, self.scene.worldMatrix(node))
+        keep_out = self.scene.createNode('cMuscleKeepOut', 'cMuscleKeepOut1', group)
+        shape = self.scene.createNode('cMuscleKeepOutShape', 'cMuscleKeepOutShape1', keep_out)
+        for attr, attr_type in [('inDirection', 'double3'), ('muscleData', 'message')]:
+            self.commands.addAttr(self.scene.shortestName(shape), longName=attr, attributeType=attr_type)
+        for axis in 'XYZ':
+            self.commands.addAttr(self.scene.shortestName(shape), longName='inDirection{0}'.format(axis), attributeType='double', parent='inDirection')
+        self.scene.setParent(node, keep_out, keepWorld=True)
+        return [self.scene.shortestName(x) for x in [keep_out, shape, group]]
+
+
+scene = Scene()
+commands = FakeCommands(scene)
+cmds = CountingCommands(commands)
+mel = FakeMel(commands)
+
+
+def package(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+def apiModule(name):
+    module = types.ModuleType(name)
+    for source in [math_types, api]:
+        module.__dict__.update({k: v for k, v in vars(source).items() if k.startswith('M')})
+    return module
+
+
+def install():
+    api.scene = scene
+    om2 = apiModule('maya.api.OpenMaya')
+    oma2 = package('maya.api.OpenMayaAnim', MFnSkinCluster=api.MFnSkinCluster, MFnAnimCurve=api.MFnAnimCurve)
+    # The old API only gets imported, nothing the build runs uses it.
+    om = package('maya.OpenMaya')
+    modules = {
+        'maya': package('maya', cmds=cmds, mel=mel, OpenMaya=om),
+        'maya.cmds': cmds,
+        'maya.mel': mel,
+        'maya.OpenMaya': om,
+        'maya.api': package('maya.api', OpenMaya=om2, OpenMayaAnim=oma2),
+        'maya.api.OpenMaya': om2,
+        'maya.api.OpenMayaAnim': oma2,
+    }
+    sys.modules.update(modules)
+    return scene
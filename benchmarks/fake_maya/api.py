@@ -0,0 +1,1021 @@
+# Stand-ins for the maya.api.OpenMaya (and OpenMayaAnim) classes the rigger uses, on top of the fake scene.  Each
+# function set that gets made is counted, since those are what the rigger's API calls cost in maya.
+import math
+
+from . import scene as scene_module
+from .math_types import (MSpace, MVector, MPoint, MMatrix, MEulerRotation, MQuaternion, MTransformationMatrix,
+    matrixToEuler)
+
+# Set by install(), the scene everything here looks things up in.
+scene = None
+
+
+def count(name):
+    scene.calls['om2.{0}'.format(name)] += 1
+
+
+class MFn():
+    kInvalid = 0
+    kDagNode = 107
+    kTransform = 110
+    kJoint = 121
+    kMesh = 296
+    kNurbsCurve = 267
+    kNurbsSurface = 294
+    kLocator = 281
+    kNumericAttribute = 568
+    kDoubleAngleAttribute = 562
+    kFloatAngleAttribute = 564
+    kDoubleLinearAttribute = 563
+    kFloatLinearAttribute = 565
+    kTimeAttribute = 566
+    kEnumAttribute = 569
+    kTypedAttribute = 571
+    kMatrixAttribute = 579
+    kCompoundAttribute = 571
+    kMeshVertComponent = 551
+    kCurveCVComponent = 533
+    kAnimCurve = 7
+    kUnitConversion = 526
+    kBlendWeighted = 1034
+
+
+NODE_FUNCTIONS = {
+    'transform': [MFn.kDagNode, MFn.kTransform],
+    'joint': [MFn.kDagNode, MFn.kTransform, MFn.kJoint],
+    'mesh': [MFn.kDagNode, MFn.kMesh],
+    'nurbsCurve': [MFn.kDagNode, MFn.kNurbsCurve],
+    'nurbsSurface': [MFn.kDagNode, MFn.kNurbsSurface],
+    'locator': [MFn.kDagNode, MFn.kLocator],
+    'animCurveUA': [MFn.kAnimCurve],
+    'animCurveUL': [MFn.kAnimCurve],
+    'animCurveUT': [MFn.kAnimCurve],
+    'animCurveUU': [MFn.kAnimCurve],
+    'unitConversion': [MFn.kUnitConversion],
+    'blendWeighted': [MFn.kBlendWeighted],
+}
+ATTRIBUTE_FUNCTIONS = {
+    'enum': MFn.kEnumAttribute,
+    'doubleAngle': MFn.kDoubleAngleAttribute,
+    'doubleLinear': MFn.kDoubleLinearAttribute,
+    'matrix': MFn.kMatrixAttribute,
+    'string': MFn.kTypedAttribute,
+    'double3': MFn.kCompoundAttribute,
+}
+
+
+class MFnNumericData():
+    kInvalid = 0
+    kBoolean = 1
+    kByte = 2
+    kChar = 3
+    kShort = 4
+    kInt = 7
+    kLong = 7
+    kFloat = 10
+    kDouble = 13
+    k3Double = 16
+
+
+NUMERIC_TYPES = {'bool': MFnNumericData.kBoolean, 'byte': MFnNumericData.kByte, 'short': MFnNumericData.kShort,
+    'long': MFnNumericData.kLong, 'int': MFnNumericData.kInt, 'float': MFnNumericData.kFloat, 'double': MFnNumericData.kDouble}
+
+
+class MDoubleArray(list):
+    pass
+
+
+class MIntArray(list):
+    pass
+
+
+class MPointArray(list):
+    pass
+
+
+class MAngle():
+    kInvalid = 0
+    kRadians = 1
+    kDegrees = 2
+
+    def __init__(self, value=0.0, unit=kRadians):
+        self.value = value
+        self.unit = unit
+
+    @staticmethod
+    def uiUnit():
+        return MAngle.kDegrees
+
+    def asRadians(self):
+        return math.radians(self.value) if self.unit == MAngle.kDegrees else self.value
+
+    def asDegrees(self):
+        return self.value if self.unit == MAngle.kDegrees else math.degrees(self.value)
+
+    def asUnits(self, unit):
+        return self.asDegrees() if unit == MAngle.kDegrees else self.asRadians()
+
+
+class MDistance():
+    kInvalid = 0
+    kCentimeters = 6
+
+    def __init__(self, value=0.0, unit=kCentimeters):
+        self.value = value
+        self.unit = unit
+
+    @staticmethod
+    def uiUnit():
+        return MDistance.kCentimeters
+
+    @staticmethod
+    def internalToUI(value):
+        return value
+
+    @staticmethod
+    def uiToInternal(value):
+        return value
+
+    def asCentimeters(self):
+        return self.value
+
+    def asUnits(self, unit):
+        return self.value
+
+
+# Either a node or one of a node's attributes.
+class MObject():
+
+    def __init__(self, node=None, attr=None):
+        self.node = node
+        self.attr = attr
+
+    def isNull(self):
+        return self.node is None
+
+    def apiType(self):
+        if self.attr is not None:
+            attr_type = scene.attributeType(self.node, self.attr)
+            if attr_type in ATTRIBUTE_FUNCTIONS:
+                return ATTRIBUTE_FUNCTIONS[attr_type]
+            return MFn.kNumericAttribute
+        return NODE_FUNCTIONS.get(self.node.type, [MFn.kInvalid])[-1]
+
+    def hasFn(self, fn):
+        if self.attr is not None:
+            return self.apiType() == fn
+        return fn in NODE_FUNCTIONS.get(self.node.type, [MFn.kDagNode] if self.node.isDag else [])
+
+
+MObject.kNullObj = MObject()
+
+
+class MObjectHandle():
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def isValid(self):
+        return self.obj.node is not None and self.obj.node.alive
+
+    def isAlive(self):
+        return self.isValid()
+
+    def object(self):
+        return self.obj
+
+    def hashCode(self):
+        return id(self.obj.node)
+
+
+class MDagPath():
+
+    def __init__(self, other=None):
+        count('MDagPath')
+        self.nodes = list(other.nodes) if other is not None else []
+
+    @property
+    def node_(self):
+        return self.nodes[-1]
+
+    def node(self):
+        return MObject(self.nodes[-1])
+
+    def hasFn(self, fn):
+        return self.node().hasFn(fn)
+
+    def apiType(self):
+        return self.node().apiType()
+
+    def pop(self, num=1):
+        self.nodes = self.nodes[:-num]
+
+    def length(self):
+        return len(self.nodes)
+
+    def partialPathName(self):
+        return scene.shortestName(self.nodes[-1])
+
+    def fullPathName(self):
+        return self.nodes[-1].fullPath()
+
+    def inclusiveMatrix(self):
+        return MMatrix(scene.worldMatrix(self.nodes[-1]))
+
+    def inclusiveMatrixInverse(self):
+        return scene.worldMatrix(self.nodes[-1]).inverse()
+
+    def exclusiveMatrix(self):
+        return MMatrix(scene.parentMatrix(self.nodes[-1]))
+
+    def exclusiveMatrixInverse(self):
+        return scene.parentMatrix(self.nodes[-1]).inverse()
+
+    @staticmethod
+    def getAPathTo(obj):
+        return dagPathTo(obj.node)
+
+
+def dagPathTo(node):
+    path = MDagPath()
+    path.nodes = list(reversed([node] + list(node.ancestors())))
+    return path
+
+
+# Visits every DAG node under a root (the root included), depth first, skipping the ones that don't match the filter.
+class MItDag():
+    kDepthFirst = 0
+    kBreadthFirst = 1
+
+    def __init__(self, traversalType=kDepthFirst, filterType=MFn.kInvalid):
+        count('MItDag')
+        self.items = []
+        self.index = 0
+        self.filterType = filterType
+
+    def reset(self, root, traversalType=kDepthFirst, filterType=None):
+        if filterType is not None:
+            self.filterType = filterType
+        root = root.nodes[-1] if isinstance(root, MDagPath) else root.node
+        self.items = []
+        self.collect(root, len(list(root.ancestors())) + 1)
+        self.index = 0
+        return self
+
+    def collect(self, node, depth):
+        if self.filterType == MFn.kInvalid or MObject(node).hasFn(self.filterType):
+            self.items.append((node, depth))
+        for child in node.children:
+            self.collect(child, depth + 1)
+
+    def isDone(self):
+        return self.index >= len(self.items)
+
+    def next(self):
+        self.index += 1
+        return self
+
+    def depth(self):
+        return self.items[self.index][1]
+
+    def currentItem(self):
+        return MObject(self.items[self.index][0])
+
+    def getPath(self):
+        return dagPathTo(self.items[self.index][0])
+
+    def partialPathName(self):
+        return scene.shortestName(self.items[self.index][0])
+
+    def fullPathName(self):
+        return self.items[self.index][0].fullPath()
+
+
+class MPlug():
+    kFreeToChange = 0
+    kNotFreeToChange = 1
+    kChildrenNotFreeToChange = 2
+
+    def __init__(self, node=None, attr=None):
+        self.node_ = node
+        self.attr = attr
+
+    def node(self):
+        return MObject(self.node_)
+
+    def name(self):
+        return '{0}.{1}'.format(scene.shortestName(self.node_), self.attr)
+
+    def partialName(self, includeNodeName=False, **kwargs):
+        return self.name() if includeNodeName else self.attr
+
+    @property
+    def isDestination(self):
+        return self.attr in self.node_.inputs
+
+    @property
+    def isSource(self):
+        return bool(self.node_.outputs.get(self.attr))
+
+    def source(self):
+        source = self.node_.inputs.get(self.attr)
+        return MPlug(*source) if source is not None else MPlug()
+
+    def destinations(self):
+        return [MPlug(*x) for x in self.node_.outputs.get(self.attr, [])]
+
+    @property
+    def isNull(self):
+        return self.node_ is None
+
+    def asString(self):
+        value = scene.getValue(self.node_, self.attr)
+        return value if isinstance(value, str) else ''
+
+    # The scene keeps values in UI units, the API hands back internal ones.
+    def asDouble(self):
+        value = float(scene.getValue(self.node_, self.attr))
+        return math.radians(value) if scene.attributeType(self.node_, self.attr) == 'doubleAngle' else value
+
+    def asMAngle(self):
+        return MAngle(self.asDouble(), MAngle.kRadians)
+
+    def asMDistance(self):
+        return MDistance(self.asDouble(), MDistance.kCentimeters)
+
+    def setDouble(self, value):
+        count('MPlug.set')
+        value = math.degrees(value) if scene.attributeType(self.node_, self.attr) == 'doubleAngle' else value
+        scene.setValue(self.node_, self.attr, [value])
+
+    def setMAngle(self, angle):
+        count('MPlug.set')
+        scene.setValue(self.node_, self.attr, [angle.asDegrees()])
+
+    def setMDistance(self, distance):
+        count('MPlug.set')
+        scene.setValue(self.node_, self.attr, [distance.asCentimeters()])
+
+    def attribute(self):
+        return MObject(self.node_, self.attr)
+
+    def numChildren(self):
+        return len(scene.compoundChildren(self.node_, self.attr) or [])
+
+    # By index or by the child's attribute.  Utility node attributes aren't listed as compounds, their children just
+    # go on the end of the plug's path.
+    def child(self, child):
+        children = scene.compoundChildren(self.node_, self.attr) or []
+        name = children[child] if isinstance(child, int) else child.attr
+        if name in children:
+            return MPlug(self.node_, scene.childPath(self.attr, name))
+        return MPlug(self.node_, '{0}.{1}'.format(self.attr, name))
+
+    def elementByLogicalIndex(self, index):
+        return MPlug(self.node_, '{0}[{1}]'.format(self.attr, index))
+
+    # Locked or connected, either this plug or, for a compound, any of its children.
+    def isFreeToChange(self, checkParents=True, checkChildren=True):
+        node = self.node_
+        if self.attr in node.locked or self.attr in node.inputs:
+            return MPlug.kNotFreeToChange
+        if checkParents:
+            for parent, children in scene_module.COMPOUND_CHILDREN.items():
+                if self.attr in children and (parent in node.locked or parent in node.inputs):
+                    return MPlug.kNotFreeToChange
+        if checkChildren:
+            for child in scene.compoundChildren(node, self.attr) or []:
+                if child in node.locked or child in node.inputs:
+                    return MPlug.kChildrenNotFreeToChange
+        return MPlug.kFreeToChange
+
+
+class MSelectionList():
+
+    def __init__(self):
+        count('MSelectionList')
+        self.items = []
+
+    # A node that's already in the list isn't added again, the same as maya.
+    def add(self, name):
+        try:
+            node = scene.findNode(name.split('.')[0])
+        except ValueError as error:
+            raise RuntimeError(str(error))
+        if node not in self.items:
+            self.items.append(node)
+        return self
+
+    def length(self):
+        return len(self.items)
+
+    def getDagPath(self, index):
+        node = self.items[index]
+        if not node.isDag:
+            raise TypeError('{0} is not a DAG node'.format(node.name))
+        return dagPathTo(node)
+
+    def getDependNode(self, index):
+        return MObject(self.items[index])
+
+
+# Nothing a modifier is given happens to the scene until doIt(), which makes each edit in order and keeps track of how
+# far it got, so undoIt() takes back just the edits that were made.  An edit that fails stops doIt() there, the same
+# as maya.
+class MDGModifier():
+
+    def __init__(self):
+        count(type(self).__name__)
+        # [(do, undo)]
+        self.edits = []
+        self.done = 0
+
+    def doIt(self):
+        count('MDGModifier.doIt')
+        while self.done < len(self.edits):
+            self.edits[self.done][0]()
+            self.done += 1
+
+    def undoIt(self):
+        while self.done:
+            self.done -= 1
+            self.edits[self.done][1]()
+
+    # The node is there to be renamed and connected straight away, it only goes in the scene with doIt().
+    def createNode(self, nodeType, parent=None):
+        node = scene_module.Node(scene, '{0}1'.format(nodeType), nodeType)
+        node.alive = False
+        parent = parent.node if parent is not None else None
+
+        def create():
+            node.name = scene.uniqueName(node.name)
+            scene.addNode(node, parent)
+        self.edits.append((create, lambda: scene.deleteNode(node)))
+        return MObject(node)
+
+    def renameNode(self, obj, name):
+        node = obj.node
+        previous = []
+
+        def rename():
+            previous[:] = [node.name]
+            scene.setName(node, scene.uniqueName(name, ignore=node))
+        self.edits.append((rename, lambda: scene.setName(node, previous[0])))
+
+    def plugPath(self, plug):
+        return plug.node_, scene.normalizeAttr(plug.node_, plug.attr)
+
+    def connect(self, source, destination):
+        source, destination = self.plugPath(source), self.plugPath(destination)
+
+        def connect():
+            if destination[1] in destination[0].locked:
+                raise RuntimeError('The destination attribute \'{0}\' is locked'.format(scene.plugName(destination)))
+            scene.connect(source, destination)
+        self.edits.append((connect, lambda: scene.disconnect(source, destination)))
+
+    def disconnect(self, source, destination):
+        source, destination = self.plugPath(source), self.plugPath(destination)
+        self.edits.append((lambda: scene.disconnect(source, destination), lambda: scene.connect(source, destination)))
+
+    # Values go in the scene in UI units, the same as cmds.setAttr.
+    def newPlugValue(self, plug, value):
+        node, attr = self.plugPath(plug)
+        previous = []
+
+        def setValue():
+            if attr in node.locked or attr in node.inputs:
+                raise RuntimeError('The attribute \'{0}\' is locked or connected and cannot be modified.'.format(scene.plugName((node, attr))))
+            previous[:] = [scene.getValue(node, attr)]
+            scene.setValue(node, attr, [value])
+        self.edits.append((setValue, lambda: scene.setValue(node, attr, previous)))
+
+    def newPlugValueString(self, plug, value):
+        self.newPlugValue(plug, value)
+
+    def newPlugValueInt(self, plug, value):
+        self.newPlugValue(plug, value)
+
+    def newPlugValueBool(self, plug, value):
+        self.newPlugValue(plug, value)
+
+    def newPlugValueDouble(self, plug, value):
+        self.newPlugValue(plug, math.degrees(value) if scene.attributeType(plug.node_, plug.attr) == 'doubleAngle' else value)
+
+    def newPlugValueMAngle(self, plug, angle):
+        self.newPlugValue(plug, angle.asDegrees())
+
+    def newPlugValueMDistance(self, plug, distance):
+        self.newPlugValue(plug, distance.asCentimeters())
+
+
+class MDagModifier(MDGModifier):
+
+    def createNode(self, nodeType, parent=None):
+        return MDGModifier.createNode(self, nodeType, None if parent is None or parent.isNull() else parent)
+
+
+class MArgList(list):
+    pass
+
+
+class MPxCommand():
+
+    def isUndoable(self):
+        return False
+
+
+# Plug-in commands become commands on the fake maya.cmds, see FakeCommands.__getattr__().
+class MFnPlugin():
+
+    def __init__(self, obj, vendor='', version='', apiVersion='Any'):
+        self.obj = obj
+
+    def registerCommand(self, name, creator, syntaxCreator=None):
+        if name in scene.pluginCommands:
+            raise RuntimeError('A command named {0} is already registered'.format(name))
+        scene.pluginCommands[name] = creator
+
+    def deregisterCommand(self, name):
+        del scene.pluginCommands[name]
+
+
+# The node added/removed callbacks, which are what the build profiler counts new nodes with and what the node handle
+# cache drops deleted nodes with.
+class MDGMessage():
+    nextId = 0
+
+    @classmethod
+    def addNodeAddedCallback(cls, function, nodeType='dependNode', clientData=None):
+        cls.nextId += 1
+        scene.nodeAddedCallbacks[cls.nextId] = lambda node: function(MObject(node), clientData)
+        return cls.nextId
+
+    @classmethod
+    def addNodeRemovedCallback(cls, function, nodeType='dependNode', clientData=None):
+        cls.nextId += 1
+        scene.nodeRemovedCallbacks[cls.nextId] = lambda node: function(MObject(node), clientData)
+        return cls.nextId
+
+
+# Every node's name, what the node handle cache drops renamed nodes with, and one node's attrs being set.
+class MNodeMessage():
+    kConnectionMade = 0x01
+    kConnectionBroken = 0x02
+    kAttributeEval = 0x04
+    kAttributeSet = 0x08
+
+    @staticmethod
+    def addNameChangedCallback(node, function, clientData=None):
+        MDGMessage.nextId += 1
+        scene.nameChangedCallbacks[MDGMessage.nextId] = lambda changed, previous: function(MObject(changed), previous, clientData)
+        return MDGMessage.nextId
+
+    @staticmethod
+    def addAttributeChangedCallback(node, function, clientData=None):
+        MDGMessage.nextId += 1
+        scene.attributeChangedCallbacks.setdefault(node.node, {})[MDGMessage.nextId] = lambda changed, attr: function(
+            MNodeMessage.kAttributeSet, MPlug(changed, attr), MPlug(), clientData)
+        return MDGMessage.nextId
+
+
+class MEventMessage():
+
+    @staticmethod
+    def addEventCallback(eventName, function, clientData=None):
+        MDGMessage.nextId += 1
+        scene.eventCallbacks[MDGMessage.nextId] = (eventName, lambda: function(clientData))
+        return MDGMessage.nextId
+
+
+class MMessage():
+
+    @staticmethod
+    def removeCallback(callbackId):
+        for callbacks in [scene.nodeAddedCallbacks, scene.nodeRemovedCallbacks, scene.nameChangedCallbacks, scene.eventCallbacks]:
+            callbacks.pop(callbackId, None)
+        for node, callbacks in list(scene.attributeChangedCallbacks.items()):
+            if callbacks.pop(callbackId, None) is not None and not callbacks:
+                del scene.attributeChangedCallbacks[node]
+
+
+class FunctionSet():
+
+    def __init__(self, obj=None):
+        count(type(self).__name__)
+        self.node = None
+        if obj is not None:
+            self.setObject(obj)
+
+    def setObject(self, obj):
+        if isinstance(obj, MDagPath):
+            self.node = obj.nodes[-1]
+        else:
+            self.node = obj.node
+
+
+class MFnDependencyNode(FunctionSet):
+
+    def name(self):
+        return self.node.name
+
+    def typeName(self):
+        return self.node.type
+
+    def attribute(self, name):
+        name = scene.longAttrName(self.node, name)
+        if not scene.attributeExists(self.node, name):
+            raise RuntimeError('{0} has no attribute {1}'.format(self.node.name, name))
+        return MObject(self.node, name)
+
+    def hasAttribute(self, name):
+        return scene.attributeExists(self.node, name)
+
+    def findPlug(self, name, wantNetworkedPlug):
+        if not scene.attributeExists(self.node, name):
+            raise RuntimeError('{0} has no attribute {1}'.format(self.node.name, name))
+        return MPlug(self.node, scene.longAttrName(self.node, name))
+
+    # Every plug on the node that has a connection, either way.
+    def getConnections(self):
+        attrs = list(self.node.inputs) + [x for x, outputs in self.node.outputs.items() if outputs and x not in self.node.inputs]
+        return [MPlug(self.node, x) for x in attrs]
+
+
+class MFnDagNode(MFnDependencyNode):
+
+    def fullPathName(self):
+        return self.node.fullPath()
+
+    def partialPathName(self):
+        return scene.shortestName(self.node)
+
+
+class AttributeFunctionSet():
+
+    def __init__(self, obj):
+        count(type(self).__name__)
+        self.node = obj.node
+        self.attr = obj.attr
+
+    @property
+    def attribute(self):
+        return self.node.dynamic.get(self.attr)
+
+
+class MFnAttribute(AttributeFunctionSet):
+
+    @property
+    def isProxyAttribute(self):
+        return self.attribute is not None and self.attribute.proxy is not None
+
+    @isProxyAttribute.setter
+    def isProxyAttribute(self, value):
+        if self.attribute is not None:
+            self.attribute.proxy = self.attribute.proxy or '' if value else None
+
+
+class MFnEnumAttribute(AttributeFunctionSet):
+
+    def getMin(self):
+        return min(self.attribute.enumFields.values()) if self.attribute.enumFields else 0
+
+    # No fields at all reads back as -1.
+    def getMax(self):
+        return max(self.attribute.enumFields.values()) if self.attribute.enumFields else -1
+
+    def addField(self, name, value):
+        if name in self.attribute.enumFields:
+            raise RuntimeError('{0} already has an enum field named {1}'.format(self.attr, name))
+        self.attribute.enumFields[name] = value
+
+    def fieldName(self, value):
+        for name, field_value in self.attribute.enumFields.items():
+            if field_value == value:
+                return name
+        raise RuntimeError('No enum field with the value {0}'.format(value))
+
+
+class MFnNumericAttribute(AttributeFunctionSet):
+
+    def numericType(self):
+        return NUMERIC_TYPES.get(scene.attributeType(self.node, self.attr), MFnNumericData.kDouble)
+
+
+class MFnTransform(FunctionSet):
+
+    def translation(self, space):
+        if space == MSpace.kWorld:
+            return scene.worldTranslation(self.node)
+        return MVector(scene.getVector(self.node, 'translate'))
+
+    def setTranslation(self, vector, space):
+        count('MFnTransform.set')
+        if space == MSpace.kWorld:
+            scene.setWorldTranslation(self.node, vector)
+        else:
+            scene.setValue(self.node, 'translate', [vector.x, vector.y, vector.z])
+
+    # Like maya this leaves out a joint's joint orient in transform space.
+    def rotation(self, space=MSpace.kTransform, asQuaternion=False):
+        if space == MSpace.kWorld:
+            quaternion = scene.worldRotation(self.node)
+            return quaternion if asQuaternion else quaternion.asEulerRotation()
+        euler = MEulerRotation([math.radians(x) for x in scene.getVector(self.node, 'rotate')], scene.rotationOrder(self.node))
+        return euler.asQuaternion() if asQuaternion else euler
+
+    def setRotation(self, rotation, space=MSpace.kTransform):
+        # An euler in the node's own rotate order goes on as it is, like maya, anything else gets converted.
+        if space != MSpace.kWorld and isinstance(rotation, MEulerRotation) and rotation.order == scene.rotationOrder(self.node):
+            count('MFnTransform.set')
+            scene.setValue(self.node, 'rotate', [math.degrees(rotation.x), math.degrees(rotation.y), math.degrees(rotation.z)])
+            return
+        quaternion = rotation if isinstance(rotation, MQuaternion) else rotation.asQuaternion()
+        if space == MSpace.kWorld:
+            scene.setWorldRotation(self.node, quaternion)
+        else:
+            euler = matrixToEuler(quaternion.asMatrix(), scene.rotationOrder(self.node))
+            scene.setValue(self.node, 'rotate', [math.degrees(x) for x in euler])
+
+    def scale(self):
+        return list(scene.getVector(self.node, 'scale'))
+
+    def setScale(self, scale):
+        count('MFnTransform.set')
+        scene.setValue(self.node, 'scale', [float(x) for x in scale])
+
+    def rotatePivot(self, space):
+        pivot = MPoint(scene.getVector(self.node, 'rotatePivot'))
+        if space == MSpace.kWorld:
+            return pivot * scene.worldMatrix(self.node)
+        return pivot
+
+    def transformation(self):
+        return MTransformationMatrix(scene.localMatrix(self.node))
+
+
+class GeometryFunctionSet(FunctionSet):
+
+    def setObject(self, obj):
+        FunctionSet.setObject(self, obj)
+        self.node = scene.geometryNode(self.node)
+
+    @property
+    def data(self):
+        return self.node.data
+
+    def toSpace(self, point, space):
+        if space == MSpace.kWorld:
+            return MPoint(point) * scene.worldMatrix(self.node)
+        return MPoint(point)
+
+    def fromSpace(self, point, space):
+        if space == MSpace.kWorld:
+            return MPoint(point) * scene.worldMatrix(self.node).inverse()
+        return MPoint(point)
+
+
+class MFnNurbsCurve(GeometryFunctionSet):
+
+    @property
+    def numCVs(self):
+        return len(self.data['cvs'])
+
+    @property
+    def degree(self):
+        return self.data['degree']
+
+    @property
+    def knotDomain(self):
+        return scene_module.knotDomain(self.data)
+
+    # The length samples only get worked out again when the curve's been changed.
+    def samples(self):
+        cached = self.data.get('samples')
+        if cached is None or cached[0] is not self.data['cvs'] or cached[1] is not self.data['knots']:
+            cached = (self.data['cvs'], self.data['knots'], scene_module.curveSamples(self.data))
+            self.data['samples'] = cached
+        return cached[2]
+
+    def length(self, tolerance=0.001):
+        return self.samples()[-1][1]
+
+    def findParamFromLength(self, length):
+        samples = self.samples()
+        if length <= 0.0:
+            return samples[0][0]
+        for (param_a, length_a), (param_b, length_b) in zip(samples, samples[1:]):
+            if length_b >= length:
+                fraction = (length - length_a) / (length_b - length_a) if length_b > length_a else 0.0
+                return param_a + (param_b - param_a) * fraction
+        return samples[-1][0]
+
+    def findLengthFromParam(self, param):
+        samples = self.samples()
+        for (param_a, length_a), (param_b, length_b) in zip(samples, samples[1:]):
+            if param_b >= param:
+                fraction = (param - param_a) / (param_b - param_a) if param_b > param_a else 0.0
+                return length_a + (length_b - length_a) * fraction
+        return samples[-1][1]
+
+    def getPointAtParam(self, param, space=MSpace.kObject):
+        return self.toSpace(scene_module.curvePoint(self.data, param), space)
+
+    def getDerivativesAtParam(self, param, space=MSpace.kObject):
+        point = self.getPointAtParam(param, space)
+        tangent = scene_module.curveTangent(self.data, param)
+        if space == MSpace.kWorld:
+            tangent = tangent * scene.worldMatrix(self.node)
+        return point, tangent
+
+    def closestPoint(self, point, space=MSpace.kObject, **kwargs):
+        local = self.fromSpace(point, space)
+        samples = self.samples()
+        best = min((local.distanceTo(scene_module.curvePoint(self.data, x[0])), x[0]) for x in samples)[1]
+        # Narrow it down around the closest sample.
+        step = (samples[1][0] - samples[0][0]) if len(samples) > 1 else 0.0
+        for i in range(16):
+            step *= 0.5
+            best = min([best - step, best, best + step], key=lambda x: local.distanceTo(scene_module.curvePoint(self.data, x)))
+        start, end = self.knotDomain
+        best = max(start, min(end, best))
+        return self.getPointAtParam(best, space), best
+
+    def cvPositions(self, space=MSpace.kObject):
+        return MPointArray(self.toSpace(x, space) for x in self.data['cvs'])
+
+    def setCVPositions(self, points, space=MSpace.kObject):
+        self.data['cvs'] = [tuple(self.fromSpace(x, space))[:3] for x in points]
+
+    def knots(self):
+        return MDoubleArray(self.data['knots'])
+
+    def setKnots(self, knots, startIndex, endIndex):
+        self.data['knots'] = [float(x) for x in knots[startIndex:endIndex + 1]]
+
+    def updateCurve(self):
+        self.data.pop('samples', None)
+
+
+class MFnNurbsSurface(GeometryFunctionSet):
+
+    @property
+    def numCVsInU(self):
+        return len(self.data['cvs'])
+
+    @property
+    def numCVsInV(self):
+        return len(self.data['cvs'][0])
+
+    @property
+    def knotDomainInU(self):
+        return scene_module.knotDomain(self.data, 'knotsU', self.data['degreeU'])
+
+    @property
+    def knotDomainInV(self):
+        return scene_module.knotDomain(self.data, 'knotsV', self.data['degreeV'])
+
+    def getPointAtParam(self, u, v, space=MSpace.kObject):
+        return self.toSpace(scene_module.surfacePoint(self.data, u, v), space)
+
+    def closestPoint(self, point, space=MSpace.kObject, **kwargs):
+        local = self.fromSpace(point, space)
+        u_start, u_end = self.knotDomainInU
+        v_start, v_end = self.knotDomainInV
+        steps = 16
+        best = min(((u_start + (u_end - u_start) * i / steps, v_start + (v_end - v_start) * j / steps)
+            for i in range(steps + 1) for j in range(steps + 1)),
+            key=lambda x: local.distanceTo(scene_module.surfacePoint(self.data, x[0], x[1])))
+        u_step = (u_end - u_start) / steps
+        v_step = (v_end - v_start) / steps
+        for i in range(12):
+            u_step *= 0.5
+            v_step *= 0.5
+            candidates = [(min(u_end, max(u_start, best[0] + a * u_step)), min(v_end, max(v_start, best[1] + b * v_step)))
+                for a in (-1, 0, 1) for b in (-1, 0, 1)]
+            best = min(candidates, key=lambda x: local.distanceTo(scene_module.surfacePoint(self.data, x[0], x[1])))
+        return self.getPointAtParam(best[0], best[1], space), best[0], best[1]
+
+
+class MFnMesh(GeometryFunctionSet):
+
+    @property
+    def numVertices(self):
+        return len(self.data.get('points', []))
+
+    def getPoints(self, space=MSpace.kObject):
+        return MPointArray(self.toSpace(x, space) for x in self.data.get('points', []))
+
+    def getVertices(self):
+        faces = self.data.get('faces', [])
+        return MIntArray(len(x) for x in faces), MIntArray(x for face in faces for x in face)
+
+    def getPoint(self, vertex, space=MSpace.kObject):
+        return self.toSpace(self.data['points'][vertex], space)
+
+    def getPolygonVertices(self, face):
+        return MIntArray(self.data['faces'][face])
+
+    # Snaps to the nearest vertex rather than a point on a face, which is all the rigger wants it for.
+    def getClosestPoint(self, point, space=MSpace.kObject):
+        local = self.fromSpace(point, space)
+        vertex, distance = self.data['lookup'].nearest((local.x, local.y, local.z))
+        if vertex < 0:
+            raise RuntimeError('{0} has no faces'.format(self.node.name))
+        return self.getPoint(vertex, space), self.data['lookup'].vertexFaces[vertex]
+
+
+class MItMeshVertex():
+
+    def __init__(self, obj):
+        count('MItMeshVertex')
+        node = obj.nodes[-1] if isinstance(obj, MDagPath) else obj.node
+        self.data = scene.geometryNode(node).data
+        self.current = 0
+
+    def setIndex(self, index):
+        self.current = index
+        return self.current
+
+    def index(self):
+        return self.current
+
+    def getConnectedVertices(self):
+        return MIntArray(self.data['lookup'].neighbours[self.current])
+
+
+class MFnSingleIndexedComponent():
+
+    def __init__(self, obj=None):
+        count('MFnSingleIndexedComponent')
+        self.elements = []
+        self.complete = None
+
+    def create(self, componentType):
+        return self
+
+    def setCompleteData(self, numElements):
+        self.complete = numElements
+
+    def addElements(self, elements):
+        self.elements.extend(elements)
+
+    def getElements(self):
+        if self.complete is not None:
+            return MIntArray(range(self.complete))
+        return MIntArray(self.elements)
+
+
+class MFnSkinCluster(FunctionSet):
+
+    def influenceObjects(self):
+        return [dagPathTo(x) for x in self.node.data.get('influences', [])]
+
+    def getWeights(self, shapePath, components):
+        num_influences = len(self.node.data.get('influences', []))
+        weights = self.node.data.setdefault('weights', {})
+        result = MDoubleArray()
+        for vertex in components.getElements():
+            result.extend(weights.get(vertex, [0.0] * num_influences))
+        return result, num_influences
+
+    def setWeights(self, shapePath, components, influenceIndices, values, normalize=True, returnOldWeights=False):
+        weights = self.node.data.setdefault('weights', {})
+        num_influences = len(influenceIndices)
+        for i, vertex in enumerate(components.getElements()):
+            weights[vertex] = list(values[i * num_influences:(i + 1) * num_influences])
+
+
+# Keys are kept the way the fake cmds keep them, [input, value, in angle, out angle, in type, out type] with the
+# value and angles in UI units.
+class MFnAnimCurve(FunctionSet):
+    kTangentGlobal = 0
+    kTangentFixed = 1
+    kTangentLinear = 2
+    kTangentFlat = 3
+    kTangentSmooth = 4
+    kTangentStep = 5
+    kTangentSlow = 6
+    kTangentFast = 7
+    kTangentClamped = 8
+    kTangentPlateau = 9
+    kTangentStepNext = 10
+    kTangentAuto = 11
+
+    TANGENT_NAMES = {kTangentGlobal: 'auto', kTangentFixed: 'fixed', kTangentLinear: 'linear', kTangentFlat: 'flat',
+        kTangentSmooth: 'spline', kTangentStep: 'step', kTangentSlow: 'slow', kTangentFast: 'fast',
+        kTangentClamped: 'clamped', kTangentPlateau: 'plateau', kTangentStepNext: 'stepnext', kTangentAuto: 'auto'}
+
+    def addKey(self, time, value, tangentInType=kTangentGlobal, tangentOutType=kTangentGlobal, change=None):
+        if self.node.type == 'animCurveUA':
+            value = math.degrees(value)
+        keys = self.node.data.setdefault('keys', [])
+        keys[:] = [x for x in keys if x[0] != time]
+        keys.append([float(time), float(value), 0.0, 0.0, self.TANGENT_NAMES[tangentInType], self.TANGENT_NAMES[tangentOutType]])
+        keys.sort(key=lambda x: x[0])
+        return [x[0] for x in keys].index(time)
+
+    def setAngle(self, index, angle, isInTangent, change=None):
+        key = self.node.data['keys'][index]
+        key[2 if isInTangent else 3] = angle.asDegrees()
+        key[4 if isInTangent else 5] = 'fixed'
@@ -0,0 +1,1223 @@
+# Stand-ins for the maya.cmds commands the rigger calls.  They're written against what the rigger needs from each
+# command, so flags it never passes are mostly ignored rather than supported.
+import fnmatch
+import importlib.util
+import math
+import os
+
+from . import api, scene as scene_module
+from .math_types import MMatrix, MVector, MPoint, MEulerRotation, MTransformationMatrix
+
+# command -> {short flag: long flag}
+FLAG_ALIASES = {
+    'createNode': {'n': 'name', 'p': 'parent', 'ss': 'skipSelect'},
+    'shadingNode': {'n': 'name', 'au': 'asUtility'},
+    'group': {'n': 'name', 'p': 'parent', 'em': 'empty', 'w': 'world'},
+    'parent': {'w': 'world', 'r': 'relative', 's': 'shape'},
+    'spaceLocator': {'n': 'name', 'p': 'position'},
+    'joint': {'n': 'name', 'p': 'position', 'o': 'orientation', 'rad': 'radius', 'r': 'relative', 'sc': 'scaleCompensate',
+        'e': 'edit', 'q': 'query', 'oj': 'orientJoint', 'sao': 'secondaryAxisOrient', 'zso': 'zeroScaleOrient', 'ch': 'children'},
+    'curve': {'n': 'name', 'd': 'degree', 'p': 'point', 'k': 'knot', 'per': 'periodic'},
+    'duplicate': {'n': 'name', 'po': 'parentOnly', 'rr': 'returnRootsOnly'},
+    'ls': {'sl': 'selection', 'fl': 'flatten', 'tr': 'transforms', 'typ': 'type', 'l': 'long', 's': 'shapes'},
+    'select': {'cl': 'clear', 'add': 'add', 'r': 'replace', 'd': 'deselect'},
+    'getAttr': {'typ': 'type', 'asString': 'asString', 'l': 'lock'},
+    'setAttr': {'typ': 'type', 'l': 'lock', 'k': 'keyable', 'cb': 'channelBox'},
+    'addAttr': {'ln': 'longName', 'sn': 'shortName', 'at': 'attributeType', 'dt': 'dataType', 'k': 'keyable',
+        'dv': 'defaultValue', 'min': 'minValue', 'max': 'maxValue', 'p': 'parent', 'pxy': 'proxy', 'uap': 'usedAsProxy',
+        'en': 'enumName', 'nc': 'numberOfChildren', 'e': 'edit', 'h': 'hidden', 'm': 'multi', 'q': 'query'},
+    'attributeQuery': {'n': 'node', 'ex': 'exists', 'mxe': 'maxExists', 'mne': 'minExists', 'max': 'maximum',
+        'min': 'minimum', 'le': 'listEnum', 'at': 'attributeType', 'lc': 'listChildren'},
+    'listAttr': {'ud': 'userDefined', 'k': 'keyable'},
+    'connectAttr': {'f': 'force', 'na': 'nextAvailable'},
+    'listConnections': {'s': 'source', 'd': 'destination', 'p': 'plugs', 'c': 'connections', 't': 'type', 'scn': 'skipConversionNodes'},
+    'connectionInfo': {'sfd': 'sourceFromDestination', 'dfs': 'destinationFromSource', 'il': 'isLocked', 'id': 'isDestination', 'is': 'isSource'},
+    'listRelatives': {'p': 'parent', 'c': 'children', 's': 'shapes', 'ad': 'allDescendents', 'f': 'fullPath', 'typ': 'type', 'ap': 'allParents'},
+    'listHistory': {'f': 'future', 'lf': 'leaf', 'pdo': 'pruneDagObjects'},
+    'nodeType': {'itn': 'isTypeName', 'i': 'inherited'},
+    'objectType': {'isa': 'isAType', 'i': 'isType'},
+    'xform': {'q': 'query', 't': 'translation', 'ro': 'rotation', 's': 'scale', 'ws': 'worldSpace', 'os': 'objectSpace',
+        'r': 'relative', 'cp': 'centerPivots', 'm': 'matrix', 'rp': 'rotatePivot', 'piv': 'pivots', 'a': 'absolute'},
+    'matchTransform': {'position': 'pos', 'rotation': 'rot', 'scale': 'scl', 'pivots': 'piv'},
+    'makeIdentity': {'a': 'apply', 't': 'translate', 'r': 'rotate', 's': 'scale', 'jo': 'jointOrient', 'n': 'normal'},
+    'ikHandle': {'n': 'name', 'sj': 'startJoint', 'ee': 'endEffector', 'sol': 'solver', 'c': 'curve', 'ccv': 'createCurve',
+        'pcv': 'parentCurve', 'scv': 'simplifyCurve', 'ns': 'numSpans', 'roc': 'rootOnCurve'},
+    'cluster': {'n': 'name', 'rel': 'relative', 'wn': 'weightedNode'},
+    'softMod': {'n': 'name', 'wn': 'weightedNode'},
+    'wire': {'n': 'name', 'w': 'wire'},
+    'blendShape': {'n': 'name', 'w': 'weight', 'e': 'edit', 'ib': 'inBetween', 't': 'target', 'o': 'origin'},
+    'skinCluster': {'n': 'name', 'tsb': 'toSelectedBones', 'mi': 'maximumInfluences', 'dr': 'dropoffRate', 'bm': 'bindMethod'},
+    'loft': {'ch': 'constructionHistory', 'd': 'degree', 'n': 'name'},
+    'rebuildCurve': {'ch': 'constructionHistory', 'd': 'degree', 's': 'spans', 'kt': 'keepTangents', 'rpo': 'replaceOriginal'},
+    'rebuildSurface': {'ch': 'constructionHistory', 'rt': 'rebuildType', 'su': 'spansU', 'sv': 'spansV', 'du': 'degreeU', 'dv': 'degreeV'},
+    'setDrivenKeyframe': {'cd': 'currentDriver', 'dv': 'driverValue', 'v': 'value', 'q': 'query', 'dn': 'driven', 'dr': 'driver',
+        'itt': 'inTangentType', 'ott': 'outTangentType'},
+    'keyframe': {'q': 'query', 'fc': 'floatChange', 'vc': 'valueChange', 'a': 'absolute', 'in': 'index', 'tc': 'timeChange'},
+    'keyTangent': {'q': 'query', 'e': 'edit', 'ia': 'inAngle', 'oa': 'outAngle', 'itt': 'inTangentType', 'ott': 'outTangentType',
+        'a': 'absolute', 'in': 'index'},
+    'setInfinity': {'pri': 'preInfinite', 'poi': 'postInfinite'},
+    'closeCurve': {'ch': 'constructionHistory', 'ps': 'preserveShape', 'rpo': 'replaceOriginal'},
+    'inheritTransform': {'p': 'preserve'},
+    'skinPercent': {'q': 'query', 't': 'transform', 'v': 'value', 'ib': 'ignoreBelow', 'tv': 'transformValue', 'nrm': 'normalize'},
+    'delete': {},
+}
+CONSTRAINT_TYPES = ['parentConstraint', 'pointConstraint', 'orientConstraint', 'aimConstraint', 'poleVectorConstraint', 'scaleConstraint']
+
+
+def flags(command, kwargs):
+    aliases = FLAG_ALIASES.get(command, {})
+    return {aliases.get(k, k): v for k, v in kwargs.items()}
+
+
+def flatten(args):
+    flat = []
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            flat.extend(flatten(arg))
+        elif arg is not None:
+            flat.append(arg)
+    return flat
+
+
+def degrees(rotation):
+    return [math.degrees(x) for x in rotation]
+
+
+def eulerFromDegrees(values, order=0):
+    return MEulerRotation([math.radians(float(x)) for x in values], order)
+
+
+class FakeCommands():
+
+    def __init__(self, scene):
+        self.scene = scene
+
+    # The commands loaded plug-ins registered.
+    def __getattr__(self, name):
+        if name == 'scene' or name not in self.scene.pluginCommands:
+            raise AttributeError('The fake maya has no command {0}'.format(name))
+        creator = self.scene.pluginCommands[name]
+
+        def command(*args):
+            instance = creator()
+            instance.doIt(api.MArgList(args))
+            if instance.isUndoable():
+                self.scene.undoQueue.append(instance)
+        return command
+
+    # ---- helpers -----------------------------------------------------------------------------------------------------
+
+    def node(self, name):
+        return self.scene.findNode(name)
+
+    def name(self, node):
+        return self.scene.shortestName(node)
+
+    def nodes(self, args, default_selection=True):
+        names = flatten(args)
+        if not names and default_selection:
+            return [x for x in self.scene.selection if isinstance(x, scene_module.Node)]
+        return [self.node(x) for x in names]
+
+    def plug(self, plug):
+        return self.scene.resolvePlug(plug)
+
+    def isAType(self, node, typeName):
+        return typeName == node.type or typeName in scene_module.TYPE_INHERITANCE.get(node.type, [])
+
+    def expandComponents(self, name):
+        match = scene_module.COMPONENT.match(name)
+        node = self.node(match.group(1))
+        shape = self.scene.geometryNode(node)
+        count = self.scene.componentCount(shape, match.group(2))
+        start, end = match.group(3), match.group(4)
+        if start == '' or name.endswith('[*]'):
+            indices = range(count)
+        elif end is None and ':' not in name[name.rfind('['):]:
+            indices = [int(start)]
+        else:
+            indices = range(int(start or 0), (int(end) + 1) if end else count)
+        prefix = '{0}.{1}'.format(self.name(node), match.group(2))
+        return shape, ['{0}[{1}]'.format(prefix, i) for i in indices]
+
+    def componentIndex(self, name):
+        return int(name[name.rfind('[') + 1:-1])
+
+    def componentPosition(self, name):
+        match = scene_module.COMPONENT.match(name)
+        shape = self.scene.geometryNode(self.node(match.group(1)))
+        return self.scene.componentPosition(shape, self.componentIndex(name))
+
+    def select(self, *args, **kwargs):
+        kwargs = flags('select', kwargs)
+        items = []
+        for name in flatten(args):
+            if scene_module.COMPONENT.match(name):
+                items.extend(self.expandComponents(name)[1])
+            else:
+                items.append(self.node(name))
+        if kwargs.get('clear'):
+            self.scene.selection = []
+        elif kwargs.get('add'):
+            self.scene.selection.extend(x for x in items if x not in self.scene.selection)
+        elif kwargs.get('deselect'):
+            self.scene.selection = [x for x in self.scene.selection if x not in items]
+        else:
+            self.scene.selection = items
+
+    def selectNew(self, node):
+        self.scene.selection = [node]
+
+    # ---- queries -----------------------------------------------------------------------------------------------------
+
+    def objExists(self, name):
+        if '.' in name:
+            try:
+                node, attr = self.plug(name)
+                return self.scene.attributeExists(node, attr.split('.')[0])
+            except ValueError:
+                return False
+        return self.scene.exists(name)
+
+    def ls(self, *args, **kwargs):
+        kwargs = flags('ls', kwargs)
+        if kwargs.get('selection'):
+            items = list(self.scene.selection)
+        elif args:
+            items = []
+            for pattern in flatten(args):
+                items.extend(self.lsPattern(pattern, kwargs.get('flatten')))
+        else:
+            items = list(self.scene.nodes)
+        result = []
+        for item in items:
+            if isinstance(item, str):
+                result.append(item)
+                continue
+            if kwargs.get('transforms') and not item.isTransform:
+                continue
+            if kwargs.get('shapes') and item.type not in scene_module.SHAPE_TYPES:
+                continue
+            if kwargs.get('type') and not any(self.isAType(item, x) for x in flatten([kwargs['type']])):
+                continue
+            result.append(item.fullPath() if kwargs.get('long') else self.name(item))
+        return result
+
+    def lsPattern(self, pattern, flat):
+        if scene_module.COMPONENT.match(pattern):
+            try:
+                return self.expandComponents(pattern)[1] if flat else [pattern]
+            except ValueError:
+                return []
+        if '.' in pattern:
+            return [pattern] if self.objExists(pattern) else []
+        if not any(x in pattern for x in '*?['):
+            return self.scene.findNodes(pattern)
+        if '|' in pattern:
+            return [x for x in self.scene.nodes if fnmatch.fnmatchcase(x.fullPath(), '|' + pattern.lstrip('|'))
+                or fnmatch.fnmatchcase(self.name(x), pattern)]
+        return [x for x in self.scene.nodes if fnmatch.fnmatchcase(x.name, pattern)]
+
+    def nodeType(self, name, **kwargs):
+        kwargs = flags('nodeType', kwargs)
+        if kwargs.get('isTypeName'):
+            inherited = scene_module.TYPE_INHERITANCE.get(name, ['dagNode', name] if name in scene_module.DAG_TYPES else [name])
+            return list(inherited) if kwargs.get('inherited') else name
+        if '.' in name:
+            name = name.split('.')[0]
+        node = self.node(name)
+        if kwargs.get('inherited'):
+            return list(scene_module.TYPE_INHERITANCE.get(node.type, [node.type]))
+        return node.type
+
+    def objectType(self, name, **kwargs):
+        kwargs = flags('objectType', kwargs)
+        node = self.node(name)
+        if kwargs.get('isAType'):
+            return self.isAType(node, kwargs['isAType'])
+        if kwargs.get('isType'):
+            return node.type == kwargs['isType']
+        return node.type
+
+    def listRelatives(self, *args, **kwargs):
+        kwargs = flags('listRelatives', kwargs)
+        result = []
+        for node in self.nodes(args):
+            if kwargs.get('parent') or kwargs.get('allParents'):
+                relatives = [node.parent] if node.parent else []
+            elif kwargs.get('allDescendents'):
+                relatives = list(reversed(list(node.descendants())))
+            elif kwargs.get('shapes'):
+                relatives = node.shapes()
+            else:
+                relatives = list(node.children)
+            if kwargs.get('shapes') and not kwargs.get('parent'):
+                relatives = [x for x in relatives if x.type in scene_module.SHAPE_TYPES]
+            if kwargs.get('type'):
+                relatives = [x for x in relatives if any(self.isAType(x, t) for t in flatten([kwargs['type']]))]
+            result.extend(relatives)
+        if not result:
+            return None
+        return [x.fullPath() if kwargs.get('fullPath') else self.name(x) for x in result]
+
+    def listAttr(self, *args, **kwargs):
+        kwargs = flags('listAttr', kwargs)
+        names = flatten(args)
+        result = []
+        for name in names:
+            node = self.node(name.split('.')[0])
+            if kwargs.get('userDefined'):
+                result.extend(node.dynamic.keys())
+            else:
+                attrs = set(x.split('.')[0].split('[')[0] for x in node.values)
+                attrs.update(node.dynamic.keys())
+                if node.isTransform:
+                    attrs.update(['translate', 'rotate', 'scale', 'visibility', 'translateX', 'translateY', 'translateZ',
+                        'rotateX', 'rotateY', 'rotateZ', 'scaleX', 'scaleY', 'scaleZ', 'offsetParentMatrix', 'worldMatrix'])
+                result.extend(sorted(attrs))
+        return result or None
+
+    def attributeQuery(self, attr, **kwargs):
+        kwargs = flags('attributeQuery', kwargs)
+        node = self.node(kwargs['node'])
+        name = self.scene.longAttrName(node, attr)
+        attribute = node.dynamic.get(name)
+        if kwargs.get('exists'):
+            return self.scene.attributeExists(node, attr)
+        if not self.scene.attributeExists(node, attr):
+            raise RuntimeError('No attribute named {0} on {1}'.format(attr, node.name))
+        if kwargs.get('maxExists'):
+            return attribute is not None and attribute.max is not None
+        if kwargs.get('minExists'):
+            return attribute is not None and attribute.min is not None
+        if kwargs.get('maximum'):
+            return [attribute.max if attribute is not None and attribute.max is not None else 0.0]
+        if kwargs.get('minimum'):
+            return [attribute.min if attribute is not None and attribute.min is not None else 0.0]
+        if kwargs.get('listEnum'):
+            fields = sorted(attribute.enumFields.items(), key=lambda x: x[1]) if attribute else []
+            return [':'.join('{0}={1}'.format(k, v) for k, v in fields)]
+        if kwargs.get('attributeType'):
+            return self.scene.attributeType(node, name)
+        if kwargs.get('listChildren'):
+            return list(attribute.children if attribute else scene_module.COMPOUND_CHILDREN.get(name, [])) or None
+        return True
+
+    # ---- nodes -------------------------------------------------------------------------------------------------------
+
+    def createNode(self, nodeType, **kwargs):
+        kwargs = flags('createNode', kwargs)
+        parent = self.node(kwargs['parent']) if kwargs.get('parent') else None
+        if nodeType in scene_module.SHAPE_TYPES and (parent is None or not parent.isTransform):
+            # Shapes get a transform made for them.
+            parent = self.scene.createNode('transform', '{0}1'.format(nodeType), parent)
+        node = self.scene.createNode(nodeType, kwargs.get('name'), parent)
+        if not kwargs.get('skipSelect'):
+            self.selectNew(node)
+        return self.name(node)
+
+    def shadingNode(self, nodeType, **kwargs):
+        kwargs = flags('shadingNode', kwargs)
+        return self.createNode(nodeType, name=kwargs.get('name'))
+
+    def delete(self, *args, **kwargs):
+        for node in self.nodes(args, default_selection=not args):
+            self.scene.deleteNode(node)
+
+    def rename(self, old, new=None):
+        if new is None:
+            old, new = self.scene.selection[0], old
+        # A one item list works as well as a name.
+        node = self.node(flatten([old])[0])
+        self.scene.setName(node, self.scene.uniqueName(new, ignore=node))
+        return self.name(node)
+
+    def group(self, *args, **kwargs):
+        kwargs = flags('group', kwargs)
+        objects = [] if kwargs.get('empty') else self.nodes(args)
+        parent = None
+        if kwargs.get('parent'):
+            parent = self.node(kwargs['parent'])
+        elif objects and not kwargs.get('world'):
+            parents = set(x.parent for x in objects)
+            parent = parents.pop() if len(parents) == 1 else None
+        group = self.scene.createNode('transform', kwargs.get('name') or 'group1', parent)
+        for node in objects:
+            self.scene.setParent(node, group, keepWorld=True)
+        self.selectNew(group)
+        return self.name(group)
+
+    def parent(self, *args, **kwargs):
+        kwargs = flags('parent', kwargs)
+        names = flatten(args)
+        if kwargs.get('world'):
+            children, parent = names, None
+        else:
+            children, parent = names[:-1], self.node(names[-1])
+        result = []
+        for name in children:
+            node = self.node(name)
+            if node.parent is parent:
+                result.append(self.name(node))
+                continue
+            if parent is not None and (parent is node or node in parent.ancestors()):
+                raise RuntimeError('Cannot parent {0} under one of its own descendants'.format(name))
+            self.scene.setParent(node, parent, keepWorld=not kwargs.get('relative'))
+            # Maya renames the node if the new parent already has a child with the same name, and it's good enough
+            # here to only check for clashes at the new level.
+            result.append(self.name(node))
+        return result
+
+    def inheritTransform(self, *args, **kwargs):
+        kwargs = flags('inheritTransform', kwargs)
+        for node in self.nodes(args):
+            world = self.scene.worldMatrix(node) if kwargs.get('preserve') else None
+            self.scene.setValue(node, 'inheritsTransform', [not kwargs.get('off') and kwargs.get('on', True)])
+            if world is not None:
+                self.scene.setWorldMatrix(node, world)
+
+    def spaceLocator(self, *args, **kwargs):
+        kwargs = flags('spaceLocator', kwargs)
+        transform = self.scene.createNode('transform', kwargs.get('name') or 'locator1')
+        shape = self.scene.createNode('locator', '{0}Shape'.format(transform.name), transform)
+        if kwargs.get('position'):
+            self.scene.setValue(shape, 'localPosition', list(kwargs['position']))
+        self.selectNew(transform)
+        return [self.name(transform)]
+
+    def joint(self, *args, **kwargs):
+        kwargs = flags('joint', kwargs)
+        if kwargs.get('edit'):
+            return self.editJoint(args, kwargs)
+        if kwargs.get('query'):
+            node = self.nodes(args)[0]
+            if kwargs.get('position'):
+                return list(self.scene.worldTranslation(node))
+            if kwargs.get('orientation'):
+                return self.scene.getVector(node, 'jointOrient')
+            return None
+        if args:
+            parent = self.node(flatten(args)[0])
+        else:
+            selected = [x for x in self.scene.selection if isinstance(x, scene_module.Node) and x.isTransform]
+            parent = selected[0] if selected else None
+        joint = self.scene.createNode('joint', kwargs.get('name') or 'joint1', parent)
+        if kwargs.get('orientation') is not None:
+            self.scene.setValue(joint, 'jointOrient', list(kwargs['orientation']))
+        if kwargs.get('radius') is not None:
+            self.scene.setValue(joint, 'radius', [kwargs['radius']])
+        if kwargs.get('scaleCompensate') is not None:
+            self.scene.setValue(joint, 'segmentScaleCompensate', [bool(kwargs['scaleCompensate'])])
+        position = kwargs.get('position')
+        if position is not None:
+            if kwargs.get('relative'):
+                self.scene.setValue(joint, 'translate', list(position))
+            else:
+                self.scene.setWorldTranslation(joint, position)
+        self.selectNew(joint)
+        return self.name(joint)
+
+    # Aims the joint's first orient axis at its first child joint, with the second one as close to the secondary
+    # axis as it can get.  Children stay where they are in world space.
+    def editJoint(self, args, kwargs):
+        joints = self.nodes(args)
+        orient = kwargs.get('orientJoint')
+        if orient is None:
+            if kwargs.get('position') is not None:
+                for joint in joints:
+                    self.scene.setWorldTranslation(joint, kwargs['position'])
+            return
+        for joint in joints:
+            children = [x for x in joint.children if x.type == 'joint']
+            child_worlds = [(x, self.scene.worldMatrix(x)) for x in joint.children if x.isTransform]
+            if orient == 'none' or not children:
+                rotation = MTransformationMatrix(self.scene.parentMatrix(joint)).rotation(asQuaternion=True)
+            else:
+                aim = (self.scene.worldTranslation(children[0]) - self.scene.worldTranslation(joint)).normal()
+                sao = kwargs.get('secondaryAxisOrient', 'yup')
+                up = {'x': MVector.kXaxisVector, 'y': MVector.kYaxisVector, 'z': MVector.kZaxisVector}[sao[0]]
+                if sao.endswith('down'):
+                    up = -up
+                secondary = (up - aim * (up * aim))
+                if secondary.length() < 1.0e-8:
+                    secondary = MVector.kZaxisVector if abs(aim.z) < 0.9 else MVector.kXaxisVector
+                    secondary = (secondary - aim * (secondary * aim))
+                secondary = secondary.normal()
+                first, second = orient[0], orient[1]
+                third = [x for x in 'xyz' if x not in (first, second)][0]
+                cyclic = (('xyz'.index(second) - 'xyz'.index(first)) % 3) == 1
+                rows = {first: aim, second: secondary, third: (aim ^ secondary) if cyclic else (secondary ^ aim)}
+                matrix = MMatrix([rows['x'].x, rows['x'].y, rows['x'].z, 0, rows['y'].x, rows['y'].y, rows['y'].z, 0,
+                    rows['z'].x, rows['z'].y, rows['z'].z, 0, 0, 0, 0, 1])
+                rotation = MTransformationMatrix(matrix).rotation(asQuaternion=True)
+            parent_rotation = MTransformationMatrix(self.scene.parentMatrix(joint)).rotation(asQuaternion=True)
+            local = rotation * parent_rotation.inverse()
+            self.scene.setValue(joint, 'rotate', [0.0, 0.0, 0.0])
+            self.scene.setValue(joint, 'jointOrient', degrees(local.asEulerRotation()))
+            for child, world in child_worlds:
+                self.scene.setWorldMatrix(child, world, scale=False)
+
+    def duplicate(self, *args, **kwargs):
+        kwargs = flags('duplicate', kwargs)
+        result = []
+        for node in self.nodes(args):
+            copy = self.copyNode(node, kwargs.get('name'), node.parent, not kwargs.get('parentOnly'), True)
+            result.append(self.name(copy))
+            if not kwargs.get('parentOnly') and not kwargs.get('returnRootsOnly'):
+                result.extend(self.name(x) for x in copy.descendants() if x.type not in scene_module.SHAPE_TYPES)
+        self.scene.selection = [self.node(result[0])] if result else []
+        return result
+
+    def copyNode(self, node, name, parent, children, top):
+        if top:
+            copy = self.scene.createNode(node.type, name or node.name, parent)
+        else:
+            # Maya keeps the names of everything under the duplicated node, even though it makes them clash.
+            copy = self.scene.createNode(node.type, node.name, parent, unique=False)
+        copy.values = dict(node.values)
+        copy.dynamic = dict(node.dynamic)
+        copy.data = {k: (list(v) if isinstance(v, list) else v) for k, v in node.data.items()}
+        for child in node.children:
+            if child.type in scene_module.SHAPE_TYPES:
+                shape = self.copyNode(child, None, copy, False, False)
+                self.scene.setName(shape, self.scene.uniqueName('{0}Shape'.format(copy.name)))
+            elif children:
+                self.copyNode(child, None, copy, True, False)
+        return copy
+
+    def curve(self, *args, **kwargs):
+        kwargs = flags('curve', kwargs)
+        points = kwargs.get('point') or []
+        degree = kwargs.get('degree', 3)
+        transform, shape = self.scene.createCurve(kwargs.get('name') or 'curve1', points, degree, kwargs.get('knot'),
+            periodic=kwargs.get('periodic', False))
+        self.selectNew(transform)
+        return self.name(transform)
+
+    def closeCurve(self, *args, **kwargs):
+        for node in self.nodes(args):
+            scene_module.closeCurve(self.scene.geometryNode(node).data)
+        return [self.name(x) for x in self.nodes(args)]
+
+    def rebuildCurve(self, *args, **kwargs):
+        kwargs = flags('rebuildCurve', kwargs)
+        nodes = self.nodes(args)
+        for node in nodes:
+            data = self.scene.geometryNode(node).data
+            degree = kwargs.get('degree', data['degree'])
+            spans = kwargs.get('spans') or max(1, len(data['cvs']) - data['degree'])
+            count = spans + degree
+            start, end = scene_module.knotDomain(data)
+            points = [scene_module.curvePoint(data, start + (end - start) * i / (count - 1)) for i in range(count)]
+            data.update({'cvs': [(p.x, p.y, p.z) for p in points], 'degree': degree, 'form': 'open'})
+            data['knots'] = [x * (end - start) / spans + start for x in scene_module.defaultKnots(count, degree)]
+        return [self.name(x) for x in nodes]
+
+    def loft(self, *args, **kwargs):
+        kwargs = flags('loft', kwargs)
+        curves = self.nodes(args)
+        rows = []
+        for curve in curves:
+            shape = self.scene.geometryNode(curve)
+            rows.append([tuple(self.scene.componentPosition(shape, i))[:3] for i in range(len(shape.data['cvs']))])
+        degree = kwargs.get('degree', 3)
+        transform, shape = self.scene.createSurface(kwargs.get('name') or 'loftedSurface1', rows, min(degree, len(rows) - 1),
+            self.scene.geometryNode(curves[0]).data['degree'])
+        self.selectNew(transform)
+        result = [self.name(transform)]
+        if kwargs.get('constructionHistory', True):
+            loft = self.scene.createNode('loft', 'loft1')
+            self.scene.connect((loft, 'outputSurface'), (shape, 'create'))
+            result.append(self.name(loft))
+        return result
+
+    def rebuildSurface(self, *args, **kwargs):
+        kwargs = flags('rebuildSurface', kwargs)
+        nodes = self.nodes(args)
+        for node in nodes:
+            data = self.scene.geometryNode(node).data
+            degree_v = kwargs.get('degreeV') or data['degreeV']
+            spans_v = kwargs.get('spansV') or max(1, len(data['cvs'][0]) - data['degreeV'])
+            count = spans_v + degree_v
+            start, end = scene_module.knotDomain(data, 'knotsV', data['degreeV'])
+            u_start, u_end = scene_module.knotDomain(data, 'knotsU', data['degreeU'])
+            cvs = []
+            for i in range(len(data['cvs'])):
+                u = u_start + (u_end - u_start) * i / max(1, len(data['cvs']) - 1)
+                cvs.append([tuple(scene_module.surfacePoint(data, u, start + (end - start) * j / (count - 1)))[:3] for j in range(count)])
+            data.update({'cvs': cvs, 'degreeV': degree_v, 'knotsV': scene_module.defaultKnots(count, degree_v)})
+        result = [self.name(x) for x in nodes]
+        if kwargs.get('constructionHistory', True):
+            result.append(self.name(self.scene.createNode('rebuildSurface', 'rebuildSurface1')))
+        return result
+
+    # ---- attributes --------------------------------------------------------------------------------------------------
+
+    def getAttr(self, plug, **kwargs):
+        kwargs = flags('getAttr', kwargs)
+        if scene_module.COMPONENT.match(plug):
+            return [tuple(self.componentPosition(x))[:3] for x in self.expandComponents(plug)[1]]
+        node, attr = self.plug(plug)
+        # Same as maya for an attr the node doesn't have, like the radius of something that isn't a joint.
+        if not self.scene.attributeExists(node, attr):
+            raise ValueError('No object matches name: {0}'.format(plug))
+        if kwargs.get('type'):
+            return self.scene.attributeType(node, attr)
+        if kwargs.get('lock'):
+            return attr in node.locked
+        value = self.scene.getValue(node, attr)
+        if kwargs.get('asString'):
+            if self.scene.leafName(attr) in ['preInfinity', 'postInfinity']:
+                return scene_module.INFINITY_TYPES[int(value or 0)]
+            attribute = node.dynamic.get(self.scene.leafName(attr))
+            if attribute is not None and attribute.enumFields:
+                for field, number in attribute.enumFields.items():
+                    if number == value:
+                        return field
+            return str(value)
+        return value
+
+    def setAttr(self, plug, *values, **kwargs):
+        kwargs = flags('setAttr', kwargs)
+        node, attr = self.plug(plug)
+        if 'lock' in kwargs:
+            if kwargs['lock']:
+                node.locked.add(attr)
+            else:
+                node.locked.discard(attr)
+        if not values:
+            return
+        if attr in node.locked:
+            raise RuntimeError('The attribute \'{0}\' is locked or connected and cannot be modified.'.format(plug))
+        if attr in node.inputs:
+            raise RuntimeError('The attribute \'{0}\' is locked or connected and cannot be modified.'.format(plug))
+        data_type = kwargs.get('type')
+        attribute = node.dynamic.get(self.scene.leafName(attr))
+        if data_type == 'matrix' and len(flatten(values)) != 16:
+            raise RuntimeError('Wrong number of values for a matrix')
+        if attribute is not None and attribute.type == 'string' and not isinstance(values[0], str):
+            raise RuntimeError('Wrong data type for {0}'.format(plug))
+        if attribute is not None and attribute.type == 'matrix' and data_type != 'matrix':
+            raise RuntimeError('Matrix attributes need type="matrix"')
+        self.scene.setValue(node, attr, values)
+
+    def addAttr(self, *args, **kwargs):
+        kwargs = flags('addAttr', kwargs)
+        if kwargs.get('edit') or kwargs.get('query'):
+            plugs = flatten(args)
+            if not plugs:
+                raise RuntimeError('No attribute given to edit')
+            node, attr = self.plug(plugs[0])
+            attribute = node.dynamic.get(self.scene.leafName(attr))
+            if attribute is None:
+                raise RuntimeError('{0} is not a dynamic attribute'.format(plugs[0]))
+            if kwargs.get('query'):
+                if kwargs.get('maxValue'):
+                    return attribute.max
+                if kwargs.get('minValue'):
+                    return attribute.min
+                if kwargs.get('enumName'):
+                    return ':'.join(sorted(attribute.enumFields, key=attribute.enumFields.get))
+                return None
+            if 'minValue' in kwargs:
+                attribute.min = kwargs['minValue']
+            if 'maxValue' in kwargs:
+                attribute.max = kwargs['maxValue']
+            if 'enumName' in kwargs:
+                attribute.enumFields = parseEnumNames(kwargs['enumName'])
+            if 'defaultValue' in kwargs:
+                attribute.default = kwargs['defaultValue']
+            if 'keyable' in kwargs:
+                attribute.keyable = kwargs['keyable']
+            return
+        for node in self.nodes(args):
+            self.addAttribute(node, kwargs)
+
+    def addAttribute(self, node, kwargs):
+        name = kwargs.get('longName') or kwargs.get('shortName')
+        if self.scene.attributeExists(node, name) and name in node.dynamic:
+            raise RuntimeError('Found attribute {0}.{1} already exists'.format(node.name, name))
+        proxy = kwargs.get('proxy')
+        if proxy:
+            source = self.plug(proxy)
+            attr_type = self.scene.attributeType(source[0], source[1])
+        else:
+            attr_type = kwargs.get('attributeType') or kwargs.get('dataType') or 'double'
+        attribute = scene_module.Attribute(name, attr_type, kwargs.get('parent'))
+        attribute.shortName = kwargs.get('shortName') or name
+        attribute.min = kwargs.get('minValue')
+        attribute.max = kwargs.get('maxValue')
+        attribute.default = kwargs.get('defaultValue')
+        attribute.keyable = kwargs.get('keyable', False)
+        attribute.multi = kwargs.get('multi', False)
+        if 'enumName' in kwargs:
+            attribute.enumFields = parseEnumNames(kwargs['enumName'])
+        if attr_type == 'bool' and attribute.default is not None:
+            attribute.default = bool(attribute.default)
+        node.dynamic[name] = attribute
+        if attribute.parent:
+            parent = node.dynamic.get(attribute.parent)
+            if parent is None:
+                raise RuntimeError('No compound attribute named {0}'.format(attribute.parent))
+            parent.children.append(name)
+        if proxy:
+            attribute.proxy = proxy
+            source_node, source_attr = self.plug(proxy)
+            if source_node.dynamic.get(self.scene.leafName(source_attr)) is not None:
+                attribute.enumFields = source_node.dynamic[self.scene.leafName(source_attr)].enumFields
+            self.scene.connect((source_node, source_attr), (node, name))
+
+    def deleteAttr(self, *args, **kwargs):
+        for plug in flatten(args):
+            node, attr = self.plug(plug)
+            name = self.scene.leafName(attr)
+            if name not in node.dynamic:
+                raise RuntimeError('{0} is not a dynamic attribute'.format(plug))
+            for path in [x for x in node.inputs if x.split('[')[0].split('.')[0] == name]:
+                self.scene.disconnect(node.inputs[path], (node, path))
+            for path in [x for x in node.outputs if x.split('[')[0].split('.')[0] == name]:
+                for destination in list(node.outputs[path]):
+                    self.scene.disconnect((node, path), destination)
+            for path in [x for x in node.values if x.split('[')[0].split('.')[0] == name]:
+                del node.values[path]
+            del node.dynamic[name]
+
+    # ---- connections -------------------------------------------------------------------------------------------------
+
+    def connectAttr(self, source, destination, **kwargs):
+        kwargs = flags('connectAttr', kwargs)
+        source_plug = self.plug(source)
+        destination_plug = self.plug(destination)
+        if destination_plug[1] in destination_plug[0].locked:
+            raise RuntimeError('The destination attribute \'{0}\' is locked'.format(destination))
+        self.scene.connect(source_plug, destination_plug, kwargs.get('force', False))
+
+    def disconnectAttr(self, source, destination=None, **kwargs):
+        source_plug = self.plug(source)
+        if destination is None:
+            for plug in list(source_plug[0].outputs.get(source_plug[1], [])):
+                self.scene.disconnect(source_plug, plug)
+            return
+        self.scene.disconnect(source_plug, self.plug(destination))
+
+    def connectionInfo(self, plug, **kwargs):
+        kwargs = flags('connectionInfo', kwargs)
+        node, attr = self.plug(plug)
+        if kwargs.get('sourceFromDestination'):
+            source = node.inputs.get(attr)
+            return self.scene.plugName(source) if source else ''
+        if kwargs.get('destinationFromSource'):
+            return [self.scene.plugName(x) for x in node.outputs.get(attr, [])]
+        if kwargs.get('isLocked'):
+            return attr in node.locked
+        if kwargs.get('isDestination'):
+            return attr in node.inputs
+        if kwargs.get('isSource'):
+            return attr in node.outputs
+        return False
+
+    def listConnections(self, *args, **kwargs):
+        kwargs = flags('listConnections', kwargs)
+        source = kwargs.get('source', True)
+        destination = kwargs.get('destination', True)
+        result = []
+        for name in flatten(args):
+            if '.' in name:
+                node, attr = self.plug(name)
+                pairs = []
+                if source and attr in node.inputs:
+                    pairs.append(((node, attr), node.inputs[attr]))
+                if destination:
+                    pairs.extend(((node, attr), x) for x in node.outputs.get(attr, []))
+            else:
+                node = self.node(name)
+                pairs = []
+                if source:
+                    pairs.extend(((node, path), x) for path, x in node.inputs.items())
+                if destination:
+                    pairs.extend(((node, path), x) for path, outputs in node.outputs.items() for x in outputs)
+            for local, other in pairs:
+                if kwargs.get('type') and not self.isAType(other[0], kwargs['type']):
+                    continue
+                if kwargs.get('connections'):
+                    result.append(self.scene.plugName(local))
+                result.append(self.scene.plugName(other) if kwargs.get('plugs') else self.name(other[0]))
+        return result or None
+
+    def listHistory(self, *args, **kwargs):
+        kwargs = flags('listHistory', kwargs)
+        result = []
+        seen = set()
+        for name in flatten(args):
+            node = self.node(name)
+            if node.isTransform and node.shapes():
+                node = node.shapes()[0]
+            queue = [node]
+            while queue:
+                current = queue.pop(0)
+                if current in seen:
+                    continue
+                seen.add(current)
+                result.append(current)
+                queue.extend(self.scene.connectedNodes(current, source=not kwargs.get('future'), destination=bool(kwargs.get('future'))))
+        if kwargs.get('pruneDagObjects'):
+            result = [x for x in result if not x.isDag]
+        return [self.name(x) for x in result] or None
+
+    # ---- transforms --------------------------------------------------------------------------------------------------
+
+    def xform(self, *args, **kwargs):
+        kwargs = flags('xform', kwargs)
+        names = flatten(args) or [self.name(x) for x in self.scene.selection if isinstance(x, scene_module.Node)]
+        if kwargs.get('query'):
+            name = names[0]
+            if scene_module.COMPONENT.match(name):
+                return list(tuple(self.componentPosition(name))[:3])
+            node = self.node(name)
+            world = kwargs.get('worldSpace')
+            if kwargs.get('translation'):
+                return list(self.scene.worldTranslation(node)) if world else self.scene.getVector(node, 'translate')
+            if kwargs.get('rotation'):
+                if world:
+                    order = self.scene.rotationOrder(node)
+                    return degrees(MTransformationMatrix(self.scene.worldMatrix(node)).rotation().reorder(order))
+                return self.scene.getVector(node, 'rotate')
+            if kwargs.get('scale'):
+                return self.scene.getVector(node, 'scale')
+            if kwargs.get('matrix'):
+                return list(self.scene.worldMatrix(node) if world else self.scene.localMatrix(node))
+            if kwargs.get('rotatePivot') or kwargs.get('pivots'):
+                pivot = self.scene.getVector(node, 'rotatePivot')
+                if world:
+                    pivot = list(MPoint(pivot) * self.scene.worldMatrix(node))[:3]
+                return pivot + pivot if kwargs.get('pivots') else pivot
+            return None
+        for name in names:
+            node = self.node(name)
+            world = kwargs.get('worldSpace')
+            if kwargs.get('centerPivots'):
+                self.centerPivots(node)
+            if kwargs.get('translation') is not None:
+                value = list(kwargs['translation'])
+                if kwargs.get('relative'):
+                    value = [a + b for a, b in zip(self.scene.getVector(node, 'translate'), value)]
+                    self.scene.setValue(node, 'translate', value)
+                elif world:
+                    self.scene.setWorldTranslation(node, value)
+                else:
+                    self.scene.setValue(node, 'translate', value)
+            if kwargs.get('rotation') is not None:
+                value = list(kwargs['rotation'])
+                if world:
+                    self.scene.setWorldRotation(node, eulerFromDegrees(value).asQuaternion())
+                else:
+                    self.scene.setValue(node, 'rotate', value)
+            if kwargs.get('scale') is not None:
+                self.scene.setValue(node, 'scale', list(kwargs['scale']))
+            if kwargs.get('matrix') is not None:
+                if world:
+                    self.scene.setWorldMatrix(node, MMatrix(kwargs['matrix']))
+                else:
+                    self.scene.setWorldMatrix(node, MMatrix(kwargs['matrix']) * self.scene.parentMatrix(node))
+
+    def centerPivots(self, node):
+        points = []
+        for shape in node.shapes():
+            for i in range(self.scene.componentCount(shape, None)):
+                if shape.type == 'nurbsCurve':
+                    points.append(shape.data['cvs'][i])
+                elif shape.type == 'nurbsSurface':
+                    columns = len(shape.data['cvs'][0])
+                    points.append(shape.data['cvs'][i // columns][i % columns])
+                else:
+                    points.append(shape.data['points'][i])
+        if points:
+            center = [sum(p[i] for p in points) / len(points) for i in range(3)]
+            self.scene.setValue(node, 'rotatePivot', center)
+            self.scene.setValue(node, 'scalePivot', center)
+
+    def matchTransform(self, *args, **kwargs):
+        kwargs = flags('matchTransform', kwargs)
+        names = flatten(args)
+        target = self.node(names[-1])
+        position, rotation, scale = kwargs.get('pos'), kwargs.get('rot'), kwargs.get('scl')
+        if not position and not rotation and not scale:
+            position = rotation = scale = True
+        world = self.scene.worldMatrix(target)
+        for name in names[:-1]:
+            node = self.node(name)
+            if position:
+                self.scene.setWorldTranslation(node, self.scene.worldTranslation(target))
+            if rotation:
+                self.scene.setWorldRotation(node, self.scene.worldRotation(target))
+            if scale:
+                scales = MTransformationMatrix(world).scale()
+                parent_scales = MTransformationMatrix(self.scene.parentMatrix(node)).scale()
+                self.scene.setValue(node, 'scale', [a / b if b else a for a, b in zip(scales, parent_scales)])
+
+    def makeIdentity(self, *args, **kwargs):
+        kwargs = flags('makeIdentity', kwargs)
+        everything = not any(kwargs.get(x) for x in ['translate', 'rotate', 'scale', 'jointOrient'])
+        for node in self.nodes(args):
+            if not kwargs.get('apply'):
+                child_worlds = []
+            else:
+                child_worlds = [(x, self.scene.worldMatrix(x)) for x in node.children if x.isTransform]
+            if kwargs.get('apply') and node.type == 'joint' and (everything or kwargs.get('rotate')):
+                # Frozen joint rotations end up in the joint orient.
+                rotation = self.scene.localRotation(node)
+                self.scene.setValue(node, 'jointOrient', degrees(rotation.asEulerRotation()))
+                self.scene.setValue(node, 'rotate', [0.0, 0.0, 0.0])
+            if everything or kwargs.get('translate'):
+                self.scene.setValue(node, 'translate', [0.0, 0.0, 0.0])
+            if (everything or kwargs.get('rotate')) and not (kwargs.get('apply') and node.type == 'joint'):
+                self.scene.setValue(node, 'rotate', [0.0, 0.0, 0.0])
+            if everything or kwargs.get('scale'):
+                self.scene.setValue(node, 'scale', [1.0, 1.0, 1.0])
+            if kwargs.get('jointOrient') and node.type == 'joint':
+                self.scene.setValue(node, 'jointOrient', [0.0, 0.0, 0.0])
+            for child, world in child_worlds:
+                self.scene.setWorldMatrix(child, world)
+
+    # ---- constraints, deformers and ik -------------------------------------------------------------------------------
+
+    def constraint(self, constraintType, args, kwargs):
+        names = flatten(args)
+        targets = [self.node(x) for x in names[:-1]]
+        constrained = self.node(names[-1])
+        name = kwargs.get('name') or kwargs.get('n') or '{0}_{1}1'.format(constrained.name, constraintType)
+        constraint = self.scene.createNode(constraintType, name, constrained)
+        for i, target in enumerate(targets):
+            self.scene.connect((target, 'parentMatrix[0]'), (constraint, 'target[{0}].targetParentMatrix'.format(i)))
+            self.scene.connect((target, 'translate'), (constraint, 'target[{0}].targetTranslate'.format(i)))
+        maintain_offset = kwargs.get('maintainOffset', kwargs.get('mo', False))
+        if constraintType == 'poleVectorConstraint':
+            self.scene.connect((constraint, 'constraintTranslate'), (constrained, 'poleVector'), True)
+            return [self.name(constraint)]
+        # Nothing gets evaluated, so the constrained node gets snapped to where the constraint would put it.
+        if not maintain_offset and targets and constraintType != 'aimConstraint':
+            world = MVector()
+            for target in targets:
+                world = world + self.scene.worldTranslation(target)
+            if constraintType in ['parentConstraint', 'pointConstraint']:
+                self.scene.setWorldTranslation(constrained, world / len(targets))
+            if constraintType in ['parentConstraint', 'orientConstraint']:
+                self.scene.setWorldRotation(constrained, self.scene.worldRotation(targets[0]))
+        outputs = {'parentConstraint': ['translate', 'rotate'], 'pointConstraint': ['translate'],
+            'orientConstraint': ['rotate'], 'aimConstraint': ['rotate'], 'scaleConstraint': ['scale']}[constraintType]
+        for attr in outputs:
+            output = 'constraint{0}{1}'.format(attr[0].upper(), attr[1:])
+            self.scene.connect((constraint, output), (constrained, attr), True)
+        return [self.name(constraint)]
+
+    def parentConstraint(self, *args, **kwargs):
+        return self.constraint('parentConstraint', args, kwargs)
+
+    def pointConstraint(self, *args, **kwargs):
+        return self.constraint('pointConstraint', args, kwargs)
+
+    def orientConstraint(self, *args, **kwargs):
+        return self.constraint('orientConstraint', args, kwargs)
+
+    def aimConstraint(self, *args, **kwargs):
+        return self.constraint('aimConstraint', args, kwargs)
+
+    def scaleConstraint(self, *args, **kwargs):
+        return self.constraint('scaleConstraint', args, kwargs)
+
+    def poleVectorConstraint(self, *args, **kwargs):
+        return self.constraint('poleVectorConstraint', args, kwargs)
+
+    def ikHandle(self, *args, **kwargs):
+        kwargs = flags('ikHandle', kwargs)
+        start = self.node(kwargs['startJoint'])
+        end = self.node(kwargs['endEffector'])
+        solver = kwargs.get('solver', 'ikRPsolver')
+        chain = [end] + [x for x in end.ancestors()]
+        chain = list(reversed(chain[:chain.index(start) + 1])) if start in chain else [start, end]
+        effector = self.scene.createNode('ikEffector', 'effector1', end.parent)
+        self.scene.setWorldTranslation(effector, self.scene.worldTranslation(end))
+        handle = self.scene.createNode('ikHandle', kwargs.get('name') or 'ikHandle1')
+        self.scene.setWorldTranslation(handle, self.scene.worldTranslation(end))
+        self.scene.connect((start, 'message'), (handle, 'startJoint'))
+        self.scene.connect((effector, 'handlePath[0]'), (handle, 'endEffector'))
+        result = [self.name(handle), self.name(effector)]
+        if solver == 'ikSplineSolver':
+            if kwargs.get('createCurve', True) and not kwargs.get('curve'):
+                # A cubic curve along the chain, with as many spans as it has bones unless it gets simplified.
+                joints = [tuple(self.scene.worldTranslation(x)) for x in chain]
+                spans = kwargs.get('numSpans', 1) if kwargs.get('simplifyCurve', True) else len(chain) - 1
+                data = {'cvs': joints, 'degree': 1, 'knots': scene_module.defaultKnots(len(joints), 1)}
+                count = spans + 3
+                points = [tuple(scene_module.curvePoint(data, (len(chain) - 1) * i / (count - 1)))[:3] for i in range(count)]
+                degree = min(3, len(points) - 1)
+                curve, shape = self.scene.createCurve('curve1', points, degree)
+                result.append(self.name(curve))
+                self.scene.connect((shape, 'worldSpace[0]'), (handle, 'inCurve'))
+            elif kwargs.get('curve'):
+                shape = self.scene.geometryNode(self.node(kwargs['curve']))
+                self.scene.connect((shape, 'worldSpace[0]'), (handle, 'inCurve'))
+        return result
+
+    def deformer(self, deformerType, name, geometry):
+        node = self.scene.createNode(deformerType, name or '{0}1'.format(deformerType))
+        for i, geo in enumerate(geometry):
+            shape = self.scene.geometryNode(geo)
+            upstream = shape.inputs.get('inMesh') or shape.inputs.get('create')
+            self.scene.connect((shape, 'worldSpace[0]'), (node, 'input[{0}].inputGeometry'.format(i)), True) if upstream is None else None
+            self.scene.connect((node, 'outputGeometry[{0}]'.format(i)), (shape, 'inMesh' if shape.type == 'mesh' else 'create'), True)
+        return node
+
+    def skinCluster(self, *args, **kwargs):
+        kwargs = flags('skinCluster', kwargs)
+        if kwargs.get('query') or kwargs.get('q') or kwargs.get('edit') or kwargs.get('e'):
+            node = self.node(flatten(args)[0])
+            return [self.name(x[0]) for path, x in sorted(node.inputs.items()) if path.startswith('matrix[')]
+        names = flatten(args) or [self.name(x) for x in self.scene.selection]
+        nodes = [self.node(x) for x in names]
+        joints = [x for x in nodes if x.type == 'joint']
+        geometry = [x for x in nodes if x.type != 'joint']
+        node = self.deformer('skinCluster', kwargs.get('name'), geometry[-1:])
+        for i, joint in enumerate(joints):
+            self.scene.connect((joint, 'worldMatrix[0]'), (node, 'matrix[{0}]'.format(i)))
+        node.data['influences'] = joints
+        return [self.name(node)]
+
+    def skinPercent(self, *args, **kwargs):
+        kwargs = flags('skinPercent', kwargs)
+        if kwargs.get('query'):
+            return []
+        return None
+
+    def cluster(self, *args, **kwargs):
+        kwargs = flags('cluster', kwargs)
+        names = flatten(args) or [x if isinstance(x, str) else self.name(x) for x in self.scene.selection]
+        positions = []
+        geometry = []
+        for name in names:
+            if scene_module.COMPONENT.match(name):
+                shape, components = self.expandComponents(name)
+                positions.extend(self.componentPosition(x) for x in components)
+                geometry.append(shape)
+            else:
+                geometry.append(self.scene.geometryNode(self.node(name)))
+        node = self.deformer('cluster', kwargs.get('name'), geometry[:1])
+        handle = self.scene.createNode('transform', '{0}Handle'.format(node.name))
+        handle_shape = self.scene.createNode('clusterHandle', '{0}HandleShape'.format(node.name), handle)
+        handle_shape.type = 'locator'
+        if positions:
+            center = [sum(p[i] for p in positions) / len(positions) for i in range(3)]
+            self.scene.setValue(handle, 'rotatePivot', center)
+            self.scene.setValue(handle, 'scalePivot', center)
+            self.scene.setValue(handle_shape, 'origin', center)
+        self.scene.connect((handle, 'worldMatrix[0]'), (node, 'matrix'))
+        self.selectNew(handle)
+        return [self.name(node), self.name(handle)]
+
+    def softMod(self, *args, **kwargs):
+        kwargs = flags('softMod', kwargs)
+        names = flatten(args) or [x if isinstance(x, str) else self.name(x) for x in self.scene.selection]
+        geometry = [self.scene.geometryNode(self.node(x.split('.')[0])) for x in names]
+        node = self.deformer('softMod', kwargs.get('name'), geometry[:1])
+        handle = self.scene.createNode('transform', '{0}Handle'.format(node.name))
+        self.scene.connect((handle, 'worldMatrix[0]'), (node, 'matrix'))
+        return [self.name(node), self.name(handle)]
+
+    def wire(self, *args, **kwargs):
+        kwargs = flags('wire', kwargs)
+        geometry = [self.node(x) for x in flatten(args)]
+        node = self.deformer('wire', kwargs.get('name'), geometry)
+        for i, wire in enumerate(flatten([kwargs.get('wire')])):
+            wire_node = self.node(wire)
+            shape = self.scene.geometryNode(wire_node)
+            base, base_shape = self.scene.createCurve('{0}BaseWire'.format(wire_node.name), shape.data['cvs'], shape.data['degree'],
+                shape.data['knots'], wire_node.parent)
+            self.scene.connect((shape, 'worldSpace[0]'), (node, 'deformedWire[{0}]'.format(i)))
+            self.scene.connect((base_shape, 'worldSpace[0]'), (node, 'baseWire[{0}]'.format(i)))
+        return [self.name(node)]
+
+    def blendShape(self, *args, **kwargs):
+        kwargs = flags('blendShape', kwargs)
+        names = flatten(args)
+        if kwargs.get('edit') or kwargs.get('query'):
+            node = self.node(names[0])
+            for index, value in blendWeights(kwargs.get('weight')):
+                self.scene.setValue(node, 'weight[{0}]'.format(index), [value])
+            return None
+        nodes = [self.node(x) for x in names] or [x for x in self.scene.selection if isinstance(x, scene_module.Node)]
+        targets, base = nodes[:-1], nodes[-1]
+        node = self.deformer('blendShape', kwargs.get('name'), [base])
+        for i, target in enumerate(targets):
+            shape = self.scene.geometryNode(target)
+            self.scene.connect((shape, 'worldSpace[0]'), (node, 'inputTarget[0].inputTargetGroup[{0}].inputTargetItem[6000].inputGeomTarget'.format(i)))
+            self.scene.setValue(node, 'weight[{0}]'.format(i), [0.0])
+        for index, value in blendWeights(kwargs.get('weight')):
+            self.scene.setValue(node, 'weight[{0}]'.format(index), [value])
+        return [self.name(node)]
+
+    # ---- driven keys -------------------------------------------------------------------------------------------------
+
+    def animCurveFor(self, plug):
+        node, attr = self.plug(plug)
+        source = node.inputs.get(attr)
+        while source is not None and source[0].type in ['unitConversion', 'blendWeighted']:
+            inputs = list(source[0].inputs.values())
+            source = inputs[0] if inputs else None
+        if source is not None and source[0].type.startswith('animCurve'):
+            return source[0]
+        return None
+
+    def setDrivenKeyframe(self, *args, **kwargs):
+        kwargs = flags('setDrivenKeyframe', kwargs)
+        names = flatten(args)
+        if kwargs.get('query'):
+            name = names[0]
+            if kwargs.get('driven'):
+                node = self.node(name.split('.')[0])
+                driven = [path for path in node.inputs if self.animCurveFor('{0}.{1}'.format(name.split('.')[0], path))]
+                return ['{0}.{1}'.format(self.name(node), x) for x in driven] or None
+            if kwargs.get('driver'):
+                curve = self.animCurveFor(name)
+                if curve is None or 'input' not in curve.inputs:
+                    return None
+                return [self.scene.plugName(curve.inputs['input'])]
+            return None
+        for name in names:
+            node, attr = self.plug(name)
+            curve = self.animCurveFor(name)
+            if curve is None:
+                curve_type = {'doubleAngle': 'animCurveUA', 'doubleLinear': 'animCurveUL'}.get(self.scene.attributeType(node, attr), 'animCurveUU')
+                curve = self.scene.createNode(curve_type, '{0}_{1}'.format(node.name, attr.replace('.', '_').replace('[', '_').replace(']', '')))
+                curve.data['keys'] = []
+                self.scene.connect((curve, 'output'), (node, attr), True)
+                self.scene.connect(self.plug(kwargs['currentDriver']), (curve, 'input'))
+            driver_value = kwargs.get('driverValue')
+            if driver_value is None:
+                driver_value = self.getAttr(kwargs['currentDriver'])
+            value = kwargs.get('value')
+            if value is None:
+                value = node.values.get(attr, 0.0)
+            keys = [x for x in curve.data['keys'] if x[0] != driver_value]
+            keys.append([float(driver_value), float(value), 0.0, 0.0, 'auto', 'auto'])
+            keys.sort(key=lambda x: x[0])
+            curve.data['keys'] = keys
+
+    def keyCurve(self, name):
+        if '.' in name:
+            return self.animCurveFor(name)
+        node = self.node(name)
+        return node if node.type.startswith('animCurve') else None
+
+    def keyIndices(self, curve, index):
+        keys = curve.data.get('keys', [])
+        if not index:
+            return range(len(keys))
+        start, end = index if isinstance(index, (list, tuple)) else (index, index)
+        return range(start, min(end, len(keys) - 1) + 1)
+
+    def keyframe(self, *args, **kwargs):
+        kwargs = flags('keyframe', kwargs)
+        curve = self.keyCurve(flatten(args)[0])
+        if curve is None:
+            return None
+        if kwargs.get('query'):
+            result = []
+            for i in self.keyIndices(curve, kwargs.get('index')):
+                key = curve.data['keys'][i]
+                if kwargs.get('floatChange') or kwargs.get('timeChange'):
+                    result.append(key[0])
+                if kwargs.get('valueChange'):
+                    result.append(key[1])
+            return result
+        return None
+
+    def keyTangent(self, *args, **kwargs):
+        kwargs = flags('keyTangent', kwargs)
+        curve = self.keyCurve(flatten(args)[0])
+        if curve is None:
+            return None
+        fields = [('inAngle', 2), ('outAngle', 3), ('inTangentType', 4), ('outTangentType', 5)]
+        if kwargs.get('query'):
+            result = []
+            for i in self.keyIndices(curve, kwargs.get('index')):
+                key = curve.data['keys'][i]
+                result.extend(key[slot] for flag, slot in fields if kwargs.get(flag))
+            return result
+        for i in self.keyIndices(curve, kwargs.get('index')):
+            key = curve.data['keys'][i]
+            for flag, slot in fields:
+                if flag in kwargs:
+                    key[slot] = kwargs[flag]
+        return None
+
+    def setInfinity(self, *args, **kwargs):
+        kwargs = flags('setInfinity', kwargs)
+        curve = self.keyCurve(flatten(args)[0])
+        if curve is None:
+            return
+        for flag, attr in [('preInfinite', 'preInfinity'), ('postInfinite', 'postInfinity')]:
+            if kwargs.get(flag):
+                self.scene.setValue(curve, attr, [scene_module.INFINITY_TYPES.index(kwargs[flag].lower())])
+
+    # ---- everything else ---------------------------------------------------------------------------------------------
+
+    def undoInfo(self, *args, **kwargs):
+        return None
+
+    # Only the plug-in commands go on the undo queue, nothing else the fake does can be undone.
+    def undo(self, *args, **kwargs):
+        if self.scene.undoQueue:
+            self.scene.undoQueue.pop().undoIt()
+
+    # Python plug-ins get imported from their file on their own, not as part of a package, the same as maya does.
+    # Anything else is taken to be one of maya's own plug-ins, which the fake doesn't need.
+    def loadPlugin(self, *args, **kwargs):
+        names = []
+        for path in flatten(args):
+            name = os.path.splitext(os.path.basename(path))[0]
+            if path.endswith('.py') and name not in self.scene.plugins:
+                spec = importlib.util.spec_from_file_location(name, path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                module.initializePlugin(api.MObject())
+                self.scene.plugins[name] = module
+            names.append(name)
+        return names
+
+    def refresh(self, *args, **kwargs):
+        return None
+
+    def file(self, *args, **kwargs):
+        if kwargs.get('new') or kwargs.get('n'):
+            self.scene.clear()
+        return None
+
+    def channelBox(self, *args, **kwargs):
+        return None
+
+    def polyEditUV(self, *args, **kwargs):
+        return []
+
+    def ConvertSelectionToUVs(self, *args, **kwargs):
+        return None
+
+
+def parseEnumNames(enumNames):
+    fields = {}
+    value = 0
+    for field in [x for x in enumNames.split(':') if x]:
+        if '=' in field:
+            field, value = field.split('=')
+            value = int(value)
+        fields[field] = value
+        value += 1
+    return fields
+
+
+# [(index, weight)] from either "weight=(0, 1.0)" or "weight=[(0, 1.0), (1, 0.5)]"
+def blendWeights(weights):
+    if not weights:
+        return []
+    if isinstance(weights[0], (list, tuple)):
+        return [(int(x[0]), float(x[1])) for x in weights]
+    return [(int(weights[0]), float(weights[1]))]
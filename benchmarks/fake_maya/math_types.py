@@ -0,0 +1,556 @@
+# The om2 math classes the rigger uses.  Maya multiplies row vectors on the left, so a point goes through a matrix as
+# "point * matrix" and a child's world matrix is "local * parentWorld".  Everything here follows that convention.
+import math
+
+
+class MSpace():
+    kInvalid = 0
+    kTransform = 1
+    kPreTransform = 2
+    kPostTransform = 3
+    kWorld = 4
+    kObject = kPreTransform
+
+
+class MVector():
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = tuple(args[0])
+        args = tuple(args) + (0.0, 0.0, 0.0)
+        self.x, self.y, self.z = float(args[0]), float(args[1]), float(args[2])
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, i):
+        return (self.x, self.y, self.z)[i]
+
+    def __setitem__(self, i, value):
+        setattr(self, 'xyz'[i], float(value))
+
+    def __repr__(self):
+        return '{0}({1}, {2}, {3})'.format(type(self).__name__, self.x, self.y, self.z)
+
+    def __eq__(self, other):
+        try:
+            return self.x == other[0] and self.y == other[1] and self.z == other[2]
+        except (TypeError, IndexError):
+            return False
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.z))
+
+    def __neg__(self):
+        return MVector(-self.x, -self.y, -self.z)
+
+    def __add__(self, other):
+        return MVector(self.x + other[0], self.y + other[1], self.z + other[2])
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return MVector(self.x - other[0], self.y - other[1], self.z - other[2])
+
+    def __mul__(self, other):
+        if isinstance(other, MMatrix):
+            return MVector(*other.transformDirection(self))
+        if isinstance(other, (MVector, MPoint)):
+            return self.x * other[0] + self.y * other[1] + self.z * other[2]
+        return MVector(self.x * other, self.y * other, self.z * other)
+
+    def __rmul__(self, other):
+        return MVector(self.x * other, self.y * other, self.z * other)
+
+    def __truediv__(self, other):
+        return MVector(self.x / other, self.y / other, self.z / other)
+
+    def __xor__(self, other):
+        return MVector(self.y * other[2] - self.z * other[1], self.z * other[0] - self.x * other[2], self.x * other[1] - self.y * other[0])
+
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def normal(self):
+        length = self.length()
+        return MVector(self) if length == 0.0 else self / length
+
+    def normalize(self):
+        normal = self.normal()
+        self.x, self.y, self.z = normal.x, normal.y, normal.z
+        return self
+
+    def angle(self, other):
+        lengths = self.length() * MVector(other).length()
+        if lengths == 0.0:
+            return 0.0
+        return math.acos(max(-1.0, min(1.0, (self * MVector(other)) / lengths)))
+
+    def isEquivalent(self, other, tolerance=1.0e-10):
+        return all(abs(a - b) <= tolerance for a, b in zip(self, other))
+
+    def rotateBy(self, rotation):
+        if isinstance(rotation, MEulerRotation):
+            rotation = rotation.asQuaternion()
+        return MVector(*rotation.asMatrix().transformDirection(self))
+
+
+MVector.kZeroVector = MVector(0.0, 0.0, 0.0)
+MVector.kOneVector = MVector(1.0, 1.0, 1.0)
+MVector.kXaxisVector = MVector(1.0, 0.0, 0.0)
+MVector.kYaxisVector = MVector(0.0, 1.0, 0.0)
+MVector.kZaxisVector = MVector(0.0, 0.0, 1.0)
+MVector.kXnegAxisVector = MVector(-1.0, 0.0, 0.0)
+MVector.kYnegAxisVector = MVector(0.0, -1.0, 0.0)
+MVector.kZnegAxisVector = MVector(0.0, 0.0, -1.0)
+AXIS_VECTORS = {'x': MVector.kXaxisVector, 'y': MVector.kYaxisVector, 'z': MVector.kZaxisVector}
+
+
+class MPoint():
+    __slots__ = ('x', 'y', 'z', 'w')
+
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = tuple(args[0])
+        args = tuple(args)
+        self.x = float(args[0]) if len(args) > 0 else 0.0
+        self.y = float(args[1]) if len(args) > 1 else 0.0
+        self.z = float(args[2]) if len(args) > 2 else 0.0
+        self.w = float(args[3]) if len(args) > 3 else 1.0
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z, self.w))
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, i):
+        return (self.x, self.y, self.z, self.w)[i]
+
+    def __repr__(self):
+        return 'MPoint({0}, {1}, {2}, {3})'.format(self.x, self.y, self.z, self.w)
+
+    def __eq__(self, other):
+        try:
+            return all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return False
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.z, self.w))
+
+    def __add__(self, other):
+        return MPoint(self.x + other[0], self.y + other[1], self.z + other[2])
+
+    def __sub__(self, other):
+        if isinstance(other, MPoint):
+            return MVector(self.x - other.x, self.y - other.y, self.z - other.z)
+        return MPoint(self.x - other[0], self.y - other[1], self.z - other[2])
+
+    def __mul__(self, other):
+        if isinstance(other, MMatrix):
+            return MPoint(*other.transformPoint(self))
+        return MPoint(self.x * other, self.y * other, self.z * other)
+
+    def __truediv__(self, other):
+        return MPoint(self.x / other, self.y / other, self.z / other)
+
+    def distanceTo(self, other):
+        return math.sqrt((self.x - other[0]) ** 2 + (self.y - other[1]) ** 2 + (self.z - other[2]) ** 2)
+
+    def isEquivalent(self, other, tolerance=1.0e-10):
+        return all(abs(a - b) <= tolerance for a, b in zip(self, other))
+
+
+MPoint.kOrigin = MPoint(0.0, 0.0, 0.0)
+
+
+class MMatrix():
+    __slots__ = ('values',)
+
+    def __init__(self, values=None):
+        if values is None:
+            self.values = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+        elif isinstance(values, MMatrix):
+            self.values = list(values.values)
+        else:
+            values = list(values)
+            if len(values) == 4:
+                values = [x for row in values for x in row]
+            self.values = [float(x) for x in values]
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        return 16
+
+    def __getitem__(self, i):
+        return self.values[i]
+
+    def __setitem__(self, i, value):
+        self.values[i] = float(value)
+
+    def __repr__(self):
+        return 'MMatrix({0})'.format(self.values)
+
+    def __eq__(self, other):
+        return isinstance(other, MMatrix) and self.values == other.values
+
+    def __mul__(self, other):
+        a = self.values
+        b0, b1, b2, b3, b4, b5, b6, b7, b8, b9, b10, b11, b12, b13, b14, b15 = other.values
+        values = []
+        for i in (0, 4, 8, 12):
+            x, y, z, w = a[i], a[i + 1], a[i + 2], a[i + 3]
+            values.extend((x * b0 + y * b4 + z * b8 + w * b12, x * b1 + y * b5 + z * b9 + w * b13,
+                x * b2 + y * b6 + z * b10 + w * b14, x * b3 + y * b7 + z * b11 + w * b15))
+        result = MMatrix.__new__(MMatrix)
+        result.values = values
+        return result
+
+    def getElement(self, row, column):
+        return self.values[row * 4 + column]
+
+    def setElement(self, row, column, value):
+        self.values[row * 4 + column] = float(value)
+
+    def isEquivalent(self, other, tolerance=1.0e-10):
+        return all(abs(a - b) <= tolerance for a, b in zip(self.values, other.values))
+
+    def transpose(self):
+        return MMatrix([self.values[j * 4 + i] for i in range(4) for j in range(4)])
+
+    def transformPoint(self, point):
+        m = self.values
+        x, y, z = point[0], point[1], point[2]
+        return (x * m[0] + y * m[4] + z * m[8] + m[12], x * m[1] + y * m[5] + z * m[9] + m[13], x * m[2] + y * m[6] + z * m[10] + m[14])
+
+    def transformDirection(self, vector):
+        m = self.values
+        x, y, z = vector[0], vector[1], vector[2]
+        return (x * m[0] + y * m[4] + z * m[8], x * m[1] + y * m[5] + z * m[9], x * m[2] + y * m[6] + z * m[10])
+
+    # Gauss-Jordan with partial pivoting, singular matrices come back as identity rather than raising.
+    def inverse(self):
+        rows = [self.values[i * 4:i * 4 + 4] + [1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+        for column in range(4):
+            pivot = max(range(column, 4), key=lambda r: abs(rows[r][column]))
+            if abs(rows[pivot][column]) < 1.0e-12:
+                return MMatrix()
+            rows[column], rows[pivot] = rows[pivot], rows[column]
+            scale = rows[column][column]
+            rows[column] = [x / scale for x in rows[column]]
+            for r in range(4):
+                if r != column and rows[r][column] != 0.0:
+                    factor = rows[r][column]
+                    rows[r] = [x - factor * y for x, y in zip(rows[r], rows[column])]
+        return MMatrix([x for row in rows for x in row[4:]])
+
+
+MMatrix.kIdentity = MMatrix()
+
+
+class MEulerRotation():
+    __slots__ = ('x', 'y', 'z', 'order')
+
+    kXYZ, kYZX, kZXY, kXZY, kYXZ, kZYX = range(6)
+    ORDER_AXES = ['xyz', 'yzx', 'zxy', 'xzy', 'yxz', 'zyx']
+
+    def __init__(self, *args, **kwargs):
+        order = kwargs.get('order', MEulerRotation.kXYZ)
+        if len(args) == 1 and isinstance(args[0], MEulerRotation):
+            order = args[0].order
+            args = tuple(args[0])
+        elif len(args) == 1 or (len(args) == 2 and not isinstance(args[0], (int, float))):
+            values = tuple(args[0]) if isinstance(args[0], (list, tuple, MVector)) else (args[0],)
+            if len(args) == 2:
+                order = args[1]
+            args = values
+        elif len(args) == 4:
+            order = args[3]
+        args = tuple(args) + (0.0, 0.0, 0.0)
+        self.x, self.y, self.z = float(args[0]), float(args[1]), float(args[2])
+        self.order = order
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, i):
+        return (self.x, self.y, self.z)[i]
+
+    def __repr__(self):
+        return 'MEulerRotation({0}, {1}, {2}, {3})'.format(self.x, self.y, self.z, self.order)
+
+    def __eq__(self, other):
+        return isinstance(other, MEulerRotation) and tuple(self) == tuple(other) and self.order == other.order
+
+    def __neg__(self):
+        return MEulerRotation(-self.x, -self.y, -self.z, self.order)
+
+    def __mul__(self, other):
+        if isinstance(other, MEulerRotation):
+            other = other.asQuaternion()
+        return (self.asQuaternion() * other).asEulerRotation().reorder(self.order)
+
+    def isEquivalent(self, other, tolerance=1.0e-10):
+        return all(abs(a - b) <= tolerance for a, b in zip(self, other))
+
+    def asMatrix(self):
+        matrix = MMatrix()
+        for axis in MEulerRotation.ORDER_AXES[self.order]:
+            matrix = matrix * axisRotation(axis, getattr(self, axis))
+        return matrix
+
+    def asQuaternion(self):
+        quaternion = MQuaternion()
+        for axis in MEulerRotation.ORDER_AXES[self.order]:
+            quaternion = quaternion * MQuaternion(getattr(self, axis), AXIS_VECTORS[axis])
+        return quaternion
+
+    def reorder(self, order):
+        return matrixToEuler(self.asMatrix(), order)
+
+    def inverse(self):
+        return self.asQuaternion().inverse().asEulerRotation().reorder(self.order)
+
+
+class MQuaternion():
+    __slots__ = ('x', 'y', 'z', 'w')
+
+    def __init__(self, *args):
+        if not args:
+            self.x, self.y, self.z, self.w = 0.0, 0.0, 0.0, 1.0
+        elif len(args) == 1:
+            self.x, self.y, self.z, self.w = [float(v) for v in args[0]]
+        elif len(args) == 2 and isinstance(args[0], (int, float)):
+            # angle, axis
+            axis = MVector(args[1]).normal()
+            half = args[0] / 2.0
+            s = math.sin(half)
+            self.x, self.y, self.z, self.w = axis.x * s, axis.y * s, axis.z * s, math.cos(half)
+        elif len(args) in [2, 3]:
+            # The rotation that takes one vector onto another.
+            start = MVector(args[0]).normal()
+            end = MVector(args[1]).normal()
+            factor = args[2] if len(args) == 3 else 1.0
+            axis = start ^ end
+            if axis.length() < 1.0e-10:
+                if start * end > 0.0:
+                    self.x, self.y, self.z, self.w = 0.0, 0.0, 0.0, 1.0
+                    return
+                # Opposite vectors, any perpendicular axis will do.
+                axis = start ^ MVector.kXaxisVector
+                if axis.length() < 1.0e-10:
+                    axis = start ^ MVector.kYaxisVector
+            angle = start.angle(end) * factor
+            rotation = MQuaternion(angle, axis)
+            self.x, self.y, self.z, self.w = rotation.x, rotation.y, rotation.z, rotation.w
+        else:
+            self.x, self.y, self.z, self.w = float(args[0]), float(args[1]), float(args[2]), float(args[3])
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z, self.w))
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, i):
+        return (self.x, self.y, self.z, self.w)[i]
+
+    def __repr__(self):
+        return 'MQuaternion({0}, {1}, {2}, {3})'.format(self.x, self.y, self.z, self.w)
+
+    def __eq__(self, other):
+        return isinstance(other, MQuaternion) and tuple(self) == tuple(other)
+
+    def __neg__(self):
+        return MQuaternion(-self.x, -self.y, -self.z, -self.w)
+
+    # "a * b" is a then b, the same as multiplying their matrices.
+    def __mul__(self, other):
+        if isinstance(other, (int, float)):
+            return MQuaternion(self.x * other, self.y * other, self.z * other, self.w * other)
+        ax, ay, az, aw = other.x, other.y, other.z, other.w
+        bx, by, bz, bw = self.x, self.y, self.z, self.w
+        return MQuaternion(
+            aw * bx + ax * bw + ay * bz - az * by,
+            aw * by - ax * bz + ay * bw + az * bx,
+            aw * bz + ax * by - ay * bx + az * bw,
+            aw * bw - ax * bx - ay * by - az * bz
+        )
+
+    def isEquivalent(self, other, tolerance=1.0e-10):
+        return all(abs(a - b) <= tolerance for a, b in zip(self, other))
+
+    def conjugate(self):
+        return MQuaternion(-self.x, -self.y, -self.z, self.w)
+
+    def inverse(self):
+        length = self.x * self.x + self.y * self.y + self.z * self.z + self.w * self.w
+        if length == 0.0:
+            return MQuaternion()
+        return MQuaternion(-self.x / length, -self.y / length, -self.z / length, self.w / length)
+
+    def normal(self):
+        length = math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z + self.w * self.w)
+        if length == 0.0:
+            return MQuaternion()
+        return MQuaternion(self.x / length, self.y / length, self.z / length, self.w / length)
+
+    def normalizeIt(self):
+        normal = self.normal()
+        self.x, self.y, self.z, self.w = normal.x, normal.y, normal.z, normal.w
+        return self
+
+    def asMatrix(self):
+        x, y, z, w = self.normal()
+        return MMatrix([
+            1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y + z * w), 2.0 * (x * z - y * w), 0.0,
+            2.0 * (x * y - z * w), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z + x * w), 0.0,
+            2.0 * (x * z + y * w), 2.0 * (y * z - x * w), 1.0 - 2.0 * (x * x + y * y), 0.0,
+            0.0, 0.0, 0.0, 1.0
+        ])
+
+    def asEulerRotation(self):
+        return matrixToEuler(self.asMatrix(), MEulerRotation.kXYZ)
+
+    def asAxisAngle(self):
+        quat = self.normal()
+        angle = 2.0 * math.acos(max(-1.0, min(1.0, quat.w)))
+        s = math.sqrt(max(0.0, 1.0 - quat.w * quat.w))
+        if s < 1.0e-10:
+            return MVector.kXaxisVector, 0.0
+        return MVector(quat.x / s, quat.y / s, quat.z / s), angle
+
+
+MQuaternion.kIdentity = MQuaternion()
+
+
+def axisRotation(axis, angle):
+    c, s = math.cos(angle), math.sin(angle)
+    if axis == 'x':
+        return MMatrix([1, 0, 0, 0, 0, c, s, 0, 0, -s, c, 0, 0, 0, 0, 1])
+    if axis == 'y':
+        return MMatrix([c, 0, -s, 0, 0, 1, 0, 0, s, 0, c, 0, 0, 0, 0, 1])
+    return MMatrix([c, s, 0, 0, -s, c, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1])
+
+
+def matrixToQuaternion(matrix):
+    m = [[matrix.getElement(i, j) for j in range(3)] for i in range(3)]
+    trace = m[0][0] + m[1][1] + m[2][2]
+    # Row vector matrices are the transpose of the usual ones, hence the swapped indices.
+    if trace > 0.0:
+        s = math.sqrt(trace + 1.0) * 2.0
+        return MQuaternion((m[1][2] - m[2][1]) / s, (m[2][0] - m[0][2]) / s, (m[0][1] - m[1][0]) / s, 0.25 * s)
+    if m[0][0] > m[1][1] and m[0][0] > m[2][2]:
+        s = math.sqrt(1.0 + m[0][0] - m[1][1] - m[2][2]) * 2.0
+        return MQuaternion(0.25 * s, (m[1][0] + m[0][1]) / s, (m[2][0] + m[0][2]) / s, (m[1][2] - m[2][1]) / s)
+    if m[1][1] > m[2][2]:
+        s = math.sqrt(1.0 + m[1][1] - m[0][0] - m[2][2]) * 2.0
+        return MQuaternion((m[1][0] + m[0][1]) / s, 0.25 * s, (m[2][1] + m[1][2]) / s, (m[2][0] - m[0][2]) / s)
+    s = math.sqrt(1.0 + m[2][2] - m[0][0] - m[1][1]) * 2.0
+    return MQuaternion((m[2][0] + m[0][2]) / s, (m[2][1] + m[1][2]) / s, 0.25 * s, (m[0][1] - m[1][0]) / s)
+
+
+# Only the rotation part of the matrix is looked at, and it's assumed to be orthonormal.
+def matrixToEuler(matrix, order=MEulerRotation.kXYZ):
+    axes = MEulerRotation.ORDER_AXES[order]
+    i, j, k = ['xyz'.index(a) for a in axes]
+    # An even permutation of xyz gets one sign, odd ones get the other.
+    sign = 1.0 if (j - i) % 3 == 1 else -1.0
+    m = lambda r, c: matrix.getElement(r, c)
+    sy = -sign * m(i, k)
+    sy = max(-1.0, min(1.0, sy))
+    angles = [0.0, 0.0, 0.0]
+    angles[j] = math.asin(sy)
+    if abs(sy) < 0.9999999:
+        angles[i] = math.atan2(sign * m(j, k), m(k, k))
+        angles[k] = math.atan2(sign * m(i, j), m(i, i))
+    else:
+        angles[i] = math.atan2(-sign * m(k, j), m(j, j))
+        angles[k] = 0.0
+    return MEulerRotation(angles[0], angles[1], angles[2], order)
+
+
+class MTransformationMatrix():
+
+    def __init__(self, matrix=None):
+        if isinstance(matrix, MTransformationMatrix):
+            matrix = matrix.asMatrix()
+        self._translation = MVector()
+        self._rotation = MQuaternion()
+        self._scale = [1.0, 1.0, 1.0]
+        if matrix is not None:
+            self.setFromMatrix(MMatrix(matrix))
+
+    def setFromMatrix(self, matrix):
+        rows = [MVector(matrix.getElement(i, 0), matrix.getElement(i, 1), matrix.getElement(i, 2)) for i in range(3)]
+        scale = [row.length() for row in rows]
+        if rows[0] * (rows[1] ^ rows[2]) < 0.0:
+            scale[0] = -scale[0]
+        rotation = MMatrix()
+        for i in range(3):
+            for j in range(3):
+                rotation.setElement(i, j, rows[i][j] / scale[i] if scale[i] else 0.0)
+        self._translation = MVector(matrix.getElement(3, 0), matrix.getElement(3, 1), matrix.getElement(3, 2))
+        self._rotation = matrixToQuaternion(rotation)
+        self._scale = scale
+
+    def asMatrix(self):
+        scale = MMatrix([self._scale[0], 0, 0, 0, 0, self._scale[1], 0, 0, 0, 0, self._scale[2], 0, 0, 0, 0, 1])
+        matrix = scale * self._rotation.asMatrix()
+        for i in range(3):
+            matrix.setElement(3, i, self._translation[i])
+        return matrix
+
+    def asMatrixInverse(self):
+        return self.asMatrix().inverse()
+
+    def translation(self, space=MSpace.kTransform):
+        return MVector(self._translation)
+
+    def setTranslation(self, vector, space=MSpace.kTransform):
+        self._translation = MVector(vector)
+        return self
+
+    def translateBy(self, vector, space=MSpace.kTransform):
+        self._translation = self._translation + vector
+        return self
+
+    def rotation(self, asQuaternion=False):
+        if asQuaternion:
+            return MQuaternion(self._rotation)
+        return self._rotation.asEulerRotation()
+
+    def rotationComponents(self, asQuaternion=False):
+        return list(self.rotation(asQuaternion))
+
+    def setRotation(self, rotation):
+        if isinstance(rotation, MEulerRotation):
+            rotation = rotation.asQuaternion()
+        self._rotation = MQuaternion(rotation)
+        return self
+
+    def rotateBy(self, rotation, space=MSpace.kTransform):
+        if isinstance(rotation, MEulerRotation):
+            rotation = rotation.asQuaternion()
+        self._rotation = self._rotation * rotation
+        return self
+
+    def scale(self, space=MSpace.kTransform):
+        return list(self._scale)
+
+    def setScale(self, scale, space=MSpace.kTransform):
+        self._scale = [float(x) for x in scale]
+        return self
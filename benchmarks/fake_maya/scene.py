@@ -0,0 +1,784 @@
+# The scene the fake commands work on: nodes with a type, DAG parent/children, attribute values, dynamic attributes,
+# and the connections between plugs.  Nothing gets evaluated, a plug just holds whatever was last set on it, except
+# for the transform matrices which are worked out from the transform attributes and the hierarchy when asked for.
+import collections
+import math
+import re
+
+from .math_types import MMatrix, MVector, MPoint, MQuaternion, MEulerRotation, MTransformationMatrix, matrixToEuler
+
+# Node types that are transforms, everything else in DAG_TYPES is a shape.
+TRANSFORM_TYPES = set(['transform', 'joint', 'ikHandle', 'ikEffector', 'clusterHandle', 'softModHandle', 'parentConstraint',
+    'aimConstraint', 'orientConstraint', 'pointConstraint', 'poleVectorConstraint', 'cMuscleKeepOut'])
+SHAPE_TYPES = set(['mesh', 'nurbsCurve', 'nurbsSurface', 'locator', 'cMuscleObject', 'cMuscleKeepOutShape'])
+DAG_TYPES = TRANSFORM_TYPES | SHAPE_TYPES
+
+# Type -> the types it inherits from, for "nodeType(inherited=True)" and "objectType(isAType=...)"
+TYPE_INHERITANCE = {
+    'transform': ['dagNode', 'transform'],
+    'joint': ['dagNode', 'transform', 'joint'],
+    'ikHandle': ['dagNode', 'transform', 'ikHandle'],
+    'ikEffector': ['dagNode', 'transform', 'ikEffector'],
+    'mesh': ['dagNode', 'shape', 'geometryShape', 'deformableShape', 'controlPoint', 'surfaceShape', 'mesh'],
+    'nurbsCurve': ['dagNode', 'shape', 'geometryShape', 'deformableShape', 'controlPoint', 'curveShape', 'nurbsCurve'],
+    'nurbsSurface': ['dagNode', 'shape', 'geometryShape', 'deformableShape', 'controlPoint', 'surfaceShape', 'nurbsSurface'],
+    'locator': ['dagNode', 'shape', 'locator'],
+    'skinCluster': ['geometryFilter', 'skinCluster'],
+    'blendShape': ['geometryFilter', 'blendShape'],
+    'wire': ['geometryFilter', 'weightGeometryFilter', 'wire'],
+    'cluster': ['geometryFilter', 'weightGeometryFilter', 'cluster'],
+    'softMod': ['geometryFilter', 'weightGeometryFilter', 'softMod'],
+    'animCurveUU': ['animCurve', 'animCurveUU'],
+    'animCurveUA': ['animCurve', 'animCurveUA'],
+    'animCurveUL': ['animCurve', 'animCurveUL'],
+}
+
+# Compound attributes that come with the node types the rigger uses.
+COMPOUND_CHILDREN = {}
+for _name, _suffixes in [
+        ('translate', 'XYZ'), ('rotate', 'XYZ'), ('scale', 'XYZ'), ('jointOrient', 'XYZ'), ('rotateAxis', 'XYZ'),
+        ('rotatePivot', 'XYZ'), ('scalePivot', 'XYZ'), ('outputTranslate', 'XYZ'), ('outputRotate', 'XYZ'),
+        ('outputScale', 'XYZ'), ('inputTranslate', 'XYZ'), ('inputRotate', 'XYZ'), ('inputScale', 'XYZ'),
+        ('outputQuat', 'XYZW'), ('inputQuat', 'XYZW'), ('color1', 'RGB'), ('color2', 'RGB'), ('output', 'RGB'),
+        ('colorIfTrue', 'RGB'), ('colorIfFalse', 'RGB'), ('outColor', 'RGB'), ('overrideColorRGB', 'RGB'),
+        ('position', 'XYZ'), ('normal', 'XYZ'), ('point1', 'XYZ'), ('point2', 'XYZ'), ('input1', 'XYZ'),
+        ('input2', 'XYZ'), ('input3D', 'xyz'), ('output3D', 'xyz'), ('tangentU', 'xyz'), ('tangentV', 'xyz'),
+        ('normalizedNormal', 'XYZ'), ('result', 'XYZ')]:
+    COMPOUND_CHILDREN[_name] = [_name + x for x in _suffixes]
+COMPOUND_CHILDREN['shear'] = ['shearXY', 'shearXZ', 'shearYZ']
+COMPOUND_CHILDREN['outputShear'] = ['outputShearX', 'outputShearY', 'outputShearZ']
+COMPOUND_CHILDREN['inputShear'] = ['inputShearX', 'inputShearY', 'inputShearZ']
+COMPOUND_PARENTS = {child: parent for parent, children in COMPOUND_CHILDREN.items() for child in children}
+
+ALIASES = {
+    't': 'translate', 'tx': 'translateX', 'ty': 'translateY', 'tz': 'translateZ',
+    'r': 'rotate', 'rx': 'rotateX', 'ry': 'rotateY', 'rz': 'rotateZ',
+    's': 'scale', 'sx': 'scaleX', 'sy': 'scaleY', 'sz': 'scaleZ',
+    'sh': 'shear', 'v': 'visibility', 'jo': 'jointOrient', 'jox': 'jointOrientX', 'joy': 'jointOrientY',
+    'joz': 'jointOrientZ', 'ro': 'rotateOrder', 'opm': 'offsetParentMatrix', 'wm': 'worldMatrix',
+    'wim': 'worldInverseMatrix', 'pm': 'parentMatrix', 'pim': 'parentInverseMatrix', 'm': 'matrix',
+    'im': 'inverseMatrix', 'rp': 'rotatePivot', 'sp': 'scalePivot', 'it': 'inheritsTransform', 'radi': 'radius',
+    'ove': 'overrideEnabled', 'ovc': 'overrideColor', 'ovrgb': 'overrideColorRGB', 'ovrgbf': 'overrideRGBColors',
+    'ws': 'worldSpace', 'l': 'local', 'io': 'intermediateObject',
+}
+# Multi attributes that get an index when a plug leaves it off.
+IMPLIED_INDEX = set(['worldMatrix', 'worldInverseMatrix', 'parentMatrix', 'parentInverseMatrix', 'worldSpace', 'instObjGroups'])
+COMPUTED_MATRICES = set(['matrix', 'inverseMatrix', 'worldMatrix', 'worldInverseMatrix', 'parentMatrix', 'parentInverseMatrix', 'xformMatrix'])
+TRANSFORM_ATTRS = set(['translate', 'rotate', 'scale', 'jointOrient', 'offsetParentMatrix', 'inheritsTransform', 'rotateOrder', 'shear'])
+BOOL_ATTRS = set(['visibility', 'inheritsTransform', 'overrideEnabled', 'overrideRGBColors', 'intermediateObject', 'segmentScaleCompensate'])
+ENUM_ATTRS = set(['rotateOrder', 'preInfinity', 'postInfinity', 'operation', 'overrideDisplayType', 'inputRotateOrder', 'interpType'])
+INFINITY_TYPES = ['constant', 'linear', 'constant', 'cycle', 'cycleRelative', 'oscillate']
+DEFAULTS = {
+    'scaleX': 1.0, 'scaleY': 1.0, 'scaleZ': 1.0, 'visibility': True, 'inheritsTransform': True, 'radius': 1.0,
+    'inputScaleX': 1.0, 'inputScaleY': 1.0, 'inputScaleZ': 1.0, 'outputScaleX': 1.0, 'outputScaleY': 1.0,
+    'outputScaleZ': 1.0, 'blender': 0.5, 'envelope': 1.0, 'segmentScaleCompensate': True, 'inputQuatW': 1.0,
+    'outputQuatW': 1.0,
+}
+DATA_TYPES = set(['string', 'matrix', 'nurbsCurve', 'nurbsSurface', 'mesh', 'stringArray', 'doubleArray'])
+NUMERIC_COMPOUNDS = {'double2': 2, 'double3': 3, 'float2': 2, 'float3': 3, 'long2': 2, 'long3': 3, 'short2': 2, 'short3': 3}
+
+PLUG_TOKEN = re.compile(r'^([A-Za-z_]\w*)(?:\[(-?\d+)\])?$')
+COMPONENT = re.compile(r'^(.+)\.(vtx|cv|e|f|map|u|v)\[(\d*)(?::(\d*))?\]$')
+
+
+def isMatrixAttr(attrName):
+    return 'Matrix' in attrName or attrName.startswith('matrix')
+
+
+class Attribute():
+    __slots__ = ('name', 'shortName', 'type', 'parent', 'children', 'min', 'max', 'default', 'keyable', 'proxy', 'enumFields', 'multi')
+
+    def __init__(self, name, type, parent=None):
+        self.name = name
+        self.shortName = name
+        self.type = type
+        self.parent = parent
+        self.children = []
+        self.min = None
+        self.max = None
+        self.default = None
+        self.keyable = False
+        self.proxy = None
+        # field name -> value
+        self.enumFields = {}
+        self.multi = False
+
+
+class Node():
+
+    def __init__(self, scene, name, type):
+        self.scene = scene
+        self.name = name
+        self.type = type
+        self.parent = None
+        self.children = []
+        self.values = {}
+        # attr name -> Attribute, for attributes added with addAttr
+        self.dynamic = {}
+        # attr path -> (node, attr path)
+        self.inputs = {}
+        # attr path -> [(node, attr path)]
+        self.outputs = {}
+        self.locked = set()
+        self.data = {}
+        self.alive = True
+
+    def __repr__(self):
+        return '<{0} {1}>'.format(self.type, self.name)
+
+    @property
+    def isDag(self):
+        return self.type in DAG_TYPES
+
+    @property
+    def isTransform(self):
+        return self.type in TRANSFORM_TYPES
+
+    def ancestors(self):
+        node = self.parent
+        while node:
+            yield node
+            node = node.parent
+
+    def descendants(self):
+        for child in self.children:
+            yield child
+            for descendant in child.descendants():
+                yield descendant
+
+    def shapes(self):
+        return [x for x in self.children if x.type in SHAPE_TYPES]
+
+    def fullPath(self):
+        if not self.isDag:
+            return self.name
+        return ''.join('|' + x.name for x in reversed([self] + list(self.ancestors())))
+
+    def getAttribute(self, name):
+        base = name.split('[')[0]
+        return self.dynamic.get(base)
+
+
+class Scene():
+
+    def __init__(self):
+        self.nodes = []
+        # short name -> [nodes]
+        self.names = {}
+        self.selection = []
+        self.matrixCache = {}
+        # command/function set name -> how many times it's been called
+        self.calls = collections.Counter()
+        # callback id -> function run with every new node, see MDGMessage in api.py
+        self.nodeAddedCallbacks = {}
+        # callback id -> function run with every node that gets deleted
+        self.nodeRemovedCallbacks = {}
+        # callback id -> function run with every node that gets renamed, and its old name
+        self.nameChangedCallbacks = {}
+        # node -> {callback id: function run with each of the node's attrs that gets set}
+        self.attributeChangedCallbacks = {}
+        # callback id -> (event name, function), run by fireEvent()
+        self.eventCallbacks = {}
+        # command name -> function that makes the MPxCommand, for the commands loaded plug-ins registered
+        self.pluginCommands = {}
+        # plug-in name -> the module loaded from its file
+        self.plugins = {}
+        self.clear()
+
+    def clear(self):
+        self.nodes = []
+        self.names = {}
+        self.selection = []
+        self.matrixCache = {}
+        # The plug-in commands that can be undone, last one run at the end.
+        self.undoQueue = []
+        for name in ['time1', 'persp', 'top', 'front', 'side']:
+            self.createNode('time' if name == 'time1' else 'transform', name)
+
+    # ---- names -------------------------------------------------------------------------------------------------------
+
+    def register(self, node):
+        self.names.setdefault(node.name, []).append(node)
+
+    def unregister(self, node):
+        nodes = self.names.get(node.name)
+        if nodes:
+            nodes.remove(node)
+            if not nodes:
+                del self.names[node.name]
+
+    def uniqueName(self, name, ignore=None):
+        name = name.split('|')[-1].replace('#', '1')
+        # Anything that can't go in a name becomes an underscore.
+        name = re.sub(r'\W', '_', name)
+        if name[0].isdigit():
+            name = '_' + name
+        if not self.names.get(name) or self.names[name] == [ignore]:
+            return name
+        match = re.match(r'^(.*?)(\d*)$', name)
+        base, number = match.group(1), match.group(2)
+        i = int(number) + 1 if number else 1
+        while self.names.get('{0}{1}'.format(base, i)):
+            i += 1
+        return '{0}{1}'.format(base, i)
+
+    # What maya does when it gets around to an event, like "idle" once it's caught up.
+    def fireEvent(self, name):
+        for event, callback in list(self.eventCallbacks.values()):
+            if event == name:
+                callback()
+
+    def setName(self, node, name):
+        previous = node.name
+        self.unregister(node)
+        node.name = name
+        self.register(node)
+        for callback in list(self.nameChangedCallbacks.values()):
+            callback(node, previous)
+
+    # The shortest path that only matches this node, what maya hands back from most commands.
+    def shortestName(self, node):
+        if not node.isDag or len(self.names.get(node.name, [])) <= 1:
+            return node.name
+        path = node.name
+        for ancestor in node.ancestors():
+            path = '{0}|{1}'.format(ancestor.name, path)
+            if len(self.findNodes(path)) == 1:
+                return path
+        return '|' + path
+
+    def findNodes(self, path):
+        if not path:
+            return []
+        absolute = path.startswith('|')
+        parts = path.strip('|').split('|')
+        candidates = self.names.get(parts[-1], [])
+        matches = []
+        for node in candidates:
+            current = node
+            ok = True
+            for part in reversed(parts[:-1]):
+                current = current.parent
+                if current is None or current.name != part:
+                    ok = False
+                    break
+            if ok and absolute and current.parent is not None:
+                ok = False
+            if ok:
+                matches.append(node)
+        return matches
+
+    def findNode(self, path):
+        if isinstance(path, Node):
+            return path
+        matches = self.findNodes(path)
+        if not matches:
+            raise ValueError('No object matches name: {0}'.format(path))
+        if len(matches) > 1:
+            raise ValueError('More than one object matches name: {0}'.format(path))
+        return matches[0]
+
+    def exists(self, path):
+        return len(self.findNodes(path)) == 1
+
+    # ---- nodes -------------------------------------------------------------------------------------------------------
+
+    def createNode(self, nodeType, name=None, parent=None, unique=True):
+        name = name or '{0}1'.format(nodeType)
+        if unique:
+            name = self.uniqueName(name)
+        node = Node(self, name, nodeType)
+        self.addNode(node, parent)
+        return node
+
+    # Puts a node made outside of the scene (by a modifier) into it, or back into it after it's been deleted.
+    def addNode(self, node, parent=None):
+        node.alive = True
+        self.nodes.append(node)
+        self.register(node)
+        if parent is not None:
+            self.setParent(node, parent)
+        if node.type == 'nurbsCurve' and not node.data:
+            node.data.update({'cvs': [], 'knots': [], 'degree': 3, 'form': 'open'})
+        for callback in list(self.nodeAddedCallbacks.values()):
+            callback(node)
+
+    def deleteNode(self, node):
+        if not node.alive:
+            return
+        for child in list(node.children):
+            self.deleteNode(child)
+        for path, source in list(node.inputs.items()):
+            self.disconnect(source, (node, path))
+        for path, destinations in list(node.outputs.items()):
+            for destination in list(destinations):
+                self.disconnect((node, path), destination)
+        if node.parent:
+            node.parent.children.remove(node)
+            node.parent = None
+        self.unregister(node)
+        self.nodes.remove(node)
+        if node in self.selection:
+            self.selection.remove(node)
+        node.alive = False
+        self.matrixCache.pop(node, None)
+        for callback in list(self.nodeRemovedCallbacks.values()):
+            callback(node)
+
+    def setParent(self, node, parent, keepWorld=False):
+        world = self.worldMatrix(node) if keepWorld and node.isTransform else None
+        if node.parent:
+            node.parent.children.remove(node)
+        node.parent = parent
+        if parent is not None:
+            parent.children.append(node)
+        self.invalidateMatrices(node)
+        if world is not None:
+            self.setWorldMatrix(node, world)
+
+    # ---- plugs -------------------------------------------------------------------------------------------------------
+
+    def normalizeAttr(self, node, attrPath):
+        tokens = []
+        parts = attrPath.split('.')
+        for i, token in enumerate(parts):
+            match = PLUG_TOKEN.match(token)
+            if not match:
+                raise ValueError('Invalid attribute: {0}'.format(attrPath))
+            name, index = match.groups()
+            name = self.longAttrName(node, name)
+            if index is None and name in IMPLIED_INDEX and i == len(parts) - 1:
+                index = '0'
+            tokens.append(name if index is None else '{0}[{1}]'.format(name, index))
+        return '.'.join(tokens)
+
+    def longAttrName(self, node, name):
+        if name in node.dynamic:
+            return name
+        for attribute in node.dynamic.values():
+            if attribute.shortName == name:
+                return attribute.name
+        return ALIASES.get(name, name)
+
+    def resolvePlug(self, plug):
+        if isinstance(plug, tuple):
+            return plug
+        node_name, attr_path = plug.split('.', 1)
+        node = self.findNode(node_name)
+        attr_path = self.normalizeAttr(node, attr_path)
+        # Shape attributes asked for on the transform.
+        if node.isTransform and attr_path.split('[')[0].split('.')[0] in ['local', 'worldSpace', 'create', 'cv', 'controlPoints', 'vtx']:
+            shapes = node.shapes()
+            if shapes:
+                node = shapes[0]
+        return node, attr_path
+
+    def plugName(self, plug):
+        return '{0}.{1}'.format(self.shortestName(plug[0]), plug[1])
+
+    def leafName(self, attrPath):
+        return attrPath.split('.')[-1].split('[')[0]
+
+    def compoundChildren(self, node, attrPath):
+        leaf = self.leafName(attrPath)
+        attribute = node.dynamic.get(leaf)
+        if attribute is not None:
+            return attribute.children or None
+        return COMPOUND_CHILDREN.get(leaf)
+
+    def childPath(self, attrPath, childName):
+        parts = attrPath.split('.')
+        prefix = '.'.join(parts[:-1])
+        index = parts[-1][len(self.leafName(attrPath)):]
+        # A dynamic compound's children live beside it, "target[0].targetMatrix" style plugs keep their parents.
+        return '{0}.{1}'.format(prefix, childName) if prefix else childName + index
+
+    def attributeType(self, node, attrPath):
+        leaf = self.leafName(attrPath)
+        attribute = node.dynamic.get(leaf)
+        if attribute is not None:
+            return attribute.type
+        if leaf in COMPOUND_CHILDREN:
+            return 'double3' if len(COMPOUND_CHILDREN[leaf]) == 3 else 'double4'
+        if isMatrixAttr(leaf) or (leaf == 'output' and node.type == 'fourByFourMatrix'):
+            return 'matrix'
+        if leaf in BOOL_ATTRS:
+            return 'bool'
+        if leaf in ENUM_ATTRS:
+            return 'enum'
+        parent = COMPOUND_PARENTS.get(leaf)
+        if parent in ['translate', 'outputTranslate', 'inputTranslate']:
+            return 'doubleLinear'
+        if parent in ['rotate', 'jointOrient', 'outputRotate', 'inputRotate']:
+            return 'doubleAngle'
+        return 'double'
+
+    def attributeExists(self, node, attrName):
+        name = self.longAttrName(node, attrName.split('[')[0])
+        if name in node.dynamic:
+            return True
+        # Utility nodes have too many attributes to list out, so they're taken to have whatever they're asked for.
+        if not node.isDag:
+            return True
+        if any(x.split('[')[0].split('.')[0] == name for paths in [node.values, node.inputs, node.outputs] for x in paths):
+            return True
+        if node.isTransform and (name in COMPOUND_CHILDREN or name in COMPOUND_PARENTS or name in COMPUTED_MATRICES
+                or name in DEFAULTS or name in BOOL_ATTRS or name in ['offsetParentMatrix', 'rotateOrder', 'shear']):
+            return name not in ['jointOrient', 'jointOrientX', 'jointOrientY', 'jointOrientZ', 'radius'] or node.type == 'joint'
+        return False
+
+    def getValue(self, node, attrPath):
+        children = self.compoundChildren(node, attrPath)
+        if children and attrPath not in node.values:
+            return [tuple(self.getValue(node, self.childPath(attrPath, x)) for x in children)]
+        if attrPath in node.values:
+            return node.values[attrPath]
+        leaf = self.leafName(attrPath)
+        if node.isDag and leaf in COMPUTED_MATRICES:
+            return list(self.computedMatrix(node, leaf))
+        attribute = node.dynamic.get(leaf)
+        if attribute is not None and attribute.default is not None:
+            return attribute.default
+        if self.attributeType(node, attrPath) == 'matrix':
+            return list(MMatrix())
+        if attribute is not None and attribute.type == 'string':
+            return None
+        return DEFAULTS.get(leaf, 0.0)
+
+    def setValue(self, node, attrPath, values):
+        flat = []
+        for value in values:
+            if isinstance(value, (list, tuple, MVector, MPoint)) and not (len(value) == 16 and not isinstance(value, tuple)):
+                flat.extend(value)
+            else:
+                flat.append(value)
+        children = self.compoundChildren(node, attrPath)
+        if children and len(flat) == len(children):
+            for child, value in zip(children, flat):
+                self.setValue(node, self.childPath(attrPath, child), [value])
+            return
+        if len(flat) == 1:
+            value = flat[0]
+        elif len(flat) == 16:
+            value = [float(x) for x in flat]
+        else:
+            value = list(flat)
+        attribute = node.dynamic.get(self.leafName(attrPath))
+        if attribute is not None and isinstance(value, (int, float)) and not isinstance(value, bool):
+            if attribute.min is not None:
+                value = max(value, attribute.min)
+            if attribute.max is not None:
+                value = min(value, attribute.max)
+        node.values[attrPath] = value
+        for callback in list(self.attributeChangedCallbacks.get(node, {}).values()):
+            callback(node, attrPath)
+        if node.isTransform and COMPOUND_PARENTS.get(attrPath, attrPath) in TRANSFORM_ATTRS:
+            self.invalidateMatrices(node)
+
+    # ---- connections -------------------------------------------------------------------------------------------------
+
+    def connect(self, source, destination, force=False):
+        if destination == source:
+            raise RuntimeError('Cannot connect a plug to itself.')
+        existing = destination[0].inputs.get(destination[1])
+        if existing is not None:
+            if existing == source:
+                raise RuntimeError('{0} is already connected to {1}.'.format(self.plugName(source), self.plugName(destination)))
+            if not force:
+                raise RuntimeError('{0} already has an incoming connection from {1}.'.format(self.plugName(destination), self.plugName(existing)))
+            self.disconnect(existing, destination)
+        destination[0].inputs[destination[1]] = source
+        source[0].outputs.setdefault(source[1], []).append(destination)
+
+    def disconnect(self, source, destination):
+        if destination[0].inputs.get(destination[1]) != source:
+            raise RuntimeError('There is no connection from {0} to {1} to disconnect'.format(self.plugName(source), self.plugName(destination)))
+        del destination[0].inputs[destination[1]]
+        outputs = source[0].outputs[source[1]]
+        outputs.remove(destination)
+        if not outputs:
+            del source[0].outputs[source[1]]
+
+    def connectedNodes(self, node, source=True, destination=True):
+        nodes = []
+        if source:
+            nodes.extend(x[0] for x in node.inputs.values())
+        if destination:
+            nodes.extend(x[0] for outputs in node.outputs.values() for x in outputs)
+        return nodes
+
+    # ---- transforms --------------------------------------------------------------------------------------------------
+
+    def getVector(self, node, attr):
+        return [float(x) for x in self.getValue(node, attr)[0]]
+
+    def rotationOrder(self, node):
+        return int(self.getValue(node, 'rotateOrder') or 0)
+
+    def jointOrientQuaternion(self, node):
+        if node.type != 'joint':
+            return MQuaternion()
+        return MEulerRotation([math.radians(x) for x in self.getVector(node, 'jointOrient')]).asQuaternion()
+
+    def localRotation(self, node):
+        rotate = MEulerRotation([math.radians(x) for x in self.getVector(node, 'rotate')], self.rotationOrder(node))
+        return rotate.asQuaternion() * self.jointOrientQuaternion(node)
+
+    def localMatrix(self, node):
+        if not node.isTransform:
+            return MMatrix()
+        transformation = MTransformationMatrix()
+        transformation.setScale(self.getVector(node, 'scale'))
+        transformation.setRotation(self.localRotation(node))
+        transformation.setTranslation(MVector(self.getVector(node, 'translate')))
+        return transformation.asMatrix()
+
+    # Everything above the node's own transform: offset parent matrix and the parent's world matrix.
+    def parentMatrix(self, node):
+        matrix = MMatrix(self.getValue(node, 'offsetParentMatrix')) if node.isTransform else MMatrix()
+        if node.parent is not None and self.getValue(node, 'inheritsTransform'):
+            matrix = matrix * self.worldMatrix(node.parent)
+        return matrix
+
+    # A node's world matrix, and everything under it, has to be worked out again once it's moved.
+    def invalidateMatrices(self, node):
+        if node in self.matrixCache:
+            del self.matrixCache[node]
+            for child in node.children:
+                self.invalidateMatrices(child)
+
+    def worldMatrix(self, node):
+        matrix = self.matrixCache.get(node)
+        if matrix is None:
+            matrix = self.localMatrix(node) * self.parentMatrix(node)
+            self.matrixCache[node] = matrix
+        return matrix
+
+    def computedMatrix(self, node, name):
+        if name == 'matrix' or name == 'xformMatrix':
+            return self.localMatrix(node)
+        if name == 'inverseMatrix':
+            return self.localMatrix(node).inverse()
+        if name == 'worldMatrix':
+            return self.worldMatrix(node)
+        if name == 'worldInverseMatrix':
+            return self.worldMatrix(node).inverse()
+        parent = self.worldMatrix(node.parent) if node.parent else MMatrix()
+        return parent if name == 'parentMatrix' else parent.inverse()
+
+    def setLocalRotation(self, node, quaternion):
+        rotate = quaternion * self.jointOrientQuaternion(node).inverse()
+        euler = matrixToEuler(rotate.asMatrix(), self.rotationOrder(node))
+        self.setValue(node, 'rotate', [math.degrees(x) for x in euler])
+
+    def setWorldMatrix(self, node, matrix, translate=True, rotate=True, scale=True):
+        local = MTransformationMatrix(MMatrix(matrix) * self.parentMatrix(node).inverse())
+        if translate:
+            self.setValue(node, 'translate', list(local.translation()))
+        if rotate:
+            self.setLocalRotation(node, local.rotation(asQuaternion=True))
+        if scale:
+            self.setValue(node, 'scale', local.scale())
+
+    def setWorldTranslation(self, node, position):
+        local = MPoint(position) * self.parentMatrix(node).inverse()
+        self.setValue(node, 'translate', [local.x, local.y, local.z])
+
+    def setWorldRotation(self, node, quaternion):
+        parent_rotation = MTransformationMatrix(self.parentMatrix(node)).rotation(asQuaternion=True)
+        self.setLocalRotation(node, quaternion * parent_rotation.inverse())
+
+    def worldRotation(self, node):
+        return MTransformationMatrix(self.worldMatrix(node)).rotation(asQuaternion=True)
+
+    def worldTranslation(self, node):
+        matrix = self.worldMatrix(node)
+        return MVector(matrix.getElement(3, 0), matrix.getElement(3, 1), matrix.getElement(3, 2))
+
+    # ---- geometry ----------------------------------------------------------------------------------------------------
+
+    def geometryNode(self, node):
+        if node.type in SHAPE_TYPES:
+            return node
+        shapes = [x for x in node.shapes() if not x.values.get('intermediateObject')]
+        if not shapes:
+            raise RuntimeError('{0} has no shape'.format(node.name))
+        return shapes[0]
+
+    def createCurve(self, name, points, degree, knots=None, parent=None, periodic=False):
+        transform = self.createNode('transform', name, parent)
+        shape = self.createNode('nurbsCurve', '{0}Shape'.format(transform.name), transform)
+        shape.data.update({'cvs': [tuple(float(v) for v in p[:3]) for p in points], 'degree': degree, 'form': 'open'})
+        shape.data['knots'] = list(knots) if knots else defaultKnots(len(points), degree)
+        if periodic:
+            closeCurve(shape.data)
+        return transform, shape
+
+    def createSurface(self, name, cvs, degreeU=1, degreeV=1, parent=None):
+        transform = self.createNode('transform', name, parent)
+        shape = self.createNode('nurbsSurface', '{0}Shape'.format(transform.name), transform)
+        shape.data.update({'cvs': cvs, 'degreeU': degreeU, 'degreeV': degreeV,
+            'knotsU': defaultKnots(len(cvs), degreeU), 'knotsV': defaultKnots(len(cvs[0]), degreeV)})
+        return transform, shape
+
+    # "faces" is the vertex ids around each face, only what asks about the topology needs them.
+    def createMesh(self, name, points, parent=None, faces=None):
+        transform = self.createNode('transform', name, parent)
+        shape = self.createNode('mesh', '{0}Shape'.format(transform.name), transform)
+        shape.data['points'] = [tuple(float(v) for v in p[:3]) for p in points]
+        shape.data['faces'] = [list(x) for x in faces or []]
+        shape.data['lookup'] = MeshLookup(shape.data['points'], shape.data['faces'])
+        return transform, shape
+
+    def componentCount(self, shape, componentType):
+        if shape.type == 'mesh':
+            return len(shape.data.get('points', []))
+        if shape.type == 'nurbsCurve':
+            return len(shape.data['cvs'])
+        if shape.type == 'nurbsSurface':
+            return len(shape.data['cvs']) * len(shape.data['cvs'][0])
+        return 0
+
+    def componentPosition(self, shape, index):
+        if shape.type == 'mesh':
+            point = shape.data['points'][index]
+        elif shape.type == 'nurbsCurve':
+            point = shape.data['cvs'][index]
+        else:
+            columns = len(shape.data['cvs'][0])
+            point = shape.data['cvs'][index // columns][index % columns]
+        return MPoint(point) * self.worldMatrix(shape)
+
+
+def defaultKnots(numCVs, degree):
+    spans = max(numCVs - degree, 1)
+    return [0.0] * (degree - 1) + [float(x) for x in range(0, spans + 1)] + [float(spans)] * (degree - 1)
+
+
+def closeCurve(data):
+    degree = data['degree']
+    cvs = data['cvs']
+    if data['form'] == 'periodic' or len(cvs) <= degree:
+        return
+    data['cvs'] = cvs + cvs[:degree]
+    data['knots'] = [float(x) for x in range(-(degree - 1), len(cvs) + degree)]
+    data['form'] = 'periodic'
+
+
+# Maya leaves off the first and last knot of the textbook knot vector.
+def fullKnots(knots):
+    return [knots[0]] + list(knots) + [knots[-1]]
+
+
+def knotDomain(data, key='knots', degree=None):
+    degree = data['degree'] if degree is None else degree
+    knots = data[key]
+    count = len(knots) - degree + 1
+    return knots[degree - 1], knots[count - 1]
+
+
+def deBoor(points, knots, degree, param):
+    knots = fullKnots(knots)
+    n = len(points)
+    # Find the span the parameter is in.
+    span = degree
+    for i in range(degree, n):
+        if knots[i] <= param:
+            span = i
+    span = min(span, n - 1)
+    d = [list(points[j + span - degree]) for j in range(degree + 1)]
+    for r in range(1, degree + 1):
+        for j in range(degree, r - 1, -1):
+            left = knots[j + span - degree]
+            right = knots[j + 1 + span - r]
+            alpha = 0.0 if right == left else (param - left) / (right - left)
+            d[j] = [(1.0 - alpha) * a + alpha * b for a, b in zip(d[j - 1], d[j])]
+    return d[degree]
+
+
+def curvePoint(data, param):
+    start, end = knotDomain(data)
+    param = max(start, min(end, param))
+    return MPoint(deBoor(data['cvs'], data['knots'], data['degree'], param))
+
+
+def curveTangent(data, param):
+    start, end = knotDomain(data)
+    step = (end - start) * 1.0e-4 or 1.0e-4
+    a = curvePoint(data, max(start, param - step))
+    b = curvePoint(data, min(end, param + step))
+    return (b - a) / ((min(end, param + step) - max(start, param - step)) or 1.0)
+
+
+# (param, length so far) samples along the curve, for the length/parameter lookups.
+def curveSamples(data, samplesPerSpan=24):
+    start, end = knotDomain(data)
+    spans = max(1, int(round(end - start)))
+    count = spans * samplesPerSpan
+    samples = [(start, 0.0)]
+    previous = curvePoint(data, start)
+    length = 0.0
+    for i in range(1, count + 1):
+        param = start + (end - start) * i / count
+        point = curvePoint(data, param)
+        length += previous.distanceTo(point)
+        samples.append((param, length))
+        previous = point
+    return samples
+
+
+def surfacePoint(data, u, v):
+    rows = [deBoor(row, data['knotsV'], data['degreeV'], v) for row in data['cvs']]
+    return MPoint(deBoor(rows, data['knotsU'], data['degreeU'], u))
+
+
+# What maya already has on hand for a mesh (each vertex's edges and faces, and something to find the closest point
+# with), worked out once when the mesh is made since its points never move.  All in object space.
+class MeshLookup():
+
+    def __init__(self, points, faces):
+        self.points = points
+        neighbours = [set() for x in points]
+        self.vertexFaces = [-1] * len(points)
+        for i, face in enumerate(faces):
+            for a, b in zip(face, face[1:] + face[:1]):
+                neighbours[a].add(b)
+                neighbours[b].add(a)
+                if self.vertexFaces[a] < 0:
+                    self.vertexFaces[a] = i
+        self.neighbours = [sorted(x) for x in neighbours]
+        # Points bucketed into cubes about as wide as a few vertices apart.
+        self.cells = collections.defaultdict(list)
+        self.low = tuple(min(x[i] for x in points) for i in range(3)) if points else (0.0, 0.0, 0.0)
+        extent = max([max(x[i] for x in points) - self.low[i] for i in range(3)] + [0.0]) if points else 0.0
+        self.size = max(extent / max(len(points) ** (1.0 / 3.0), 1.0), 1.0e-6)
+        # Only vertices on a face, the same as maya's closest point is always on one.
+        for i, point in enumerate(points):
+            if self.vertexFaces[i] >= 0:
+                self.cells[self.cell(point)].append(i)
+        self.reach = [max(x[i] for x in self.cells) for i in range(3)] if self.cells else [0, 0, 0]
+
+    def cell(self, point):
+        return tuple(int(math.floor((point[i] - self.low[i]) / self.size)) for i in range(3))
+
+    # (vertex, squared distance) of the vertex nearest the point, the lowest id on a tie.  Searches the cubes in
+    # growing shells around the point's until nothing further out could be closer.
+    def nearest(self, point):
+        best = (-1, float('inf'))
+        if not self.cells:
+            return best
+        centre = self.cell(point)
+        for ring in range(max(max(abs(centre[i]), abs(self.reach[i] - centre[i])) for i in range(3)) + 1):
+            if best[0] >= 0 and ((ring - 1) * self.size) ** 2 > best[1]:
+                break
+            for x in range(centre[0] - ring, centre[0] + ring + 1):
+                for y in range(centre[1] - ring, centre[1] + ring + 1):
+                    for z in range(centre[2] - ring, centre[2] + ring + 1):
+                        if max(abs(x - centre[0]), abs(y - centre[1]), abs(z - centre[2])) != ring:
+                            continue
+                        for vertex in self.cells.get((x, y, z), ()):
+                            other = self.points[vertex]
+                            distance = (point[0] - other[0]) ** 2 + (point[1] - other[1]) ** 2 + (point[2] - other[2]) ** 2
+                            if distance < best[1] or (distance == best[1] and vertex < best[0]):
+                                best = (vertex, distance)
+        return best
@@ -0,0 +1,156 @@
+# Benchmarks for the pure-python parts of the component graph.  These don't need maya, so run them from the repo root with:
+#
+#   python -m benchmarks.graph_benchmark
+#
+import time
+
+from src import graph_utils
+
+
+# Stand-in for a loaded component, it only has the bits the graph and the controller passes look at.
+class FakeComponent():
+
+    def __init__(self, name, prefix):
+        self.name = name
+        self.prefix = prefix
+        self.children = []
+
+
+# Builds a template-ish list of components: a 'C' root that fans out into L/R chains, the same way the blueprints
+# unroll into L/R limbs.  Each link in a chain lists the next one as its child.
+def makeComponents(num_components, chain_length=8):
+    components = []
+    root = FakeComponent('root', 'C')
+    components.append(root)
+    chain_idx = 0
+    while len(components) < num_components:
+        previous = root
+        for link in range(chain_length):
+            name = 'chain{0}link{1}'.format(chain_idx, link)
+            if len(components) >= num_components:
+                break
+            for prefix in ['L', 'R']:
+                component = FakeComponent(name, prefix)
+                components.append(component)
+            previous.children.append({'childName': name, 'childPrefix': 'LR' if previous.prefix == 'C' else previous.prefix})
+            # Keep walking down the L side of the chain.
+            previous = components[-2]
+        chain_idx += 1
+    return components
+
+
+def isComponent(cName, cPrefix, checkNodeData):
+    if cName == checkNodeData.name and checkNodeData.prefix in cPrefix:
+        return True
+    return False
+
+
+# The way "handleParentConnections()", "propagateLimits()" and "connectModuleAttrs()" used to find child components.
+def legacyChildScan(components):
+    found = 0
+    for component in components:
+        for child in component.children:
+            for ccomponent in components:
+                if isComponent(child['childName'], child['childPrefix'], ccomponent):
+                    found += 1
+    return found
+
+
+def registryChildScan(components, graph):
+    found = 0
+    for component in components:
+        for child in component.children:
+            found += len(graph.registry.findComponents(child['childName'], child['childPrefix']))
+    return found
+
+
+def timeIt(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def runRegistryBenchmark(sizes=(100, 200, 400, 800, 1600, 3200)):
+    print('Child resolution pass (3 passes per build, timings are for one pass)')
+    print('{0:>8} {1:>12} {2:>12} {3:>12} {4:>14}'.format('comps', 'graph (ms)', 'legacy (ms)', 'registry (ms)', 'us/component'))
+    for size in sizes:
+        components = makeComponents(size)
+        build_time, graph = timeIt(graph_utils.ComponentGraph.buildFromList, components)
+        legacy_time, legacy_found = timeIt(legacyChildScan, components)
+        registry_time, registry_found = timeIt(registryChildScan, components, graph)
+        assert legacy_found == registry_found
+        print('{0:>8} {1:>12.3f} {2:>12.3f} {3:>12.3f} {4:>14.3f}'.format(
+            len(components),
+            build_time * 1000,
+            legacy_time * 1000,
+            registry_time * 1000,
+            (registry_time / len(components)) * 1000000
+        ))
+
+
+# Layered graph where every node has a couple of parents in the previous layer, plus one from further back.  The
+# extra parents are what made the old iterator shuffle nodes to the back of the queue over and over.
+def makeLayeredComponents(num_components, layer_width=100):
+    layers = []
+    components = []
+    while len(components) < num_components:
+        layer = []
+        for i in range(min(layer_width, num_components - len(components))):
+            component = FakeComponent('layer{0}node{1}'.format(len(layers), i), 'C')
+            layer.append(component)
+            components.append(component)
+        if layers:
+            for i, component in enumerate(layer):
+                parents = [layers[-1][i % len(layers[-1])], layers[-1][(i + 1) % len(layers[-1])], layers[len(layers) // 2][i % len(layers[len(layers) // 2])]]
+                for parent in parents:
+                    if not any(child['childName'] == component.name for child in parent.children):
+                        parent.children.append({'childName': component.name, 'childPrefix': 'C'})
+        layers.append(layer)
+    return components
+
+
+# The requeueing iterator "ComponentGraphIterator.breadthFirstIteration()" used before it was swapped for a
+# topological sort.  The read flags are kept in a dict so the graph nodes don't need the old attribute.
+def legacyBreadthFirstIteration(graph, function):
+    read = {}
+    queue = []
+    for node in graph.nodes:
+        queue.append(node)
+    while(len(queue) > 0):
+        requeue = False
+        for parent in queue[0].parents:
+            if not read.get(parent):
+                requeue = True
+                break
+        if requeue:
+            node = queue.pop(0)
+            queue.append(node)
+            continue
+        else:
+            if not read.get(queue[0]):
+                function(queue[0].component)
+            node = queue.pop(0)
+            read[node] = True
+            for child in node.children:
+                if not read.get(child):
+                    queue.append(child)
+
+
+def runSchedulerBenchmark(sizes=(1000, 2500, 5000, 10000)):
+    print('Graph iteration order (parents before children)')
+    print('{0:>8} {1:>12} {2:>12} {3:>10}'.format('comps', 'legacy (ms)', 'kahn (ms)', 'speedup'))
+    iterator = graph_utils.ComponentGraphIterator()
+    for size in sizes:
+        graph = graph_utils.ComponentGraph.buildFromList(makeLayeredComponents(size))
+        legacy_visited = []
+        legacy_time, result = timeIt(legacyBreadthFirstIteration, graph, legacy_visited.append)
+        visited = []
+        kahn_time, result = timeIt(iterator.breadthFirstIteration, graph, visited.append)
+        assert len(visited) == len(legacy_visited) == len(graph.components)
+        print('{0:>8} {1:>12.3f} {2:>12.3f} {3:>9.1f}x'.format(size, legacy_time * 1000, kahn_time * 1000, legacy_time / kahn_time))
+
+
+if __name__ == '__main__':
+    runRegistryBenchmark()
+    print('')
+    runSchedulerBenchmark()
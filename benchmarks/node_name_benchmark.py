@@ -0,0 +1,107 @@
+# Parsing and formatting node names the old way (splitting every time, formatting with a five slot format string)
+# against NodeName.  The names come from the saved eskah positions and control data, and each one gets asked about a
+# few times over, about what a build does.  Doesn't need maya, run from the repo root with:
+#
+#   python -m benchmarks.node_name_benchmark
+#
+import json
+import os
+import time
+
+from src import constants, node_names
+
+# How many times each name gets parsed in a pass.
+REPEATS = [1, 8]
+PASSES = 20
+
+
+# What getNodeNameParts() used to be.
+def legacyParse(node):
+    component_part = node.split('_', 2)
+    prefix = component_part[0]
+    component_name = component_part[1]
+    node_part = component_part[2].rsplit('_', 2)
+    joint_name = node_part[0]
+    node_purpose = node_part[1]
+    node_type = node_part[2]
+    return prefix, component_name, joint_name, node_purpose, node_type
+
+
+def loadNameCorpus():
+    names = set()
+    with open(os.path.join(constants.POSITIONS_PATH, 'eskah_root_positions.json'), 'r') as f:
+        for nodes in json.load(f).values():
+            names.update(nodes)
+    with open(os.path.join(constants.CONTROLS_PATH, 'custom_curves.json'), 'r') as f:
+        control_data = json.load(f)
+    for key in [constants.CONTROL_DATA_KEYS.curves, constants.CONTROL_DATA_KEYS.attributes]:
+        for nodes in control_data.get(key, {}).values():
+            names.update(nodes)
+    corpus = []
+    for name in sorted(names):
+        try:
+            legacyParse(name)
+        except IndexError:
+            continue
+        corpus.append(name)
+    return corpus
+
+
+def timeIt(function, *args):
+    start = time.perf_counter()
+    for i in range(PASSES):
+        function(*args)
+    return (time.perf_counter() - start) / PASSES
+
+
+def legacyParseAll(names):
+    for name in names:
+        legacyParse(name)
+
+
+def parseAll(names):
+    parse = node_names.parseNodeName
+    for name in names:
+        parse(name)
+
+
+def coldParseAll(names):
+    node_names.parseNodeName.cache_clear()
+    parseAll(names)
+
+
+def legacyFormatAll(parts):
+    for prefix, component_name, joint_name, node_purpose, node_type in parts:
+        '{0}_{1}_{2}_{3}_{4}'.format(prefix, component_name, joint_name, 'PLC', 'GRP')
+
+
+def formatAll(parts):
+    for name in parts:
+        name.withParts(purpose='PLC', type='GRP').format()
+
+
+def fastFormatAll(parts):
+    format_name = node_names.formatNodeName
+    for prefix, component_name, joint_name, node_purpose, node_type in parts:
+        format_name(prefix, component_name, joint_name, 'PLC', 'GRP')
+
+
+def runNameBenchmark():
+    corpus = loadNameCorpus()
+    for name in corpus:
+        assert tuple(node_names.parseNodeName(name)) == legacyParse(name), name
+    print('Node names, {0} distinct names'.format(len(corpus)))
+    row = '  {0:>8} {1:>12} {2:>12} {3:>12}'
+    print(row.format('repeats', 'split us', 'cold us', 'cached us'))
+    for repeats in REPEATS:
+        names = corpus * repeats
+        print(row.format(repeats, *['{0:.1f}'.format(x * 1e6) for x in
+            [timeIt(legacyParseAll, names), timeIt(coldParseAll, names), timeIt(parseAll, names)]]))
+    parts = [node_names.parseNodeName(x) for x in corpus]
+    print('  formatting {0} names: format string {1:.1f} us, formatNodeName {2:.1f} us, NodeName.withParts {3:.1f} us'.format(
+        len(parts), timeIt(legacyFormatAll, parts) * 1e6, timeIt(fastFormatAll, parts) * 1e6, timeIt(formatAll, parts) * 1e6))
+    print('  cache: {0}'.format(node_names.parseNodeName.cache_info()))
+
+
+if __name__ == '__main__':
+    runNameBenchmark()
@@ -0,0 +1,144 @@
+# Benchmarks for reading/writing skin weights per vertex vs a whole shape at a time, against the fake in-memory skin
+# cluster.  In maya each call also pays the command/API overhead, so the call counts matter as much as the timings.
+# Run from the repo root with:
+#
+#   python -m benchmarks.skin_benchmark
+#
+import os
+import random
+import tempfile
+import time
+
+from src import constants, skin_backend, skin_symmetry
+
+NUM_INFLUENCES = 12
+MAX_INFLUENCES_PER_VERTEX = 4
+
+
+def timeIt(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def makeSkinnedShape(num_vertices):
+    backend = skin_backend.FakeSkinBackend()
+    influences = ['C_spine_{0}_BND_JNT'.format(i) for i in range(NUM_INFLUENCES)]
+    backend.addJoints(influences)
+    backend.addShape('body_GEOShape', 'body_GEO.vtx', num_vertices)
+    skin_cluster = backend.createSkinCluster('body_GEOShape', influences, 'body_SCLST')
+
+    rand = random.Random(num_vertices)
+    weights = [0.0] * (num_vertices * NUM_INFLUENCES)
+    for i in range(num_vertices):
+        for j in rand.sample(range(NUM_INFLUENCES), rand.randint(1, MAX_INFLUENCES_PER_VERTEX)):
+            weights[i * NUM_INFLUENCES + j] = rand.random()
+    backend.setWeights(skin_cluster, 'body_GEOShape', weights)
+    backend.calls = 0
+    return backend, skin_cluster
+
+
+# What "getVertexWeights" does, one query per vertex.
+def legacyRead(backend, skinCluster, shape, ignoreThreshold=0.001):
+    component, vertex_ids = backend.getComponents(shape)
+    influences = backend.getInfluences(skinCluster)
+    weight_dict = {}
+    for vertex_id in vertex_ids:
+        row = backend.getWeights(skinCluster, shape, [vertex_id])
+        weight_dict['{0}[{1}]'.format(component, vertex_id)] = [(influences[j], x) for j, x in enumerate(row) if x > ignoreThreshold]
+    return weight_dict
+
+
+# What the old "loadSmoothBind" did, one edit per vertex.
+def legacyWrite(backend, skinCluster, shape, shapeWeights):
+    influences = backend.getInfluences(skinCluster)
+    for i in range(shapeWeights.vertexCount):
+        row = [0.0] * len(influences)
+        for joint, weight in shapeWeights.getVertexWeights(i):
+            row[influences.index(joint)] = weight
+        backend.setWeights(skinCluster, shape, row, [shapeWeights.vertexIds[i]])
+
+
+def runSkinBenchmark(sizes=(1000, 5000, 20000, 100000)):
+    print('Skin weights, {0} influences, up to {1} per vertex'.format(NUM_INFLUENCES, MAX_INFLUENCES_PER_VERTEX))
+    print('{0:>8} {1:>6} {2:>12} {3:>8} {4:>12} {5:>8} {6:>12} {7:>8} {8:>12} {9:>8}'.format(
+        'verts', '', 'legacy read', 'calls', 'bulk read', 'calls', 'legacy bind', 'calls', 'bulk bind', 'calls'))
+    for size in sizes:
+        backend, skin_cluster = makeSkinnedShape(size)
+
+        legacy_read_time, legacy_dict = timeIt(legacyRead, backend, skin_cluster, 'body_GEOShape')
+        legacy_read_calls, backend.calls = backend.calls, 0
+        bulk_read_time, shape_weights = timeIt(backend.readShapeWeights, skin_cluster, 'body_GEOShape')
+        bulk_read_calls, backend.calls = backend.calls, 0
+        assert shape_weights.toVertexDict() == {k: [list(x) for x in v] for k, v in legacy_dict.items()}
+
+        legacy_write_time, result = timeIt(legacyWrite, backend, skin_cluster, 'body_GEOShape', shape_weights)
+        legacy_write_calls, backend.calls = backend.calls, 0
+        bulk_write_time, result = timeIt(backend.writeShapeWeights, skin_cluster, 'body_GEOShape', shape_weights)
+        bulk_write_calls, backend.calls = backend.calls, 0
+
+        print('{0:>8} {1:>6} {2:>12.1f} {3:>8} {4:>12.1f} {5:>8} {6:>12.1f} {7:>8} {8:>12.1f} {9:>8}'.format(
+            size, '(ms)', legacy_read_time * 1000, legacy_read_calls, bulk_read_time * 1000, bulk_read_calls,
+            legacy_write_time * 1000, legacy_write_calls, bulk_write_time * 1000, bulk_write_calls))
+
+
+# A mesh that's symmetric across X, with its vertices shuffled so the mirror of a vertex could be anywhere.
+def makeSymmetricShape(num_vertices):
+    rand = random.Random(num_vertices)
+    num_center = num_vertices // 50
+    half = [(rand.uniform(0.01, 10.0), rand.uniform(0.0, 20.0), rand.uniform(-5.0, 5.0)) for i in range((num_vertices - num_center) // 2)]
+    points = half + [(-x, y, z) for x, y, z in half] + [(0.0, rand.uniform(0.0, 20.0), rand.uniform(-5.0, 5.0)) for i in range(num_center)]
+    rand.shuffle(points)
+    influences = ['{0}_arm_{1}_BND_JNT'.format(side, i) for side in 'LR' for i in range(NUM_INFLUENCES // 3)]
+    influences += ['C_spine_{0}_BND_JNT'.format(i) for i in range(NUM_INFLUENCES - len(influences))]
+    weights = [0.0] * (len(points) * len(influences))
+    for i in range(len(points)):
+        for j in rand.sample(range(len(influences)), rand.randint(1, MAX_INFLUENCES_PER_VERTEX)):
+            weights[i * len(influences) + j] = rand.random()
+    return points, influences, weights
+
+
+# What finding the mirrors looks like without the tree, every vertex checked against every other one.
+def bruteForceMirrors(points, tolerance=skin_symmetry.DEFAULT_TOLERANCE):
+    mirror_ids = []
+    for x, y, z in points:
+        distances = [(x + px) ** 2 + (y - py) ** 2 + (z - pz) ** 2 for px, py, pz in points]
+        best = min(range(len(points)), key=distances.__getitem__)
+        mirror_ids.append(best if distances[best] <= tolerance * tolerance else -1)
+    return mirror_ids
+
+
+def runSymmetryBenchmark(sizes=(1000, 5000, 20000, 100000), bruteForceLimit=1000):
+    print('')
+    print('Skin weight mirroring, {0} influences{1}'.format(NUM_INFLUENCES, '' if skin_symmetry.numpy is None else ' (numpy)'))
+    print('{0:>8} {1:>6} {2:>12} {3:>12} {4:>12} {5:>12}'.format('verts', '', 'brute force', 'kd-tree', 'cached', 'mirror'))
+    constants.SYMMETRY_CACHE_PATH = tempfile.mkdtemp()
+    for size in sizes:
+        points, influences, weights = makeSymmetricShape(size)
+        brute_time = None
+        if size <= bruteForceLimit:
+            brute_time, brute_ids = timeIt(bruteForceMirrors, points)
+        topology_hash = skin_symmetry.getTopologyHash([size], [])
+        build_time, symmetry_map = timeIt(skin_symmetry.getSymmetryMap, topology_hash, lambda: points)
+        cached_time, cached_map = timeIt(skin_symmetry.getSymmetryMap, topology_hash, lambda: points)
+        assert cached_map.mirrorIds == symmetry_map.mirrorIds
+        if brute_time is not None:
+            assert list(symmetry_map.mirrorIds) == brute_ids
+        mirror_time, (mirrored, count) = timeIt(skin_symmetry.mirrorWeights, weights, influences, symmetry_map)
+
+        # Every R vertex should have its L mirror's weights, with the L and R joints swapped.
+        num_influences = len(influences)
+        columns = {name: i for i, name in enumerate(influences)}
+        for target in symmetry_map.getTargets(skin_symmetry.SIDES['R']):
+            source = symmetry_map.mirrorIds[target]
+            for j, name in enumerate(influences):
+                assert mirrored[target * num_influences + columns[skin_symmetry.getMirrorInfluenceName(name)]] == weights[source * num_influences + j]
+
+        print('{0:>8} {1:>6} {2:>12} {3:>12.1f} {4:>12.1f} {5:>12.1f}'.format(
+            size, '(ms)', '{0:.1f}'.format(brute_time * 1000) if brute_time is not None else '-', build_time * 1000, cached_time * 1000, mirror_time * 1000))
+        os.remove(os.path.join(constants.SYMMETRY_CACHE_PATH, '{0}.sym'.format(topology_hash)))
+
+
+if __name__ == '__main__':
+    runSkinBenchmark()
+    runSymmetryBenchmark()
@@ -0,0 +1,129 @@
+# The vertex joint tool placing an eyelid's joints on a selected edge loop the old way (a cmds.xform per vertex in the
+# sort, then again per joint) against the vertex position cache, then picking the loop from where the joints already
+# are without anything selected.  Runs against the fake maya in benchmarks/fake_maya, from the repo root with:
+#
+#   python -m benchmarks.vertex_joint_benchmark
+#
+import math
+import time
+
+from benchmarks import fake_maya
+
+fake_maya.install()
+
+from src import constants
+from src.crig_maya import maya_utils_controller
+
+# (rings, segments) of the sphere the joints go on.
+SPHERES = [(32, 64), (96, 192)]
+RADIUS = 10.0
+# How many of the ring's vertices get a joint.
+LOOP_JOINTS = [8, 32]
+
+
+def timeIt(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+# Just what the vertex joint tool needs to know about an eyelid component.
+class EyelidComponent():
+
+    def __init__(self, baseJoint):
+        self.prefix = 'L'
+        self.name = 'headEyelid'
+        self.componentVars = {'numUpper': 0}
+        self.joint_dict = {'baseJoint': baseJoint, 'upperJoints': []}
+
+
+def createSphere(rings, segments):
+    scene = fake_maya.scene
+    points = [(0.0, RADIUS, 0.0)]
+    for ring in range(1, rings):
+        theta = math.pi * ring / rings
+        for segment in range(segments):
+            phi = 2.0 * math.pi * segment / segments
+            points.append((RADIUS * math.sin(theta) * math.cos(phi), RADIUS * math.cos(theta), RADIUS * math.sin(theta) * math.sin(phi)))
+    points.append((0.0, -RADIUS, 0.0))
+    ring_start = lambda ring: 1 + (ring - 1) * segments
+    faces = [[0, ring_start(1) + (i + 1) % segments, ring_start(1) + i] for i in range(segments)]
+    for ring in range(1, rings - 1):
+        for i in range(segments):
+            a, b = ring_start(ring) + i, ring_start(ring) + (i + 1) % segments
+            faces.append([a, b, b + segments, a + segments])
+    last = len(points) - 1
+    faces.extend([ring_start(rings - 1) + i, ring_start(rings - 1) + (i + 1) % segments, last] for i in range(segments))
+    geometry_group = scene.createNode('transform', constants.DEFAULT_GROUPS.geometry)
+    scene.createMesh('C_head_GEO', points, geometry_group, faces)
+    # The upper lid: half of the ring just above the equator, the half X runs along from one end to the other.
+    ring = rings // 2 - 2
+    return [ring_start(ring) + i for i in range(segments // 2 + 1)]
+
+
+# What "generateVertexJoints" used to do for categories with a joint count.
+def legacyGenerateVertexJoints(component, joint_data):
+    cmds = fake_maya.cmds
+    verts = cmds.ls(selection=True, flatten=True)
+    reversed = component.prefix == 'R'
+    sort_func = lambda x : cmds.xform(x, query=True, translation=True)[0]
+    verts.sort(reverse=reversed, key=sort_func)
+    component.componentVars[joint_data['numJointsVar']] = len(verts)
+    try:
+        cmds.delete(*component.joint_dict[joint_data['jointKey']])
+    except:
+        pass
+    component.joint_dict[joint_data['jointKey']] = []
+    for idx, vert in enumerate(verts):
+        new_joint = cmds.joint(component.joint_dict['baseJoint'], name='{0}_{1}_{2}_{3}_BND_JNT'.format(component.prefix, component.name, joint_data['name'], idx),
+            position=cmds.xform(vert, query=True, translation=True, worldSpace=True))
+        component.joint_dict[joint_data['jointKey']].append(new_joint)
+
+
+def jointPositions(component):
+    return [tuple(fake_maya.cmds.xform(x, query=True, translation=True, worldSpace=True)) for x in component.joint_dict['upperJoints']]
+
+
+def runVertexJointBenchmark(spheres=SPHERES):
+    cmds = fake_maya.cmds
+    joint_data = next(x for x in constants.VERTEX_JOINT_COMPONENTS[0]['categories'] if x['name'] == 'upper')
+    utils = maya_utils_controller.UtilsController()
+    for rings, segments in spheres:
+        fake_maya.commands.file(new=True, force=True)
+        loop = createSphere(rings, segments)
+        base_joint = cmds.joint(name='L_headEyelid_base_BND_JNT', position=(0.0, 0.0, 0.0))
+        component = EyelidComponent(base_joint)
+        print('Sphere {0}x{1}, {2} vertices, upper lid loop of {3}'.format(rings, segments, fake_maya.scene.componentCount(fake_maya.scene.findNode('C_head_GEOShape'), 'vtx'), len(loop)))
+
+        cmds.select(['C_head_GEO.vtx[{0}]'.format(x) for x in loop])
+        fake_maya.scene.calls.clear()
+        legacy_seconds, result = timeIt(legacyGenerateVertexJoints, component, joint_data)
+        legacy_calls = sum(fake_maya.scene.calls.values())
+        legacy_positions = jointPositions(component)
+
+        cmds.select(['C_head_GEO.vtx[{0}]'.format(x) for x in loop])
+        fake_maya.scene.calls.clear()
+        cached_seconds, result = timeIt(utils.generateVertexJoints, component, joint_data)
+        cached_calls = sum(fake_maya.scene.calls.values())
+        assert jointPositions(component) == legacy_positions, 'The cached joint positions don\'t match the legacy ones'
+        print('  selected loop: legacy {0:.1f} ms ({1} calls), cached {2:.1f} ms ({3} calls)'.format(
+            legacy_seconds * 1000, legacy_calls, cached_seconds * 1000, cached_calls))
+
+        # Only some of the joints are left along the lid, nudged off of the mesh, the rest of the loop gets picked.
+        for count in LOOP_JOINTS:
+            keep = [component.joint_dict['upperJoints'][round(i * (len(loop) - 1) / (count - 1))] for i in range(count)]
+            cmds.delete(*[x for x in component.joint_dict['upperJoints'] if x not in keep])
+            for joint in keep:
+                cmds.xform(joint, translation=[x * 1.02 for x in cmds.xform(joint, query=True, translation=True, worldSpace=True)], worldSpace=True)
+            component.joint_dict['upperJoints'] = keep
+            cmds.select(clear=True)
+            fake_maya.scene.calls.clear()
+            picked_seconds, result = timeIt(utils.generateVertexJoints, component, joint_data)
+            assert jointPositions(component) == legacy_positions, 'The picked loop doesn\'t match the selected one'
+            print('  picked from {0} joints: {1:.1f} ms ({2} calls), {3} joints'.format(
+                count, picked_seconds * 1000, sum(fake_maya.scene.calls.values()), len(component.joint_dict['upperJoints'])))
+        print('')
+
+
+if __name__ == '__main__':
+    runVertexJointBenchmark()
@@ -1,19 +1,24 @@
 import os
-import sys
 import json
 import yaml
-import inspect
 import copy
-import importlib.util
+import glob
+import pickle
+import hashlib
 from abc import ABC, abstractmethod
 
 from . import constants
 from . import graph_utils
+from . import module_registry
+from . import json_stream
+from . import driven_keys
+from . import bind_positions
 
 class BaseController(ABC):
 
     def __init__(self):
         constants.DEFAULT_CURVE_TEMPLATES = self.loadJSON(constants.CURVE_TEMPLATES_PATH)
+        self.moduleRegistry = None
         return
 
     @property
@@ -114,36 +119,90 @@ class BaseController(ABC):
     def importModules(self, template_path):
         self.components = []
         self.loadedBlueprints = {}
-        module_files = os.listdir(self.modulePath)
         blueprint_files = os.listdir(constants.BLUEPRINTS_PATH)
-        templates = self.loadYaml(template_path)
-        self.unrollBlueprints(templates, blueprint_files)
-        self.hookUpBlueprintComponents(templates)
-        default_attrs = self.loadYaml(constants.DEFAULT_ATTRS_PATH)
-        for file in module_files:
-            if os.path.splitext(file)[1] != '.py' or file == '__init__.py':
-                continue
-            # First, import the file in the module path. I forget how we did it at brazen, so here I basically just
-            # have to recreate the whole import chain (as in, I can't do any relative import stuff here.)
-            # This is probably way overcomplicated.  Also it breaks importlib so if anyone knows how to avoid that lmk.
+        cache_key = self.getTemplateCacheKey(template_path, blueprint_files)
+        cached_data = self.loadTemplateCache(template_path, cache_key)
+        if cached_data:
+            templates = cached_data['templates']
+            default_attrs = cached_data['defaultAttrs']
+            self.loadedBlueprints = cached_data['loadedBlueprints']
+        else:
+            templates = self.loadYaml(template_path)
+            self.unrollBlueprints(templates, blueprint_files)
+            self.hookUpBlueprintComponents(templates)
+            default_attrs = self.loadYaml(constants.DEFAULT_ATTRS_PATH)
+        registry = self.getModuleRegistry()
+        for name, data in templates.items():
+            # Blueprint entries won't have a class, they've already been unrolled into their components.
+            component_class = registry.getClass(data['componentType'])
+            if component_class:
+                self.components.append(component_class.loadFromDict(name, data, default_attrs))
+
+        # "loadFromDict()" fills the default attrs into the template data, so what we cache is fully resolved.
+        if not cached_data:
+            self.saveTemplateCache(template_path, cache_key, {
+                'templates': templates,
+                'defaultAttrs': default_attrs,
+                'loadedBlueprints': self.loadedBlueprints
+            })
+
+    def getModuleRegistry(self):
+        if self.moduleRegistry is None or self.moduleRegistry.modulePath != self.modulePath:
+            # The module files have to be imported with their full package name so their relative imports work.
+            # I forget how we did it at brazen, so here I basically just have to recreate the whole import chain.
             src_module_name = __name__.rsplit('.', 1)[0]
             dcc_code_root = os.path.splitext(os.path.basename(self.dccPath))[0]
             module_code_root = os.path.splitext(os.path.basename(self.modulePath))[0]
-            file_base_name = os.path.splitext(file)[0]
-            python_module_name = '{0}.{1}.{2}.{3}'.format(src_module_name, dcc_code_root, module_code_root, file_base_name)
-            spec = importlib.util.spec_from_file_location(python_module_name, os.path.join(self.modulePath, file))
-            module = importlib.util.module_from_spec(spec)
-            sys.modules[python_module_name] = module
-            spec.loader.exec_module(module)
-
-            # Then, find the class in that file
-            members = inspect.getmembers(module)
-            for name, obj in members:
-                if inspect.isclass(obj):
-                    for name, data in templates.items():
-                        if data['componentType'] == obj.__name__:
-                            self.components.append(obj.loadFromDict(name, data, default_attrs))
-                            continue
+            python_package = '{0}.{1}.{2}'.format(src_module_name, dcc_code_root, module_code_root)
+            self.moduleRegistry = module_registry.ModuleRegistry(self.modulePath, python_package)
+        # Only files that changed since the last load get looked at again.
+        self.moduleRegistry.scan()
+        return self.moduleRegistry
+
+    # The cache key is a hash of everything that goes into resolving a template: the template itself, every
+    # blueprint it could pull in, and the default attrs.  If any of them change, the key changes.
+    def getTemplateCacheKey(self, template_path, blueprint_files):
+        hasher = hashlib.sha1()
+        hasher.update(str(constants.TEMPLATE_CACHE_VERSION).encode())
+        input_files = [template_path, constants.DEFAULT_ATTRS_PATH]
+        input_files += [os.path.join(constants.BLUEPRINTS_PATH, file) for file in sorted(blueprint_files)]
+        for path in input_files:
+            hasher.update(os.path.basename(path).encode())
+            with open(path, 'rb') as file:
+                hasher.update(hashlib.sha1(file.read()).digest())
+        return hasher.hexdigest()
+
+    def getTemplateCachePath(self, template_path, cache_key):
+        template_name = os.path.splitext(os.path.basename(template_path))[0]
+        return os.path.join(constants.TEMPLATE_CACHE_PATH, '{0}_{1}.pickle'.format(template_name, cache_key))
+
+    def loadTemplateCache(self, template_path, cache_key):
+        cache_path = self.getTemplateCachePath(template_path, cache_key)
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as file:
+                return pickle.load(file)
+        except Exception:
+            constants.RIGGER_LOG.info('Template cache {0} could not be read, reloading {1} from scratch.'.format(cache_path, template_path))
+            return None
+
+    def saveTemplateCache(self, template_path, cache_key, data):
+        cache_path = self.getTemplateCachePath(template_path, cache_key)
+        template_name = os.path.splitext(os.path.basename(template_path))[0]
+        try:
+            os.makedirs(constants.TEMPLATE_CACHE_PATH, exist_ok=True)
+            # Clear out anything cached for older versions of this template.
+            for old_cache in glob.glob(os.path.join(constants.TEMPLATE_CACHE_PATH, '{0}_*.pickle'.format(glob.escape(template_name)))):
+                if os.path.basename(old_cache)[len(template_name) + 1:-len('.pickle')].isalnum():
+                    os.remove(old_cache)
+            # Write to a temp file first so a half written cache never gets picked up.
+            temp_path = '{0}.tmp'.format(cache_path)
+            with open(temp_path, 'wb') as file:
+                pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except (IOError, OSError, pickle.PicklingError):
+            constants.RIGGER_LOG.warning('Could not write template cache {0}.'.format(cache_path))
 
 
     # If the component type of a component in the templates file matches a blueprint type, then we load the blueprint
@@ -215,15 +274,53 @@ class BaseController(ABC):
 
             
 
+    # A hash of everything a component's rig gets built from: its resolved template data and its saved positions.  If
+    # it's the same as last time, building the component again would make the same thing.
+    def getComponentFingerprint(self, component):
+        component_key = '{0}_{1}'.format(component.prefix, component.name)
+        data = {
+            'componentType': type(component).__name__,
+            'children': component.children,
+            'controls': component.controls,
+            'componentVars': component.componentVars,
+            'inputAttrs': component.inputAttrs,
+            'outputAttrs': component.outputAttrs,
+            'bindGeometry': component.geomData,
+            'positions': self.bindPositionData.get(component_key),
+        }
+        return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+    # A hash of the saved control data a component gets.  That's only applied once the control rigs are made, so it's
+    # kept apart from the rest of the fingerprint, and there might not be any loaded at all.
+    def getControlDataFingerprint(self, component):
+        component_key = '{0}_{1}'.format(component.prefix, component.name)
+        data = [self.controlsData.get(key, {}).get(component_key) for key in constants.CONTROL_DATA_KEYS]
+        return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
     def importBindJointPositions(self, positions_path):
         if not self.components:
             constants.RIGGER_LOG.warning('No modules loaded, please load a template first!')
-        self.bindPositionData = self.loadJSON(positions_path)
+        self.bindPositionData = bind_positions.loadPositions(positions_path)
 
     def importControlData(self, control_data_path):
         if not self.components:
             constants.RIGGER_LOG.warning('No modules loaded, please load a template first!')
-        self.controlsData = self.loadJSON(control_data_path)
+        self.controlsData = self.loadControlData(control_data_path)
+
+    def loadControlData(self, control_data_path):
+        try:
+            controls_data = self.loadJSON(control_data_path)
+        except json.JSONDecodeError:
+            # Most likely a save that got cut off, get back whatever made it to disk.  Each component is an item
+            # inside the curves/driven keys/attributes objects.
+            controls_data = json_stream.recoverJSON(control_data_path, itemDepth=2)
+        for key in constants.CONTROL_DATA_KEYS:
+            controls_data.setdefault(key, {})
+        # Files saved before the driven keys went columnar get converted as they're loaded.
+        driven_keys_data = controls_data[constants.CONTROL_DATA_KEYS.drivenKeys]
+        for component, data in driven_keys_data.items():
+            driven_keys_data[component] = driven_keys.toColumnar(data)
+        return controls_data
 
     @abstractmethod
     def saveBindJointPositions(self, positions_path):
@@ -252,6 +349,12 @@ class BaseController(ABC):
             templates = yaml.safe_load(file)
         return templates
     
+    # Resolves a child entry from a component's "children" list to the loaded components it refers to.
+    def findChildComponents(self, child):
+        if self.componentGraph is None:
+            self.buildComponentGraph()
+        return self.componentGraph.registry.findComponents(child['childName'], child['childPrefix'])
+
     def isComponent(self, cName, cPrefix, checkNodeData):
         if cName == checkNodeData.name and checkNodeData.prefix in cPrefix:
             return True
@@ -0,0 +1,251 @@
+import os
+import math
+import json
+from array import array
+
+# Saved bind joint positions.  A snapshot keeps every node's values in one flat array, "len(attrs)" values per node,
+# with NaN standing in for attrs the node doesn't have (only joints have a radius).
+#
+# The snapshot file is plain text so it diffs well in version control, one node per line in a fixed order:
+#
+#   crig positions 1
+#   attrs translateX translateY translateZ rotateX rotateY rotateZ scaleX scaleY scaleZ radius
+#   component L_armupper
+#   L_armupper_shoulder_BND_JNT 12.5 140.0 -1.25 0.0 0.0 -42.0 1.0 1.0 1.0 0.5
+#
+# Values are written so they read back exactly, and "-" is an attr the node doesn't have.  The attrs line is what the
+# columns are, so files saved with different attrs still load and diff against each other by attr name.
+SNAPSHOT_HEADER = 'crig positions'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_EXTENSION = '.crpos'
+# Live positions keep the snapshot as it was when they started, and append every node that's moved since to a journal
+# next to it, "positions.crjournal" for "positions.crpos".  A journal line is the whole row for one node, so the last
+# line for a node is where it is, and a line that was only half written when maya went down gets skipped:
+#
+#   crig positions journal 1
+#   attrs translateX translateY translateZ rotateX rotateY rotateZ scaleX scaleY scaleZ radius
+#   L_armupper L_armupper_shoulder_BND_JNT 12.5 141.0 -1.25 0.0 0.0 -42.0 1.0 1.0 1.0 0.5
+JOURNAL_HEADER = 'crig positions journal'
+JOURNAL_VERSION = 1
+JOURNAL_EXTENSION = '.crjournal'
+# constants.POSITION_SAVE_ATTRS in the order they're stored.
+ATTRS = ['translateX', 'translateY', 'translateZ', 'rotateX', 'rotateY', 'rotateZ', 'scaleX', 'scaleY', 'scaleZ', 'radius']
+MISSING = '-'
+
+
+class PositionSnapshotError(Exception):
+    pass
+
+
+class PositionSnapshot():
+
+    def __init__(self, attrs=None):
+        self.attrs = list(attrs or ATTRS)
+        # component -> (first node, node count), in the order they were added.
+        self.components = {}
+        self.nodes = []
+        self.values = array('d')
+
+    @property
+    def nodeCount(self):
+        return len(self.nodes)
+
+    # "values" is flat, "len(self.attrs)" per node.
+    def addComponent(self, component, nodes, values):
+        if len(values) != len(nodes) * len(self.attrs):
+            raise PositionSnapshotError('{0} has {1} values for {2} nodes'.format(component, len(values), len(nodes)))
+        self.components[component] = (len(self.nodes), len(nodes))
+        self.nodes.extend(nodes)
+        self.values.extend(values)
+
+    # {node: {attr: value}} for one component, the attrs a node doesn't have are left out.
+    def getComponent(self, component):
+        start, count = self.components[component]
+        stride = len(self.attrs)
+        nodes = {}
+        for i in range(start, start + count):
+            row = self.values[i * stride:(i + 1) * stride]
+            nodes[self.nodes[i]] = { attr: value for attr, value in zip(self.attrs, row) if not math.isnan(value) }
+        return nodes
+
+    # The {component: {node: {attr: value}}} dict the JSON positions files hold.
+    def toDict(self):
+        return { component: self.getComponent(component) for component in self.components }
+
+    @classmethod
+    def fromDict(cls, data, attrs=None):
+        snapshot = cls(attrs)
+        for component, nodes in data.items():
+            values = array('d')
+            for attrs_dict in nodes.values():
+                values.extend(float(attrs_dict.get(attr, math.nan)) for attr in snapshot.attrs)
+            snapshot.addComponent(component, list(nodes), values)
+        return snapshot
+
+    # (component, node) -> where that node's row starts in "values".
+    def getRowIndex(self):
+        stride = len(self.attrs)
+        index = {}
+        for component, (start, count) in self.components.items():
+            for i in range(start, start + count):
+                index[(component, self.nodes[i])] = i * stride
+        return index
+
+    # (component, [(node, values)]) for each component, sorted by name so saves of the same rig line up.
+    def rows(self):
+        stride = len(self.attrs)
+        for component in sorted(self.components):
+            start, count = self.components[component]
+            yield component, sorted(((self.nodes[i], self.values[i * stride:(i + 1) * stride]) for i in range(start, start + count)), key=lambda x: x[0])
+
+    # Written to a temporary file first, so the one that's there is never left half written.
+    def write(self, path):
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write('{0} {1}\n'.format(SNAPSHOT_HEADER, SNAPSHOT_VERSION))
+            f.write('attrs {0}\n'.format(' '.join(self.attrs)))
+            for component, rows in self.rows():
+                f.write('component {0}\n'.format(component))
+                for node, row in rows:
+                    f.write('{0} {1}\n'.format(node, formatRow(row)))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def read(cls, path):
+        with open(path, 'r') as f:
+            header = f.readline().split()
+            if ' '.join(header[:-1]) != SNAPSHOT_HEADER or not header[-1].isdigit():
+                raise PositionSnapshotError('{0} isn\'t a positions snapshot'.format(path))
+            if int(header[-1]) > SNAPSHOT_VERSION:
+                raise PositionSnapshotError('{0} is snapshot version {1}, this only reads up to {2}'.format(path, header[-1], SNAPSHOT_VERSION))
+            attrs = f.readline().split()[1:]
+            snapshot = cls(attrs)
+            component = None
+            nodes = []
+            values = array('d')
+            for line in f:
+                parts = line.split()
+                if not parts:
+                    continue
+                if parts[0] == 'component':
+                    if component is not None:
+                        snapshot.addComponent(component, nodes, values)
+                    component = parts[1]
+                    nodes = []
+                    values = array('d')
+                    continue
+                nodes.append(parts[0])
+                values.extend(parseRow(parts[1:]))
+            if component is not None:
+                snapshot.addComponent(component, nodes, values)
+        return snapshot
+
+    # [(component, node, attr, this value, other value)] for everything that's different between the two, with None
+    # for values that are only in one of them.  Matched up by name, so the attrs don't have to be in the same order.
+    def diff(self, other, tolerance=1e-6):
+        changes = []
+        mine = self.toDict()
+        theirs = other.toDict()
+        for component in sorted(set(mine) | set(theirs)):
+            my_nodes = mine.get(component, {})
+            their_nodes = theirs.get(component, {})
+            for node in sorted(set(my_nodes) | set(their_nodes)):
+                my_attrs = my_nodes.get(node, {})
+                their_attrs = their_nodes.get(node, {})
+                for attr in sorted(set(my_attrs) | set(their_attrs)):
+                    a = my_attrs.get(attr)
+                    b = their_attrs.get(attr)
+                    if a is None or b is None or abs(a - b) > tolerance:
+                        changes.append((component, node, attr, a, b))
+        return changes
+
+
+class PositionJournal():
+
+    def __init__(self, path, attrs=None):
+        self.path = path
+        self.attrs = list(attrs or ATTRS)
+        self.file = None
+
+    # Starts a new journal, throwing away whatever was in the old one.
+    def open(self):
+        self.file = open(self.path, 'w')
+        self.file.write('{0} {1}\n'.format(JOURNAL_HEADER, JOURNAL_VERSION))
+        self.file.write('attrs {0}\n'.format(' '.join(self.attrs)))
+        self.sync()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    # [(component, node, values)] in one write.  Flushed straight away so maya going down doesn't lose them, "sync"
+    # makes sure they're on the disk too.
+    def append(self, rows, sync=False):
+        self.file.write(''.join('{0} {1} {2}\n'.format(component, node, formatRow(values)) for component, node, values in rows))
+        if sync:
+            self.sync()
+        else:
+            self.file.flush()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    # (attrs, [(component, node, values)]) in the order they were written.
+    @classmethod
+    def read(cls, path):
+        with open(path, 'r') as f:
+            header = f.readline().split()
+            if ' '.join(header[:-1]) != JOURNAL_HEADER or not header[-1].isdigit():
+                raise PositionSnapshotError('{0} isn\'t a positions journal'.format(path))
+            if int(header[-1]) > JOURNAL_VERSION:
+                raise PositionSnapshotError('{0} is journal version {1}, this only reads up to {2}'.format(path, header[-1], JOURNAL_VERSION))
+            attrs = f.readline().split()[1:]
+            rows = []
+            for line in f:
+                parts = line.split()
+                # The last line can be cut short if maya went down while it was being written.
+                if len(parts) != len(attrs) + 2 or not line.endswith('\n'):
+                    continue
+                try:
+                    rows.append((parts[0], parts[1], array('d', parseRow(parts[2:]))))
+                except ValueError:
+                    continue
+        return attrs, rows
+
+
+def formatRow(values):
+    return ' '.join(MISSING if math.isnan(x) else repr(x) for x in values)
+
+
+def parseRow(parts):
+    return [math.nan if x == MISSING else float(x) for x in parts]
+
+
+def isSnapshotFile(path):
+    return path.lower().endswith(SNAPSHOT_EXTENSION)
+
+
+def journalPath(path):
+    return os.path.splitext(path)[0] + JOURNAL_EXTENSION
+
+
+# The journal's rows put over the {component: {node: {attr: value}}} dict, later rows winning.
+def replayJournal(path, data):
+    attrs, rows = PositionJournal.read(path)
+    for component, node, values in rows:
+        data.setdefault(component, {})[node] = { attr: value for attr, value in zip(attrs, values) if not math.isnan(value) }
+    return data
+
+
+# Saved positions from either kind of file, as the {component: {node: {attr: value}}} dict.  A snapshot with a
+# journal next to it comes back with the journal replayed over it.
+def loadPositions(path):
+    if isSnapshotFile(path):
+        data = PositionSnapshot.read(path).toDict()
+        if os.path.exists(journalPath(path)):
+            replayJournal(journalPath(path), data)
+        return data
+    with open(path, 'r') as f:
+        return json.load(f)
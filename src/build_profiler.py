@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import collections
+from contextlib import contextmanager
+
+from . import constants
+
+SUMMARY_ROW = '  {0:<48} {1:>10} {2:>8} {3:>8}  {4}'
+
+
+class ProfileEntry():
+    __slots__ = ('seconds', 'runs', 'commands', 'nodes', 'info')
+
+    def __init__(self, info=None):
+        self.seconds = 0.0
+        self.runs = 0
+        self.commands = collections.Counter()
+        self.nodes = 0
+        self.info = info or {}
+
+    def toDict(self):
+        data = dict(self.info)
+        data.update({
+            'seconds': self.seconds,
+            'runs': self.runs,
+            'commandCount': sum(self.commands.values()),
+            'commands': dict(self.commands.most_common()),
+            'nodesCreated': self.nodes,
+        })
+        return data
+
+
+# Times each phase of a build, and each component inside of a phase, along with how many commands they ran and how
+# many nodes they made.  It doesn't know anything about maya, whatever's running the build hands it:
+#   commandCounts - a Counter of command name -> calls that gets added to as commands are run
+#   nodeCount - a function that returns how many nodes have been made so far
+# Either can be left out, in which case only the timings get recorded.
+class BuildProfiler():
+
+    def __init__(self, commandCounts=None, nodeCount=None):
+        self.commandCounts = commandCounts
+        self.nodeCount = nodeCount
+        # name -> ProfileEntry, in the order they first ran.
+        self.phases = collections.OrderedDict()
+        self.components = collections.OrderedDict()
+        self.currentPhase = None
+        # name -> number, anything else the build wants to report (like cache hits).
+        self.counters = collections.OrderedDict()
+        self.started = time.time()
+        # Where whatever's running the build wants the report written.
+        self.reportPath = None
+
+    def snapshot(self):
+        commands = collections.Counter(self.commandCounts) if self.commandCounts is not None else collections.Counter()
+        nodes = self.nodeCount() if self.nodeCount is not None else 0
+        return time.perf_counter(), commands, nodes
+
+    def record(self, entry, before):
+        after = self.snapshot()
+        entry.seconds += after[0] - before[0]
+        entry.runs += 1
+        entry.commands.update(after[1] - before[1])
+        entry.nodes += after[2] - before[2]
+
+    @contextmanager
+    def phase(self, name):
+        entry = self.phases.setdefault(name, ProfileEntry())
+        outer_phase = self.currentPhase
+        self.currentPhase = name
+        before = self.snapshot()
+        try:
+            yield entry
+        finally:
+            self.record(entry, before)
+            self.currentPhase = outer_phase
+
+    # Components are kept per phase, so making the bind joints and making the control rig show up separately.
+    @contextmanager
+    def component(self, component):
+        name = '{0}_{1}'.format(component.prefix, component.name)
+        key = '{0}:{1}'.format(self.currentPhase, name) if self.currentPhase else name
+        info = {'component': name, 'componentType': type(component).__name__, 'phase': self.currentPhase}
+        entry = self.components.setdefault(key, ProfileEntry(info))
+        before = self.snapshot()
+        try:
+            yield entry
+        finally:
+            self.record(entry, before)
+
+    def addCounter(self, name, value):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    # componentType -> ProfileEntry, everything each kind of component cost added together.
+    def componentTypeTotals(self):
+        totals = collections.OrderedDict()
+        for entry in self.components.values():
+            total = totals.setdefault(entry.info['componentType'], ProfileEntry({'componentType': entry.info['componentType']}))
+            total.seconds += entry.seconds
+            total.runs += entry.runs
+            total.commands.update(entry.commands)
+            total.nodes += entry.nodes
+        return totals
+
+    def toDict(self):
+        by_time = lambda entries: sorted(entries, key=lambda x: -x.seconds)
+        return {
+            'started': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started)),
+            'totalSeconds': sum(x.seconds for x in self.phases.values()),
+            'phases': [dict(x.toDict(), phase=name) for name, x in self.phases.items()],
+            'components': [x.toDict() for x in by_time(self.components.values())],
+            'componentTypes': [x.toDict() for x in by_time(self.componentTypeTotals().values())],
+            'counters': dict(self.counters),
+        }
+
+    def writeReport(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(path, 'w') as f:
+            json.dump(self.toDict(), f, indent=4)
+
+    # Phases in the order they ran, then the slowest components and component types.
+    def summary(self, top=15):
+        lines = ['Build profile: {0:.1f} ms'.format(sum(x.seconds for x in self.phases.values()) * 1000)]
+        sections = [
+            ('phase', self.phases.items()),
+            ('component', sorted(self.components.items(), key=lambda x: -x[1].seconds)[:top]),
+            ('component type', sorted(self.componentTypeTotals().items(), key=lambda x: -x[1].seconds)),
+        ]
+        for title, entries in sections:
+            lines.append(SUMMARY_ROW.format(title, 'ms', 'commands', 'nodes', 'most run'))
+            for name, entry in entries:
+                most_run = ', '.join('{0} {1}'.format(k, v) for k, v in entry.commands.most_common(3))
+                lines.append(SUMMARY_ROW.format(name, '{0:.1f}'.format(entry.seconds * 1000), sum(entry.commands.values()), entry.nodes, most_run))
+        if self.counters:
+            lines.append('  ' + ', '.join('{0} {1}'.format(k, v) for k, v in self.counters.items()))
+        return '\n'.join(lines)
+
+    def logSummary(self, top=15):
+        constants.RIGGER_LOG.info(self.summary(top))
+
+
+# Stands in for a BuildProfiler when profiling is off, so the build doesn't have to check before every phase.
+class NullProfiler():
+
+    @contextmanager
+    def phase(self, name):
+        yield None
+
+    @contextmanager
+    def component(self, component):
+        yield None
+
+    def addCounter(self, name, value):
+        pass
+
+
+def defaultReportPath():
+    return os.path.join(constants.BUILD_PROFILE_PATH, 'build_profile_{0}.json'.format(time.strftime('%Y%m%d_%H%M%S')))
@@ -14,6 +14,24 @@ SKIN_DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '
 DEFAULT_ATTRS_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'defaults', 'default_attrs.yaml'))
 CURVE_TEMPLATES_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'defaults', 'curve_data.json'))
 PREV_RIG_DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'previous_rig_paths.json'))
+SKIN_WEIGHTS_EXTENSION = '.skw'
+TEMPLATE_CACHE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'cache'))
+SYMMETRY_CACHE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'symmetry'))
+BUILD_PROFILE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'profiles'))
+
+# Bump this if the way templates get resolved changes, so old cache files get ignored.
+TEMPLATE_CACHE_VERSION = 1
+
+# Set this to have control data and JSON skin weights saved indented, the same as the other data files.
+PRETTY_JSON_ENV = 'CRIG_PRETTY_JSON'
+
+# Component builds queue up their node creation/connections/attribute sets and run them through one modifier per
+# component.  Set this to 0 to have every command run as it's called instead.
+BATCH_COMMANDS_ENV = 'CRIG_BATCH_COMMANDS'
+
+# Set this to have "generateLocs"/"generateJoints" time every build phase and component, log the slowest ones and
+# write a JSON report to data/profiles.  Set it to a .json path to have the report written there instead.
+BUILD_PROFILE_ENV = 'CRIG_BUILD_PROFILE'
 
 # Is this overcomplicated for a single switch statement in "maya_controller.py"? Yes. But I miss C
 # (Also it feels weird for the valid inputs for the "connectionType" field in the component dict to not be stated somewhere)
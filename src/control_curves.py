@@ -0,0 +1,64 @@
+from array import array
+
+# Saved control curve shapes for one component, packed into flat arrays when they're first needed so putting them back
+# on the controls doesn't go through the JSON lists again.  Curve i's points are the "pointCounts[i]" xyz triples
+# starting at "pointStarts[i]" in "points", and its knots are the "knotCounts[i]" values starting at "knotStarts[i]".
+class ControlCurveTable():
+
+    def __init__(self, names, pointCount, knotCount):
+        self.names = list(names)
+        # name -> curve index
+        self.indices = { x: i for i, x in enumerate(self.names) }
+        self.points = array('d', [0.0]) * (pointCount * 3)
+        self.knots = array('d', [0.0]) * knotCount
+        self.pointStarts = array('I', [0]) * len(self.names)
+        self.pointCounts = array('I', [0]) * len(self.names)
+        self.knotStarts = array('I', [0]) * len(self.names)
+        self.knotCounts = array('I', [0]) * len(self.names)
+
+    @property
+    def curveCount(self):
+        return len(self.names)
+
+    # The same {name: {'points': [[x, y, z], ...], 'knots': [...]}} dict getCurveData() gives for each curve.
+    @classmethod
+    def fromDict(cls, data):
+        table = cls(data, sum(len(x['points']) for x in data.values()), sum(len(x['knots']) for x in data.values()))
+        point_start = 0
+        knot_start = 0
+        for i, name in enumerate(table.names):
+            points = data[name]['points']
+            knots = data[name]['knots']
+            table.pointStarts[i] = point_start
+            table.pointCounts[i] = len(points)
+            table.knotStarts[i] = knot_start
+            table.knotCounts[i] = len(knots)
+            for j, point in enumerate(points):
+                offset = (point_start + j) * 3
+                table.points[offset:offset + 3] = array('d', point[:3])
+            table.knots[knot_start:knot_start + len(knots)] = array('d', knots)
+            point_start += len(points)
+            knot_start += len(knots)
+        return table
+
+    # Curve i's points as a flat [x, y, z, x, y, z, ...] array.
+    def getPoints(self, i):
+        start = self.pointStarts[i] * 3
+        return self.points[start:start + self.pointCounts[i] * 3]
+
+    def getKnots(self, i):
+        start = self.knotStarts[i]
+        return self.knots[start:start + self.knotCounts[i]]
+
+    # Whether curve i already has these points (flat, like getPoints()) and knots.
+    def matches(self, i, points, knots, tolerance=1e-6):
+        if len(points) != self.pointCounts[i] * 3 or len(knots) != self.knotCounts[i]:
+            return False
+        saved_points = self.getPoints(i)
+        saved_knots = self.getKnots(i)
+        # Shapes that were set from this table come back exactly the same, only check the tolerance if they don't.
+        if saved_points == array('d', points) and saved_knots == array('d', knots):
+            return True
+        if any(abs(a - b) > tolerance for a, b in zip(saved_points, points)):
+            return False
+        return not any(abs(a - b) > tolerance for a, b in zip(saved_knots, knots))
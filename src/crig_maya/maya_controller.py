@@ -1,9 +1,12 @@
-import maya.cmds as cmds
-import maya.mel as mel
+import os
+import math
+import collections
+from contextlib import contextmanager
 import maya.api.OpenMaya as om2
 
-from .utilities import python_utils
-from .. import base_controller, constants, graph_utils
+from .utilities import python_utils, maya_skin_backend, control_curve_apply, driven_key_replay, driven_key_resolver, node_handle_cache, position_snapshot, scene_harvest
+from .utilities.command_batch import cmds
+from .. import base_controller, bind_positions, build_profiler, constants, control_curves, driven_keys, graph_utils, json_stream, skin_weights
 
 class MayaController(base_controller.BaseController):
 
@@ -16,7 +19,26 @@ class MayaController(base_controller.BaseController):
         self._componentGraph = None
         self._bindPositionData = {}
         self._controlsData = {}
+        self.controlCurveTables = {}
+        self.controlsDataPath = None
+        self.nodeHandleStats = {}
+        self.livePositions = None
         self._utils = python_utils
+        self.skinBackend = maya_skin_backend.MayaSkinBackend()
+        self.prettyJSON = bool(os.environ.get(constants.PRETTY_JSON_ENV))
+        self.batchCommands = os.environ.get(constants.BATCH_COMMANDS_ENV, '1') != '0'
+        profile_setting = os.environ.get(constants.BUILD_PROFILE_ENV, '')
+        self.profileBuild = profile_setting not in ['', '0']
+        self.buildProfilePath = profile_setting if profile_setting.endswith('.json') else None
+        self.buildProfiler = build_profiler.NullProfiler()
+        # The profile "generateLocs" started, so "generateJoints" can add to it.
+        self.openBuildProfile = None
+        self.nodesCreated = 0
+        # full name -> the component that's in the scene, the fingerprint of what it was built from, and the fingerprint
+        # of the control data that was applied to it.
+        self.builtComponents = {}
+        self.builtFingerprints = {}
+        self.builtControlFingerprints = {}
 
     @property
     def modulePath(self):
@@ -68,11 +90,16 @@ class MayaController(base_controller.BaseController):
 
     @property
     def controlsData(self):
+        # Saving the control data doesn't keep it all in memory, it gets read back from the file when it's needed.
+        if self._controlsData is None:
+            self._controlsData = self.loadControlData(self.controlsDataPath)
         return self._controlsData
     
     @controlsData.setter
     def controlsData(self, c):
         self._controlsData = c
+        # component -> ControlCurveTable, packed from the curve data the first time it gets applied.
+        self.controlCurveTables = {}
 
     @property
     def utils(self):
@@ -83,64 +110,235 @@ class MayaController(base_controller.BaseController):
         self._utils = u
 
     def generateLocs(self):
-        # First, have the modules generate their bind/location joints.
-        iter = graph_utils.ComponentGraphIterator()
-        iter.breadthFirstIteration(self.componentGraph, self.callCreateBindJoints)
-
-        # Then, set those joints to the saved positions (if any)
+        with self.profiledBuildStep(startsBuild=True, endsBuild=False) as profiler, self.cachedNodeHandles(profiler):
+            # What's about to be built is what "rebuildChangedComponents()" compares against later.
+            self.builtComponents = {component.getFullName(): component for component in self.components}
+            self.builtFingerprints = {name: self.getComponentFingerprint(component) for name, component in self.builtComponents.items()}
+            # Filled in as the control data gets applied, after the control rigs are made.
+            self.builtControlFingerprints = {}
+
+            # First, have the modules generate their bind/location joints.
+            with profiler.phase('createBindJoints'):
+                iter = graph_utils.ComponentGraphIterator()
+                iter.breadthFirstIteration(self.componentGraph, self.callCreateBindJoints)
+
+            # Then, set those joints to the saved positions (if any)
+            with profiler.phase('setSavedPositions'):
+                self.setSavedPositions()
+            # Whatever was being watched before is gone now, the new bind joints are what get watched.
+            if self.livePositions is not None:
+                self.startLivePositions(self.livePositions.path)
+
+    # Every saved position for the given components (all of them by default) goes back on in one restore, and whatever
+    # couldn't be found or set gets one summary line instead of a line per attr.
+    def setSavedPositions(self, components=None):
+        positions = {}
         for component, data in self.bindPositionData.items():
-            python_utils.setNodesFromDict(data)
+            if components is None or component in components:
+                positions.update(data)
+        restored, missing, blocked = position_snapshot.restorePositions(positions)
+        constants.RIGGER_LOG.info('Saved positions: {0} nodes set, {1} not in the scene, {2} attrs couldn\'t be set.'.format(restored, len(missing), len(blocked)))
+        if missing:
+            constants.RIGGER_LOG.info('Saved positions for nodes not in the scene: {0}'.format(', '.join(sorted(missing))))
+        if blocked:
+            constants.RIGGER_LOG.info('Saved positions that could not be set: {0}'.format(', '.join(sorted(blocked))))
 
     def callCreateBindJoints(self, component):
-        # Create all the basic groups components are assumed to have.
-        component.generateComponentBase()
-        # Create individual bind joints.
-        component.createBindJoints()
-        # We have to initialize the components input/output custom attrs so they can be connected later, even if the component rig hasn't been created yet.
-        component.initializeInputandoutputAttrs()
+        with self.buildProfiler.component(component), self.trackComponentNodes(component):
+            # Create all the basic groups components are assumed to have.
+            component.generateComponentBase()
+            # Create individual bind joints.
+            component.createBindJoints()
+            # We have to initialize the components input/output custom attrs so they can be connected later, even if the component rig hasn't been created yet.
+            component.initializeInputandoutputAttrs()
 
     def generateJoints(self):
-        #We generate and connect the control rigs from the root down to ensure that
-        #Parents are always created before we connect them to their children.  Otherwise,
-        #the data won't be there when the child components are created which will mess up
-        #any intended offsets in the child components.
-        #
-        #The parent/child relationships are defined in the template.
-        iter = graph_utils.ComponentGraphIterator()
-        iter.breadthFirstIteration(self.componentGraph, self.callControlRigAndConnect)
-
+        with self.profiledBuildStep(startsBuild=False, endsBuild=True) as profiler, self.cachedNodeHandles(profiler):
+            #We generate and connect the control rigs from the root down to ensure that
+            #Parents are always created before we connect them to their children.  Otherwise,
+            #the data won't be there when the child components are created which will mess up
+            #any intended offsets in the child components.
+            #
+            #The parent/child relationships are defined in the template.
+            with profiler.phase('createControlRigs'):
+                iter = graph_utils.ComponentGraphIterator()
+                iter.breadthFirstIteration(self.componentGraph, self.callControlRigAndConnect)
+
+            self.finishComponents(profiler)
+
+    # Everything that runs after the control rigs are made.  "components" limits it to just those components (and, for
+    # anything done between a parent and its children, just the children in the list).
+    def finishComponents(self, profiler, components=None):
         #After the initial connections are made, if there are any special cases we handle them here.
-        self.handleParentConnections()
+        with profiler.phase('handleParentConnections'):
+            self.handleParentConnections(components)
 
         #Attributes that were just copied between components rather than directly plugged in might not have been
         #initialized properly due to ordering issues.  We re-copy them here in order to make sure they're correct.
-        self.refreshCopiedAttrs()
+        with profiler.phase('refreshCopiedAttrs'):
+            self.refreshCopiedAttrs(components)
 
         #After all the parent-child relationships are propagated properly, loop through again to set up
         #The attribute limits.
-        self.propagateLimits()
+        with profiler.phase('propagateLimits'):
+            self.propagateLimits(components)
 
         #Similarly, we have to wait to hook up any "parent" type attributes until after everyting else is made
         #because otherwise the offsets will be wrong for any bottom-up connections.
-        self.activateParentAttrs()
+        with profiler.phase('activateParentAttrs'):
+            self.activateParentAttrs(components)
 
         #Load in the saved out curve data for the controls (or I guess any curve under the controls )
-        self.updateControlCurves()
+        with profiler.phase('updateControlCurves'):
+            self.updateControlCurves(components)
         #Load the saved out driven key data for the KEY joints
-        self.createDrivenKeys()
+        with profiler.phase('createDrivenKeys'):
+            self.createDrivenKeys(components)
         #Load saved out attrs
-        self.setSavedAttrs()
+        with profiler.phase('setSavedAttrs'):
+            self.setSavedAttrs(components)
+        # Whatever control data was loaded by now is what got applied, which is what "rebuildChangedComponents()"
+        # compares against later.
+        for component in self.filterComponents(self.components, components):
+            self.builtControlFingerprints[component.getFullName()] = self.getControlDataFingerprint(component)
 
         # Handle any special bindings to the geometry.
         # You'd think this would be in the bindSkin function, but it's not.  For reasons.
-        self.handleSpecialBindOps()
+        with profiler.phase('handleSpecialBindOps'):
+            self.handleSpecialBindOps(components)
 
-        self.setControlColors()
+        with profiler.phase('setControlColors'):
+            self.setControlColors(components)
 
 
     def callControlRigAndConnect(self, component):
-        component.createControlRig()
-        self.connectModuleToChildren(component)
+        with self.buildProfiler.component(component), self.trackComponentNodes(component), component.commandBatch(self.batchCommands):
+            component.createControlRig()
+            self.connectModuleToChildren(component)
+
+    # Profiles "generateLocs"/"generateJoints" when "profileBuild" is on.  The report gets written (and the summary
+    # logged) after each step, and "generateJoints" adds on to whatever "generateLocs" started so the last report
+    # covers the whole build.
+    @contextmanager
+    def profiledBuildStep(self, startsBuild, endsBuild):
+        if not self.profileBuild:
+            self.openBuildProfile = None
+            yield self.buildProfiler
+            return
+        if startsBuild or self.openBuildProfile is None:
+            self.nodesCreated = 0
+            self.openBuildProfile = build_profiler.BuildProfiler(collections.Counter(), lambda: self.nodesCreated)
+            self.openBuildProfile.reportPath = self.buildProfilePath or build_profiler.defaultReportPath()
+        profiler = self.openBuildProfile
+        self.buildProfiler = profiler
+        cmds.commandCounts = profiler.commandCounts
+        callback_id = om2.MDGMessage.addNodeAddedCallback(self.countCreatedNode, 'dependNode')
+        try:
+            yield profiler
+        finally:
+            om2.MMessage.removeCallback(callback_id)
+            cmds.commandCounts = None
+            self.buildProfiler = build_profiler.NullProfiler()
+            if endsBuild:
+                self.openBuildProfile = None
+            profiler.writeReport(profiler.reportPath)
+            profiler.logSummary()
+            constants.RIGGER_LOG.info('Build profile written to {0}'.format(profiler.reportPath))
+
+    # Node lookups during a build step go through one NodeHandleCache.  How often it saved a lookup ends up in
+    # "nodeHandleStats" and the build profile.
+    @contextmanager
+    def cachedNodeHandles(self, profiler):
+        with node_handle_cache.cachedNodeHandles() as cache:
+            try:
+                yield cache
+            finally:
+                self.nodeHandleStats = cache.stats()
+                for name, value in self.nodeHandleStats.items():
+                    profiler.addCounter('nodeHandleCache.{0}'.format(name), value)
+
+    def countCreatedNode(self, node, clientData):
+        self.nodesCreated += 1
+
+    # Every node made while this is open gets added to the component's "createdNodes", so "destroy()" can find the
+    # ones that aren't under its groups.
+    @contextmanager
+    def trackComponentNodes(self, component):
+        if component is None:
+            yield
+            return
+        callback_id = om2.MDGMessage.addNodeAddedCallback(lambda node, clientData: component.createdNodes.append(om2.MObjectHandle(node)), 'dependNode')
+        try:
+            yield
+        finally:
+            om2.MMessage.removeCallback(callback_id)
+
+    # Rebuilds just the components whose template data, saved positions or saved control data changed since they were
+    # built, and everything downstream of them.  Whatever changed has to be loaded back in first, same as for a full
+    # build.  Components that are the same keep what's already in the scene.
+    def rebuildChangedComponents(self):
+        if not self.builtComponents:
+            constants.RIGGER_LOG.warning('Nothing has been built yet, generate the bind joints and components first!')
+            return
+        fingerprints = {component.getFullName(): self.getComponentFingerprint(component) for component in self.components}
+        changed = [x for x in self.components if self.builtFingerprints.get(x.getFullName()) != fingerprints[x.getFullName()]
+            or self.builtControlFingerprints.get(x.getFullName()) != self.getControlDataFingerprint(x)]
+        removed = [name for name in self.builtComponents if name not in fingerprints]
+        dirty_names = set(x.getFullName() for x in self.componentGraph.downstreamComponents(changed))
+        if not dirty_names and not removed:
+            constants.RIGGER_LOG.info('No components have changed since the last build.')
+            return
+        constants.RIGGER_LOG.info('Rebuilding {0} of {1} components: {2}'.format(len(dirty_names), len(self.components), ', '.join(sorted(dirty_names))))
+
+        with self.profiledBuildStep(startsBuild=True, endsBuild=True) as profiler, self.cachedNodeHandles(profiler):
+            with profiler.phase('destroyComponents'):
+                for name in removed + sorted(dirty_names):
+                    if name in self.builtComponents:
+                        self.builtComponents[name].destroy()
+
+            # The components that didn't change are swapped back for the ones that built them, since those are the
+            # ones that know what's in the scene.
+            self.components = [x if x.getFullName() in dirty_names else self.builtComponents[x.getFullName()] for x in self.components]
+            self.buildComponentGraph()
+            dirty = set(x for x in self.components if x.getFullName() in dirty_names)
+            iter = graph_utils.ComponentGraphIterator()
+
+            with profiler.phase('createBindJoints'):
+                iter.breadthFirstIteration(self.componentGraph, lambda x: self.callCreateBindJoints(x) if x in dirty else None)
+            with profiler.phase('setSavedPositions'):
+                self.setSavedPositions(dirty_names)
+            if self.livePositions is not None:
+                self.startLivePositions(self.livePositions.path)
+
+            # Parents that weren't rebuilt lost their connections to the children that were, and those have to be
+            # back before the children's control rigs get made.
+            with profiler.phase('reconnectParents'):
+                for component in self.components:
+                    if component not in dirty:
+                        for child in component.children:
+                            self.connectModuleAttrs(child, component, dirty)
+
+            with profiler.phase('createControlRigs'):
+                iter.breadthFirstIteration(self.componentGraph, lambda x: self.callControlRigAndConnect(x) if x in dirty else None)
+
+            self.finishComponents(profiler, dirty)
+
+        self.builtComponents = {component.getFullName(): component for component in self.components}
+        self.builtFingerprints = fingerprints
+        self.builtControlFingerprints = {x: y for x, y in self.builtControlFingerprints.items() if x in fingerprints}
+
+    # Just the components from "found" that are in "components", or all of them if "components" is None.
+    def filterComponents(self, found, components):
+        if components is None:
+            return found
+        return [x for x in found if x in components]
+
+    # Same thing for saved control data, which is keyed by component name.
+    def filterComponentData(self, data, components):
+        if components is None:
+            return data.items()
+        names = set(x.getFullName() for x in components)
+        return [(name, component_data) for name, component_data in data.items() if name in names]
 
 
     # Loads skin data from the bind_skin .json file and binds it to the bind joints
@@ -148,33 +346,38 @@ class MayaController(base_controller.BaseController):
         self.loadSmoothBind(skin_data_path)
 
 
-    def handleParentConnections(self):
+    def handleParentConnections(self, components=None):
         for component in self.components:
             for child in component.children:
-                for ccomponent in self.components:
-                    if self.isComponent(child['childName'], child['childPrefix'], ccomponent):
+                for ccomponent in self.filterComponents(self.findChildComponents(child), components):
+                    with self.trackComponentNodes(ccomponent):
                         self.connectParentLogic(child, ccomponent, component)
 
 
-    def refreshCopiedAttrs(self):
-        for component in self.components:
+    def refreshCopiedAttrs(self, components=None):
+        for component in self.filterComponents(self.components, components):
             component.refreshCopiedAttrs()
 
 
-    def handleSpecialBindOps(self):
-        for component in self.components:
+    def handleSpecialBindOps(self, components=None):
+        for component in self.filterComponents(self.components, components):
             for bind in component.geomData:
                 if bind['bindType'] == 'offsetParentMatrix':
-                    self.offsetParentMatrixBind(component, bind)
+                    with self.trackComponentNodes(component):
+                        self.offsetParentMatrixBind(component, bind)
                 elif bind['bindType'] == 'keepChildPositions':
-                    self.keepChildPositionsBind(component, bind)
+                    with self.trackComponentNodes(component):
+                        self.keepChildPositionsBind(component, bind)
                 else:
                     constants.RIGGER_LOG.error('Unknown component bindGeometry type {0} in component {1}!  I don\'t actually use this for much.'.format(bind['bindType'], component.name))
 
-    def setControlColors(self):
-        controls = cmds.ls('*_CTL_CRV')
+    def setControlColors(self, components=None):
+        if components is None:
+            controls = cmds.ls('*_CTL_CRV')
+        else:
+            controls = [x for component in self.filterComponents(self.components, components) for x in cmds.ls('{0}_*_CTL_CRV'.format(component.getFullName()))]
         for control in controls:
-            prefix, component_name, joint_name, node_purpose, node_type = python_utils.getNodeNameParts(control)
+            prefix = python_utils.getNodeNameParts(control).prefix
             cmds.setAttr('{0}.overrideEnabled'.format(control), 1)
             cmds.setAttr('{0}.overrideRGBColors'.format(control), 1)
             if prefix == 'C':
@@ -204,70 +407,121 @@ class MayaController(base_controller.BaseController):
             cmds.xform(child['name'], worldSpace=True, translation=child['translation'])
 
     def loadSmoothBind(self, skin_data_path):
-        bind_data = self.loadJSON(skin_data_path)
-        for shape, data in bind_data.items():
-            bind_joints = []
-            for vertex, touple in data.items():
-                [bind_joints.append(x[0]) for x in touple if x[0] not in bind_joints and cmds.ls(x[0])]
-            skinCluster = mel.eval('findRelatedSkinCluster ' + shape)
-            if not skinCluster:
-                try:
-                    skinCluster = cmds.skinCluster(bind_joints, shape, name='{0}'.format(shape.split('|')[-1].replace('GEOShape', 'SCLST')), maximumInfluences=3, dropoffRate=7, toSelectedBones=True)[0]
-                except:
-                    constants.RIGGER_LOG.warning('Could not bind skincluster to {0}'.format(shape))
-                    continue
+        with skin_weights.openSkinWeights(skin_data_path) as bind_data:
+            for shape in bind_data.shapes():
+                shape_weights = bind_data.getShape(shape)
+                bind_joints = [x for x in shape_weights.influences if self.skinBackend.exists(x)]
+                skinCluster = self.skinBackend.findSkinCluster(shape)
+                if not skinCluster:
+                    try:
+                        skinCluster = self.skinBackend.createSkinCluster(shape, bind_joints, '{0}'.format(shape.split('|')[-1].replace('GEOShape', 'SCLST')))
+                    except:
+                        constants.RIGGER_LOG.warning('Could not bind skincluster to {0}'.format(shape))
+                        continue
 
-            for vertex, touple in data.items():
-                cmds.skinPercent(skinCluster, vertex, transformValue=[x for x in touple if cmds.ls(x[0])])
+                if self.skinBackend.supportsShape(shape) and self.skinBackend.writeShapeWeights(skinCluster, shape, shape_weights):
+                    continue
+                for i in range(shape_weights.vertexCount):
+                    cmds.skinPercent(skinCluster, shape_weights.getVertexName(i), transformValue=[x for x in shape_weights.getVertexWeights(i) if x[0] in bind_joints])
         return
 
+    # Positions get saved as a snapshot file unless the path asks for the old JSON.  While live positions are on for the
+    # same file, only what's moved since the last save has to be written.
     def saveBindJointPositions(self, positions_path):
-        position_dict = {}
-        for component in self.components:
-            deform_group = component.baseGroups['deform_group']
-            children = cmds.listRelatives(deform_group, allDescendents=True, type='transform')
-            if children:
-                position_dict['{0}_{1}'.format(component.prefix, component.name)] = python_utils.dictionizeAttrs(children, constants.POSITION_SAVE_ATTRS)
-        self.bindPositionData = position_dict
-        self.saveJSON(positions_path, position_dict)
+        if self.livePositions is not None and os.path.abspath(positions_path) == os.path.abspath(self.livePositions.path):
+            self.livePositions.flush(sync=True)
+            for (component, node), values in self.livePositions.changed.items():
+                self.bindPositionData.setdefault(component, {})[node] = { attr: value for attr, value in zip(self.livePositions.snapshot.attrs, values) if not math.isnan(value) }
+            constants.RIGGER_LOG.info('Live positions: {0} nodes moved since live positions started.'.format(len(self.livePositions.changed)))
+            return
+        deform_groups = {'{0}_{1}'.format(x.prefix, x.name): x.baseGroups['deform_group'] for x in self.components}
+        snapshot = position_snapshot.snapshotPositions(deform_groups)
+        self.bindPositionData = snapshot.toDict()
+        if bind_positions.isSnapshotFile(positions_path):
+            snapshot.write(positions_path)
+        else:
+            self.saveJSON(positions_path, self.bindPositionData)
+
+    # Saves the positions to "positions_path" as they are now, then keeps the file up to date as the bind joints get
+    # moved until "stopLivePositions()", so saving is just what moved and maya going down doesn't lose any of it.
+    def startLivePositions(self, positions_path):
+        self.stopLivePositions()
+        if not bind_positions.isSnapshotFile(positions_path):
+            constants.RIGGER_LOG.warning('Live positions need a {0} snapshot file, not {1}.'.format(bind_positions.SNAPSHOT_EXTENSION, positions_path))
+            return
+        deform_groups = {'{0}_{1}'.format(x.prefix, x.name): x.baseGroups['deform_group'] for x in self.components}
+        snapshot = position_snapshot.snapshotPositions(deform_groups)
+        if not snapshot.nodeCount:
+            constants.RIGGER_LOG.warning('No bind joints to watch, generate the bind joints before turning on live positions.')
+            return
+        self.bindPositionData = snapshot.toDict()
+        self.livePositions = position_snapshot.LivePositions(positions_path, snapshot)
+        self.livePositions.start()
+        constants.RIGGER_LOG.info('Live positions: watching {0} nodes, saving to {1}'.format(len(self.livePositions.handles), positions_path))
+
+    def stopLivePositions(self):
+        if self.livePositions is None:
+            return
+        live_positions = self.livePositions
+        self.livePositions = None
+        live_positions.stop()
+        constants.RIGGER_LOG.info('Live positions: stopped, {0} nodes moved, saved to {1}'.format(len(live_positions.changed), live_positions.path))
 
     def saveControlData(self, control_data_path):
-        curves_dict = {}
-        keys_dict = {}
-        attrs_dict = {}
-        for component in self.components:
-            controls_group = component.baseGroups['controls_group']
-            children = cmds.listRelatives(controls_group, allDescendents=True, type='transform')
-            for child in children:
-                if len(child.split('_')) <= 1:
-                    continue
-                prefix, component_name, joint_name, node_purpose, node_type = python_utils.getNodeNameParts(child)
-                if node_type == 'CRV' and node_purpose == 'CTL':
-                    if '{0}_{1}'.format(component.prefix, component.name) not in curves_dict:
-                        curves_dict['{0}_{1}'.format(component.prefix, component.name)] = {}
-                    curves_dict['{0}_{1}'.format(component.prefix, component.name)][child] = python_utils.getCurveData(child)
-                if node_purpose == 'KEY' or node_purpose == 'CTL':
-                    if '{0}_{1}'.format(component.prefix, component.name) not in keys_dict:
-                        keys_dict['{0}_{1}'.format(component.prefix, component.name)] = {}
-                    keys = python_utils.getDrivenKeys(child)
-                    if keys:
-                        keys_dict['{0}_{1}'.format(component.prefix, component.name)][child] = keys
-                if cmds.attributeQuery(constants.SAVE_ATTR_LIST_ATTR, node=child, exists=True):
-                    # If there are attributes to save, we save them out.
-                    attribute_string = cmds.getAttr('{0}.{1}'.format(child, constants.SAVE_ATTR_LIST_ATTR))
-                    attribute_list = attribute_string.split(',')
-                    dictionized_attrs = python_utils.dictionizeAttrs([child], attribute_list, type=True)
-                    if '{0}_{1}'.format(component.prefix, component.name) not in attrs_dict:
-                        attrs_dict['{0}_{1}'.format(component.prefix, component.name)] = {}
-                    attrs_dict['{0}_{1}'.format(component.prefix, component.name)][child] = dictionized_attrs[child]
-                    # Save out the list of saved attributes.
-                    attrs_dict['{0}_{1}'.format(component.prefix, component.name)][child][constants.SAVE_ATTR_LIST_ATTR] = {}
-                    attrs_dict['{0}_{1}'.format(component.prefix, component.name)][child][constants.SAVE_ATTR_LIST_ATTR]['data'] = attribute_string
-                    attrs_dict['{0}_{1}'.format(component.prefix, component.name)][child][constants.SAVE_ATTR_LIST_ATTR]['type'] = 'string'
-        self.controlsData[constants.CONTROL_DATA_KEYS.curves] = curves_dict
-        self.controlsData[constants.CONTROL_DATA_KEYS.drivenKeys] = keys_dict
-        self.controlsData[constants.CONTROL_DATA_KEYS.attributes] = attrs_dict
-        self.saveJSON(control_data_path, self.controlsData)
+        # Everything under the rig gets looked at in one go (just names, paths and flags), then each component's data
+        # is read and written out as soon as it's gathered.  The curves go straight into the file, the driven keys and
+        # attributes come after them so they get spooled until the curves are done.
+        controls_groups = {x.baseGroups['controls_group']: '{0}_{1}'.format(x.prefix, x.name) for x in self.components}
+        harvested = scene_harvest.harvestControls(constants.DEFAULT_GROUPS.rig, controls_groups)
+        key_resolver = driven_key_resolver.DrivenKeyResolver()
+        with json_stream.JSONStreamWriter.open(control_data_path, self.prettyJSON) as writer:
+            keys_spool = writer.spool()
+            attrs_spool = writer.spool()
+            writer.beginObject(constants.CONTROL_DATA_KEYS.curves)
+            for component in self.components:
+                component_key = '{0}_{1}'.format(component.prefix, component.name)
+                curves_dict = None
+                keys_dict = None
+                attrs_dict = None
+                for node in harvested[component_key]:
+                    if node.nameParts is None:
+                        continue
+                    child = node.name
+                    prefix, component_name, joint_name, node_purpose, node_type = node.nameParts
+                    if node.isCurve:
+                        if curves_dict is None:
+                            curves_dict = {}
+                        curves_dict[child] = python_utils.getCurveData(node.path)
+                    if node_purpose == 'KEY' or node_purpose == 'CTL':
+                        if keys_dict is None:
+                            keys_dict = {}
+                        # Nothing can be driving a node with nothing connected into it.
+                        keys = python_utils.getDrivenKeys(child, key_resolver) if node.hasInputs else None
+                        if keys:
+                            keys_dict[child] = keys
+                    if node.savedAttrList is not None:
+                        # If there are attributes to save, we save them out.
+                        attribute_string = node.savedAttrList
+                        attribute_list = attribute_string.split(',')
+                        dictionized_attrs = python_utils.dictionizeAttrs([child], attribute_list, type=True)
+                        if attrs_dict is None:
+                            attrs_dict = {}
+                        attrs_dict[child] = dictionized_attrs[child]
+                        # Save out the list of saved attributes.
+                        attrs_dict[child][constants.SAVE_ATTR_LIST_ATTR] = {}
+                        attrs_dict[child][constants.SAVE_ATTR_LIST_ATTR]['data'] = attribute_string
+                        attrs_dict[child][constants.SAVE_ATTR_LIST_ATTR]['type'] = 'string'
+                if curves_dict is not None:
+                    writer.writeItem(component_key, curves_dict)
+                if keys_dict is not None:
+                    keys_spool.writeItem(component_key, driven_keys.DrivenKeyTable.fromNodeDict(keys_dict).toDict())
+                if attrs_dict is not None:
+                    attrs_spool.writeItem(component_key, attrs_dict)
+            writer.endObject()
+            writer.writeSpool(constants.CONTROL_DATA_KEYS.drivenKeys, keys_spool)
+            writer.writeSpool(constants.CONTROL_DATA_KEYS.attributes, attrs_spool)
+        self.controlsDataPath = control_data_path
+        self.controlsData = None
 
     def saveBindSkinData(self, bind_path):
         geo_transforms = python_utils.getRigGeo()
@@ -276,15 +530,21 @@ class MayaController(base_controller.BaseController):
             if cmds.attributeQuery(constants.BOUND_GEO_ATTR, node=thing, exists=True):
                     geo_transforms.append(thing)
 
-        bindDict = {}
+        skinned_shapes = []
         for transform in geo_transforms:
             shape = cmds.listRelatives(transform, shapes=True, fullPath=True)[0]
             skinClusters = [x for x in cmds.listHistory(shape) if cmds.nodeType(x) == "skinCluster" ]
             if skinClusters:
-                bindDict[shape] = self.getVertexWeights(shape, skinClusters[0])
+                skinned_shapes.append((shape, skinClusters[0]))
 
         self.bindSkinPath = bind_path
-        self.saveJSON(bind_path, bindDict)
+        if os.path.splitext(bind_path)[1] == constants.SKIN_WEIGHTS_EXTENSION:
+            skin_weights.saveSkinWeights(bind_path, [self.getShapeWeights(shape, skinCluster) for shape, skinCluster in skinned_shapes])
+        else:
+            # One shape at a time, so only one shape's weights are ever held in memory.
+            with json_stream.JSONStreamWriter.open(bind_path, self.prettyJSON) as writer:
+                for shape, skinCluster in skinned_shapes:
+                    writer.writeItem(shape, self.getShapeWeights(shape, skinCluster).toVertexDict())
         return
 
     def connectModuleToChildren(self, module):
@@ -292,42 +552,27 @@ class MayaController(base_controller.BaseController):
                 # First we connect up all the attributes.
                 self.connectModuleAttrs(child, module)
 
-    def updateControlCurves(self):
-        for component, component_data in self.controlsData['curves'].items():
-            for name in component_data:
-                if cmds.ls(name):
-                    curve = om2.MFnNurbsCurve(python_utils.getDagPath(name))
-                    curve.setCVPositions(component_data[name]['points'])
-                    curve.setKnots(component_data[name]['knots'], 0 , len(component_data[name]['knots']) - 1)
-                    curve.updateCurve()
-
-    def createDrivenKeys(self):
-        components = self.controlsData[constants.CONTROL_DATA_KEYS.drivenKeys]
-        for component, nodes in components.items():
-            for node, attrs in nodes.items():
-                if cmds.ls(node):
-                    for attr, dict in attrs.items():
-                        if 'driver' in dict:
-                            for i in range(0, len(dict['keyframes']), 2):
-                                cmds.setDrivenKeyframe(attr, currentDriver=dict['driver'], driverValue=dict['keyframes'][i], value=dict['keyframes'][i + 1])
-                            index_num = 0
-                            for i in range(0, len(dict['keytangents']), 4):
-                                cmds.keyTangent(attr, absolute=True, inAngle=dict['keytangents'][i], outAngle=dict['keytangents'][i+1], inTangentType=dict['keytangents'][i+2], outTangentType=dict['keytangents'][i+3], index=(index_num, index_num))
-                                index_num += 1
-                            cmds.setInfinity(attr, preInfinite=dict['infinites'][0], postInfinite=dict['infinites'][1])
-                        else:
-                            for driver, keyData in dict.items():
-                                for i in range(0, len(keyData['keyframes']), 2):
-                                    cmds.setDrivenKeyframe(attr, currentDriver=driver, driverValue=keyData['keyframes'][i], value=keyData['keyframes'][i + 1])
-                                index_num = 0
-                                for i in range(0, len(keyData['keytangents']), 4):
-                                    cmds.keyTangent(attr, absolute=True, inAngle=keyData['keytangents'][i], outAngle=keyData['keytangents'][i+1], inTangentType=keyData['keytangents'][i+2], outTangentType=keyData['keytangents'][i+3], index=(index_num, index_num))
-                                    index_num += 1
-                                cmds.setInfinity(attr, preInfinite=keyData['infinites'][0].lower(), postInfinite=keyData['infinites'][1].lower())
-
-    def setSavedAttrs(self):
-        components = self.controlsData[constants.CONTROL_DATA_KEYS.attributes]
-        for component, nodes in components.items():
+    def updateControlCurves(self, components=None):
+        totals = [0, 0, 0]
+        for component, component_data in self.filterComponentData(self.controlsData['curves'], components):
+            if component not in self.controlCurveTables:
+                self.controlCurveTables[component] = control_curves.ControlCurveTable.fromDict(component_data)
+            applied, unchanged, missing = control_curve_apply.applyControlCurves(self.controlCurveTables[component])
+            totals[0] += applied
+            totals[1] += unchanged
+            totals[2] += len(missing)
+        constants.RIGGER_LOG.info('Control curves: {0} set, {1} already matched, {2} not in the scene.'.format(*totals))
+
+    def createDrivenKeys(self, components=None):
+        component_lookup = {x.getFullName(): x for x in self.components}
+        for component, data in self.filterComponentData(self.controlsData[constants.CONTROL_DATA_KEYS.drivenKeys], components):
+            if not data:
+                continue
+            with self.trackComponentNodes(component_lookup.get(component)):
+                driven_key_replay.createDrivenKeys(driven_keys.DrivenKeyTable.fromDict(data))
+
+    def setSavedAttrs(self, components=None):
+        for component, nodes in self.filterComponentData(self.controlsData[constants.CONTROL_DATA_KEYS.attributes], components):
             for node, attrs in nodes.items():
                 if cmds.ls(node):
                     for name, value in attrs.items():
@@ -505,124 +750,123 @@ class MayaController(base_controller.BaseController):
         )
 
 
-    def connectModuleAttrs(self, child, module):
-        for ccomponent in self.components:
-            if self.isComponent(child['childName'], child['childPrefix'], ccomponent):
-                for i in range(len(child['parentAttrs'])):
-                    pOutput = '{0}_output_GRP.{1}'.format(module.getFullName(), child['parentAttrs'][i])
-                    cInput = '{0}_input_GRP.{1}'.format(ccomponent.getFullName(), child['childAttrs'][i])
+    def connectModuleAttrs(self, child, module, childComponents=None):
+        for ccomponent in self.filterComponents(self.findChildComponents(child), childComponents):
+            for i in range(len(child['parentAttrs'])):
+                pOutput = '{0}_output_GRP.{1}'.format(module.getFullName(), child['parentAttrs'][i])
+                cInput = '{0}_input_GRP.{1}'.format(ccomponent.getFullName(), child['childAttrs'][i])
+                try:
+                    cmds.immediate.connectAttr(pOutput, cInput)
+                except:
+                    # If there's multiple incoming connections we let "connectParentLogic()" sort it out.
+                    constants.RIGGER_LOG.warning('{0} and {1} are already connected! (This could be fine)'.format(pOutput, cInput))
+                    continue
+            if 'parentUpAttrs' in child:
+                for i in range(len(child['parentUpAttrs'])):
+                    pInput = '{0}_input_GRP.{1}'.format(module.getFullName(), child['parentUpAttrs'][i])
+                    cOutput = '{0}_output_GRP.{1}'.format(ccomponent.getFullName(), child['childUpAttrs'][i])
                     try:
-                        cmds.connectAttr(pOutput, cInput)
+                        cmds.immediate.connectAttr(cOutput, pInput)
                     except:
                         # If there's multiple incoming connections we let "connectParentLogic()" sort it out.
-                        constants.RIGGER_LOG.warning('{0} and {1} are already connected! (This could be fine)'.format(pOutput, cInput))
+                        constants.RIGGER_LOG.warning('{0} and {1} are already connected! (This could be fine)'.format(cOutput, pInput))
                         continue
-                if 'parentUpAttrs' in child:
-                    for i in range(len(child['parentUpAttrs'])):
-                        pInput = '{0}_input_GRP.{1}'.format(module.getFullName(), child['parentUpAttrs'][i])
-                        cOutput = '{0}_output_GRP.{1}'.format(ccomponent.getFullName(), child['childUpAttrs'][i])
-                        try:
-                            cmds.connectAttr(cOutput, pInput)
-                        except:
-                            # If there's multiple incoming connections we let "connectParentLogic()" sort it out.
-                            constants.RIGGER_LOG.warning('{0} and {1} are already connected! (This could be fine)'.format(cOutput, pInput))
-                            continue
 
     
-    def activateParentAttrs(self):
-        for component in self.components:
-            parent_group = component.baseGroups['input_group']
-            for attr in component.inputAttrs:
-                if 'attrConnection' in attr:
-                    lower_connection_type = attr['attrConnection'].lower()
-                    if lower_connection_type == constants.ATTR_CONNECTION_TYPES.parent:
-                        new_attr = '{0}.{1}'.format(parent_group, attr['attrName'])
-                        final_attr_path = '{0}_{1}_{2}'.format(component.prefix, component.name, attr['internalAttr'])
-                        python_utils.constrainByMatrix(new_attr, final_attr_path, True, False)
-                    if lower_connection_type == constants.ATTR_CONNECTION_TYPES.parentOffset:
-                        new_attr = '{0}.{1}'.format(parent_group, attr['attrName'])
-                        final_attr_path = '{0}_{1}_{2}'.format(component.prefix, component.name, attr['internalAttr'])
-                        python_utils.constrainByMatrix(new_attr, final_attr_path, True, False)
-                    if lower_connection_type == constants.ATTR_CONNECTION_TYPES.parentOffsetTranslate:
-                        new_attr = '{0}.{1}'.format(parent_group, attr['attrName'])
-                        final_attr_path = '{0}_{1}_{2}'.format(component.prefix, component.name, attr['internalAttr'])
-                        python_utils.constrainByMatrix(new_attr, final_attr_path, True, False, ['translate'])
-                    if lower_connection_type == constants.ATTR_CONNECTION_TYPES.spaceSwitch:
-                        new_attr = '{0}.{1}'.format(parent_group, attr['attrName'])
-                        final_attr_path = '{0}_{1}_{2}'.format(component.prefix, component.name, attr['internalAttr'])
-                        # Check to see if the user has defined an attribute for the space switch
-                        split_list = final_attr_path.split('.')
-                        space_switch_attr = constants.DEFAULT_SPACE_SWITCH_ATTR
-                        if len(split_list) > 1:
-                            space_switch_attr = split_list[-1]
-                            final_attr_path = split_list[0]
+    def activateParentAttrs(self, components=None):
+        for component in self.filterComponents(self.components, components):
+            with self.trackComponentNodes(component):
+                parent_group = component.baseGroups['input_group']
+                for attr in component.inputAttrs:
+                    if 'attrConnection' in attr:
+                        lower_connection_type = attr['attrConnection'].lower()
+                        if lower_connection_type == constants.ATTR_CONNECTION_TYPES.parent:
+                            new_attr = '{0}.{1}'.format(parent_group, attr['attrName'])
+                            final_attr_path = '{0}_{1}_{2}'.format(component.prefix, component.name, attr['internalAttr'])
+                            python_utils.constrainByMatrix(new_attr, final_attr_path, True, False)
+                        if lower_connection_type == constants.ATTR_CONNECTION_TYPES.parentOffset:
+                            new_attr = '{0}.{1}'.format(parent_group, attr['attrName'])
+                            final_attr_path = '{0}_{1}_{2}'.format(component.prefix, component.name, attr['internalAttr'])
+                            python_utils.constrainByMatrix(new_attr, final_attr_path, True, False)
+                        if lower_connection_type == constants.ATTR_CONNECTION_TYPES.parentOffsetTranslate:
+                            new_attr = '{0}.{1}'.format(parent_group, attr['attrName'])
+                            final_attr_path = '{0}_{1}_{2}'.format(component.prefix, component.name, attr['internalAttr'])
+                            python_utils.constrainByMatrix(new_attr, final_attr_path, True, False, ['translate'])
+                        if lower_connection_type == constants.ATTR_CONNECTION_TYPES.spaceSwitch:
+                            new_attr = '{0}.{1}'.format(parent_group, attr['attrName'])
+                            final_attr_path = '{0}_{1}_{2}'.format(component.prefix, component.name, attr['internalAttr'])
+                            # Check to see if the user has defined an attribute for the space switch
+                            split_list = final_attr_path.split('.')
+                            space_switch_attr = constants.DEFAULT_SPACE_SWITCH_ATTR
+                            if len(split_list) > 1:
+                                space_switch_attr = split_list[-1]
+                                final_attr_path = split_list[0]
                         
-                        # Check to see if the user has defined a name for the enum
-                        enum_name = attr['attrName']
-                        if 'enumName' in attr:
-                            enum_name = attr['enumName']
+                            # Check to see if the user has defined a name for the enum
+                            enum_name = attr['attrName']
+                            if 'enumName' in attr:
+                                enum_name = attr['enumName']
 
-                        self.handleInternalSpaceSwitch(new_attr, enum_name, final_attr_path, space_switch_attr)
+                            self.handleInternalSpaceSwitch(new_attr, enum_name, final_attr_path, space_switch_attr)
 
 
-    def propagateLimits(self):
+    def propagateLimits(self, components=None):
         for component in self.components:
             for child in component.children:
-                for ccomponent in self.components:
-                    if self.isComponent(child['childName'], child['childPrefix'], ccomponent):
-                        for i in range(len(child['parentAttrs'])):
-                            # Get the parent/child connections between components, and the internal connections between the input/output groups and their
-                            # internal nodes.
-                            pOutput = '{0}_output_GRP.{1}'.format(component.getFullName(), child['parentAttrs'][i])
-                            pInternal = [ x['internalAttr'] for x in component.outputAttrs if x['attrName'] == child['parentAttrs'][i] ][0]
+                for ccomponent in self.filterComponents(self.findChildComponents(child), components):
+                    for i in range(len(child['parentAttrs'])):
+                        # Get the parent/child connections between components, and the internal connections between the input/output groups and their
+                        # internal nodes.
+                        pOutput = '{0}_output_GRP.{1}'.format(component.getFullName(), child['parentAttrs'][i])
+                        pInternal = [ x['internalAttr'] for x in component.outputAttrs if x['attrName'] == child['parentAttrs'][i] ][0]
+                        pInternal = '{0}_{1}_{2}'.format(component.prefix, component.name, pInternal)
+                        cInput = '{0}_input_GRP.{1}'.format(ccomponent.getFullName(), child['childAttrs'][i])
+                        cInternal = [ x['internalAttr'] for x in ccomponent.inputAttrs if x['attrName'] == child['childAttrs'][i] ][0]
+                        cInternal = '{0}_{1}_{2}'.format(ccomponent.prefix, ccomponent.name, cInternal)
+
+                        # If the 'internalAttr' isn't actually an attr and just a node we skip it.  My fudges are catching up to me.
+                        if len(cInternal.split('.')) < 2 or len(pInternal.split('.')) < 2:
+                            continue
+                        try:
+                            # Now propagate the limits of the internal attributes to the input/output groups
+                            self.copyLimits(pInternal, pOutput)
+                            self.copyLimits(cInput, cInternal)
+                            # Now propagate between the input/output groups (the parent output group takes precedent)
+                            self.copyLimits(pOutput, cInput)
+                            # Now we propagate the limits of the input/ouput groups to the internal attributes again.
+                            self.copyLimits(pInternal, pOutput)
+                            self.copyLimits(cInput, cInternal)
+                        except:
+                                # I don't want the program crashing every time it tries to set a limit on a deleted node
+                                constants.RIGGER_LOG.warning('Could not set limits on {0}, {1}, and {2}, {3}! Maybe check that out or something.'.format(pInternal, pInput, cInternal, cOutput))
+                                continue
+                    if 'parentUpAttrs' in child:
+                        for i in range(len(child['parentUpAttrs'])):
+                            # Now we do everything but in reverse for the child->parent attrs
+                            pInput = '{0}_input_GRP.{1}'.format(component.getFullName(), child['parentUpAttrs'][i])
+                            pInternal = [ x['internalAttr'] for x in component.inputAttrs if x['attrName'] == child['parentUpAttrs'][i] ][0]
                             pInternal = '{0}_{1}_{2}'.format(component.prefix, component.name, pInternal)
-                            cInput = '{0}_input_GRP.{1}'.format(ccomponent.getFullName(), child['childAttrs'][i])
-                            cInternal = [ x['internalAttr'] for x in ccomponent.inputAttrs if x['attrName'] == child['childAttrs'][i] ][0]
+                            cOutput = '{0}_output_GRP.{1}'.format(ccomponent.getFullName(), child['childUpAttrs'][i])
+                            cInternal = [ x['internalAttr'] for x in ccomponent.outputAttrs if x['attrName'] == child['childUpAttrs'][i] ][0]
                             cInternal = '{0}_{1}_{2}'.format(ccomponent.prefix, ccomponent.name, cInternal)
 
                             # If the 'internalAttr' isn't actually an attr and just a node we skip it.  My fudges are catching up to me.
                             if len(cInternal.split('.')) < 2 or len(pInternal.split('.')) < 2:
                                 continue
+
                             try:
                                 # Now propagate the limits of the internal attributes to the input/output groups
-                                self.copyLimits(pInternal, pOutput)
-                                self.copyLimits(cInput, cInternal)
-                                # Now propagate between the input/output groups (the parent output group takes precedent)
-                                self.copyLimits(pOutput, cInput)
+                                self.copyLimits(pInternal, pInput)
+                                self.copyLimits(cInternal, cOutput)
+                                # Now propagate between the input/output groups (the child output group takes precedent)
+                                self.copyLimits(cOutput, pInput)
                                 # Now we propagate the limits of the input/ouput groups to the internal attributes again.
-                                self.copyLimits(pInternal, pOutput)
-                                self.copyLimits(cInput, cInternal)
+                                self.copyLimits(pInput, pInternal)
+                                self.copyLimits(cInternal, cOutput)
                             except:
-                                    # I don't want the program crashing every time it tries to set a limit on a deleted node
-                                    constants.RIGGER_LOG.warning('Could not set limits on {0}, {1}, and {2}, {3}! Maybe check that out or something.'.format(pInternal, pInput, cInternal, cOutput))
-                                    continue
-                        if 'parentUpAttrs' in child:
-                            for i in range(len(child['parentUpAttrs'])):
-                                # Now we do everything but in reverse for the child->parent attrs
-                                pInput = '{0}_input_GRP.{1}'.format(component.getFullName(), child['parentUpAttrs'][i])
-                                pInternal = [ x['internalAttr'] for x in component.inputAttrs if x['attrName'] == child['parentUpAttrs'][i] ][0]
-                                pInternal = '{0}_{1}_{2}'.format(component.prefix, component.name, pInternal)
-                                cOutput = '{0}_output_GRP.{1}'.format(ccomponent.getFullName(), child['childUpAttrs'][i])
-                                cInternal = [ x['internalAttr'] for x in ccomponent.outputAttrs if x['attrName'] == child['childUpAttrs'][i] ][0]
-                                cInternal = '{0}_{1}_{2}'.format(ccomponent.prefix, ccomponent.name, cInternal)
-
-                                # If the 'internalAttr' isn't actually an attr and just a node we skip it.  My fudges are catching up to me.
-                                if len(cInternal.split('.')) < 2 or len(pInternal.split('.')) < 2:
-                                    continue
-
-                                try:
-                                    # Now propagate the limits of the internal attributes to the input/output groups
-                                    self.copyLimits(pInternal, pInput)
-                                    self.copyLimits(cInternal, cOutput)
-                                    # Now propagate between the input/output groups (the child output group takes precedent)
-                                    self.copyLimits(cOutput, pInput)
-                                    # Now we propagate the limits of the input/ouput groups to the internal attributes again.
-                                    self.copyLimits(pInput, pInternal)
-                                    self.copyLimits(cInternal, cOutput)
-                                except:
-                                    # I don't want the program crashing every time it tries to set a limit on a deleted node
-                                    constants.RIGGER_LOG.warning('Could not set limits on {0}, {1}, and {2}, {3}! Maybe check that out or something.'.format(pInternal, pInput, cInternal, cOutput))
-                                    continue
+                                # I don't want the program crashing every time it tries to set a limit on a deleted node
+                                constants.RIGGER_LOG.warning('Could not set limits on {0}, {1}, and {2}, {3}! Maybe check that out or something.'.format(pInternal, pInput, cInternal, cOutput))
+                                continue
 
 
     def copyLimits(self, parentAttr, childAttr):
@@ -651,6 +895,11 @@ class MayaController(base_controller.BaseController):
                 cmds.addAttr(parentAttr, edit=True, minValue=min)
 
 
+    def getShapeWeights(self, shape, skinCluster, ignoreThreshold=0.001):
+        if self.skinBackend.supportsShape(shape):
+            return self.skinBackend.readShapeWeights(skinCluster, shape, ignoreThreshold)
+        return skin_weights.ShapeWeights.fromVertexDict(shape, self.getVertexWeights(shape, skinCluster, ignoreThreshold))
+
     def getVertexWeights(self, shape, skinCluster, ignoreThreshold=0.001):
         if cmds.objectType(shape) == 'mesh':
             vertices = cmds.ls('{0}.vtx[*]'.format(shape), flatten=True)
@@ -1,12 +1,12 @@
 from maya import cmds
 from maya import OpenMaya as om
-from .utilities import python_utils
-from .. import utils_controller, constants
+from .utilities import python_utils, maya_skin_backend, driven_key_mirror, mesh_vertex_query
+from .. import utils_controller, constants, skin_symmetry, vertex_positions
 
 class UtilsController(utils_controller.UtilsController):
 
     def __init__(self):
-        return
+        self.skinBackend = maya_skin_backend.MayaSkinBackend()
 
     def constrainByMatrix(self):
         selection = cmds.ls(selection=True)
@@ -54,84 +54,93 @@ class UtilsController(utils_controller.UtilsController):
             python_utils.zeroJointOrient(joint)
         python_utils.reverseJointChainOnX(opposite_node)
 
+    # Copies the weights from one side of each selected mesh to the other (L is +X), swapping the L_/R_ joints.  The
+    # vertex symmetry only gets worked out once per topology, after that it comes from the cache.
+    def mirrorSkinWeights(self, fromSide='L'):
+        for transform in cmds.ls(selection=True, transforms=True):
+            shapes = cmds.listRelatives(transform, shapes=True, fullPath=True, type='mesh')
+            if not shapes:
+                constants.RIGGER_LOG.warning('{0} isn\'t a mesh, skipping.'.format(transform))
+                continue
+            shape = shapes[0]
+            skin_cluster = self.skinBackend.findSkinCluster(shape)
+            if not skin_cluster:
+                constants.RIGGER_LOG.warning('{0} isn\'t skinned, skipping.'.format(transform))
+                continue
+            counts, vertex_ids = self.skinBackend.getTopology(shape)
+            symmetry_map = skin_symmetry.getSymmetryMap(skin_symmetry.getTopologyHash(counts, vertex_ids), lambda: self.skinBackend.getPoints(shape))
+            influences = self.skinBackend.getInfluences(skin_cluster)
+            weights, mirrored = skin_symmetry.mirrorWeights(self.skinBackend.getWeights(skin_cluster, shape), influences, symmetry_map, skin_symmetry.SIDES[fromSide])
+            self.skinBackend.setWeights(skin_cluster, shape, weights)
+            unmatched = len([x for x in symmetry_map.mirrorIds if x < 0])
+            constants.RIGGER_LOG.info('Mirrored {0} vertices on {1}, {2} had no mirror.'.format(mirrored, transform, unmatched))
+
     def selectBindJoints(self):
         selection = cmds.ls('*_BND_JNT', type='joint')
         cmds.select(selection)
 
-    def mirrorDrivenKeys(self):
-        selected = cmds.ls(selection=True, transforms=True)
-        for node in selected:
-            prefix, component_name, joint_name, node_purpose, node_type = python_utils.getNodeNameParts(node)
-            # We only mirror if there's an opposite node
-            if prefix == 'R':
-                opposite_prefix = 'L'
-            elif prefix == 'L':
-                opposite_prefix = 'R'
-            else:
-                continue
-            opposite_node = cmds.ls('{0}_{1}_{2}_{3}_{4}'.format(opposite_prefix, component_name, joint_name, node_purpose, node_type))
-            if not opposite_node:
-                constants.RIGGER_LOG.info('No opposite node found for {0}, skipping'.format(node))
-                continue
-            # Get attrs driven by keys
-            driven_attrs = cmds.setDrivenKeyframe(node, query=True, driven=True)
-            if not driven_attrs:
-                constants.RIGGER_LOG.info('No driven attrs found for {0}, skipping'.format(opposite_node))
-                continue
-            # Get animCurve nodes driving attr
-            for attr in driven_attrs:
-                drivers = cmds.listConnections(attr, source=True, type='animCurve')
-                # for each driver get the connections, then copy it and connect it to the opposite nodes.
-                for driver in drivers:
-                    driver_split = list(python_utils.getNodeNameParts(driver))
-                    d_connections = cmds.listConnections(driver, destination=False, connections=True, plugs=True)
-                    s_connections = cmds.listConnections(driver, source=False, connections=True, plugs=True)
-                    opposite_driver = cmds.duplicate(driver, name='{0}_{1}_{2}_{3}_{4}'.format(opposite_prefix, driver_split[1], driver_split[2], driver_split[3], driver_split[4]))
-                    for i in range(0, len(d_connections), 2):
-                        driver_connection = list(python_utils.getNodeNameParts(d_connections[i]))
-                        source_connection = list(python_utils.getNodeNameParts(d_connections[i + 1]))
-                        if source_connection[0] == 'R':
-                            source_connection[0] = 'L'
-                        elif source_connection[0] == 'L':
-                            source_connection[0] = 'R'
-                        cmds.connectAttr(
-                            '{0}_{1}_{2}_{3}_{4}'.format(source_connection[0], source_connection[1], source_connection[2], source_connection[3], source_connection[4]),
-                            '{0}_{1}_{2}_{3}_{4}'.format(opposite_prefix, driver_connection[1], driver_connection[2], driver_connection[3], driver_connection[4]),
-                        )
-                    for i in range(0, len(s_connections), 2):
-                        driver_connection = list(python_utils.getNodeNameParts(s_connections[i]))
-                        dest_connection = list(python_utils.getNodeNameParts(s_connections[i + 1]))
-                        if dest_connection[0] == 'R':
-                            dest_connection[0] = 'L'
-                        elif dest_connection[0] == 'L':
-                            dest_connection[0] = 'R'
-                        cmds.connectAttr(
-                            '{0}_{1}_{2}_{3}_{4}'.format(opposite_prefix, driver_connection[1], driver_connection[2], driver_connection[3], driver_connection[4]),
-                            '{0}_{1}_{2}_{3}_{4}'.format(dest_connection[0], dest_connection[1], dest_connection[2], dest_connection[3], dest_connection[4])
-                        )
+    # Mirrors the driven keys on the selected L_/R_ nodes (or every driven key in the scene) onto the other side.  If
+    # "planPath" is given, what it's going to do gets written there first so it can be looked over.
+    def mirrorDrivenKeys(self, allNetworks=False, planPath=None):
+        plan = self.planDrivenKeyMirror(allNetworks)
+        if plan is None:
+            return
+        if planPath:
+            plan.export(planPath)
+        for skipped in plan.skipped:
+            constants.RIGGER_LOG.info('Not mirroring {0}: {1}'.format(skipped['curve'], skipped['reason']))
+        constants.RIGGER_LOG.info(plan.summary())
+        driven_key_mirror.applyMirrorPlan(plan)
+
+    # Writes out what "mirrorDrivenKeys()" would do, without doing it.
+    def exportDrivenKeyMirrorPlan(self, planPath, allNetworks=False):
+        plan = self.planDrivenKeyMirror(allNetworks)
+        if plan is None:
+            return
+        plan.export(planPath)
+        constants.RIGGER_LOG.info('{0} Plan written to {1}.'.format(plan.summary(), planPath))
+
+    def planDrivenKeyMirror(self, allNetworks=False):
+        if allNetworks:
+            curves = driven_key_mirror.getDrivenKeyCurves()
+        else:
+            selected = cmds.ls(selection=True, transforms=True)
+            if not selected:
+                constants.RIGGER_LOG.warning('Nothing selected, select the L_/R_ nodes to mirror the driven keys of.')
+                return None
+            curves = driven_key_mirror.getDrivenKeyCurves(selected)
+        return driven_key_mirror.buildMirrorPlan(curves)
 
     def generateVertexJoints(self, component, joint_data):
-        # Get selected vertices.
-        verts = cmds.ls(selection=True, flatten=True)
+        # Each vertex's position gets asked for once, and only for the vertices the tool actually looks at.
+        cache = vertex_positions.VertexPositionCache(self.getMeshQuery)
+        # Get selected vertices.  With none selected, they get picked along the edges the joints are on now.
+        verts = [vertex_positions.parseVertexName(x) for x in cmds.ls(selection=True, flatten=True) if vertex_positions.VERTEX_NAME.match(x)]
+        if not verts:
+            verts = self.pickVertexJointVertices(cache, component, joint_data)
+            if not verts:
+                constants.RIGGER_LOG.warning('No vertices selected, and none could be picked from {0}_{1}\'s {2} joints.'.format(component.prefix, component.name, joint_data['name']))
+                return
+            constants.RIGGER_LOG.info('No vertices selected, picked {0} near {1}_{2}\'s {3} joints.'.format(len(verts), component.prefix, component.name, joint_data['name']))
         # Sort the vertices from inner to outer (lowest X to highest X if an L component, reversed if an R)
         reversed = False
         if component.prefix == 'R':
             reversed = True
-        sort_func = lambda x : cmds.xform(x, query=True, translation=True)[0]
-        verts.sort(reverse=reversed, key=sort_func)
+        positions = self.sortVertices(cache, verts, reversed)
         idx = 0
         # Create/replace the joints in the component and update the relevant component properties.
         if 'numJointsVar' in joint_data:
-            component.componentVars[joint_data['numJointsVar']] = len(verts)
+            component.componentVars[joint_data['numJointsVar']] = len(positions)
             try:
                 cmds.delete(*component.joint_dict[joint_data['jointKey']])
             except:
                 print('CREATE VERTEX JOINT: could not delete {0}_{1} {2} joints.'.format(component.prefix, component.name, joint_data['name']))
-            for vert in verts:
+            component.joint_dict[joint_data['jointKey']] = []
+            for position in positions:
                 new_joint = cmds.joint(
                     component.joint_dict['baseJoint'],
                     name='{0}_{1}_{2}_{3}_BND_JNT'.format(component.prefix, component.name, joint_data['name'], idx),
-                    position=cmds.xform(vert, query=True, translation=True, worldSpace=True)
+                    position=position
                 )
                 component.joint_dict[joint_data['jointKey']].append(new_joint)
                 idx += 1
@@ -140,17 +149,44 @@ class UtilsController(utils_controller.UtilsController):
                     cmds.delete(component.joint_dict[joint_data['jointKey']])
             except:
                 print('CREATE VERTEX JOINT: could not delete {0}_{1} {2} joint.'.format(component.prefix, component.name, joint_data['name']))
-            for vert in verts:
-                new_joint = cmds.joint(
-                    component.joint_dict['baseJoint'],
-                    name='{0}_{1}_{2}_BND_JNT'.format(component.prefix, component.name, joint_data['name']),
-                    position=cmds.xform(vert, query=True, translation=True, worldSpace=True)
-                )
-                component.joint_dict[joint_data['jointKey']] = new_joint
-                idx += 1
-                break
+            new_joint = cmds.joint(
+                component.joint_dict['baseJoint'],
+                name='{0}_{1}_{2}_BND_JNT'.format(component.prefix, component.name, joint_data['name']),
+                position=positions[0]
+            )
+            component.joint_dict[joint_data['jointKey']] = new_joint
+
+    # [(mesh, vertex id)] -> their world positions, sorted on X.  Vertices that are all on one mesh get sorted in one go.
+    def sortVertices(self, cache, verts, reverse=False):
+        meshes = set(x[0] for x in verts)
+        if len(meshes) == 1:
+            positions = cache.get(verts[0][0])
+            return positions.getPositions(positions.sortIds([x[1] for x in verts], 0, reverse))
+        found = [cache.get(mesh).getPositions([vertex])[0] for mesh, vertex in verts]
+        return sorted(found, key=lambda x: x[0], reverse=reverse)
+
+    # The vertices nearest where the category's joints are now, on whichever rig mesh they're closest to.  Categories
+    # with a joint count get the edge loop running through them, the single joint ones just the nearest vertex.
+    def pickVertexJointVertices(self, cache, component, joint_data):
+        joints = component.joint_dict.get(joint_data['jointKey']) or []
+        joints = [x for x in ([joints] if isinstance(joints, str) else joints) if cmds.objExists(x)]
+        if not joints:
+            return []
+        points = [cmds.xform(x, query=True, translation=True, worldSpace=True) for x in joints]
+        meshes = [x for x in python_utils.getRigGeo() if cmds.listRelatives(x, shapes=True, type='mesh')]
+        mesh, positions = cache.nearestMesh(meshes, points)
+        if mesh is None:
+            return []
+        if 'numJointsVar' in joint_data:
+            return [(mesh, x) for x in positions.pickEdgeLoop(points)]
+        return [(mesh, positions.nearest(points[0])[0])]
+
+    def getMeshShape(self, mesh):
+        shapes = cmds.listRelatives(mesh, shapes=True, fullPath=True, type='mesh')
+        return shapes[0] if shapes else mesh
 
-        pass
+    def getMeshQuery(self, mesh):
+        return mesh_vertex_query.MeshVertexQuery(python_utils.getDagPath(self.getMeshShape(mesh)))
 
     def markAttrsForSaving(self):
         selected_node = cmds.ls(selection=True)[-1]
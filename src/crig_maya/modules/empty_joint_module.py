@@ -1,7 +1,7 @@
 from . import maya_base_module
 from ..utilities import python_utils
 from ... import constants
-import maya.cmds as cmds
+from ..utilities.command_batch import cmds
 
 class EmptyJointModule(maya_base_module.MayaBaseModule):
 
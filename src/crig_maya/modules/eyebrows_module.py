@@ -1,7 +1,7 @@
 from . import maya_base_module
 from ..utilities import python_utils
 from ... import constants
-import maya.cmds as cmds
+from ..utilities.command_batch import cmds
 import maya.api.OpenMaya as om2
 
 class EyebrowsModule(maya_base_module.MayaBaseModule):
@@ -71,8 +71,9 @@ class EyebrowsModule(maya_base_module.MayaBaseModule):
         rough_joints = []
         user_controls_place = [inner_place_group, middle_place_group, outer_place_group]
         user_controls = [inner_control, middle_control, outer_control]
+        rough_curve_table = python_utils.getCurveLengthTable(rough_curve)
         for idx in range(num_controls):
-            pointOnCurve = python_utils.getPointAlongCurve((control_percent * idx), rough_curve)
+            pointOnCurve = python_utils.getPointAlongCurve((control_percent * idx), rough_curve_table)
             rough_joint = cmds.joint(logic_group, name='{0}_{1}_rough_{2}_CTL_JNT'.format(self.prefix, self.name, idx), position=[pointOnCurve.x, pointOnCurve.y, pointOnCurve.z])
             pos_group = cmds.group(name='{0}_{1}_rough_control_{2}_PLC_GRP'.format(self.prefix, self.name, idx), parent=logic_group, empty=True)
             cmds.matchTransform(pos_group, rough_joint)
@@ -1,7 +1,7 @@
 from . import maya_base_module
 from ..utilities import python_utils
 from ... import constants
-import maya.cmds as cmds
+from ..utilities.command_batch import cmds
 import maya.api.OpenMaya as om2
 
 class EyelidsModule(maya_base_module.MayaBaseModule):
@@ -208,15 +208,17 @@ class EyelidsModule(maya_base_module.MayaBaseModule):
         outer_rough_joint = cmds.joint(outer_base_objects['locatorGroup'], name='{0}_{1}_outer_rough_CTL_JNT'.format(self.prefix, self.name), position=cmds.xform(outer_base_objects['locatorGroup'], query=True, translation=True, worldSpace=True))
         upper_rough_joints = [inner_rough_joint]
         lower_rough_joints = [inner_rough_joint]
+        rough_upper_table = python_utils.getCurveLengthTable(rough_upper_curve)
+        rough_lower_table = python_utils.getCurveLengthTable(rough_lower_curve)
         for idx in range(1, num_controls - 1):
-            pointOnCurve = python_utils.getPointAlongCurve((control_percent * idx), rough_upper_curve)
+            pointOnCurve = python_utils.getPointAlongCurve((control_percent * idx), rough_upper_table)
             upper_rough_joint = cmds.joint(rough_upper_locs_group, name='{0}_{1}_upper_rough_{2}_CTL_JNT'.format(self.prefix, self.name, idx), position=[pointOnCurve.x, pointOnCurve.y, pointOnCurve.z])
             pos_group = cmds.group(name='{0}_{1}_upper_rough_control_{2}_PLC_GRP'.format(self.prefix, self.name, idx), parent=rough_upper_locs_group, empty=True)
             cmds.matchTransform(pos_group, upper_rough_joint)
             cmds.parent(upper_rough_joint, pos_group)
             upper_rough_joints.append(upper_rough_joint)
             
-            pointOnCurve = python_utils.getPointAlongCurve((control_percent * idx), rough_lower_curve)
+            pointOnCurve = python_utils.getPointAlongCurve((control_percent * idx), rough_lower_table)
             lower_rough_joint = cmds.joint(rough_lower_locs_group, name='{0}_{1}_lower_rough_{2}_CTL_JNT'.format(self.prefix, self.name, idx), position=[pointOnCurve.x, pointOnCurve.y, pointOnCurve.z])
             pos_group = cmds.group(name='{0}_{1}_lower_rough_control_{2}_PLC_GRP'.format(self.prefix, self.name, idx), parent=rough_lower_locs_group, empty=True)
             cmds.matchTransform(pos_group, lower_rough_joint)
@@ -362,8 +364,9 @@ class EyelidsModule(maya_base_module.MayaBaseModule):
         control_percent = 1.0 / (num_controls - 1)
         blink_joints = [inner_rough_joint]
         blink_locs = []
+        blink_curve_table = python_utils.getCurveLengthTable(blink_curve)
         for idx in range(1, num_controls - 1):
-            pointOnCurve = python_utils.getPointAlongCurve((control_percent * idx), blink_curve)
+            pointOnCurve = python_utils.getPointAlongCurve((control_percent * idx), blink_curve_table)
             blink_joint = cmds.joint(blink_joints_group, name='{0}_{1}_blink_{2}_CTL_JNT'.format(self.prefix, self.name, idx), position=[pointOnCurve.x, pointOnCurve.y, pointOnCurve.z])
             pos_group = cmds.group(name='{0}_{1}_blink_control_{2}_PLC_GRP'.format(self.prefix, self.name, idx), parent=blink_joints_group, empty=True)
             cmds.matchTransform(pos_group, blink_joint)
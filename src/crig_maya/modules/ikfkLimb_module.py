@@ -1,7 +1,7 @@
 from . import maya_base_module
 from ..utilities import python_utils
 from ... import constants
-import maya.cmds as cmds
+from ..utilities.command_batch import cmds
 import maya.api.OpenMaya as om2
 
 class IKFKLimb(maya_base_module.MayaBaseModule):
@@ -1,7 +1,7 @@
 from . import maya_base_module
 from ..utilities import python_utils
-from ... import constants
-import maya.cmds as cmds
+from ... import constants, curve_lengths
+from ..utilities.command_batch import cmds
 import maya.api.OpenMaya as om2
 
 import math
@@ -256,9 +256,11 @@ class IKFKSpine(maya_base_module.MayaBaseModule):
         ik_rough_control_joints.append(base_rough_control_joint)
         end_rough_control_joint = python_utils.duplicateBindJoint(joint_objects[-1]['bind_joint'], ik_rough_group, 'CTL')
         python_utils.zeroJointOrient(end_rough_control_joint)
-        rough_curve_func = om2.MFnNurbsCurve(python_utils.getDagPath(ik_rough_curve))
-        rough_curve_len = rough_curve_func.length()
-        rough_curve_max_param = rough_curve_func.findParamFromLength(rough_curve_len)
+        rough_curve_table = python_utils.getCurveLengthTable(ik_rough_curve)
+        rough_curve_func = rough_curve_table.curveFn
+        rough_curve_len = rough_curve_table.length
+        rough_curve_max_param = rough_curve_table.maxParam
+        param_brackets = curve_lengths.ParamBrackets(param_list)
         # TODO: replace the if statements with some kind of default component vars thing at the data layer.
         if 'numRoughIKSegments' in self.componentVars:
             num_segments = self.componentVars['numRoughIKSegments']
@@ -267,10 +269,10 @@ class IKFKSpine(maya_base_module.MayaBaseModule):
         for seg_num in range(num_segments - 1):
             # Get the point and tangent along the curve we're gonna put the new joint
             length_along_curve = (rough_curve_len/num_segments) * (seg_num + 1)
-            joint_length_param = rough_curve_func.findParamFromLength(length_along_curve)
+            joint_length_param = rough_curve_table.paramAtLength(length_along_curve)
             rough_param_list.append(joint_length_param)
             joint_position, aim_vec = rough_curve_func.getDerivativesAtParam(joint_length_param, space=om2.MSpace.kWorld)
-            prev_joint, next_joint = self.find_bracketing_joints(joint_length_param, param_list, joint_objects, rough_curve_max_param)
+            prev_joint, next_joint = self.find_bracketing_joints(joint_length_param, param_list, joint_objects, rough_curve_max_param, param_brackets)
             # Get the up and forward axes for the new rough joint (they're either the unit x, y, or z vectors)
             forward_axis, up_axis = self.getOrientationAxes(next_joint['bind_joint'])
             # Get the up vector for the rough joint by averaging the up vectors of the bracketing base joints.
@@ -647,18 +649,11 @@ class IKFKSpine(maya_base_module.MayaBaseModule):
         remaining_length = (segment_length - segment_measure_length) / segment_length
         return 1 - remaining_length
 
-    def find_bracketing_joints(self, transform_param, param_list, joint_objects, max_curve_param):
-        min = 0
-        min_idx = 0
-        max = max_curve_param
-        max_idx = len(param_list) - 1
-        for idx in range(len(param_list)):
-            if param_list[idx] > min and param_list[idx] < transform_param:
-                min = param_list[idx]
-                min_idx = idx
-            if param_list[idx] < max and param_list[idx] > transform_param:
-                max = param_list[idx]
-                max_idx = idx 
+    # "brackets" is curve_lengths.ParamBrackets(param_list), worth making once when there's more than one lookup.
+    def find_bracketing_joints(self, transform_param, param_list, joint_objects, max_curve_param, brackets=None):
+        if brackets is None:
+            brackets = curve_lengths.ParamBrackets(param_list)
+        min_idx, max_idx = brackets.bracket(transform_param, max_curve_param)
         return joint_objects[min_idx], joint_objects[max_idx]
 
     def initCurveIKTwistSettings(self, joint_objects, ik_handle):
@@ -1,7 +1,7 @@
 from ... import base_module
 from ... import constants
 from ..utilities import python_utils
-import maya.cmds as cmds
+from ..utilities.command_batch import cmds
 
 class MayaBaseModule(base_module.BaseModule):
 
@@ -17,6 +17,8 @@ class MayaBaseModule(base_module.BaseModule):
         self._geomData = []
         self._baseGroups = {}
         self._bindPositionData = {}
+        # MObjectHandles for every node made while this component was being built, see "destroy()".
+        self.createdNodes = []
 
     @property
     def name(self):
@@ -115,6 +117,20 @@ class MayaBaseModule(base_module.BaseModule):
             self.baseGroups = groups
 
 
+    # Deletes everything this component built so it can be built again.  Most of it is under the component group,
+    # but utility nodes and anything hooked up to the geometry aren't, so those come from "createdNodes".
+    def destroy(self):
+        cmds.flushBatch()
+        component_group = self.baseGroups.get('component_group')
+        if component_group and cmds.objExists(component_group):
+            cmds.delete(component_group)
+        # Deleting a node can take others down with it, so each one gets checked right before it's deleted.
+        for handle in self.createdNodes:
+            if handle.isValid():
+                cmds.delete(python_utils.getNodeName(handle.object()))
+        self.createdNodes = []
+        self.baseGroups = {}
+
     def initializeInputandoutputAttrs(self):
         output_group = self.baseGroups['output_group']
         input_group = self.baseGroups['input_group']
@@ -227,4 +243,8 @@ class MayaBaseModule(base_module.BaseModule):
 
 
     def getFullName(self):
-        return '{0}_{1}'.format(self.prefix, self.name)
\ No newline at end of file
+        return '{0}_{1}'.format(self.prefix, self.name)
+
+    # Node creation, connections and attribute sets made inside this get run all at once at the end.
+    def commandBatch(self, enabled=True):
+        return cmds.commandBatch(self.getFullName(), enabled)
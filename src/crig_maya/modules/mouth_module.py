@@ -1,7 +1,7 @@
 from . import maya_base_module
 from ..utilities import python_utils
 from ... import constants
-import maya.cmds as cmds
+from ..utilities.command_batch import cmds
 import maya.api.OpenMaya as om2
 
 class MouthModule(maya_base_module.MayaBaseModule):
@@ -396,10 +396,12 @@ class MouthModule(maya_base_module.MayaBaseModule):
         upper_very_rough_joints = []
         lower_very_rough_joints = []
         control_joints_group = cmds.group(name='{0}_{1}_control_joints_PAR_GRP'.format(self.prefix, self.name), parent=logic_joints_group, empty=True)
+        upper_curve_table = python_utils.getCurveLengthTable(upper_curve_2)
+        lower_curve_table = python_utils.getCurveLengthTable(lower_curve_2)
         for idx in range(num_controls):
-            createControlOnSurface(0.5, control_percent * idx, upper_blend_ribbon, upper_curve_2, '{0}_{1}_very_rough_upper_{2}_CTL_JNT'.format(self.prefix, self.name, idx), control_joints_group, upper_very_rough_joints)
+            createControlOnSurface(0.5, control_percent * idx, upper_blend_ribbon, upper_curve_table, '{0}_{1}_very_rough_upper_{2}_CTL_JNT'.format(self.prefix, self.name, idx), control_joints_group, upper_very_rough_joints)
             
-            createControlOnSurface(0.5, control_percent * idx, lower_blend_ribbon, lower_curve_2, '{0}_{1}_very_rough_lower_{2}_CTL_JNT'.format(self.prefix, self.name, idx), control_joints_group, lower_very_rough_joints)
+            createControlOnSurface(0.5, control_percent * idx, lower_blend_ribbon, lower_curve_table, '{0}_{1}_very_rough_lower_{2}_CTL_JNT'.format(self.prefix, self.name, idx), control_joints_group, lower_very_rough_joints)
             
         # Then skin the very rough joints to the very rough curve.
         upper_rough_control_skincluster = cmds.skinCluster([x['joint'] for x in upper_very_rough_joints], upper_rough_control_ribbon, toSelectedBones=False, maximumInfluences=2, obeyMaxInfluences=False, dropoffRate=1, name='{0}_{1}_control_CTL_SCST'.format(self.prefix, self.name))[0]
@@ -420,9 +422,9 @@ class MouthModule(maya_base_module.MayaBaseModule):
         upper_rough_joints = []
         lower_rough_joints = []
         for idx in range(num_controls):
-            createControlOnSurface(0.5, control_percent * idx, upper_rough_control_ribbon, upper_curve_2, '{0}_{1}_rough_upper_{2}_CTL_JNT'.format(self.prefix, self.name, idx), control_joints_group, upper_rough_joints, True, upper_rebuild_stuff[1])
+            createControlOnSurface(0.5, control_percent * idx, upper_rough_control_ribbon, upper_curve_table, '{0}_{1}_rough_upper_{2}_CTL_JNT'.format(self.prefix, self.name, idx), control_joints_group, upper_rough_joints, True, upper_rebuild_stuff[1])
 
-            createControlOnSurface(0.5, control_percent * idx, lower_rough_control_ribbon, lower_curve_2, '{0}_{1}_rough_lower_{2}_CTL_JNT'.format(self.prefix, self.name, idx), control_joints_group, lower_rough_joints, True, lower_rebuild_stuff[1])
+            createControlOnSurface(0.5, control_percent * idx, lower_rough_control_ribbon, lower_curve_table, '{0}_{1}_rough_lower_{2}_CTL_JNT'.format(self.prefix, self.name, idx), control_joints_group, lower_rough_joints, True, lower_rebuild_stuff[1])
             
         # Create controls/joints for rougher ribbon
 
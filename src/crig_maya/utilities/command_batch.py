@@ -0,0 +1,358 @@
+import re
+from contextlib import contextmanager
+
+# The recording backend has to work without maya, so this is the one place maya is allowed to be missing.
+try:
+    import maya.cmds as maya_cmds
+    import maya.api.OpenMaya as om2
+
+    from . import command_batch_plugin
+except ImportError:
+    maya_cmds = None
+    om2 = None
+    command_batch_plugin = None
+
+from ... import constants
+
+# The commands that get queued up while a batch is open, everything else is run right away.
+CREATE_NODE_FLAGS = {'name': 'name', 'n': 'name', 'parent': 'parent', 'p': 'parent', 'skipSelect': 'skipSelect', 'ss': 'skipSelect'}
+CONNECT_ATTR_FLAGS = {'force': 'force', 'f': 'force'}
+SET_ATTR_TYPES = [None, 'string', 'double2', 'double3', 'float2', 'float3', 'long2', 'long3', 'short2', 'short3']
+# Maya changes the name of a node if it has anything but letters, numbers and underscores in it, or starts with a
+# number, so the name can't be handed back before it exists.
+SPECIAL_NAME_CHARACTERS = re.compile(r'^\d|\W')
+# 'attr', 'attr[3]'
+PLUG_TOKEN = re.compile(r'^(\w+)(?:\[(\d+)\])?$')
+
+
+class BatchedCommand():
+    __slots__ = ('command', 'args', 'kwargs')
+
+    def __init__(self, command, args, kwargs):
+        self.command = command
+        self.args = args
+        self.kwargs = kwargs
+
+    def __repr__(self):
+        return '{0}({1})'.format(self.command, ', '.join([repr(x) for x in self.args] + ['{0}={1!r}'.format(k, v) for k, v in self.kwargs.items()]))
+
+
+# Stand in for "maya.cmds".  While a batch is open, named node creations, renames, connections and plain attribute sets
+# are queued up instead of being run, and then handed to the backend all at once when the batch closes.  Any other
+# command might need to see what's been queued, so calling one flushes the queue first and then runs it like normal.
+class BatchedCommands():
+
+    def __init__(self, commands, backend=None):
+        self.operations = []
+        self.pendingNames = set()
+        self.label = None
+        self.commands = commands
+        self.backend = backend
+        self.batchedCount = 0
+        self.flushCount = 0
+        # command name -> calls, only kept while something (like the build profiler) sets it to a Counter.
+        self.commandCounts = None
+
+    def __getattr__(self, name):
+        self.flushBatch()
+        self.countCommand(name)
+        return getattr(self.commands, name)
+
+    def countCommand(self, name):
+        if self.commandCounts is not None:
+            self.commandCounts[name] += 1
+
+    @property
+    def batching(self):
+        return self.label is not None and self.backend is not None
+
+    # A queued command only fails once its batch is flushed, so anything that catches a command's errors has to run
+    # it through here instead: "cmds.immediate.connectAttr(...)".
+    @property
+    def immediate(self):
+        self.flushBatch()
+        return self.commands
+
+    # Everything run inside of this goes into one batch/undo chunk.  Nested batches just join the outer one.
+    @contextmanager
+    def commandBatch(self, label, enabled=True):
+        if not enabled or self.label is not None:
+            yield self
+            return
+        self.label = label
+        undo_chunk = self.commands is not None and hasattr(self.commands, 'undoInfo')
+        if undo_chunk:
+            self.commands.undoInfo(openChunk=True, chunkName=label)
+        try:
+            yield self
+        finally:
+            try:
+                self.flushBatch()
+            finally:
+                self.label = None
+                if undo_chunk:
+                    self.commands.undoInfo(closeChunk=True)
+
+    def flushBatch(self):
+        if not self.operations:
+            return
+        operations = self.operations
+        self.operations = []
+        self.pendingNames = set()
+        self.flushCount += 1
+        self.backend.flush(self.label, operations)
+
+    def queue(self, command, args, kwargs):
+        self.operations.append(BatchedCommand(command, args, kwargs))
+        self.batchedCount += 1
+
+    def passThrough(self, command, args, kwargs):
+        self.flushBatch()
+        return getattr(self.commands, command)(*args, **kwargs)
+
+    def createNode(self, *args, **kwargs):
+        self.countCommand('createNode')
+        if self.batching and len(args) == 1 and all(x in CREATE_NODE_FLAGS for x in kwargs):
+            flags = { CREATE_NODE_FLAGS[k]: v for k, v in kwargs.items() }
+            name = flags.get('name')
+            if (name and not SPECIAL_NAME_CHARACTERS.search(name) and name not in self.pendingNames
+                    and self.backend.canCreate(args[0]) and not self.backend.nodeExists(name)):
+                self.queue('createNode', args, { k: v for k, v in flags.items() if k != 'skipSelect' })
+                self.pendingNames.add(name)
+                return name
+        return self.passThrough('createNode', args, kwargs)
+
+    # Same as createNode, the new name only gets handed back if maya would keep it as is.
+    def rename(self, *args, **kwargs):
+        self.countCommand('rename')
+        if self.batching and len(args) == 2 and not kwargs and all(isinstance(x, str) for x in args):
+            name = args[1]
+            if not SPECIAL_NAME_CHARACTERS.search(name) and name not in self.pendingNames and not self.backend.nodeExists(name):
+                self.queue('rename', args, kwargs)
+                self.pendingNames.add(name)
+                return name
+        return self.passThrough('rename', args, kwargs)
+
+    def connectAttr(self, *args, **kwargs):
+        self.countCommand('connectAttr')
+        if self.batching and len(args) == 2 and all(x in CONNECT_ATTR_FLAGS for x in kwargs):
+            self.queue('connectAttr', args, { CONNECT_ATTR_FLAGS[k]: v for k, v in kwargs.items() })
+            return
+        return self.passThrough('connectAttr', args, kwargs)
+
+    def setAttr(self, *args, **kwargs):
+        self.countCommand('setAttr')
+        if self.batching and len(args) >= 2 and set(kwargs) <= set(['type']) and kwargs.get('type') in SET_ATTR_TYPES:
+            values = args[1:]
+            value_types = (str,) if kwargs.get('type') == 'string' else (bool, int, float)
+            if all(isinstance(x, value_types) for x in values):
+                self.queue('setAttr', args, kwargs)
+                return
+        return self.passThrough('setAttr', args, kwargs)
+
+
+# Doesn't touch maya at all, it just keeps every flushed batch so the build can be looked at (or counted, or timed)
+# afterwards.  If it's given something to run the commands on, each batch is run through that as well.
+class RecordingBackend():
+
+    def __init__(self, commands=None):
+        self.commands = commands
+        self.batches = []
+
+    def canCreate(self, nodeType):
+        return True
+
+    def nodeExists(self, name):
+        if self.commands is None:
+            return False
+        return bool(self.commands.objExists(name))
+
+    def flush(self, label, operations):
+        self.batches.append((label, operations))
+        if self.commands is None:
+            return
+        for operation in operations:
+            getattr(self.commands, operation.command)(*operation.args, **operation.kwargs)
+
+    # label -> {command: count}
+    def summary(self):
+        counts = {}
+        for label, operations in self.batches:
+            label_counts = counts.setdefault(label, {})
+            for operation in operations:
+                label_counts[operation.command] = label_counts.get(operation.command, 0) + 1
+        return counts
+
+
+# Runs each batch through DAG modifiers, done by the command in command_batch_plugin so they go on maya's undo queue
+# with the cmds edits in the same undo chunk.  Anything the modifier can't do (odd attribute types, plugs it can't
+# find) splits the batch: whatever is queued so far gets done, then that one command is run through cmds.  If a
+# modifier fails part way through, what it did is taken back and its commands are run again one at a time through
+# cmds, so the error comes from (and gets logged against) the command that caused it.
+class ModifierBackend():
+
+    def __init__(self):
+        # node type -> is it a DAG node
+        self.dagTypes = {}
+        self.pluginLoaded = False
+
+    def isDagType(self, nodeType):
+        if nodeType not in self.dagTypes:
+            self.dagTypes[nodeType] = 'dagNode' in (maya_cmds.nodeType(nodeType, isTypeName=True, inherited=True) or [])
+        return self.dagTypes[nodeType]
+
+    # DAG nodes other than transforms/joints (locators, curves, etc.) get a transform made for them, and createNode
+    # hands back the shape, which a modifier doesn't do.
+    def canCreate(self, nodeType):
+        try:
+            return not self.isDagType(nodeType) or nodeType in ['transform', 'joint']
+        except RuntimeError:
+            return False
+
+    def nodeExists(self, name):
+        return maya_cmds.objExists(name)
+
+    def loadPlugin(self):
+        if not self.pluginLoaded:
+            maya_cmds.loadPlugin(command_batch_plugin.__file__, quiet=True)
+            self.pluginLoaded = True
+
+    def flush(self, label, operations):
+        self.loadPlugin()
+        modifier = om2.MDagModifier()
+        # The operations that went into the current modifier.
+        batched = []
+        created = {}
+        # Destinations connected by the current modifier, they won't show up as connected until it's done.
+        destinations = set()
+        for operation in operations:
+            try:
+                self.addOperation(modifier, created, destinations, operation)
+            except (RuntimeError, TypeError, ValueError, KeyError):
+                if self.runModifier(label, modifier, batched):
+                    # The nodes the modifier made were taken back and made again, they get looked up by name now.
+                    created = {}
+                modifier = om2.MDagModifier()
+                batched = []
+                destinations = set()
+                self.runCommand(label, operation)
+            else:
+                batched.append(operation)
+        self.runModifier(label, modifier, batched)
+
+    # Whether the modifier failed and its operations had to be run through cmds instead.
+    def runModifier(self, label, modifier, operations):
+        if not operations:
+            return False
+        command_batch_plugin.shared.pending[:] = [modifier]
+        try:
+            getattr(maya_cmds, command_batch_plugin.COMMAND_NAME)()
+            return False
+        except RuntimeError:
+            pass
+        finally:
+            command_batch_plugin.shared.pending[:] = []
+        for operation in operations:
+            self.runCommand(label, operation)
+        return True
+
+    def runCommand(self, label, operation):
+        try:
+            getattr(maya_cmds, operation.command)(*operation.args, **operation.kwargs)
+        except Exception:
+            constants.RIGGER_LOG.error('{0} failed in the {1} batch.'.format(operation, label))
+            raise
+
+    def getNode(self, created, name):
+        if name in created:
+            return created[name]
+        selection = om2.MSelectionList()
+        selection.add(name)
+        return selection.getDependNode(0)
+
+    def getPlug(self, created, plugName):
+        node_name, attr_path = plugName.split('.', 1)
+        node_fn = om2.MFnDependencyNode(self.getNode(created, node_name))
+        plug = None
+        for token in attr_path.split('.'):
+            match = PLUG_TOKEN.match(token)
+            if not match:
+                raise ValueError('Can\'t batch plug {0}'.format(plugName))
+            attr_name, index = match.groups()
+            if plug is None:
+                plug = node_fn.findPlug(attr_name, False)
+            else:
+                plug = plug.child(node_fn.attribute(attr_name))
+            if index is not None:
+                plug = plug.elementByLogicalIndex(int(index))
+        return plug
+
+    def addOperation(self, modifier, created, destinations, operation):
+        if operation.command == 'createNode':
+            node_type = operation.args[0]
+            name = operation.kwargs['name']
+            if self.isDagType(node_type):
+                parent = operation.kwargs.get('parent')
+                node = modifier.createNode(node_type, self.getNode(created, parent) if parent else om2.MObject.kNullObj)
+            else:
+                node = om2.MDGModifier.createNode(modifier, node_type)
+            modifier.renameNode(node, name)
+            created[name] = node
+        elif operation.command == 'rename':
+            old_name, name = operation.args
+            node = self.getNode(created, old_name)
+            # cmds.rename renames a transform's shape along with it, the modifier doesn't.
+            if node.hasFn(om2.MFn.kDagNode):
+                raise TypeError('Can\'t batch renaming DAG node {0}'.format(old_name))
+            modifier.renameNode(node, name)
+            created[name] = node
+        elif operation.command == 'connectAttr':
+            source = self.getPlug(created, operation.args[0])
+            destination = self.getPlug(created, operation.args[1])
+            if operation.args[1] in destinations:
+                raise RuntimeError('{0} is already being connected'.format(operation.args[1]))
+            if destination.isDestination:
+                if not operation.kwargs.get('force'):
+                    # Let cmds raise the usual "already connected" error.
+                    raise RuntimeError('{0} is already connected'.format(operation.args[1]))
+                modifier.disconnect(destination.source(), destination)
+            modifier.connect(source, destination)
+            destinations.add(operation.args[1])
+        elif operation.command == 'setAttr':
+            plug = self.getPlug(created, operation.args[0])
+            values = operation.args[1:]
+            if len(values) == 1:
+                self.setPlugValue(modifier, plug, values[0])
+            else:
+                if plug.numChildren() != len(values):
+                    raise ValueError('Wrong number of values for {0}'.format(operation.args[0]))
+                for i, value in enumerate(values):
+                    self.setPlugValue(modifier, plug.child(i), value)
+
+    # Has to match what cmds.setAttr does, which means angles and distances are in UI units.
+    def setPlugValue(self, modifier, plug, value):
+        attribute = plug.attribute()
+        api_type = attribute.apiType()
+        if isinstance(value, str):
+            modifier.newPlugValueString(plug, value)
+        elif api_type in [om2.MFn.kDoubleAngleAttribute, om2.MFn.kFloatAngleAttribute]:
+            modifier.newPlugValueMAngle(plug, om2.MAngle(value, om2.MAngle.uiUnit()))
+        elif api_type in [om2.MFn.kDoubleLinearAttribute, om2.MFn.kFloatLinearAttribute]:
+            modifier.newPlugValueMDistance(plug, om2.MDistance(value, om2.MDistance.uiUnit()))
+        elif api_type == om2.MFn.kEnumAttribute:
+            modifier.newPlugValueInt(plug, int(value))
+        elif api_type == om2.MFn.kNumericAttribute:
+            numeric_type = om2.MFnNumericAttribute(attribute).numericType()
+            if numeric_type == om2.MFnNumericData.kBoolean:
+                modifier.newPlugValueBool(plug, bool(value))
+            elif numeric_type in [om2.MFnNumericData.kByte, om2.MFnNumericData.kChar, om2.MFnNumericData.kShort, om2.MFnNumericData.kInt, om2.MFnNumericData.kLong]:
+                modifier.newPlugValueInt(plug, int(value))
+            elif numeric_type in [om2.MFnNumericData.kFloat, om2.MFnNumericData.kDouble]:
+                modifier.newPlugValueDouble(plug, float(value))
+            else:
+                raise TypeError('Can\'t batch a value for {0}'.format(plug.name()))
+        else:
+            raise TypeError('Can\'t batch a value for {0}'.format(plug.name()))
+
+
+cmds = BatchedCommands(maya_cmds, ModifierBackend() if om2 is not None else None)
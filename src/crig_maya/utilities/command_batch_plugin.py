@@ -0,0 +1,52 @@
+import sys
+import types
+
+import maya.api.OpenMaya as om2
+
+# The command the modifier backend in command_batch runs each batch's modifier through, so the batch goes on maya's
+# undo queue (in the same undo chunk as the cmds edits around it) and gets undone along with them.  command_batch
+# loads this itself, it isn't meant to be loaded from the plug-in manager.
+COMMAND_NAME = 'crigModifierBatch'
+# Maya imports this file again when it's loaded as a plug-in, separately from the rigger importing it, so the two
+# copies hand modifiers to each other through a module they can both find.
+SHARED_MODULE = 'crigModifierBatchShared'
+
+maya_useNewAPI = True
+
+shared = sys.modules.setdefault(SHARED_MODULE, types.ModuleType(SHARED_MODULE))
+if not hasattr(shared, 'pending'):
+    # The modifier the next command runs.
+    shared.pending = []
+
+
+class ModifierBatchCommand(om2.MPxCommand):
+
+    def __init__(self):
+        om2.MPxCommand.__init__(self)
+        self.modifier = None
+
+    def doIt(self, args):
+        self.modifier = shared.pending.pop()
+        try:
+            self.modifier.doIt()
+        except Exception:
+            # A failed command doesn't go on the undo queue, so whatever the modifier got through is taken back now.
+            self.modifier.undoIt()
+            raise
+
+    def redoIt(self):
+        self.modifier.doIt()
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+    def isUndoable(self):
+        return True
+
+
+def initializePlugin(plugin):
+    om2.MFnPlugin(plugin, 'CJs_Rigger').registerCommand(COMMAND_NAME, ModifierBatchCommand)
+
+
+def uninitializePlugin(plugin):
+    om2.MFnPlugin(plugin).deregisterCommand(COMMAND_NAME)
@@ -0,0 +1,47 @@
+import maya.api.OpenMaya as om2
+
+from ... import constants
+
+
+# Puts the shapes in a ControlCurveTable back on the control curves.  Every curve gets looked up in one selection
+# list, and the ones that already have the saved shape (like after a rebuild that didn't touch them) are left alone.
+# Gives back (curves set, curves that already matched, curves that aren't in the scene or can't be told apart).
+def applyControlCurves(table):
+    selection = om2.MSelectionList()
+    # (selection index, table index)
+    found = []
+    missing = []
+    for i, name in enumerate(table.names):
+        selection_index = selection.length()
+        try:
+            selection.add(name)
+        except RuntimeError:
+            missing.append(name)
+            continue
+        # A name that matches more than one node, or a node that's already in the list, doesn't add exactly one item,
+        # and there's no telling which item is this name's.
+        if selection.length() != selection_index + 1:
+            missing.append(name)
+            continue
+        found.append((selection_index, i))
+
+    applied = 0
+    unchanged = 0
+    curve_fn = om2.MFnNurbsCurve()
+    for selection_index, i in found:
+        try:
+            curve_fn.setObject(selection.getDagPath(selection_index))
+        except (RuntimeError, TypeError):
+            constants.RIGGER_LOG.warning('{0} isn\'t a curve, its saved shape won\'t be applied.'.format(table.names[i]))
+            continue
+        current_points = [x for point in curve_fn.cvPositions() for x in (point.x, point.y, point.z)]
+        if table.matches(i, current_points, curve_fn.knots()):
+            unchanged += 1
+            continue
+        points = table.getPoints(i)
+        knots = table.getKnots(i)
+        curve_fn.setCVPositions(om2.MPointArray([om2.MPoint(points[x], points[x + 1], points[x + 2]) for x in range(0, len(points), 3)]))
+        curve_fn.setKnots(om2.MDoubleArray(knots), 0, len(knots) - 1)
+        curve_fn.updateCurve()
+        applied += 1
+    return applied, unchanged, missing
@@ -0,0 +1,38 @@
+import maya.api.OpenMaya as om2
+
+from ... import curve_lengths
+
+
+# A nurbs curve's arc length table, built from its CVs and knots in one go so placing things along the curve by length
+# doesn't ask maya to measure it again each time.  Points still come from maya, in world space.
+class CurveLengthTable():
+
+    def __init__(self, dagPath, samplesPerSpan=curve_lengths.SAMPLES_PER_SPAN):
+        self.curveFn = om2.MFnNurbsCurve(dagPath)
+        points = self.curveFn.cvPositions(om2.MSpace.kObject)
+        knots = list(self.curveFn.knots())
+        degree = self.curveFn.degree
+        if all(x.w == 1.0 for x in points):
+            self.table = curve_lengths.ArcLengthTable.fromCurve([(x.x, x.y, x.z) for x in points], knots, degree, samplesPerSpan)
+        else:
+            # Weighted CVs, maya evaluates those.
+            params = curve_lengths.sampleParams(knots, degree, samplesPerSpan)
+            self.table = curve_lengths.ArcLengthTable.fromPoints(params, [self.curveFn.getPointAtParam(x, space=om2.MSpace.kObject) for x in params])
+
+    @property
+    def length(self):
+        return self.table.length
+
+    @property
+    def maxParam(self):
+        return self.table.maxParam
+
+    def paramAtLength(self, length):
+        return self.table.paramAtLength(length)
+
+    # 0 is the start of the curve and 1 the end, by length.
+    def param(self, fraction):
+        return self.table.paramAtFraction(fraction)
+
+    def pointAt(self, fraction):
+        return self.curveFn.getPointAtParam(self.param(fraction), space=om2.MSpace.kWorld)
@@ -0,0 +1,166 @@
+import os
+import re
+import json
+
+from .command_batch import cmds
+
+# Driven keys are the anim curves with a unitless input, the ones with a time input are regular animation.
+DRIVEN_KEY_CURVE_TYPES = ['animCurveUA', 'animCurveUL', 'animCurveUT', 'animCurveUU']
+SIDE_PREFIX = re.compile(r'^(L|R)_')
+OPPOSITE_PREFIXES = {'L': 'R', 'R': 'L'}
+
+
+# L_/R_ name -> the same name on the other side.  Every name gets worked out once, no matter how many connections it
+# shows up in, and anything without a side maps to itself.
+class MirrorNameTable():
+
+    def __init__(self, names=None):
+        self.names = {}
+        if names:
+            self.compile(names)
+
+    def compile(self, names):
+        for name in names:
+            self.mirror(name)
+
+    def mirror(self, name):
+        mirrored = self.names.get(name)
+        if mirrored is None:
+            mirrored = SIDE_PREFIX.sub(lambda x: '{0}_'.format(OPPOSITE_PREFIXES[x.group(1)]), name)
+            self.names[name] = mirrored
+        return mirrored
+
+    # "L_face_brow_KEY_JNT.translateX" -> "R_face_brow_KEY_JNT.translateX"
+    def mirrorPlug(self, plug):
+        node, separator, attr = plug.partition('.')
+        return '{0}{1}{2}'.format(self.mirror(node), separator, attr)
+
+    def hasSide(self, name):
+        return self.mirror(name) != name
+
+
+# Everything a mirror is going to do, worked out before anything in the scene changes:
+#   curves - {curve, mirrorCurve, connections: [[source, destination]]} for every curve that gets copied
+#   skipped - {curve, reason} for every curve that doesn't
+class DrivenKeyMirrorPlan():
+
+    def __init__(self):
+        self.curves = []
+        self.skipped = []
+
+    def skip(self, curve, reason):
+        self.skipped.append({'curve': curve, 'reason': reason})
+
+    def toDict(self):
+        return {
+            'curves': self.curves,
+            'skipped': self.skipped,
+        }
+
+    def export(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(path, 'w') as file:
+            json.dump(self.toDict(), file, indent=4)
+
+    def summary(self):
+        return 'Mirroring {0} driven key curves, skipping {1}.'.format(len(self.curves), len(self.skipped))
+
+
+# The driven key curves hooked up to "nodes", or every driven key curve in the scene if no nodes are given.
+def getDrivenKeyCurves(nodes=None):
+    if nodes is None:
+        return cmds.ls(type=DRIVEN_KEY_CURVE_TYPES) or []
+    curves = cmds.listConnections(nodes, source=True, destination=False, type='animCurve') or []
+    if not curves:
+        return []
+    return cmds.ls(list(dict.fromkeys(curves)), type=DRIVEN_KEY_CURVE_TYPES) or []
+
+
+# Groups the flat [curve plug, other plug, ...] list listConnections hands back by curve.
+def groupConnections(connections, isSource):
+    grouped = {}
+    for i in range(0, len(connections), 2):
+        curve_plug, other_plug = connections[i], connections[i + 1]
+        pair = [other_plug, curve_plug] if isSource else [curve_plug, other_plug]
+        grouped.setdefault(curve_plug.split('.', 1)[0], []).append(pair)
+    return grouped
+
+
+# Works out the mirror of every curve in one go: the connections for all of the curves come from two queries, and
+# whether the opposite nodes exist (and whether their attrs are already driven) from one query each.
+def buildMirrorPlan(curves, nameTable=None):
+    plan = DrivenKeyMirrorPlan()
+    if not curves:
+        return plan
+    name_table = nameTable or MirrorNameTable()
+    inputs = groupConnections(cmds.listConnections(curves, source=True, destination=False, connections=True, plugs=True) or [], True)
+    outputs = groupConnections(cmds.listConnections(curves, source=False, destination=True, connections=True, plugs=True) or [], False)
+
+    candidates = []
+    needed_nodes = set()
+    needed_destinations = set()
+    for curve in curves:
+        if not name_table.hasSide(curve):
+            plan.skip(curve, '{0} has no L_/R_ prefix to mirror'.format(curve))
+            continue
+        if curve not in outputs:
+            plan.skip(curve, '{0} doesn\'t drive anything'.format(curve))
+            continue
+        unsided = [x[1] for x in outputs[curve] if not name_table.hasSide(x[1].split('.', 1)[0])]
+        if unsided:
+            plan.skip(curve, '{0} drives {1}, which has no side'.format(curve, unsided[0]))
+            continue
+        # Same for whatever drives it, like the unitConversion a rotate driver goes through.  The copy would end up
+        # hooked up to this side's node.
+        unsided = [x[0] for x in inputs.get(curve, []) if not name_table.hasSide(x[0].split('.', 1)[0])]
+        if unsided:
+            plan.skip(curve, '{0} is driven by {1}, which has no side'.format(curve, unsided[0]))
+            continue
+        connections = [[name_table.mirrorPlug(source), name_table.mirrorPlug(destination)] for source, destination in inputs.get(curve, []) + outputs[curve]]
+        # The curve's own plugs point at the copy, which won't exist until the plan is run.
+        mirror_curve = name_table.mirror(curve)
+        needed_nodes.add(mirror_curve)
+        needed_nodes.update(x.split('.', 1)[0] for pair in connections for x in pair if not x.startswith('{0}.'.format(mirror_curve)))
+        needed_destinations.update(x[1] for x in connections if not x[1].startswith('{0}.'.format(mirror_curve)))
+        candidates.append((curve, mirror_curve, connections))
+
+    existing = set(cmds.ls(list(needed_nodes)) or []) if needed_nodes else set()
+    driven = set()
+    if needed_destinations:
+        driven_plugs = cmds.listConnections([x for x in needed_destinations if x.split('.', 1)[0] in existing], source=True, destination=False, connections=True, plugs=True) or []
+        driven = set(driven_plugs[::2])
+
+    planned = set(curves)
+    for curve, mirror_curve, connections in candidates:
+        if mirror_curve in existing or mirror_curve in planned:
+            plan.skip(curve, '{0} already exists'.format(mirror_curve))
+            continue
+        mirror_prefix = '{0}.'.format(mirror_curve)
+        missing = [x for pair in connections for x in pair if not x.startswith(mirror_prefix) and x.split('.', 1)[0] not in existing]
+        if missing:
+            plan.skip(curve, 'No opposite node found for {0}'.format(missing[0]))
+            continue
+        already_driven = [x[1] for x in connections if x[1] in driven]
+        if already_driven:
+            plan.skip(curve, '{0} is already driven'.format(already_driven[0]))
+            continue
+        planned.add(mirror_curve)
+        driven.update(x[1] for x in connections)
+        plan.curves.append({'curve': curve, 'mirrorCurve': mirror_curve, 'connections': connections})
+    return plan
+
+
+# The curves all get copied by one duplicate (a modifier can't copy keys), then the renames and connections go through
+# one batch.  Returns the mirrored curves.
+def applyMirrorPlan(plan):
+    if not plan.curves:
+        return []
+    with cmds.commandBatch('mirrorDrivenKeys'):
+        copies = cmds.duplicate([x['curve'] for x in plan.curves])
+        for entry, copy in zip(plan.curves, copies):
+            cmds.rename(copy, entry['mirrorCurve'])
+            for source, destination in entry['connections']:
+                cmds.connectAttr(source, destination)
+    return [x['mirrorCurve'] for x in plan.curves]
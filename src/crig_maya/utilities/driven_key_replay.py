@@ -0,0 +1,124 @@
+import maya.api.OpenMaya as om2
+import maya.api.OpenMayaAnim as oma2
+
+from .command_batch import cmds
+
+# Driven attribute type -> the anim curve setDrivenKeyframe would make for it.
+CURVE_TYPES = {
+    om2.MFn.kDoubleAngleAttribute: 'animCurveUA',
+    om2.MFn.kFloatAngleAttribute: 'animCurveUA',
+    om2.MFn.kDoubleLinearAttribute: 'animCurveUL',
+    om2.MFn.kFloatLinearAttribute: 'animCurveUL',
+    om2.MFn.kTimeAttribute: 'animCurveUT',
+}
+# What cmds.keyTangent calls the tangent types -> the API's.
+TANGENT_TYPES = {
+    'auto': oma2.MFnAnimCurve.kTangentAuto,
+    'clamped': oma2.MFnAnimCurve.kTangentClamped,
+    'fast': oma2.MFnAnimCurve.kTangentFast,
+    'fixed': oma2.MFnAnimCurve.kTangentFixed,
+    'flat': oma2.MFnAnimCurve.kTangentFlat,
+    'linear': oma2.MFnAnimCurve.kTangentLinear,
+    'plateau': oma2.MFnAnimCurve.kTangentPlateau,
+    'slow': oma2.MFnAnimCurve.kTangentSlow,
+    'spline': oma2.MFnAnimCurve.kTangentSmooth,
+    'step': oma2.MFnAnimCurve.kTangentStep,
+    'stepnext': oma2.MFnAnimCurve.kTangentStepNext,
+}
+# The preInfinity/postInfinity enum values.
+INFINITY_VALUES = {'constant': 0, 'linear': 1, 'cycle': 3, 'cycleRelative': 4, 'oscillate': 5}
+
+
+def getCurveType(plug):
+    node_name, attr_path = plug.split('.', 1)
+    selection = om2.MSelectionList()
+    selection.add(node_name)
+    attribute = om2.MFnDependencyNode(selection.getDependNode(0)).attribute(attr_path.split('.')[-1].split('[')[0])
+    return CURVE_TYPES.get(attribute.apiType(), 'animCurveUU')
+
+
+# "L_face_brow_KEY_JNT.rotateX" -> "L_face_brow_KEY_JNT_rotateX", the name setDrivenKeyframe gives its curve.
+def getCurveName(plug):
+    return plug.replace('.', '_').replace('[', '_').replace(']', '')
+
+
+# Makes the saved driven keys in a DrivenKeyTable.  Every anim curve (and the blendWeighted node for attrs with more
+# than one driver) gets made and hooked up in one batch, then each curve's keys are set straight through the API.
+# Attrs that are already driven by something (like keys a module made itself) get their keys added with
+# setDrivenKeyframe, the same as they always have, so they end up on the curves that are already there.
+def createDrivenKeys(table):
+    by_driven = table.getCurvesByDriven()
+    existing = set(cmds.ls(list(set(x.split('.', 1)[0] for x in by_driven))) or [])
+    by_driven = {plug: curves for plug, curves in by_driven.items() if plug.split('.', 1)[0] in existing}
+    if not by_driven:
+        return []
+    connected = cmds.listConnections(list(by_driven), source=True, destination=False, connections=True, plugs=True) or []
+    already_driven = set(connected[0::2])
+
+    created = []
+    with cmds.commandBatch('createDrivenKeys'):
+        for driven, curves in by_driven.items():
+            if driven in already_driven:
+                continue
+            curve_type = getCurveType(driven)
+            curve_name = getCurveName(driven)
+            outputs = [driven]
+            if len(curves) > 1:
+                blend = cmds.createNode('blendWeighted', name='{0}_blendWeighted'.format(curve_name))
+                cmds.connectAttr('{0}.output'.format(blend), driven)
+                outputs = ['{0}.input[{1}]'.format(blend, i) for i in range(len(curves))]
+            for i, output in enumerate(outputs):
+                curve = cmds.createNode(curve_type, name=curve_name if i == 0 else '{0}{1}'.format(curve_name, i))
+                cmds.connectAttr(table.driver[curves[i]], '{0}.input'.format(curve))
+                cmds.connectAttr('{0}.output'.format(curve), output)
+                for attr, infinity in [('preInfinity', table.preInfinity[curves[i]]), ('postInfinity', table.postInfinity[curves[i]])]:
+                    if infinity != 'constant':
+                        cmds.setAttr('{0}.{1}'.format(curve, attr), INFINITY_VALUES[infinity])
+                created.append((curve, curve_type, curves[i]))
+
+    if created:
+        selection = om2.MSelectionList()
+        for curve, curve_type, index in created:
+            selection.add(curve)
+        curve_fn = oma2.MFnAnimCurve()
+        for i, (curve, curve_type, index) in enumerate(created):
+            curve_fn.setObject(selection.getDependNode(i))
+            setCurveKeys(curve_fn, curve_type, table, index)
+
+    for driven in already_driven.intersection(by_driven):
+        for index in by_driven[driven]:
+            setDrivenKeysByCommand(table, index)
+    return [x[0] for x in created]
+
+
+# The saved values and angles are in UI units, the API wants internal ones.
+def setCurveKeys(curveFn, curveType, table, index):
+    start, end = table.getKeyRange(index)
+    angle_unit = om2.MAngle.uiUnit()
+    distance_unit = om2.MDistance.uiUnit()
+    for i in range(start, end):
+        value = table.values[i]
+        if curveType == 'animCurveUA':
+            value = om2.MAngle(value, angle_unit).asRadians()
+        elif curveType == 'animCurveUL':
+            value = om2.MDistance(value, distance_unit).asCentimeters()
+        in_type = table.inTangentTypes[i]
+        out_type = table.outTangentTypes[i]
+        key = curveFn.addKey(table.inputs[i], value, TANGENT_TYPES.get(in_type, oma2.MFnAnimCurve.kTangentGlobal),
+            TANGENT_TYPES.get(out_type, oma2.MFnAnimCurve.kTangentGlobal))
+        # Any other kind of tangent works out its own angle.
+        if in_type == 'fixed':
+            curveFn.setAngle(key, om2.MAngle(table.inAngles[i], angle_unit), True)
+        if out_type == 'fixed':
+            curveFn.setAngle(key, om2.MAngle(table.outAngles[i], angle_unit), False)
+
+
+def setDrivenKeysByCommand(table, index):
+    start, end = table.getKeyRange(index)
+    driven = table.driven[index]
+    for i in range(start, end):
+        cmds.setDrivenKeyframe(driven, currentDriver=table.driver[index], driverValue=table.inputs[i], value=table.values[i])
+    for key, i in enumerate(range(start, end)):
+        cmds.keyTangent(driven, absolute=True, inAngle=table.inAngles[i], outAngle=table.outAngles[i],
+            inTangentType=table.inTangentTypes[i], outTangentType=table.outTangentTypes[i], index=(key, key))
+    cmds.setInfinity(driven, preInfinite=table.preInfinity[index], postInfinite=table.postInfinity[index])
@@ -0,0 +1,87 @@
+import maya.api.OpenMaya as om2
+
+from .command_batch import cmds
+
+# Nodes that can sit between an anim curve and the attr it drives (or the attr driving it) -> the attr the curves come
+# in through.  setDrivenKeyframe puts in a blendWeighted when an attr gets a second driver, and a unitConversion turns
+# up whenever the units either side of a curve don't match.
+PASS_THROUGH_NODES = {om2.MFn.kUnitConversion: 'input', om2.MFn.kBlendWeighted: 'input'}
+
+
+# Finds the anim curves driving a node's attrs by following the plug connections back from the attrs themselves,
+# rather than intersecting the history either side of every curve.  Everything it looks up gets kept, so make one for a
+# whole save and hand it every node.
+class DrivenKeyResolver():
+
+    def __init__(self):
+        self.nodeFn = om2.MFnDependencyNode()
+        # curve -> its MObject, so nothing has to be looked up by name twice.
+        self.curveNodes = {}
+        # pass through node -> [curves] feeding it.
+        self.passThroughCurves = {}
+        # curve -> driver plug, or None if nothing is driving it.
+        self.drivers = {}
+        # curve -> {'keyframes', 'keytangents', 'infinites'}
+        self.keyData = {}
+
+    # Same as python_utils.getDrivenKeys(): {driven attr: {driver: {'keyframes', 'keytangents', 'infinites'}}}
+    def getDrivenKeys(self, node):
+        selection = om2.MSelectionList()
+        selection.add(node)
+        self.nodeFn.setObject(selection.getDependNode(0))
+        keys_dict = {}
+        for plug in self.nodeFn.getConnections():
+            if not plug.isDestination:
+                continue
+            curves = self.getSourceCurves(plug.source())
+            if not curves:
+                continue
+            drivers = keys_dict.setdefault('{0}.{1}'.format(node, plug.partialName(useLongNames=True)), {})
+            for curve in curves:
+                driver = self.getDriver(curve)
+                if driver is not None:
+                    drivers[driver] = self.getKeyData(curve)
+        return keys_dict
+
+    # The names of the curves behind "plug", a source plug.
+    def getSourceCurves(self, plug):
+        if plug.isNull:
+            return []
+        source_node = plug.node()
+        if source_node.hasFn(om2.MFn.kAnimCurve):
+            name = om2.MFnDependencyNode(source_node).name()
+            self.curveNodes[name] = source_node
+            return [name]
+        input_attr = None
+        for fn_type, attr in PASS_THROUGH_NODES.items():
+            if source_node.hasFn(fn_type):
+                input_attr = attr
+                break
+        if input_attr is None:
+            return []
+        node_fn = om2.MFnDependencyNode(source_node)
+        name = node_fn.name()
+        if name not in self.passThroughCurves:
+            curves = self.passThroughCurves[name] = []
+            for input_plug in node_fn.getConnections():
+                if input_plug.isDestination and input_plug.partialName(useLongNames=True).split('[')[0] == input_attr:
+                    curves.extend(self.getSourceCurves(input_plug.source()))
+        return self.passThroughCurves[name]
+
+    # The plug driving "curve", skipping over any unitConversion between them.
+    def getDriver(self, curve):
+        if curve not in self.drivers:
+            source = om2.MFnDependencyNode(self.curveNodes[curve]).findPlug('input', False).source()
+            while not source.isNull and source.node().hasFn(om2.MFn.kUnitConversion):
+                source = om2.MFnDependencyNode(source.node()).findPlug('input', False).source()
+            self.drivers[curve] = None if source.isNull else source.name()
+        return self.drivers[curve]
+
+    def getKeyData(self, curve):
+        if curve not in self.keyData:
+            self.keyData[curve] = {
+                'keyframes': cmds.keyframe(curve, query=True, floatChange=True, valueChange=True, absolute=True, index=()),
+                'keytangents': cmds.keyTangent(curve, query=True, inAngle=True, inTangentType=True, outAngle=True, outTangentType=True, index=()),
+                'infinites': [cmds.getAttr('{0}.preInfinity'.format(curve), asString=True), cmds.getAttr('{0}.postInfinity'.format(curve), asString=True)],
+            }
+        return self.keyData[curve]
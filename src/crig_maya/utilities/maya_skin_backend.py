@@ -0,0 +1,84 @@
+from array import array
+
+import maya.cmds as cmds
+import maya.mel as mel
+import maya.api.OpenMaya as om2
+import maya.api.OpenMayaAnim as oma2
+
+from . import python_utils
+from ... import skin_backend
+
+# Shape type -> (component type, name the components get listed under)
+COMPONENT_TYPES = {
+    'mesh': (om2.MFn.kMeshVertComponent, 'vtx'),
+    'nurbsCurve': (om2.MFn.kCurveCVComponent, 'cv')
+}
+
+
+class MayaSkinBackend(skin_backend.SkinBackend):
+
+    def supportsShape(self, shape):
+        return cmds.objectType(shape) in COMPONENT_TYPES
+
+    def exists(self, node):
+        return bool(cmds.ls(node))
+
+    def findSkinCluster(self, shape):
+        return mel.eval('findRelatedSkinCluster ' + shape)
+
+    def createSkinCluster(self, shape, influences, name):
+        return cmds.skinCluster(influences, shape, name=name, maximumInfluences=3, dropoffRate=7, toSelectedBones=True)[0]
+
+    def getInfluences(self, skinCluster):
+        skin_fn = oma2.MFnSkinCluster(python_utils.getDependNode(skinCluster))
+        return [x.partialPathName() for x in skin_fn.influenceObjects()]
+
+    def getVertexCount(self, shapePath):
+        if shapePath.hasFn(om2.MFn.kMesh):
+            return om2.MFnMesh(shapePath).numVertices
+        return om2.MFnNurbsCurve(shapePath).numCVs
+
+    def getComponents(self, shape):
+        shape_path = python_utils.getDagPath(shape)
+        # Components are listed under the transform's name, e.g. "body_GEO.vtx[0]"
+        transform_path = om2.MDagPath(shape_path)
+        transform_path.pop()
+        component_name = '{0}.{1}'.format(transform_path.partialPathName(), COMPONENT_TYPES[cmds.objectType(shape)][1])
+        return component_name, range(self.getVertexCount(shape_path))
+
+    def makeComponents(self, shape, shapePath, vertexIds=None):
+        component_fn = om2.MFnSingleIndexedComponent()
+        components = component_fn.create(COMPONENT_TYPES[cmds.objectType(shape)][0])
+        if vertexIds is None:
+            component_fn.setCompleteData(self.getVertexCount(shapePath))
+        else:
+            component_fn.addElements(list(vertexIds))
+        return components
+
+    def getWeights(self, skinCluster, shape, vertexIds=None):
+        skin_fn = oma2.MFnSkinCluster(python_utils.getDependNode(skinCluster))
+        shape_path = python_utils.getDagPath(shape)
+        weights, num_influences = skin_fn.getWeights(shape_path, self.makeComponents(shape, shape_path, vertexIds))
+        return array('d', weights)
+
+    def setWeights(self, skinCluster, shape, weights, vertexIds=None):
+        skin_fn = oma2.MFnSkinCluster(python_utils.getDependNode(skinCluster))
+        shape_path = python_utils.getDagPath(shape)
+        influence_ids = om2.MIntArray(list(range(len(skin_fn.influenceObjects()))))
+        skin_fn.setWeights(shape_path, self.makeComponents(shape, shape_path, vertexIds), influence_ids, om2.MDoubleArray(weights), normalize=True)
+
+    def getPoints(self, shape):
+        shape_path = python_utils.getDagPath(shape)
+        if shape_path.hasFn(om2.MFn.kMesh):
+            points = om2.MFnMesh(shape_path).getPoints(om2.MSpace.kObject)
+        else:
+            points = om2.MFnNurbsCurve(shape_path).cvPositions(om2.MSpace.kObject)
+        return [(x.x, x.y, x.z) for x in points]
+
+    def getTopology(self, shape):
+        shape_path = python_utils.getDagPath(shape)
+        if shape_path.hasFn(om2.MFn.kMesh):
+            counts, vertex_ids = om2.MFnMesh(shape_path).getVertices()
+            return list(counts), list(vertex_ids)
+        curve_fn = om2.MFnNurbsCurve(shape_path)
+        return [curve_fn.numCVs, curve_fn.degree, curve_fn.form], []
@@ -0,0 +1,48 @@
+import maya.api.OpenMaya as om2
+
+
+def toUI(point):
+    return om2.MDistance.internalToUI(point.x), om2.MDistance.internalToUI(point.y), om2.MDistance.internalToUI(point.z)
+
+
+# An MPointArray read a point at a time in the scene's unit.
+class UIPoints():
+
+    def __init__(self, points):
+        self.points = points
+
+    def __len__(self):
+        return len(self.points)
+
+    def __getitem__(self, index):
+        return toUI(self.points[index])
+
+
+# What vertex_positions.MeshPositions asks a mesh, a vertex at a time, in world space.  Nothing about the mesh gets
+# pulled until it's asked for, so a few vertices on a dense mesh cost a few calls instead of every point.  Points go
+# in and come out in the scene's linear unit, the same as cmds.xform and cmds.joint use, MFnMesh works in centimetres.
+class MeshVertexQuery():
+
+    def __init__(self, dagPath):
+        self.meshFn = om2.MFnMesh(dagPath)
+        self.vertexIt = om2.MItMeshVertex(dagPath)
+
+    @property
+    def vertexCount(self):
+        return self.meshFn.numVertices
+
+    def getPoint(self, vertex):
+        return toUI(self.meshFn.getPoint(vertex, om2.MSpace.kWorld))
+
+    # MeshPositions only converts the points it uses, each one as it's indexed.
+    def getPoints(self):
+        return UIPoints(self.meshFn.getPoints(om2.MSpace.kWorld))
+
+    def getNeighbours(self, vertex):
+        self.vertexIt.setIndex(vertex)
+        return list(self.vertexIt.getConnectedVertices())
+
+    def closestFaceVertices(self, point):
+        internal = om2.MPoint(*[om2.MDistance.uiToInternal(x) for x in point[:3]])
+        closest, face = self.meshFn.getClosestPoint(internal, om2.MSpace.kWorld)
+        return list(self.meshFn.getPolygonVertices(face))
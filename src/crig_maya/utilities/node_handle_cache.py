@@ -0,0 +1,107 @@
+from contextlib import contextmanager
+
+import maya.api.OpenMaya as om2
+
+# The cache python_utils.getDagPath()/getDependNode() go through while a build is running, None otherwise.
+ACTIVE_CACHE = None
+
+
+# Name -> MObjectHandle for the nodes looked up during a build, so asking for the same node again doesn't go back
+# through an MSelectionList.  Handles are checked before they're used, and dropped as soon as their node is renamed or
+# deleted.  DAG paths are made fresh from the handle every time since reparenting doesn't change the node, just the
+# path to it.  Only plain node names get cached, full paths change with reparenting and plugs or components
+# ("node.attr", "mesh.vtx[0]") don't always come back as the node.
+class NodeHandleCache():
+
+    def __init__(self):
+        # name -> MObjectHandle
+        self.handles = {}
+        # MObjectHandle.hashCode() -> [names it's cached under]
+        self.names = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.callbackIds = []
+
+    def start(self):
+        self.callbackIds = [
+            om2.MNodeMessage.addNameChangedCallback(om2.MObject.kNullObj, self.nodeRenamed),
+            om2.MDGMessage.addNodeRemovedCallback(self.nodeRemoved, 'dependNode'),
+        ]
+
+    def stop(self):
+        for callback_id in self.callbackIds:
+            om2.MMessage.removeCallback(callback_id)
+        self.callbackIds = []
+        self.clear()
+
+    def clear(self):
+        self.handles = {}
+        self.names = {}
+
+    def getDependNode(self, name):
+        handle = self.handles.get(name) if self.isCacheable(name) else None
+        if handle is not None and handle.isValid():
+            self.hits += 1
+            return handle.object()
+        self.misses += 1
+        selection = om2.MSelectionList()
+        selection.add(name)
+        node = selection.getDependNode(0)
+        if self.isCacheable(name):
+            self.add(name, node)
+        return node
+
+    def getDagPath(self, name):
+        if not self.isCacheable(name):
+            self.misses += 1
+            selection = om2.MSelectionList()
+            selection.add(name)
+            return selection.getDagPath(0)
+        node = self.getDependNode(name)
+        if not node.hasFn(om2.MFn.kDagNode):
+            raise TypeError('{0} is not a DAG node'.format(name))
+        return om2.MDagPath.getAPathTo(node)
+
+    def isCacheable(self, name):
+        return isinstance(name, str) and '|' not in name and '.' not in name
+
+    def add(self, name, node):
+        handle = om2.MObjectHandle(node)
+        self.handles[name] = handle
+        self.names.setdefault(handle.hashCode(), []).append(name)
+
+    def invalidate(self, node):
+        for name in self.names.pop(om2.MObjectHandle(node).hashCode(), []):
+            if self.handles.pop(name, None) is not None:
+                self.invalidations += 1
+
+    def nodeRenamed(self, node, previousName, clientData):
+        self.invalidate(node)
+        # Something renamed to a name that's cached means the cached node isn't the only one with that name any more.
+        handle = self.handles.get(om2.MFnDependencyNode(node).name())
+        if handle is not None:
+            self.invalidate(handle.object())
+
+    def nodeRemoved(self, node, clientData):
+        self.invalidate(node)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations}
+
+
+# Makes a NodeHandleCache the active one for as long as this is open.  If one's already open, that one keeps being used.
+@contextmanager
+def cachedNodeHandles():
+    global ACTIVE_CACHE
+    if ACTIVE_CACHE is not None:
+        yield ACTIVE_CACHE
+        return
+    cache = NodeHandleCache()
+    cache.start()
+    ACTIVE_CACHE = cache
+    try:
+        yield cache
+    finally:
+        ACTIVE_CACHE = None
+        cache.stop()
@@ -0,0 +1,243 @@
+import os
+import math
+from array import array
+
+import maya.api.OpenMaya as om2
+
+from . import python_utils
+from .command_batch import cmds
+from ... import bind_positions, constants
+
+ANGLE_ATTRS = set(['rotateX', 'rotateY', 'rotateZ'])
+DISTANCE_ATTRS = set(['translateX', 'translateY', 'translateZ'])
+# The nodes LivePositions watches, what gets moved around while joints are laid out.
+TRACKED_SUFFIXES = ('_BND_JNT', '_LOC')
+# The compounds restorePositions() sets in one go through MFnTransform when nothing's stopping them.
+TRANSFORM_ATTRS = {
+    'translate': ['translateX', 'translateY', 'translateZ'],
+    'rotate': ['rotateX', 'rotateY', 'rotateZ'],
+    'scale': ['scaleX', 'scaleY', 'scaleZ'],
+}
+
+
+# Reads every transform under each deform group, {component key: deform group}, straight off of their plugs in one walk
+# per group.  Values come back in UI units, the same as getAttr gives them.
+def snapshotPositions(deformGroups, attrs=bind_positions.ATTRS):
+    snapshot = bind_positions.PositionSnapshot(attrs)
+    iterator = om2.MItDag(om2.MItDag.kDepthFirst, om2.MFn.kTransform)
+    node_fn = om2.MFnDependencyNode()
+    angle_unit = om2.MAngle.uiUnit()
+    distance_unit = om2.MDistance.uiUnit()
+    for component_key, group in deformGroups.items():
+        try:
+            root = python_utils.getDagPath(group)
+        except RuntimeError:
+            constants.RIGGER_LOG.warning('Could not find {0}, {1} won\'t have any positions saved.'.format(group, component_key))
+            continue
+        nodes = []
+        values = array('d')
+        iterator.reset(root, om2.MItDag.kDepthFirst, om2.MFn.kTransform)
+        # The group itself comes first, it isn't saved, just what's under it.
+        iterator.next()
+        while not iterator.isDone():
+            path = iterator.getPath()
+            node_fn.setObject(path.node())
+            nodes.append(path.partialPathName())
+            readRow(node_fn, attrs, values, angle_unit, distance_unit)
+            iterator.next()
+        if nodes:
+            snapshot.addComponent(component_key, nodes, values)
+    return snapshot
+
+
+# Appends "node_fn"'s node's attrs to "values" in UI units, NaN for the ones it doesn't have.
+def readRow(node_fn, attrs, values, angle_unit, distance_unit):
+    for attr in attrs:
+        if not node_fn.hasAttribute(attr):
+            values.append(math.nan)
+            continue
+        plug = node_fn.findPlug(attr, False)
+        if attr in ANGLE_ATTRS:
+            values.append(plug.asMAngle().asUnits(angle_unit))
+        elif attr in DISTANCE_ATTRS:
+            values.append(plug.asMDistance().asUnits(distance_unit))
+        else:
+            values.append(plug.asDouble())
+
+
+# Puts saved positions, {node: {attr: value}} in UI units, back on their nodes.  Every node gets looked up in one
+# selection list, and each node's translate/rotate/scale get set whole through MFnTransform, with whatever wasn't saved
+# kept at its current value.  Compounds that are locked or connected are set a child at a time instead, so the children
+# that are free still get their values.  Gives back (nodes restored, nodes that aren't in the scene or can't be told
+# apart, "node.attr"s that couldn't be set).
+def restorePositions(positions):
+    # Anything queued up has to exist before the API can find it.
+    cmds.flushBatch()
+    selection = om2.MSelectionList()
+    # (selection index, name)
+    found = []
+    missing = []
+    for name in positions:
+        selection_index = selection.length()
+        try:
+            selection.add(name)
+        except RuntimeError:
+            missing.append(name)
+            continue
+        # A name that matches more than one node, or a node that's already in the list, doesn't add exactly one item,
+        # and there's no telling which item is this name's.
+        if selection.length() != selection_index + 1:
+            missing.append(name)
+            continue
+        found.append((selection_index, name))
+
+    restored = 0
+    blocked = []
+    node_fn = om2.MFnDependencyNode()
+    transform_fn = om2.MFnTransform()
+    angle_unit = om2.MAngle.uiUnit()
+    distance_unit = om2.MDistance.uiUnit()
+    for selection_index, name in found:
+        node = selection.getDependNode(selection_index)
+        node_fn.setObject(node)
+        is_transform = node.hasFn(om2.MFn.kTransform)
+        if is_transform:
+            transform_fn.setObject(node)
+        values = positions[name]
+        handled = set()
+        for compound, children in TRANSFORM_ATTRS.items():
+            saved = [values.get(x) for x in children]
+            if all(x is None for x in saved):
+                continue
+            handled.update(children)
+            if not is_transform or node_fn.findPlug(compound, False).isFreeToChange() != om2.MPlug.kFreeToChange:
+                blocked.extend(setPlugValues(node_fn, name, [(x, y) for x, y in zip(children, saved) if y is not None], angle_unit, distance_unit))
+                continue
+            if compound == 'translate':
+                current = transform_fn.translation(om2.MSpace.kTransform)
+                transform_fn.setTranslation(om2.MVector(*[x if y is None else om2.MDistance(y, distance_unit).asCentimeters()
+                    for x, y in zip(current, saved)]), om2.MSpace.kTransform)
+            elif compound == 'rotate':
+                # The current rotation keeps the node's rotate order, so the saved values go on as they are.
+                rotation = transform_fn.rotation(om2.MSpace.kTransform)
+                rotation.x, rotation.y, rotation.z = [x if y is None else om2.MAngle(y, angle_unit).asRadians()
+                    for x, y in zip((rotation.x, rotation.y, rotation.z), saved)]
+                transform_fn.setRotation(rotation, om2.MSpace.kTransform)
+            else:
+                transform_fn.setScale([x if y is None else y for x, y in zip(transform_fn.scale(), saved)])
+        blocked.extend(setPlugValues(node_fn, name, [(x, y) for x, y in values.items() if x not in handled], angle_unit, distance_unit))
+        restored += 1
+    return restored, missing, blocked
+
+
+# Sets [(attr, value)] one plug at a time, giving back the "node.attr"s that aren't there or aren't free to change.
+def setPlugValues(node_fn, name, values, angle_unit, distance_unit):
+    blocked = []
+    for attr, value in values:
+        if not node_fn.hasAttribute(attr):
+            blocked.append('{0}.{1}'.format(name, attr))
+            continue
+        plug = node_fn.findPlug(attr, False)
+        if plug.isFreeToChange() != om2.MPlug.kFreeToChange:
+            blocked.append('{0}.{1}'.format(name, attr))
+            continue
+        if attr in ANGLE_ATTRS:
+            plug.setMAngle(om2.MAngle(value, angle_unit))
+        elif attr in DISTANCE_ATTRS:
+            plug.setMDistance(om2.MDistance(value, distance_unit))
+        else:
+            plug.setDouble(value)
+    return blocked
+
+
+# Keeps a positions snapshot up to date while joints are being laid out.  Every bind joint and locator under the
+# deform groups gets an attribute changed callback that marks it as moved, and whenever maya's idle the moved ones get
+# read and appended to the snapshot's journal.  Saving only has to sync the journal, and "stop()" folds the journal
+# back into the snapshot.
+class LivePositions():
+
+    def __init__(self, path, snapshot):
+        self.path = path
+        self.snapshot = snapshot
+        self.journal = bind_positions.PositionJournal(bind_positions.journalPath(path), snapshot.attrs)
+        # (component, node) -> where its row starts in the snapshot's values.
+        self.rowIndex = snapshot.getRowIndex()
+        # (component, node) -> MObjectHandle
+        self.handles = {}
+        self.moved = set()
+        # The rows appended since this started, what saving adds to the controller's positions.
+        self.changed = {}
+        self.watchedAttrs = set(snapshot.attrs) | set(x for x, children in TRANSFORM_ATTRS.items() if set(children) & set(snapshot.attrs))
+        self.callbackIds = []
+
+    # Starts watching every bind joint and locator in the snapshot, with a fresh journal.
+    def start(self):
+        self.snapshot.write(self.path)
+        self.journal.open()
+        selection = om2.MSelectionList()
+        # (selection index, key)
+        keys = []
+        for key in self.rowIndex:
+            if not key[1].endswith(TRACKED_SUFFIXES):
+                continue
+            selection_index = selection.length()
+            try:
+                selection.add(key[1])
+            except RuntimeError:
+                continue
+            # Same as restorePositions(), a name that doesn't add exactly one item can't be told apart from the others.
+            if selection.length() != selection_index + 1:
+                continue
+            keys.append((selection_index, key))
+        for selection_index, key in keys:
+            node = selection.getDependNode(selection_index)
+            self.handles[key] = om2.MObjectHandle(node)
+            self.callbackIds.append(om2.MNodeMessage.addAttributeChangedCallback(node, self.attributeChanged, key))
+        self.callbackIds.append(om2.MEventMessage.addEventCallback('idle', self.idle))
+
+    # Appends whatever's moved and folds the journal back into the snapshot, which is then all there is.
+    def stop(self):
+        for callback_id in self.callbackIds:
+            try:
+                om2.MMessage.removeCallback(callback_id)
+            except RuntimeError:
+                pass
+        self.callbackIds = []
+        self.flush()
+        self.snapshot.write(self.path)
+        self.journal.close()
+        os.remove(self.journal.path)
+
+    def attributeChanged(self, message, plug, otherPlug, clientData):
+        if message & om2.MNodeMessage.kAttributeSet and plug.partialName(useLongNames=True) in self.watchedAttrs:
+            self.moved.add(clientData)
+
+    def idle(self, clientData):
+        if self.moved:
+            self.flush()
+
+    # Reads the nodes that were marked as moved, and appends the ones that really did change.  Gives back how many
+    # rows were appended.
+    def flush(self, sync=False):
+        rows = []
+        node_fn = om2.MFnDependencyNode()
+        angle_unit = om2.MAngle.uiUnit()
+        distance_unit = om2.MDistance.uiUnit()
+        stride = len(self.snapshot.attrs)
+        for key in self.moved:
+            handle = self.handles[key]
+            if not handle.isValid():
+                continue
+            node_fn.setObject(handle.object())
+            values = array('d')
+            readRow(node_fn, self.snapshot.attrs, values, angle_unit, distance_unit)
+            start = self.rowIndex[key]
+            if values.tobytes() == self.snapshot.values[start:start + stride].tobytes():
+                continue
+            self.snapshot.values[start:start + stride] = values
+            self.changed[key] = values
+            rows.append((key[0], key[1], values))
+        self.moved = set()
+        if rows or sync:
+            self.journal.append(rows, sync)
+        return len(rows)
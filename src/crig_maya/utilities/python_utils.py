@@ -1,20 +1,13 @@
 import math
-import maya.cmds as cmds
 import maya.mel as mel
 import maya.OpenMaya as om
 import maya.api.OpenMaya as om2
 
-from ... import constants
+from . import curve_length_table, driven_key_resolver, node_handle_cache
+from .command_batch import cmds
+from ... import constants, node_names
 
 
-def setNodesFromDict(node_dict):
-    for name, attrs in node_dict.items():
-        for attr, data in attrs.items():
-            try:
-                cmds.setAttr('{0}.{1}'.format(name, attr), data)
-            except:
-                constants.RIGGER_LOG.info('attr {0}.{1} could not be set from saved positions.'.format(name, attr))
-
 def renameCurveShape(node, name):
     curve_shape = cmds.listRelatives(node, shapes=True)[0]
     cmds.rename(curve_shape, name)
@@ -24,15 +17,15 @@ def getRigGeo():
 
 def zeroOutLocal(node):
     try:
-        cmds.setAttr('{0}.translate'.format(node), 0,0,0)
+        cmds.immediate.setAttr('{0}.translate'.format(node), 0,0,0)
     except:
         constants.RIGGER_LOG.info('couldn\'t zero out {0}.translate')
     try:
-        cmds.setAttr('{0}.rotate'.format(node), 0,0,0)
+        cmds.immediate.setAttr('{0}.rotate'.format(node), 0,0,0)
     except:
         constants.RIGGER_LOG.info('couldn\'t zero out {0}.rotate')
     try:
-        cmds.setAttr('{0}.scale'.format(node), 1,1,1)
+        cmds.immediate.setAttr('{0}.scale'.format(node), 1,1,1)
     except:
         constants.RIGGER_LOG.info('couldn\'t zero out {0}.scale')
 
@@ -387,12 +380,12 @@ def hookUpPointOnSurfaceTo4x4Mat(pointOnSurfaceNode, fourByFourMatNode):
     cmds.connectAttr(pointOnSurfaceNode + '.tangentVz', fourByFourMatNode + '.in22')
 
 def duplicateBindJoint(bind_joint, parent, new_purpose_suffix):
-    prefix, component_name, joint_name, node_purpose, node_type = getNodeNameParts(bind_joint)
+    bind_joint_name = getNodeNameParts(bind_joint)
     world_position = cmds.xform('{0}'.format(bind_joint), query=True, translation=True, worldSpace=True)
     world_rotation = cmds.xform('{0}'.format(bind_joint), query=True, rotation=True, worldSpace=True)
     new_joint = cmds.joint(
                         parent,
-                        name='{0}_{1}_{2}_{3}_{4}'.format(prefix, component_name, joint_name, new_purpose_suffix, node_type),
+                        name=bind_joint_name.withParts(purpose=new_purpose_suffix).format(),
                         orientation=world_rotation,
                         position=world_position,
                         radius=cmds.getAttr('{0}.radius'.format(bind_joint))
@@ -413,29 +406,22 @@ def duplicateBindChain(bind_joint, parent, new_purpose_suffix):
     return dupe_joints
 
 def createLocAt(joint, parent, loc_purpose_suffix):
-    prefix, component_name, joint_name, node_purpose, node_type = getNodeNameParts(joint)
-    new_locator = cmds.spaceLocator(name='{0}_{1}_{2}_{3}_LOC'.format(prefix, component_name, joint_name, loc_purpose_suffix))[0]
+    new_locator = cmds.spaceLocator(name=getNodeNameParts(joint).withParts(purpose=loc_purpose_suffix, type='LOC').format())[0]
     cmds.parent(new_locator, parent)
     cmds.matchTransform(new_locator, joint, pos=True, rot=False, scale=False)
     return new_locator
 
 def createLocatorAndParent(joint, parent, loc_purpose_suffix, position=True, rotation=False, scale=False):
-    prefix, component_name, joint_name, node_purpose, node_type = getNodeNameParts(joint)
-    locator_place_group = cmds.group(name='{0}_{1}_{2}_PLC_GRP'.format(prefix, component_name, joint_name), parent=parent, empty=True)
+    locator_place_group = cmds.group(name=getNodeNameParts(joint).withParts(purpose='PLC', type='GRP').format(), parent=parent, empty=True)
     cmds.matchTransform(locator_place_group, joint, position=position, rotation=rotation, scale=scale)
     locator = createLocAt(locator_place_group, locator_place_group, loc_purpose_suffix)
     return locator_place_group, locator
 
 
+# The NodeName for "node", parsed once and cached after that.  It unpacks like the old
+# (prefix, component_name, joint_name, node_purpose, node_type) tuple.
 def getNodeNameParts(node):
-    component_part = node.split('_', 2)
-    prefix = component_part[0]
-    component_name = component_part[1]
-    node_part = component_part[2].rsplit('_', 2)
-    joint_name = node_part[0]
-    node_purpose = node_part[1]
-    node_type = node_part[2]
-    return prefix, component_name, joint_name, node_purpose, node_type
+    return node_names.parseNodeName(node)
 
 def getGeoNameParts(geo):
     splits = geo.split('_')
@@ -474,18 +460,32 @@ def dictionizeAttrs(node_list, attr_list, type=False):
 
     return attr_dict
 
+# Both of these go through the build's NodeHandleCache while there is one.
 def getDagPath(node=None):
+    # Anything queued up has to exist before the API can find it.
+    cmds.flushBatch()
+    if node_handle_cache.ACTIVE_CACHE is not None:
+        return node_handle_cache.ACTIVE_CACHE.getDagPath(node)
     selection = om2.MSelectionList()
     selection.add(node)
     dagPath = selection.getDagPath(0)
     return dagPath
 
 def getDependNode(node=None):
+    cmds.flushBatch()
+    if node_handle_cache.ACTIVE_CACHE is not None:
+        return node_handle_cache.ACTIVE_CACHE.getDependNode(node)
     selection = om2.MSelectionList()
     selection.add(node)
     dagPath = selection.getDependNode(0)
     return dagPath
 
+def getNodeName(node):
+    # DAG nodes get their full path, in case the short name isn't unique.
+    if node.hasFn(om2.MFn.kDagNode):
+        return om2.MFnDagNode(node).fullPathName()
+    return om2.MFnDependencyNode(node).name()
+
 def getLocalOffset(parent, child):
     parentWorldMatrix = getDagPath(parent).inclusiveMatrix()
     childWorldMatrix = getDagPath(child).inclusiveMatrix()
@@ -555,19 +555,21 @@ def pinTransformToSurface(transform, surface, connectionsList=['rotate', 'transl
     mult_matrix, matrix_decompose = constrainByMatrix(fourByFour + '.output', transform, False, False, connectionsList)
     return mult_matrix, matrix_decompose, fourByFour, pOSurface
 
+# Arc length lookups for a curve, measured once.  Anything putting more than one thing along the same curve should get
+# one of these and hand it to getCurveParam()/getPointAlongCurve() instead of the curve's name.
+def getCurveLengthTable(curve):
+    return curve_length_table.CurveLengthTable(getDagPath(curve))
+
 # Basically pass in a 0-1 U coordinate and get back the associated param along the curve.
 def getCurveParam(fakeParam, curve):
-    curve = om2.MFnNurbsCurve(getDagPath(curve))
-    curveLen = curve.length()
-    actualParam = curve.findParamFromLength(curveLen * fakeParam)
-    return actualParam
+    if not isinstance(curve, curve_length_table.CurveLengthTable):
+        curve = getCurveLengthTable(curve)
+    return curve.param(fakeParam)
 
 def getPointAlongCurve(fakeParam, curve):
-    curve = om2.MFnNurbsCurve(getDagPath(curve))
-    curveLen = curve.length()
-    actualParam = curve.findParamFromLength(curveLen * fakeParam)
-    point = curve.getPointAtParam(actualParam, space=om2.MSpace.kWorld)
-    return point
+    if not isinstance(curve, curve_length_table.CurveLengthTable):
+        curve = getCurveLengthTable(curve)
+    return curve.pointAt(fakeParam)
 
 def getPointAlongSurface(fakeParamU, fakeParamV, surf):
     surface = om2.MFnNurbsSurface(getDagPath(surf))
@@ -589,34 +591,16 @@ def getNumSurfCVs(node):
     surf = om2.MFnNurbsSurface(getDagPath(node))
     return surf.numCVsInU, surf.numCVsInV
 
-def getDrivenKeys(node):
-    keys_dict = {}
-    driven_attrs = cmds.setDrivenKeyframe(node, query=True, driven=True)
-    if driven_attrs:
-        for attr in cmds.setDrivenKeyframe(node, query=True, driven=True):
-            keys_dict[attr] = {}
-    for attr, dict in keys_dict.items():
-        drivers = cmds.setDrivenKeyframe(attr, query=True, driver=True)
-        for driver in drivers:
-            dict[driver] = {}
-            # Now we have to find the dang animCurve node in between the driver attr and the driven attr.  This is a pain.
-            downstream_nodes = cmds.listConnections(driver)
-            upstream_node = cmds.listConnections(attr)
-            upstream_node_history = cmds.listHistory(upstream_node)
-            for downstream_node in downstream_nodes:
-                downstream_node_history = cmds.listHistory(downstream_node, future=True)
-                common_nodes = [x for x in downstream_node_history if x in upstream_node_history and 'animCurve' in cmds.nodeType(x)]
-                # If there's anything in common_nodes as near as I can tell it *has* to be the animCurve node we want.
-                if common_nodes:
-                    dict[driver]['keyframes'] = cmds.keyframe(common_nodes[0], query=True, floatChange=True, valueChange=True, absolute=True, index=())
-                    dict[driver]['keytangents'] = cmds.keyTangent(common_nodes[0], query=True, inAngle=True, inTangentType=True, outAngle=True, outTangentType=True, index=())
-                    dict[driver]['infinites'] = []
-                    dict[driver]['infinites'].append(cmds.getAttr('{0}.preInfinity'.format(common_nodes[0]), asString=True))
-                    dict[driver]['infinites'].append(cmds.getAttr('{0}.postInfinity'.format(common_nodes[0]), asString=True))
-    return keys_dict
+# {driven attr: {driver: {'keyframes', 'keytangents', 'infinites'}}} for every driven key on "node".  Pass the same
+# resolver in for every node when getting a lot of them, so the curves and whatever is between them only get looked at once.
+def getDrivenKeys(node, resolver=None):
+    if resolver is None:
+        resolver = driven_key_resolver.DrivenKeyResolver()
+    return resolver.getDrivenKeys(node)
 
+# "node" can be a name or a dag path to it.
 def getCurveData(node):
-    curve = om2.MFnNurbsCurve(getDagPath(node))
+    curve = om2.MFnNurbsCurve(node if isinstance(node, om2.MDagPath) else getDagPath(node))
     point_array = curve.cvPositions()
     knot_array = curve.knots()
     out_dict = {
@@ -696,8 +680,7 @@ def makeControl(name, scale, curveType="circle"):
         control = cmds.curve(name=name, degree=constants.DEFAULT_CURVE_TEMPLATES[curveType]['degree'], point=scaled_points, knot=constants.DEFAULT_CURVE_TEMPLATES[curveType]['knots'])
     else:
         control = cmds.curve(name=name, degree=constants.DEFAULT_CURVE_TEMPLATES[curveType]['degree'], point=scaled_points)
-    prefix, component_name, joint_name, node_purpose, node_type = getNodeNameParts(name)
-    position_group = cmds.group(control, name='{0}_{1}_{2}_{3}_{4}'.format(prefix, component_name, joint_name, 'PLC', 'GRP'))
+    position_group = cmds.group(control, name=getNodeNameParts(name).withParts(purpose='PLC', type='GRP').format())
     return position_group, control
 
 def makeDirectControl(name, controlledNode, scale, curveType="circle", matchTransform=''):
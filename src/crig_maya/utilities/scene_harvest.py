@@ -0,0 +1,69 @@
+import maya.api.OpenMaya as om2
+
+from . import python_utils
+from ... import constants
+
+
+# What saving the control data needs to know about one transform under a component's controls group.
+class HarvestedNode():
+    __slots__ = ('name', 'path', 'nameParts', 'isCurve', 'hasInputs', 'savedAttrList')
+
+    def __init__(self, name, path, nameParts=None, isCurve=False, hasInputs=False, savedAttrList=None):
+        self.name = name
+        self.path = path
+        # getNodeNameParts(), or None if the name doesn't follow the naming convention.
+        self.nameParts = nameParts
+        # Whether it's a control curve.  Its curve data is only read when it gets written out, so every control's
+        # points aren't held at once.
+        self.isCurve = isCurve
+        # Whether anything is connected into the node, nothing can be driving it if not.
+        self.hasInputs = hasInputs
+        # The attrs marked for saving, or None if it isn't marked.
+        self.savedAttrList = savedAttrList
+
+
+# Walks every transform under "root" once and picks out the ones under the controls groups, grouped by what
+# "controlsGroups" maps each group to: {controls group: component key} -> {component key: [HarvestedNode]}
+def harvestControls(root, controlsGroups):
+    group_paths = {}
+    for group, component_key in controlsGroups.items():
+        try:
+            group_paths[python_utils.getDagPath(group).fullPathName()] = component_key
+        except RuntimeError:
+            constants.RIGGER_LOG.warning('Could not find {0}, {1} won\'t have any control data saved.'.format(group, component_key))
+    harvested = { x: [] for x in controlsGroups.values() }
+
+    iterator = om2.MItDag(om2.MItDag.kDepthFirst, om2.MFn.kTransform)
+    iterator.reset(python_utils.getDagPath(root), om2.MItDag.kDepthFirst, om2.MFn.kTransform)
+    node_fn = om2.MFnDependencyNode()
+    # (depth, component key) for each controls group the iterator is currently under.
+    inside = []
+    while not iterator.isDone():
+        depth = iterator.depth()
+        while inside and inside[-1][0] >= depth:
+            inside.pop()
+        path = iterator.getPath()
+        component_key = group_paths.get(path.fullPathName())
+        if component_key is not None:
+            inside.append((depth, component_key))
+        elif inside:
+            harvested[inside[-1][1]].append(harvestNode(path, node_fn))
+        iterator.next()
+    return harvested
+
+
+def harvestNode(path, nodeFn):
+    name = path.partialPathName()
+    name_parts = None
+    if len(name.split('_')) > 1:
+        try:
+            name_parts = python_utils.getNodeNameParts(name)
+        except IndexError:
+            pass
+    nodeFn.setObject(path.node())
+    is_curve = bool(name_parts) and name_parts[3] == 'CTL' and name_parts[4] == 'CRV'
+    has_inputs = any(x.isDestination for x in nodeFn.getConnections())
+    saved_attr_list = None
+    if nodeFn.hasAttribute(constants.SAVE_ATTR_LIST_ATTR):
+        saved_attr_list = nodeFn.findPlug(constants.SAVE_ATTR_LIST_ATTR, False).asString()
+    return HarvestedNode(name, path, name_parts, is_curve, has_inputs, saved_attr_list)
@@ -67,12 +67,16 @@ class ModularRigger(QtWidgets.QMainWindow):
         self.position_button.clicked.connect(self.getPositionsPath)
         self.position_save_button = QtWidgets.QPushButton('Save Positions')
         self.position_save_button.clicked.connect(self.savePositionsPath)
+        self.position_live_checkbox = QtWidgets.QCheckBox('Live')
+        self.position_live_checkbox.setToolTip('Keep the positions file up to date while the bind joints are moved.')
+        self.position_live_checkbox.toggled.connect(self.setLivePositions)
         self.position_layout = QtWidgets.QHBoxLayout()
         self.main_layout.addLayout(self.position_layout)
         self.position_layout.addWidget(self.position_label)
         self.position_layout.addWidget(self.position_pathbox)
         self.position_layout.addWidget(self.position_button)
         self.position_layout.addWidget(self.position_save_button)
+        self.position_layout.addWidget(self.position_live_checkbox)
 
         self.curves_label = QtWidgets.QLabel('Component Control Data:')
         self.curves_pathbox = QtWidgets.QLineEdit()
@@ -106,10 +110,14 @@ class ModularRigger(QtWidgets.QMainWindow):
         self.matrix_constraint_button.clicked.connect(self.utils.constrainByMatrix)
         self.match_RL_button = QtWidgets.QPushButton('Match RL')
         self.match_RL_button.clicked.connect(self.utils.makeRLMatch)
+        self.mirror_skin_button = QtWidgets.QPushButton('Mirror Skin')
+        self.mirror_skin_button.clicked.connect(lambda: self.utils.mirrorSkinWeights())
         self.select_bind_joints_button = QtWidgets.QPushButton('Sel Bind Jnts')
         self.select_bind_joints_button.clicked.connect(self.utils.selectBindJoints)
         self.mirror_driven_keys_button = QtWidgets.QPushButton('Mirror DKeys')
-        self.mirror_driven_keys_button.clicked.connect(self.utils.mirrorDrivenKeys)
+        self.mirror_driven_keys_button.clicked.connect(lambda: self.utils.mirrorDrivenKeys())
+        self.driven_keys_plan_button = QtWidgets.QPushButton('DKey Plan')
+        self.driven_keys_plan_button.clicked.connect(self.saveDrivenKeyMirrorPlan)
         self.generate_vertex_joints_button = QtWidgets.QPushButton('Add Vertex Joints')
         self.generate_vertex_joints_button.clicked.connect(self.activateVertexJointWidget)
         self.mark_attrs_for_saving_button = QtWidgets.QPushButton('Mark Attrs 2 Save')
@@ -119,8 +127,10 @@ class ModularRigger(QtWidgets.QMainWindow):
         self.main_layout.addLayout(self.utils_layout)
         self.utils_layout.addWidget(self.matrix_constraint_button)
         self.utils_layout.addWidget(self.match_RL_button)
+        self.utils_layout.addWidget(self.mirror_skin_button)
         self.utils_layout.addWidget(self.select_bind_joints_button)
         self.utils_layout.addWidget(self.mirror_driven_keys_button)
+        self.utils_layout.addWidget(self.driven_keys_plan_button)
         self.utils_layout.addWidget(self.generate_vertex_joints_button)
         self.utils_layout.addWidget(self.mark_attrs_for_saving_button)
 
@@ -146,14 +156,25 @@ class ModularRigger(QtWidgets.QMainWindow):
         self.loc_button.clicked.connect(self.controller.generateLocs)
         self.joint_button = QtWidgets.QPushButton('Generate Components')
         self.joint_button.clicked.connect(self.controller.generateJoints)
+        self.rebuild_button = QtWidgets.QPushButton('Rebuild Changed')
+        self.rebuild_button.clicked.connect(self.callRebuildChanged)
         self.skin_button = QtWidgets.QPushButton('Bind Skin')
         self.skin_button.clicked.connect(self.callBindSkin)
+        # Times the build and writes a report, see "BUILD_PROFILE_ENV" in constants.py
+        self.profile_checkbox = QtWidgets.QCheckBox('Profile Build')
+        self.profile_checkbox.setChecked(self.controller.profileBuild)
+        self.profile_checkbox.toggled.connect(self.setProfileBuild)
         self.button_layout = QtWidgets.QHBoxLayout()
         self.button_layout.addWidget(self.loc_button)
         self.button_layout.addWidget(self.joint_button)
+        self.button_layout.addWidget(self.rebuild_button)
         self.button_layout.addWidget(self.skin_button)
+        self.button_layout.addWidget(self.profile_checkbox)
         self.main_layout.addLayout(self.button_layout)
 
+    def setProfileBuild(self, checked):
+        self.controller.profileBuild = checked
+
     def loadFilepathDicts(self):
         try:
             self.filepaths_dict = self.controller.loadJSON(constants.PREV_RIG_DATA_PATH)
@@ -191,7 +212,7 @@ class ModularRigger(QtWidgets.QMainWindow):
         filename, filter = QtWidgets.QFileDialog.getOpenFileName(self,
         'Select Position File',
         constants.POSITIONS_PATH,
-        'JSON files (*.json)'
+        'Position files (*.crpos *.json);;Position snapshots (*.crpos);;JSON files (*.json)'
         )
         self.filepaths_dict['positions_path'] = filename
         self.saveFilepathDicts()
@@ -205,11 +226,30 @@ class ModularRigger(QtWidgets.QMainWindow):
         filename, filter = QtWidgets.QFileDialog.getSaveFileName(self,
         'Select Position File',
         self.position_pathbox.text(),
-        'JSON files (*.json)'
+        'Position snapshots (*.crpos);;JSON files (*.json)'
         )
         self.position_pathbox.setText(filename)
         self.controller.saveBindJointPositions(filename)
 
+    def setLivePositions(self, checked):
+        if checked:
+            self.controller.startLivePositions(self.position_pathbox.text())
+        else:
+            self.controller.stopLivePositions()
+        # Starting can fail (no bind joints yet, or not a snapshot file), the box shows what actually happened.
+        self.position_live_checkbox.blockSignals(True)
+        self.position_live_checkbox.setChecked(self.controller.livePositions is not None)
+        self.position_live_checkbox.blockSignals(False)
+
+    def saveDrivenKeyMirrorPlan(self):
+        filename, filter = QtWidgets.QFileDialog.getSaveFileName(self,
+        'Save Driven Key Mirror Plan',
+        constants.CONTROLS_PATH,
+        'JSON files (*.json)'
+        )
+        if filename:
+            self.utils.exportDrivenKeyMirrorPlan(filename)
+
     def getCurvesPath(self):
         filename, filter = QtWidgets.QFileDialog.getOpenFileName(self,
         'Select Curves File',
@@ -237,7 +277,7 @@ class ModularRigger(QtWidgets.QMainWindow):
         filename, filter = QtWidgets.QFileDialog.getOpenFileName(self,
         'Select Bind Data File',
         constants.SKIN_DATA_PATH,
-        'JSON files (*.json)'
+        'Skin weight files (*{0} *.json)'.format(constants.SKIN_WEIGHTS_EXTENSION)
         )
         self.filepaths_dict['skin_path'] = filename
         self.saveFilepathDicts()
@@ -250,11 +290,20 @@ class ModularRigger(QtWidgets.QMainWindow):
         filename, filter = QtWidgets.QFileDialog.getSaveFileName(self,
         'Select Bind Data File',
         self.bind_pathbox.text(),
-        'JSON files (*.json)'
+        'Skin weight files (*{0} *.json)'.format(constants.SKIN_WEIGHTS_EXTENSION)
         )
         self.bind_pathbox.setText(filename)
         self.controller.saveBindSkinData(filename)
 
+    # Loads the template/positions/control data again, then only rebuilds the components that changed.
+    def callRebuildChanged(self):
+        self.initTemplateStuff(self.template_pathbox.text())
+        if self.position_pathbox.text():
+            self.initPositionsStuff(self.position_pathbox.text())
+        if self.curves_pathbox.text():
+            self.initCurvesStuff(self.curves_pathbox.text())
+        self.controller.rebuildChangedComponents()
+
     def callBindSkin(self):
         self.controller.bindSkin(self.bind_pathbox.text())
 
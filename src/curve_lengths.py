@@ -0,0 +1,152 @@
+import bisect
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# How many chords each knot span gets measured with.  The chord lengths come up short of the real length by about the
+# square of the chord over the curve's radius, so this keeps the error well under maya's own length tolerance.
+SAMPLES_PER_SPAN = 32
+
+
+# (start, end) of the parameter range, from the knots the way maya keeps them (without the first and last knot).
+def knotDomain(knots, degree):
+    return knots[degree - 1], knots[len(knots) - degree]
+
+
+# The parameters a table measures along: every knot in the domain, with "samplesPerSpan" steps between each pair.
+def sampleParams(knots, degree, samplesPerSpan=SAMPLES_PER_SPAN):
+    start, end = knotDomain(knots, degree)
+    breaks = sorted(set(x for x in knots if start <= x <= end))
+    if len(breaks) < 2:
+        return [start]
+    params = [breaks[0]]
+    for a, b in zip(breaks, breaks[1:]):
+        params.extend(a + (b - a) * i / samplesPerSpan for i in range(1, samplesPerSpan))
+        params.append(b)
+    return params
+
+
+# The points on a non-rational B-spline at each of the parameters.  "points" are [(x, y, z)] and "knots" are maya's.
+def evaluateCurve(points, knots, degree, params):
+    full_knots = [knots[0]] + list(knots) + [knots[-1]]
+    if numpy is not None:
+        return evaluateCurveArray(numpy.asarray(points, dtype=numpy.float64)[:, :3], numpy.asarray(full_knots, dtype=numpy.float64), degree,
+            numpy.asarray(params, dtype=numpy.float64)).tolist()
+    return [deBoor(points, full_knots, degree, x) for x in params]
+
+
+# de Boor for every parameter at once, each step across all of them.
+def evaluateCurveArray(points, fullKnots, degree, params):
+    count = len(points)
+    spans = numpy.clip(numpy.searchsorted(fullKnots, params, side='right') - 1, degree, count - 1)
+    d = points[spans[:, None] + numpy.arange(-degree, 1)[None, :]]
+    for r in range(1, degree + 1):
+        for j in range(degree, r - 1, -1):
+            left = fullKnots[spans + j - degree]
+            right = fullKnots[spans + j + 1 - r]
+            width = right - left
+            alpha = numpy.divide(params - left, width, out=numpy.zeros_like(params), where=width != 0.0)[:, None]
+            d[:, j] = (1.0 - alpha) * d[:, j - 1] + alpha * d[:, j]
+    return d[:, degree]
+
+
+def deBoor(points, fullKnots, degree, param):
+    count = len(points)
+    span = min(max(bisect.bisect_right(fullKnots, param) - 1, degree), count - 1)
+    d = [list(points[span - degree + j][:3]) for j in range(degree + 1)]
+    for r in range(1, degree + 1):
+        for j in range(degree, r - 1, -1):
+            left = fullKnots[span + j - degree]
+            right = fullKnots[span + j + 1 - r]
+            alpha = 0.0 if right == left else (param - left) / (right - left)
+            d[j] = [(1.0 - alpha) * a + alpha * b for a, b in zip(d[j - 1], d[j])]
+    return d[degree]
+
+
+# Arc length against parameter for one curve, measured once so every lookup after is a binary search.  Lengths in
+# between the samples are interpolated linearly, along with their parameters.
+class ArcLengthTable():
+
+    def __init__(self, params, points):
+        self.params = list(params)
+        self.lengths = [0.0]
+        if numpy is not None and len(points) > 1:
+            points = numpy.asarray(points, dtype=numpy.float64)
+            self.lengths.extend(numpy.cumsum(numpy.sqrt(((points[1:] - points[:-1]) ** 2).sum(axis=1))).tolist())
+        else:
+            for a, b in zip(points, points[1:]):
+                self.lengths.append(self.lengths[-1] + ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2) ** 0.5)
+
+    # From the curve's CVs, knots and degree.  Only for curves without weights, "fromPoints()" is for the rest.
+    @classmethod
+    def fromCurve(cls, points, knots, degree, samplesPerSpan=SAMPLES_PER_SPAN):
+        params = sampleParams(knots, degree, samplesPerSpan)
+        return cls(params, evaluateCurve(points, knots, degree, params))
+
+    # From points some other way of evaluating the curve gave for "params".
+    @classmethod
+    def fromPoints(cls, params, points):
+        return cls(params, [tuple(x)[:3] for x in points])
+
+    @property
+    def length(self):
+        return self.lengths[-1]
+
+    @property
+    def maxParam(self):
+        return self.params[-1]
+
+    def paramAtLength(self, length):
+        if length <= 0.0:
+            return self.params[0]
+        if length >= self.lengths[-1]:
+            return self.params[-1]
+        i = bisect.bisect_left(self.lengths, length)
+        length_a, length_b = self.lengths[i - 1], self.lengths[i]
+        fraction = (length - length_a) / (length_b - length_a) if length_b > length_a else 0.0
+        return self.params[i - 1] + (self.params[i] - self.params[i - 1]) * fraction
+
+    # 0 is the start of the curve and 1 the end, by length.
+    def paramAtFraction(self, fraction):
+        return self.paramAtLength(self.length * fraction)
+
+    def paramsAtFractions(self, fractions):
+        if numpy is not None:
+            return numpy.interp(numpy.asarray(fractions, dtype=numpy.float64) * self.length, self.lengths, self.params).tolist()
+        return [self.paramAtFraction(x) for x in fractions]
+
+    def lengthAtParam(self, param):
+        if param <= self.params[0]:
+            return 0.0
+        if param >= self.params[-1]:
+            return self.lengths[-1]
+        i = bisect.bisect_left(self.params, param)
+        param_a, param_b = self.params[i - 1], self.params[i]
+        fraction = (param - param_a) / (param_b - param_a) if param_b > param_a else 0.0
+        return self.lengths[i - 1] + (self.lengths[i] - self.lengths[i - 1]) * fraction
+
+
+# Which of a list of parameters sit either side of another parameter, with the list sorted once so each lookup is a
+# binary search.  Gives back the same indices the old scan over the list did: the first of the largest parameters
+# that's above 0 and below it, else 0, and the first of the smallest that's above it and below the curve's end, else
+# the last index.
+class ParamBrackets():
+
+    def __init__(self, params):
+        self.count = len(params)
+        pairs = sorted((x, i) for i, x in enumerate(params) if x == x)
+        self.values = [x[0] for x in pairs]
+        self.indices = [x[1] for x in pairs]
+
+    def bracket(self, param, maxParam):
+        lower = 0
+        below = bisect.bisect_left(self.values, param)
+        if below and self.values[below - 1] > 0:
+            lower = self.indices[bisect.bisect_left(self.values, self.values[below - 1])]
+        upper = self.count - 1
+        above = bisect.bisect_right(self.values, param)
+        if above < len(self.values) and self.values[above] < maxParam:
+            upper = self.indices[above]
+        return lower, upper
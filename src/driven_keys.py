@@ -0,0 +1,122 @@
+from array import array
+
+# Saved driven keys, one table per component.  Every curve is a row in the per curve columns, and its keys are the
+# next "keyCounts[i]" entries in the per key columns:
+#   per curve - driven, driver, keyCounts, preInfinity, postInfinity
+#   per key - inputs, values, inAngles, outAngles, inTangentTypes, outTangentTypes
+# Inputs, values and angles are in UI units, the same as cmds.keyframe/cmds.keyTangent give them.
+CURVE_COLUMNS = ['driven', 'driver', 'keyCounts', 'preInfinity', 'postInfinity']
+KEY_COLUMNS = ['inputs', 'values', 'inAngles', 'outAngles', 'inTangentTypes', 'outTangentTypes']
+NUMBER_COLUMNS = ['inputs', 'values', 'inAngles', 'outAngles']
+
+# What getAttr(asString=True) calls the infinity types -> what cmds.setInfinity calls them.
+INFINITY_TYPES = {
+    'constant': 'constant',
+    'linear': 'linear',
+    'cycle': 'cycle',
+    'cyclewithoffset': 'cycleRelative',
+    'cyclerelative': 'cycleRelative',
+    'oscillate': 'oscillate',
+}
+
+
+class DrivenKeyTable():
+
+    def __init__(self):
+        self.driven = []
+        self.driver = []
+        self.keyCounts = array('I')
+        self.preInfinity = []
+        self.postInfinity = []
+        self.inputs = array('d')
+        self.values = array('d')
+        self.inAngles = array('d')
+        self.outAngles = array('d')
+        self.inTangentTypes = []
+        self.outTangentTypes = []
+        # curve -> where its keys start, filled in as curves are added.
+        self.keyStarts = array('I')
+
+    @property
+    def curveCount(self):
+        return len(self.driven)
+
+    def addCurve(self, driven, driver, inputs, values, inAngles, outAngles, inTangentTypes, outTangentTypes, infinities=('constant', 'constant')):
+        self.keyStarts.append(len(self.inputs))
+        self.driven.append(driven)
+        self.driver.append(driver)
+        self.keyCounts.append(len(inputs))
+        self.preInfinity.append(getInfinityType(infinities[0]))
+        self.postInfinity.append(getInfinityType(infinities[1]))
+        self.inputs.extend(inputs)
+        self.values.extend(values)
+        self.inAngles.extend(inAngles)
+        self.outAngles.extend(outAngles)
+        self.inTangentTypes.extend(inTangentTypes)
+        self.outTangentTypes.extend(outTangentTypes)
+
+    # (start, end) of curve i's keys in the per key columns.
+    def getKeyRange(self, i):
+        return self.keyStarts[i], self.keyStarts[i] + self.keyCounts[i]
+
+    # driven plug -> [curve indices], in the order they were saved.
+    def getCurvesByDriven(self):
+        by_driven = {}
+        for i, driven in enumerate(self.driven):
+            by_driven.setdefault(driven, []).append(i)
+        return by_driven
+
+    def toDict(self):
+        return { name: list(getattr(self, name)) for name in CURVE_COLUMNS + KEY_COLUMNS }
+
+    @classmethod
+    def fromDict(cls, data):
+        table = cls()
+        table.driven = list(data['driven'])
+        table.driver = list(data['driver'])
+        table.keyCounts = array('I', data['keyCounts'])
+        table.preInfinity = list(data['preInfinity'])
+        table.postInfinity = list(data['postInfinity'])
+        for name in NUMBER_COLUMNS:
+            setattr(table, name, array('d', data[name]))
+        table.inTangentTypes = list(data['inTangentTypes'])
+        table.outTangentTypes = list(data['outTangentTypes'])
+        start = 0
+        for key_count in table.keyCounts:
+            table.keyStarts.append(start)
+            start += key_count
+        return table
+
+    # From the {node: {driven attr: {driver: key data}}} dicts getDrivenKeys() gives (and older saves stored), where
+    # the key data is interleaved: keyframes [input, value, ...], keytangents [in angle, out angle, in type, out type, ...].
+    # The oldest saves had one driver per attr, stored as {driver: ..., keyframes: ...} instead.
+    @classmethod
+    def fromNodeDict(cls, nodes):
+        table = cls()
+        for node, attrs in nodes.items():
+            for attr, drivers in attrs.items():
+                if 'driver' in drivers:
+                    drivers = {drivers['driver']: drivers}
+                for driver, key_data in drivers.items():
+                    if not key_data.get('keyframes'):
+                        continue
+                    keyframes = key_data['keyframes']
+                    tangents = key_data['keytangents']
+                    table.addCurve(attr, driver, keyframes[0::2], keyframes[1::2], tangents[0::4], tangents[1::4],
+                        tangents[2::4], tangents[3::4], key_data.get('infinites') or ('constant', 'constant'))
+        return table
+
+
+# Saved driven key data in either layout -> the columnar table dict.
+def toColumnar(data):
+    if not data or isColumnar(data):
+        return data
+    return DrivenKeyTable.fromNodeDict(data).toDict()
+
+
+def isColumnar(data):
+    return 'driven' in data and 'keyCounts' in data
+
+
+def getInfinityType(name):
+    return INFINITY_TYPES.get(name.lower().replace(' ', ''), 'constant')
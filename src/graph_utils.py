@@ -1,5 +1,8 @@
 import os
 import logging
+from collections import deque
+
+from . import constants
 
 class ComponentGraph():
     
@@ -8,52 +11,78 @@ class ComponentGraph():
         self.nodes = []
         #A flat list of all the nodes.
         self.components = []
+        #Lookup table for finding nodes by name/prefix without scanning the whole list.
+        self.registry = ComponentRegistry()
 
     @classmethod
     def buildFromList(cls, componentList):
         inst = cls()
         for component in componentList:
             inst.addToList(component)
-        for node in inst.nodes:
+        for node in inst.components:
             inst.findChildren(node)
         inst.deleteNonRootsFromList()
         return inst
 
     def addToList(self, component):
-        if self.checkInList(component):
+        existing = self.checkInList(component)
+        if existing:
+            constants.RIGGER_LOG.warning('{0} {1} is already in the graph as {2} {1}, skipping it.'.format(component.prefix, component.name, existing.prefix))
             return
         newNode = GraphNode(component)
         self.nodes.append(newNode)
         self.components.append(newNode)
+        self.registry.addNode(newNode)
                 
 
+    # Same rule as "isComponent()", so an 'LR' component counts as being in the list if the L one already is.
     def checkInList(self, component):
-        for node in self.nodes:
-            result = self.checkInTree(component, node)
-            if result:
-                return result
-        return False
-
-    def checkInTree(self, component, node):
-        if self.isComponent(component.name, component.prefix, node.component):
-            return node.component
-        for child in node.children: 
-            result = self.checkInTree(component, child)
-            if result:
-                return result
+        nodes = self.registry.findNodes(component.name, component.prefix)
+        if nodes:
+            return nodes[0].component
         return False
     
     def findChildren(self, curnode):
         for child in curnode.component.children:
-            for node in self.nodes:
-                if self.isComponent(child['childName'], child['childPrefix'], node.component):
-                    node.parents.append(curnode)
-                    curnode.children.append(node)
+            for node in self.registry.findNodes(child['childName'], child['childPrefix']):
+                node.parents.append(curnode)
+                curnode.children.append(node)
 
     def deleteNonRootsFromList(self):
-        for node in list(self.nodes):
-            if node.parents:
-                self.nodes.remove(node)
+        self.nodes = [node for node in self.nodes if not node.parents]
+
+    # The given components and everything that hangs off of them, directly or not, in graph order.
+    def downstreamComponents(self, components):
+        stack = [self.registry.getNode(component.name, component.prefix) for component in components]
+        found = set()
+        while stack:
+            node = stack.pop()
+            if node is None or node in found:
+                continue
+            found.add(node)
+            stack.extend(node.children)
+        return [node.component for node in self.components if node in found]
+
+    def raiseCycleError(self, waiting_parents):
+        stuck = [node for node, count in waiting_parents.items() if count]
+        cycle = self.findCycle(stuck, waiting_parents)
+        raise ComponentGraphCycleError('Component graph has a cycle, check the "children" entries of: {0}'.format(
+            ' -> '.join('{0}_{1}'.format(node.component.prefix, node.component.name) for node in cycle)))
+
+    # Everything left over after a topological sort is either in a cycle or downstream of one.  Walking up through
+    # parents that are also left over has to loop eventually, and the loop is the cycle.
+    def findCycle(self, stuck, waiting_parents):
+        path = []
+        seen = {}
+        node = stuck[0]
+        while node not in seen:
+            seen[node] = len(path)
+            path.append(node)
+            node = next(parent for parent in node.parents if waiting_parents[parent])
+        cycle = path[seen[node]:]
+        cycle.reverse()
+        cycle.append(cycle[0])
+        return cycle
 
     def isComponent(self, cName, cPrefix, checkNodeData):
         if cName == checkNodeData.name and checkNodeData.prefix in cPrefix:
@@ -61,48 +90,81 @@ class ComponentGraph():
         return False
 
 
+# Indexes the graph nodes by component name, then by prefix, so child references in the templates can be resolved
+# without looping over every component.  Lookups follow the same rules as "isComponent()", so a child prefix of
+# 'LR' will find both the L and the R component.
+class ComponentRegistry():
+
+    def __init__(self):
+        self.entries = {}
+
+    @classmethod
+    def buildFromList(cls, componentList):
+        inst = cls()
+        for component in componentList:
+            inst.addNode(GraphNode(component))
+        return inst
+
+    def addNode(self, node):
+        prefixes = self.entries.setdefault(node.component.name, {})
+        # The first component registered under a name/prefix wins, same as the graph.
+        if node.component.prefix in prefixes:
+            constants.RIGGER_LOG.warning('{0} {1} is registered more than once, keeping the first one.'.format(node.component.prefix, node.component.name))
+            return
+        prefixes[node.component.prefix] = node
+
+    def getNode(self, cName, cPrefix):
+        return self.entries.get(cName, {}).get(cPrefix)
+
+    def findNodes(self, cName, cPrefix):
+        prefixes = self.entries.get(cName)
+        if not prefixes:
+            return []
+        return [node for prefix, node in prefixes.items() if prefix in cPrefix]
+
+    def findComponents(self, cName, cPrefix):
+        return [node.component for node in self.findNodes(cName, cPrefix)]
+
+    def __len__(self):
+        return sum(len(prefixes) for prefixes in self.entries.values())
+
+
+class ComponentGraphCycleError(Exception):
+    pass
+
+
 class ComponentGraphIterator():
     
     def breadthFirstIteration(self, graph, function):
         # Base Case
         if graph is None:
             return
-    
-        # Create an empty queue
-        # for level order traversal
-        queue = []
-    
-        # Enqueue Root and initialize height
-        for node in graph.nodes:
-            queue.append(node)
-    
-        while(len(queue) > 0):
-            
-            requeue = False
-            # If not all parents have been read,
-            # move to the bottom of the queue
-            for parent in queue[0].parents:
-                if not parent.read:
-                    requeue = True
-                    break
-            
-            if requeue:
-                node = queue.pop(0)
-                queue.append(node)
-                continue
-            else:
-                # Call function to be used on component
-                # remove it from queue
-                if not queue[0].read:
-                    function(queue[0].component)
-                node = queue.pop(0)
-                node.read = True
-        
-                for child in node.children:
-                    if not child.read:
-                        queue.append(child)
+
+        # Work out the whole order up front so a bad template blows up before we've touched the scene.
+        for node in self.topologicalOrder(graph):
+            function(node.component)
+
+    # Kahn's algorithm.  A node only gets queued once all of its parents have been visited, so parents are
+    # always handled before their children.  The parent counts are kept in a dict for this call only, which
+    # means the graph itself doesn't carry any state between builds.
+    def topologicalOrder(self, graph):
+        waiting_parents = {}
         for node in graph.components:
-            node.read = False
+            waiting_parents[node] = len(node.parents)
+
+        queue = deque(node for node in graph.components if not waiting_parents[node])
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for child in node.children:
+                waiting_parents[child] -= 1
+                if not waiting_parents[child]:
+                    queue.append(child)
+
+        if len(order) < len(waiting_parents):
+            graph.raiseCycleError(waiting_parents)
+        return order
 
     def listIteration(self, graph, function):
         for node in graph.components:
@@ -115,4 +177,3 @@ class GraphNode():
         self.parents = []
         self.component = component
         self.children = []
-        self.read = False
\ No newline at end of file
@@ -0,0 +1,144 @@
+import json
+import tempfile
+
+from . import constants
+
+INDENT = '    '
+
+
+# Writes a JSON object out one item at a time, so big save files never have to be held in memory all at once.
+# Every item starts on a new line and the file gets flushed after each one, so if maya dies halfway through a
+# save everything up to the last finished item is on disk and "recoverJSON" can get it back.
+#
+# Items are written compactly unless "pretty" is set, in which case it looks the same as json.dump(indent=4).
+class JSONStreamWriter():
+
+    def __init__(self, file, pretty=False, depth=0):
+        self.file = file
+        self.pretty = pretty
+        # One entry per open object, whether anything has been written into it yet.
+        self.openObjects = [False] * depth
+
+    @classmethod
+    def open(cls, path, pretty=False):
+        writer = cls(open(path, 'w'), pretty)
+        writer.beginObject()
+        return writer
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        while self.openObjects:
+            self.endObject()
+        self.file.write('\n')
+        self.file.close()
+
+    def indent(self, depth):
+        return INDENT * depth if self.pretty else ''
+
+    def writeKey(self, key):
+        self.file.write(',\n' if self.openObjects[-1] else '\n')
+        self.file.write(self.indent(len(self.openObjects)))
+        self.file.write('{0}: '.format(json.dumps(key)) if self.pretty else '{0}:'.format(json.dumps(key)))
+        self.openObjects[-1] = True
+
+    # Starts a nested object, or the top level object if there's no key.
+    def beginObject(self, key=None):
+        if key is not None:
+            self.writeKey(key)
+        self.file.write('{')
+        self.openObjects.append(False)
+
+    def endObject(self):
+        had_items = self.openObjects.pop()
+        if had_items:
+            self.file.write('\n' + self.indent(len(self.openObjects)))
+        self.file.write('}')
+        self.file.flush()
+
+    def writeItem(self, key, value):
+        self.writeKey(key)
+        if self.pretty:
+            self.file.write(json.dumps(value, indent=4).replace('\n', '\n' + self.indent(len(self.openObjects))))
+        else:
+            self.file.write(json.dumps(value, separators=(',', ':')))
+        self.file.flush()
+
+    # A writer for the items of an object that has to go in the file after whatever is being written right now.
+    # It goes to a temp file instead of memory, then "writeSpool" copies it in.
+    def spool(self):
+        return JSONStreamWriter(tempfile.TemporaryFile('w+'), self.pretty, len(self.openObjects) + 1)
+
+    def writeSpool(self, key, spool):
+        self.beginObject(key)
+        spool.file.seek(0)
+        for chunk in iter(lambda: spool.file.read(1 << 20), ''):
+            self.file.write(chunk)
+        self.openObjects[-1] = spool.openObjects[-1]
+        spool.file.close()
+        self.endObject()
+
+
+# Loads a JSON file that might have been cut off partway through being written by "JSONStreamWriter".  Anything
+# after the last complete item is thrown away.  "itemDepth" is how many objects deep the writer's items are (1 for
+# items written straight into the top level object), values nested any deeper than that are never cut into, since
+# a pretty printed value can be cut off at one of its own line breaks and still look complete.
+def recoverJSON(path, itemDepth=1):
+    with open(path, 'r') as file:
+        text = file.read()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    for cut, closers in reversed(findItemBoundaries(text, itemDepth)):
+        try:
+            data = json.loads(text[:cut] + closers)
+        except json.JSONDecodeError:
+            continue
+        constants.RIGGER_LOG.warning('{0} was not saved completely, only loaded the first {1} of {2} characters.'.format(path, cut, len(text)))
+        return data
+    raise ValueError('Could not recover anything from {0}'.format(path))
+
+
+# [(index, closing brackets)] for every place the text could be cut and closed back up without cutting into an item:
+# after an object is opened, or a value is finished, with no more than "itemDepth" objects open.  Brackets inside
+# strings don't count.
+def findItemBoundaries(text, itemDepth):
+    boundaries = []
+    stack = []
+    in_string = False
+    escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append(char)
+            if len(stack) <= itemDepth:
+                boundaries.append((i + 1, closingBrackets(stack)))
+        elif char in '}]':
+            if not stack:
+                break
+            stack.pop()
+            if stack and len(stack) <= itemDepth:
+                boundaries.append((i + 1, closingBrackets(stack)))
+        elif char == ',' and stack and len(stack) <= itemDepth:
+            # Whatever came before it at this depth is finished, even if it wasn't an object.
+            boundaries.append((i, closingBrackets(stack)))
+    return boundaries
+
+
+def closingBrackets(stack):
+    return ''.join('}' if x == '{' else ']' for x in reversed(stack))
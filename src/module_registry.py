@@ -0,0 +1,75 @@
+import os
+import sys
+import ast
+import importlib.util
+
+from . import constants
+
+# Keeps track of which file in the module path defines which component class, so loading a template only has to
+# import the modules it actually uses.  The files are read with "ast" rather than run, and each one is only
+# re-read if it's been changed on disk since the last scan.
+class ModuleRegistry():
+
+    def __init__(self, modulePath, pythonPackage):
+        self.modulePath = modulePath
+        # The dotted name the module files live under, e.g. "<root>.src.crig_maya.modules"
+        self.pythonPackage = pythonPackage
+        # componentType -> file name
+        self.componentFiles = {}
+        # file name -> (modified time, [class names])
+        self.scannedFiles = {}
+        # file name -> modified time of the file when it was imported
+        self.importedFiles = {}
+
+    def scan(self):
+        files = {}
+        for file in sorted(os.listdir(self.modulePath)):
+            if os.path.splitext(file)[1] != '.py' or file == '__init__.py':
+                continue
+            files[file] = os.path.getmtime(os.path.join(self.modulePath, file))
+
+        for file, modified_time in files.items():
+            if file in self.scannedFiles and self.scannedFiles[file][0] == modified_time:
+                continue
+            self.scannedFiles[file] = (modified_time, self.findClassNames(file))
+        for file in list(self.scannedFiles):
+            if file not in files:
+                del self.scannedFiles[file]
+
+        self.componentFiles = {}
+        for file, (modified_time, class_names) in self.scannedFiles.items():
+            for class_name in class_names:
+                if class_name in self.componentFiles:
+                    constants.RIGGER_LOG.warning('Component class {0} is defined in both {1} and {2}, using {1}.'.format(class_name, self.componentFiles[class_name], file))
+                    continue
+                self.componentFiles[class_name] = file
+
+    def findClassNames(self, file):
+        with open(os.path.join(self.modulePath, file), 'r') as source:
+            try:
+                tree = ast.parse(source.read(), filename=file)
+            except SyntaxError:
+                constants.RIGGER_LOG.error('Could not parse component module {0}, skipping it.'.format(file))
+                return []
+        return [node.name for node in tree.body if isinstance(node, ast.ClassDef)]
+
+    def getClass(self, componentType):
+        if componentType not in self.componentFiles:
+            return None
+        module = self.importModule(self.componentFiles[componentType])
+        return getattr(module, componentType, None)
+
+    def importModule(self, file):
+        python_module_name = '{0}.{1}'.format(self.pythonPackage, os.path.splitext(file)[0])
+        modified_time = self.scannedFiles[file][0]
+        # Re-use whatever's already been imported, unless the file has been edited since then.  A module that was
+        # imported before this registry was around doesn't have a time, so it gets imported again the first time.
+        if python_module_name in sys.modules and self.importedFiles.get(file) == modified_time:
+            return sys.modules[python_module_name]
+
+        spec = importlib.util.spec_from_file_location(python_module_name, os.path.join(self.modulePath, file))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[python_module_name] = module
+        spec.loader.exec_module(module)
+        self.importedFiles[file] = modified_time
+        return module
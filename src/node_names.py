@@ -0,0 +1,46 @@
+import functools
+from typing import NamedTuple
+
+# How many parsed names are kept around.  A big rig has a few tens of thousands of nodes, but a build mostly keeps
+# asking about the same few hundred joints and controls.
+PARSE_CACHE_SIZE = 8192
+
+
+# The parts of a name that follows the {prefix}_{component}_{joint}_{purpose}_{type} convention, like
+# "L_armupper_elbow_FK_JNT".  It unpacks the same as the tuple getNodeNameParts() always gave back, and the joint part
+# keeps any underscores of its own ("L_handsthumb_upper_1_IK_JNT" has joint "upper_1").
+class NodeName(NamedTuple):
+    prefix: str
+    component: str
+    joint: str
+    purpose: str
+    type: str
+
+    @classmethod
+    def parse(cls, name):
+        return parseNodeName(name)
+
+    def format(self):
+        return '_'.join(self)
+
+    # The same name with some parts swapped out, like name.withParts(purpose='PLC', type='GRP').
+    def withParts(self, prefix=None, component=None, joint=None, purpose=None, type=None):
+        return NodeName(self.prefix if prefix is None else prefix, self.component if component is None else component,
+            self.joint if joint is None else joint, self.purpose if purpose is None else purpose, self.type if type is None else type)
+
+    def __str__(self):
+        return self.format()
+
+
+# Raises IndexError for names that don't have all five parts, the same as getNodeNameParts() always has.
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parseNodeName(name):
+    component_parts = name.split('_', 2)
+    joint_parts = component_parts[2].rsplit('_', 2) if len(component_parts) == 3 else []
+    if len(joint_parts) < 3:
+        raise IndexError('{0} doesn\'t follow the naming convention'.format(name))
+    return NodeName(component_parts[0], component_parts[1], joint_parts[0], joint_parts[1], joint_parts[2])
+
+
+def formatNodeName(prefix, component, joint, purpose, type):
+    return '_'.join((prefix, component, joint, purpose, type))
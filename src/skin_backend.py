@@ -0,0 +1,157 @@
+from abc import ABC, abstractmethod
+from array import array
+
+from . import skin_weights
+
+# Reads and writes a shape's skin weights as one (vertex x influence) buffer, instead of querying/editing them one
+# vertex at a time.  The DCC specific part is just getting that buffer in and out of a skin cluster, so a fake
+# in-memory version can stand in for it when there's no DCC around.
+class SkinBackend(ABC):
+
+    # Whether the shape's weights can be read/written in bulk, otherwise the controller falls back to doing it per vertex.
+    @abstractmethod
+    def supportsShape(self, shape):
+        pass
+
+    @abstractmethod
+    def exists(self, node):
+        pass
+
+    @abstractmethod
+    def findSkinCluster(self, shape):
+        pass
+
+    @abstractmethod
+    def createSkinCluster(self, shape, influences, name):
+        pass
+
+    @abstractmethod
+    def getInfluences(self, skinCluster):
+        pass
+
+    # Returns the name vertices are listed under (e.g. "body_GEO.vtx") and the ids of all of the shape's vertices.
+    @abstractmethod
+    def getComponents(self, shape):
+        pass
+
+    # Flat (vertex x influence) weights for the given vertices (all of them if not given), columns in "getInfluences" order.
+    @abstractmethod
+    def getWeights(self, skinCluster, shape, vertexIds=None):
+        pass
+
+    @abstractmethod
+    def setWeights(self, skinCluster, shape, weights, vertexIds=None):
+        pass
+
+    # Object space (x, y, z) for every vertex, in vertex id order.
+    @abstractmethod
+    def getPoints(self, shape):
+        pass
+
+    # (vertices per face, vertex ids for each face) for meshes.  Other shapes give back whatever describes how their
+    # points are laid out, it only gets hashed.
+    @abstractmethod
+    def getTopology(self, shape):
+        pass
+
+    def readShapeWeights(self, skinCluster, shape, ignoreThreshold=0.001):
+        component, vertex_ids = self.getComponents(shape)
+        weights = self.getWeights(skinCluster, shape)
+        return skin_weights.ShapeWeights.fromWeightMatrix(shape, self.getInfluences(skinCluster), component, vertex_ids, weights, ignoreThreshold)
+
+    # Returns False if the weights can't be written in one go (e.g. they were saved with vertex names that don't
+    # map back to ids), in which case the caller has to set them per vertex.
+    def writeShapeWeights(self, skinCluster, shape, shapeWeights):
+        if shapeWeights.vertexNames is not None:
+            return False
+        weights = shapeWeights.toWeightMatrix(self.getInfluences(skinCluster))
+        self.setWeights(skinCluster, shape, weights, shapeWeights.vertexIds)
+        return True
+
+
+class FakeSkinBackend(SkinBackend):
+
+    def __init__(self):
+        # shape -> (component name, vertex count)
+        self.shapes = {}
+        # shape -> [(x, y, z)]
+        self.points = {}
+        # skin cluster -> {'shape', 'influences', 'weights'}
+        self.skinClusters = {}
+        self.joints = set()
+        # Number of calls that would have gone to the DCC, to see how the cost scales.
+        self.calls = 0
+
+    def addShape(self, shape, component, vertexCount, points=None):
+        self.shapes[shape] = (component, vertexCount)
+        self.points[shape] = points if points is not None else [(0.0, 0.0, 0.0)] * vertexCount
+
+    def addJoints(self, joints):
+        self.joints.update(joints)
+
+    def supportsShape(self, shape):
+        return shape in self.shapes
+
+    def exists(self, node):
+        self.calls += 1
+        return node in self.joints or node in self.shapes or node in self.skinClusters
+
+    def findSkinCluster(self, shape):
+        self.calls += 1
+        for name, skin_cluster in self.skinClusters.items():
+            if skin_cluster['shape'] == shape:
+                return name
+        return None
+
+    def createSkinCluster(self, shape, influences, name):
+        self.calls += 1
+        vertex_count = self.shapes[shape][1]
+        # Everything starts bound to the first influence.
+        weights = array('d', bytes(8 * len(influences) * vertex_count))
+        for i in range(vertex_count):
+            weights[i * len(influences)] = 1.0
+        self.skinClusters[name] = {'shape': shape, 'influences': list(influences), 'weights': weights}
+        return name
+
+    def getInfluences(self, skinCluster):
+        self.calls += 1
+        return list(self.skinClusters[skinCluster]['influences'])
+
+    def getComponents(self, shape):
+        self.calls += 1
+        component, vertex_count = self.shapes[shape]
+        return component, range(vertex_count)
+
+    def getWeights(self, skinCluster, shape, vertexIds=None):
+        self.calls += 1
+        skin_cluster = self.skinClusters[skinCluster]
+        weights = skin_cluster['weights']
+        if vertexIds is None:
+            return array('d', weights)
+        num_influences = len(skin_cluster['influences'])
+        result = array('d')
+        for vertex_id in vertexIds:
+            result.extend(weights[vertex_id * num_influences:(vertex_id + 1) * num_influences])
+        return result
+
+    def setWeights(self, skinCluster, shape, weights, vertexIds=None):
+        self.calls += 1
+        skin_cluster = self.skinClusters[skinCluster]
+        num_influences = len(skin_cluster['influences'])
+        if vertexIds is None:
+            vertexIds = range(self.shapes[shape][1])
+        for i, vertex_id in enumerate(vertexIds):
+            row = weights[i * num_influences:(i + 1) * num_influences]
+            total = sum(row)
+            # Normalized like the real thing.
+            if total:
+                row = [x / total for x in row]
+            skin_cluster['weights'][vertex_id * num_influences:(vertex_id + 1) * num_influences] = array('d', row)
+
+    def getPoints(self, shape):
+        self.calls += 1
+        return list(self.points[shape])
+
+    def getTopology(self, shape):
+        self.calls += 1
+        return [self.shapes[shape][1]], []
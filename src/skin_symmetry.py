@@ -0,0 +1,203 @@
+import os
+import struct
+import hashlib
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import constants
+
+# Symmetry map file, one per mesh topology:
+#   magic (4 bytes) | version (uint32) | vertex count (uint32) | mirror ids (int32 * count) | sides (int8 * count)
+MAGIC = b'CRSM'
+VERSION = 1
+HEADER = '<4sII'
+
+# A vertex only gets a mirror if there's one within this distance of where it should be, and anything this close
+# to the mirror plane counts as being on it.
+DEFAULT_TOLERANCE = 0.001
+AXES = {'x': 0, 'y': 1, 'z': 2}
+# Left is +X, which is the side the weights get mirrored from by default.
+SIDES = {'L': 1, 'R': -1}
+OPPOSITE_PREFIXES = {'L': 'R', 'R': 'L'}
+
+
+# Nearest point lookups for the vertex positions.  The tree is kept in flat lists (one entry per node) rather than
+# node objects, since a mesh can have a lot of vertices.
+class KDTree():
+
+    def __init__(self, points):
+        self.points = points
+        self.pointIds = []
+        self.axes = []
+        self.left = []
+        self.right = []
+        self.root = self.build(list(range(len(points))), 0)
+
+    def build(self, ids, depth):
+        if not ids:
+            return -1
+        axis = depth % 3
+        ids.sort(key=lambda i: self.points[i][axis])
+        middle = len(ids) // 2
+        node = len(self.pointIds)
+        self.pointIds.append(ids[middle])
+        self.axes.append(axis)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.left[node] = self.build(ids[:middle], depth + 1)
+        self.right[node] = self.build(ids[middle + 1:], depth + 1)
+        return node
+
+    # Returns (point index, squared distance), or (-1, inf) if the tree is empty.
+    def nearest(self, point):
+        best = -1
+        best_distance = float('inf')
+        # (node, squared distance from the point to that node's side of the split)
+        stack = [(self.root, 0.0)]
+        while stack:
+            node, plane_distance = stack.pop()
+            if node < 0 or plane_distance >= best_distance:
+                continue
+            candidate = self.points[self.pointIds[node]]
+            distance = (point[0] - candidate[0]) ** 2 + (point[1] - candidate[1]) ** 2 + (point[2] - candidate[2]) ** 2
+            if distance < best_distance:
+                best = self.pointIds[node]
+                best_distance = distance
+            axis = self.axes[node]
+            delta = point[axis] - candidate[axis]
+            near, far = (self.left[node], self.right[node]) if delta < 0 else (self.right[node], self.left[node])
+            # The near side goes on last so it gets searched first, which makes skipping the far side more likely.
+            stack.append((far, delta * delta))
+            stack.append((near, 0.0))
+        return best, best_distance
+
+
+# Which vertex is the mirror of which, and what side of the mirror plane each vertex is on.
+class SymmetryMap():
+
+    def __init__(self, mirrorIds, sides):
+        # vertex -> mirror vertex, -1 if there wasn't one
+        self.mirrorIds = mirrorIds
+        # 1 on the positive side, -1 on the negative side, 0 on the mirror plane
+        self.sides = sides
+
+    @property
+    def vertexCount(self):
+        return len(self.mirrorIds)
+
+    @classmethod
+    def fromPoints(cls, points, axis='x', tolerance=DEFAULT_TOLERANCE):
+        axis = AXES[axis]
+        tree = KDTree(points)
+        max_distance = tolerance * tolerance
+        mirror_ids = array('i')
+        sides = array('b')
+        for point in points:
+            mirrored = list(point)
+            mirrored[axis] = -mirrored[axis]
+            mirror_id, distance = tree.nearest(mirrored)
+            mirror_ids.append(mirror_id if distance <= max_distance else -1)
+            sides.append(0 if abs(point[axis]) <= tolerance else (1 if point[axis] > 0 else -1))
+        return cls(mirror_ids, sides)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            magic, version, count = struct.unpack(HEADER, file.read(struct.calcsize(HEADER)))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError('{0} is not a symmetry map this version can read.'.format(path))
+            mirror_ids = array('i')
+            mirror_ids.fromfile(file, count)
+            sides = array('b')
+            sides.fromfile(file, count)
+        return cls(mirror_ids, sides)
+
+    def save(self, path):
+        temp_path = '{0}.tmp'.format(path)
+        with open(temp_path, 'wb') as file:
+            file.write(struct.pack(HEADER, MAGIC, VERSION, self.vertexCount))
+            self.mirrorIds.tofile(file)
+            self.sides.tofile(file)
+        os.replace(temp_path, path)
+
+    # The vertices on the "toSide" that have a mirror on the other side to copy from.
+    def getTargets(self, toSide):
+        return [i for i in range(self.vertexCount) if self.sides[i] == toSide and self.mirrorIds[i] >= 0]
+
+
+# Hash of the things a symmetry map depends on other than the positions: how the vertices are connected, and
+# what it got built with.  Two meshes with the same topology almost always share a map (that's what a mirrored
+# copy is), and re-sculpting a mesh doesn't usually change its symmetry.
+def getTopologyHash(counts, vertexIds, axis='x', tolerance=DEFAULT_TOLERANCE):
+    hasher = hashlib.sha1()
+    hasher.update('{0}:{1}:{2}'.format(VERSION, axis, tolerance).encode())
+    hasher.update(array('i', counts).tobytes())
+    hasher.update(array('i', vertexIds).tobytes())
+    return hasher.hexdigest()
+
+
+# Loads the map for the topology from the cache, or builds it from "getPoints()" and caches it if it isn't there.
+def getSymmetryMap(topologyHash, getPoints, axis='x', tolerance=DEFAULT_TOLERANCE):
+    cache_path = os.path.join(constants.SYMMETRY_CACHE_PATH, '{0}.sym'.format(topologyHash))
+    if os.path.exists(cache_path):
+        try:
+            return SymmetryMap.load(cache_path)
+        except (IOError, OSError, ValueError, EOFError):
+            constants.RIGGER_LOG.info('Symmetry map {0} could not be read, building it again.'.format(cache_path))
+    symmetry_map = SymmetryMap.fromPoints(getPoints(), axis, tolerance)
+    try:
+        os.makedirs(constants.SYMMETRY_CACHE_PATH, exist_ok=True)
+        symmetry_map.save(cache_path)
+    except (IOError, OSError):
+        constants.RIGGER_LOG.warning('Could not write symmetry map {0}.'.format(cache_path))
+    return symmetry_map
+
+
+# "L_armLimb_0_BND_JNT" -> "R_armLimb_0_BND_JNT", anything without an L_/R_ prefix stays the same.
+def getMirrorInfluenceName(name):
+    prefix, separator, rest = name.partition('_')
+    if separator and prefix in OPPOSITE_PREFIXES:
+        return '{0}_{1}'.format(OPPOSITE_PREFIXES[prefix], rest)
+    return name
+
+
+# For each influence, the column its weights go to on the other side.  Influences whose mirror isn't bound to the
+# skin cluster (and center influences) keep their own column.
+def getMirrorColumns(influences):
+    columns = { name: i for i, name in enumerate(influences) }
+    mirror_columns = []
+    for i, name in enumerate(influences):
+        mirror_name = getMirrorInfluenceName(name)
+        if mirror_name != name and mirror_name not in columns:
+            constants.RIGGER_LOG.warning('{0} isn\'t bound, weights for {1} will stay on {1}.'.format(mirror_name, name))
+        mirror_columns.append(columns.get(mirror_name, i))
+    return mirror_columns
+
+
+# Copies the weights from the "fromSide" vertices onto their mirrors in a flat (vertex x influence) weight buffer,
+# swapping L_/R_ influences as it goes.  Vertices on the mirror plane, and any without a mirror, are left alone.
+# Returns the new weights, in the same kind of buffer, and the number of vertices that got mirrored.
+def mirrorWeights(weights, influences, symmetryMap, fromSide=SIDES['L']):
+    num_influences = len(influences)
+    mirror_columns = getMirrorColumns(influences)
+    targets = symmetryMap.getTargets(-fromSide)
+    if numpy is not None:
+        matrix = numpy.array(weights, dtype=numpy.float64).reshape(symmetryMap.vertexCount, num_influences)
+        target_ids = numpy.array(targets, dtype=numpy.intp)
+        source_ids = numpy.frombuffer(symmetryMap.mirrorIds, dtype=numpy.int32)[target_ids]
+        # The influence mirror is its own inverse, so the same column order works both ways.
+        matrix[target_ids] = matrix[source_ids][:, mirror_columns]
+        result = matrix.ravel()
+        return (result if isinstance(weights, numpy.ndarray) else array('d', result.tobytes())), len(targets)
+
+    result = array('d', weights)
+    for target in targets:
+        source_row = symmetryMap.mirrorIds[target] * num_influences
+        target_row = target * num_influences
+        for j in range(num_influences):
+            result[target_row + mirror_columns[j]] = weights[source_row + j]
+    return result, len(targets)
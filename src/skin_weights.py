@@ -0,0 +1,351 @@
+import os
+import re
+import json
+import mmap
+import struct
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import constants
+
+# Binary skin weights file.  The JSON weights files key every vertex by its full component name and store each
+# influence as a [joint, weight] pair, which is big and slow to parse.  This stores each shape as one influence
+# name table plus flat index/weight arrays that can be read straight out of a memory map.
+#
+# Layout (little endian):
+#   magic (4 bytes) | version (uint32) | header length (uint32) | JSON header | padding to 8 bytes | array data
+#
+# The JSON header only holds the names and where each shape's arrays live in the array data, so it stays small
+# no matter how many vertices there are.  Shapes are stored either as CSR (per vertex start offsets into flat
+# influence index/weight arrays) or dense (a vertex x influence matrix of weights).
+MAGIC = b'CRSW'
+VERSION = 1
+ALIGNMENT = 8
+
+# array typecodes for the stored arrays.  Weights are doubles so converting from JSON is lossless.
+INDEX_TYPE = 'I'
+WEIGHT_TYPE = 'd'
+
+COMPONENT_PATTERN = re.compile(r'^(.*)\[(\d+)\]$')
+
+
+class SkinWeightsError(Exception):
+    pass
+
+
+class ShapeWeights():
+
+    def __init__(self, shape, influences, component='', vertexIds=None, vertexNames=None, indptr=None, indices=None, weights=None, dense=False):
+        self.shape = shape
+        # Joint names, the stored indices point into this list.
+        self.influences = list(influences)
+        # Vertex names are "<component>[<id>]", unless they didn't fit that pattern, in which case they're stored as is.
+        self.component = component
+        self.vertexIds = vertexIds if vertexIds is not None else array(INDEX_TYPE)
+        self.vertexNames = vertexNames
+        # CSR: the influences for vertex i are indices[indptr[i]:indptr[i + 1]]
+        # Dense: indptr and indices are empty and weights is a (vertex count x influence count) matrix.
+        self.indptr = indptr if indptr is not None else array(INDEX_TYPE, [0])
+        self.indices = indices if indices is not None else array(INDEX_TYPE)
+        self.weights = weights if weights is not None else array(WEIGHT_TYPE)
+        self.dense = dense
+
+    @property
+    def vertexCount(self):
+        return len(self.vertexNames) if self.vertexNames is not None else len(self.vertexIds)
+
+    def getVertexName(self, i):
+        if self.vertexNames is not None:
+            return self.vertexNames[i]
+        return '{0}[{1}]'.format(self.component, self.vertexIds[i])
+
+    def getVertexWeights(self, i):
+        if self.dense:
+            num_influences = len(self.influences)
+            row = self.weights[i * num_influences:(i + 1) * num_influences]
+            return [(self.influences[j], row[j]) for j in range(num_influences) if row[j]]
+        start = self.indptr[i]
+        end = self.indptr[i + 1]
+        return [(self.influences[self.indices[j]], self.weights[j]) for j in range(start, end)]
+
+    # Builds the stored arrays from the {vertex name: [[joint, weight], ...]} dicts the JSON files use.
+    @classmethod
+    def fromVertexDict(cls, shape, vertexDict, dense=False):
+        influence_ids = {}
+        influences = []
+        names = list(vertexDict.keys())
+        matches = [COMPONENT_PATTERN.match(name) for name in names]
+        components = set(match.group(1) for match in matches if match)
+        component = ''
+        vertex_ids = array(INDEX_TYPE)
+        vertex_names = None
+        if len(components) == 1 and all(matches):
+            component = components.pop()
+            vertex_ids = array(INDEX_TYPE, [int(match.group(2)) for match in matches])
+        else:
+            vertex_names = names
+
+        for influence_list in vertexDict.values():
+            for joint, weight in influence_list:
+                if joint not in influence_ids:
+                    influence_ids[joint] = len(influences)
+                    influences.append(joint)
+
+        if dense:
+            num_influences = len(influences)
+            weights = array(WEIGHT_TYPE, bytes(8 * num_influences * len(names)))
+            for i, influence_list in enumerate(vertexDict.values()):
+                for joint, weight in influence_list:
+                    weights[i * num_influences + influence_ids[joint]] = weight
+            return cls(shape, influences, component, vertex_ids, vertex_names, array(INDEX_TYPE), array(INDEX_TYPE), weights, True)
+
+        indptr = array(INDEX_TYPE, [0])
+        indices = array(INDEX_TYPE)
+        weights = array(WEIGHT_TYPE)
+        for influence_list in vertexDict.values():
+            for joint, weight in influence_list:
+                indices.append(influence_ids[joint])
+                weights.append(weight)
+            indptr.append(len(indices))
+        return cls(shape, influences, component, vertex_ids, vertex_names, indptr, indices, weights, False)
+
+    # Builds a shape from a flat (vertex x influence) weight buffer, which is what the skin cluster API hands back.
+    # Unless it's kept dense, anything at or below the threshold gets dropped, same as "skinPercent -ignoreBelow".
+    @classmethod
+    def fromWeightMatrix(cls, shape, influences, component, vertexIds, weights, ignoreThreshold=0.0, dense=False):
+        if dense:
+            return cls(shape, influences, component, array(INDEX_TYPE, vertexIds), None, array(INDEX_TYPE), array(INDEX_TYPE), array(WEIGHT_TYPE, weights), True)
+
+        num_influences = len(influences)
+        vertex_ids = array(INDEX_TYPE)
+        indptr = array(INDEX_TYPE, [0])
+        indices = array(INDEX_TYPE)
+        kept_weights = array(WEIGHT_TYPE)
+        for i, vertex_id in enumerate(vertexIds):
+            start = len(indices)
+            row = i * num_influences
+            for j in range(num_influences):
+                weight = weights[row + j]
+                if weight > ignoreThreshold:
+                    indices.append(j)
+                    kept_weights.append(weight)
+            # Vertices with nothing left don't get saved.
+            if len(indices) != start:
+                vertex_ids.append(vertex_id)
+                indptr.append(len(indices))
+        return cls(shape, influences, component, vertex_ids, None, indptr, indices, kept_weights, False)
+
+    def toVertexDict(self):
+        return { self.getVertexName(i): [list(pair) for pair in self.getVertexWeights(i)] for i in range(self.vertexCount) }
+
+    # Flat (vertex x influence) weight buffer with the columns in the given influence order, which is what the skin
+    # cluster API wants.  Influences that aren't in the given list are dropped.
+    def toWeightMatrix(self, influences=None):
+        if influences is None:
+            influences = self.influences
+        columns = { name: i for i, name in enumerate(influences) }
+        column_map = [columns.get(name, -1) for name in self.influences]
+        num_columns = len(influences)
+        num_influences = len(self.influences)
+        matrix = array(WEIGHT_TYPE, bytes(8 * num_columns * self.vertexCount))
+        for i in range(self.vertexCount):
+            row = i * num_columns
+            if self.dense:
+                entries = range(i * num_influences, (i + 1) * num_influences)
+            else:
+                entries = range(self.indptr[i], self.indptr[i + 1])
+            for j in entries:
+                column = column_map[j - i * num_influences if self.dense else self.indices[j]]
+                if column >= 0:
+                    matrix[row + column] = self.weights[j]
+        return matrix
+
+    # Full (vertex x influence) weight matrix as a numpy array if numpy is around, otherwise a flat array.
+    def asDenseMatrix(self):
+        matrix = self.toWeightMatrix()
+        if numpy is not None:
+            return numpy.frombuffer(matrix, dtype=numpy.float64).reshape(self.vertexCount, len(self.influences))
+        return matrix
+
+
+class SkinWeightsFile():
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            self.file.close()
+            raise SkinWeightsError('{0} is not a skin weights file.'.format(path))
+        magic, version, header_length = struct.unpack_from('<4sII', self.map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise SkinWeightsError('{0} is not a skin weights file.'.format(path))
+        if version > VERSION:
+            self.close()
+            raise SkinWeightsError('{0} was written by a newer version ({1}) of the skin weights format.'.format(path, version))
+        header_start = struct.calcsize('<4sII')
+        self.header = json.loads(self.map[header_start:header_start + header_length].decode('utf-8'))
+        self.dataStart = alignOffset(header_start + header_length)
+        self.shapeHeaders = { x['shape']: x for x in self.header['shapes'] }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        # Any arrays handed out are views into the map.  If some are still around the map can't be closed yet, so
+        # just let go of it and it'll be unmapped once they're gone.
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                pass
+            self.map = None
+        self.file.close()
+
+    def shapes(self):
+        return list(self.shapeHeaders.keys())
+
+    def getArray(self, entry, typecode):
+        offset, count = entry
+        start = self.dataStart + offset
+        size = count * array(typecode).itemsize
+        view = memoryview(self.map)[start:start + size]
+        if numpy is not None:
+            return numpy.frombuffer(view, dtype=numpy.dtype(typecode).newbyteorder('<'))
+        return view.cast(typecode)
+
+    # Nothing gets read until a shape is asked for, and even then the arrays are views into the map.
+    def getShape(self, shape):
+        header = self.shapeHeaders[shape]
+        return ShapeWeights(
+            shape,
+            header['influences'],
+            header['component'],
+            self.getArray(header['vertexIds'], INDEX_TYPE),
+            header.get('vertexNames'),
+            self.getArray(header['indptr'], INDEX_TYPE),
+            self.getArray(header['indices'], INDEX_TYPE),
+            self.getArray(header['weights'], WEIGHT_TYPE),
+            header['dense']
+        )
+
+    def toDict(self):
+        return { shape: self.getShape(shape).toVertexDict() for shape in self.shapes() }
+
+
+# Same interface as "SkinWeightsFile" for the old JSON files, so callers don't need to care which one they got.
+class JSONSkinWeights():
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'r') as file:
+            self.bindData = json.load(file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        pass
+
+    def shapes(self):
+        return list(self.bindData.keys())
+
+    def getShape(self, shape):
+        return ShapeWeights.fromVertexDict(shape, self.bindData[shape])
+
+    def toDict(self):
+        return self.bindData
+
+
+def openSkinWeights(path):
+    if isSkinWeightsFile(path):
+        return SkinWeightsFile(path)
+    return JSONSkinWeights(path)
+
+
+def alignOffset(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def toBytes(values, typecode):
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        return values.astype(numpy.dtype(typecode).newbyteorder('<'), copy=False).tobytes()
+    data = values if isinstance(values, array) and values.typecode == typecode else array(typecode, values)
+    if struct.pack('=I', 1) != struct.pack('<I', 1):
+        data = array(typecode, data)
+        data.byteswap()
+    return data.tobytes()
+
+
+def saveSkinWeights(path, shapeWeights):
+    shape_headers = []
+    chunks = []
+    offset = 0
+    for shape in shapeWeights:
+        shape_header = {
+            'shape': shape.shape,
+            'component': shape.component,
+            'influences': shape.influences,
+            'dense': shape.dense
+        }
+        if shape.vertexNames is not None:
+            shape_header['vertexNames'] = list(shape.vertexNames)
+        for key, values, typecode in [('vertexIds', shape.vertexIds, INDEX_TYPE), ('indptr', shape.indptr, INDEX_TYPE), ('indices', shape.indices, INDEX_TYPE), ('weights', shape.weights, WEIGHT_TYPE)]:
+            data = toBytes(values, typecode)
+            shape_header[key] = [offset, len(data) // array(typecode).itemsize]
+            padding = alignOffset(len(data)) - len(data)
+            chunks.append(data + bytes(padding))
+            offset += len(data) + padding
+        shape_headers.append(shape_header)
+
+    header = json.dumps({'shapes': shape_headers}, separators=(',', ':')).encode('utf-8')
+    prefix = struct.pack('<4sII', MAGIC, VERSION, len(header))
+    header_end = len(prefix) + len(header)
+    temp_path = '{0}.tmp'.format(path)
+    with open(temp_path, 'wb') as file:
+        file.write(prefix)
+        file.write(header)
+        file.write(bytes(alignOffset(header_end) - header_end))
+        for chunk in chunks:
+            file.write(chunk)
+    os.replace(temp_path, path)
+
+
+def isSkinWeightsFile(path):
+    with open(path, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+# Converts one of the old {shape: {vertex: [[joint, weight], ...]}} JSON files to the binary format.  Everything
+# goes through CSR, which keeps each vertex's influences in their original order, so converting back gives the
+# same data.
+def convertJSONWeights(json_path, out_path=None):
+    if not out_path:
+        out_path = '{0}{1}'.format(os.path.splitext(json_path)[0], constants.SKIN_WEIGHTS_EXTENSION)
+    with open(json_path, 'r') as file:
+        bind_data = json.load(file)
+    saveSkinWeights(out_path, [ShapeWeights.fromVertexDict(shape, data) for shape, data in bind_data.items()])
+    return out_path
+
+
+def exportJSONWeights(weights_path, json_path=None):
+    if not json_path:
+        json_path = '{0}.json'.format(os.path.splitext(weights_path)[0])
+    with SkinWeightsFile(weights_path) as weights_file:
+        bind_data = weights_file.toDict()
+    with open(json_path, 'w') as file:
+        json.dump(bind_data, file, indent=4)
+    return json_path
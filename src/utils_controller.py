@@ -11,12 +11,22 @@ class UtilsController(ABC):
     def makeRLMatch(self):
         pass
 
+    # Mirror the skin weights of the selected meshes from one side to the other.
+    @abstractmethod
+    def mirrorSkinWeights(self, fromSide='L'):
+        pass
+
     @abstractmethod
     def selectBindJoints(self):
         pass
 
+    # Mirror the driven keys on the selected L_/R_ nodes, or on everything, onto the other side.
+    @abstractmethod
+    def mirrorDrivenKeys(self, allNetworks=False, planPath=None):
+        pass
+
     @abstractmethod
-    def mirrorDrivenKeys(self):
+    def exportDrivenKeyMirrorPlan(self, planPath, allNetworks=False):
         pass
 
     @abstractmethod
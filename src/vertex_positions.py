@@ -0,0 +1,167 @@
+import re
+import heapq
+
+# "body_GEO.vtx[12]" -> ("body_GEO", 12)
+VERTEX_NAME = re.compile(r'^(.+)\.vtx\[(\d+)\]$')
+
+
+def parseVertexName(name):
+    match = VERTEX_NAME.match(name)
+    if not match:
+        raise ValueError('{0} isn\'t a vertex'.format(name))
+    return match.group(1), int(match.group(2))
+
+
+# Pulling every point on a mesh is one copy on the DCC's side, but asking for one vertex at a time is a round trip
+# each.  Once a lookup wants more than this much of the mesh, the whole mesh gets pulled instead.
+WHOLE_MESH_FRACTION = 0.1
+
+
+# One mesh's vertex positions and edges, asked for as they're needed and kept once they have been, so a tool working on
+# a handful of vertices doesn't pull (and convert) every point on the mesh.  "query" is what asks the DCC, in world
+# space:
+#   vertexCount - how many vertices the mesh has
+#   getPoint(vertex) - one vertex's (x, y, z)
+#   getPoints() - every vertex's point, in vertex id order, in whatever the DCC keeps them in
+#   getNeighbours(vertex) - the vertices it shares an edge with
+#   closestFaceVertices(point) - the vertices around the face closest to the point
+class MeshPositions():
+
+    def __init__(self, query):
+        self.query = query
+        # vertex -> (x, y, z)
+        self.points = {}
+        # Every point, only once a lookup wants enough of them.  They're converted a vertex at a time as they're used.
+        self.allPoints = None
+        # vertex -> [neighbouring vertices]
+        self.neighbourLists = {}
+
+    @property
+    def vertexCount(self):
+        return self.query.vertexCount
+
+    def getPoint(self, vertex):
+        point = self.points.get(vertex)
+        if point is None:
+            if self.allPoints is not None:
+                found = self.allPoints[vertex]
+                point = (found[0], found[1], found[2])
+            else:
+                point = tuple(self.query.getPoint(vertex))[:3]
+            self.points[vertex] = point
+        return point
+
+    def neighbours(self, vertex):
+        neighbours = self.neighbourLists.get(vertex)
+        if neighbours is None:
+            neighbours = self.neighbourLists[vertex] = sorted(self.query.getNeighbours(vertex))
+        return neighbours
+
+    def getPositions(self, ids):
+        ids = list(ids)
+        if self.allPoints is None and len([x for x in ids if x not in self.points]) > self.vertexCount * WHOLE_MESH_FRACTION:
+            self.allPoints = self.query.getPoints()
+        return [self.getPoint(x) for x in ids]
+
+    # The ids sorted by their position on one axis.  Ties keep the order they came in, either way round, the same as
+    # list.sort(reverse=...) does.
+    def sortIds(self, ids, axis=0, reverse=False):
+        ids = list(ids)
+        positions = self.getPositions(ids)
+        order = sorted(range(len(ids)), key=lambda i: positions[i][axis], reverse=reverse)
+        return [ids[i] for i in order]
+
+    # Returns (vertex id, squared distance) for whichever of the closest face's vertices is nearest the point, or
+    # (-1, inf) for a mesh without any faces.
+    def nearest(self, point):
+        best = (-1, float('inf'))
+        for vertex in self.query.closestFaceVertices(point):
+            other = self.getPoint(vertex)
+            distance = (point[0] - other[0]) ** 2 + (point[1] - other[1]) ** 2 + (point[2] - other[2]) ** 2
+            if distance < best[1]:
+                best = (vertex, distance)
+        return best
+
+    # The shortest path along the mesh's edges from one vertex to another, both included.  Searched towards the end
+    # vertex (A*, with the straight line to it as the estimate), so only the vertices around the path get asked about.
+    def edgePath(self, start, end):
+        if start == end:
+            return [start]
+        goal = self.getPoint(end)
+        remaining = lambda point: ((point[0] - goal[0]) ** 2 + (point[1] - goal[1]) ** 2 + (point[2] - goal[2]) ** 2) ** 0.5
+        distances = {start: 0.0}
+        previous = {}
+        queue = [(remaining(self.getPoint(start)), start)]
+        done = set()
+        while queue:
+            estimate, vertex = heapq.heappop(queue)
+            if vertex == end:
+                break
+            if vertex in done:
+                continue
+            done.add(vertex)
+            point = self.getPoint(vertex)
+            distance = distances[vertex]
+            for neighbour in self.neighbours(vertex):
+                other = self.getPoint(neighbour)
+                new_distance = distance + ((point[0] - other[0]) ** 2 + (point[1] - other[1]) ** 2 + (point[2] - other[2]) ** 2) ** 0.5
+                if new_distance < distances.get(neighbour, float('inf')):
+                    distances[neighbour] = new_distance
+                    previous[neighbour] = vertex
+                    heapq.heappush(queue, (new_distance + remaining(other), neighbour))
+        if end not in previous:
+            return []
+        path = [end]
+        while path[-1] != start:
+            path.append(previous[path[-1]])
+        path.reverse()
+        return path
+
+    # The vertices along the edges that run through the vertex nearest each point, in the points' order.  For joints
+    # that were laid out along an edge loop (an eyelid, a lip), that's the loop between the first and last joint.
+    def pickEdgeLoop(self, points):
+        anchors = []
+        for point in points:
+            vertex, distance = self.nearest(point)
+            if vertex >= 0 and (not anchors or anchors[-1] != vertex):
+                anchors.append(vertex)
+        if len(anchors) < 2:
+            return anchors
+        picked = [anchors[0]]
+        seen = set(picked)
+        for start, end in zip(anchors, anchors[1:]):
+            path = self.edgePath(start, end)
+            # Separate shells don't have a path between them, the anchors still get picked.
+            for vertex in (path[1:] if path else [end]):
+                if vertex not in seen:
+                    seen.add(vertex)
+                    picked.append(vertex)
+        return picked
+
+
+# MeshPositions for every mesh asked about, so each vertex only gets asked for once.  "getQuery(mesh)" makes the query
+# MeshPositions asks the DCC through.
+class VertexPositionCache():
+
+    def __init__(self, getQuery):
+        self.getQuery = getQuery
+        self.meshes = {}
+
+    def get(self, mesh):
+        positions = self.meshes.get(mesh)
+        if positions is None:
+            positions = MeshPositions(self.getQuery(mesh))
+            self.meshes[mesh] = positions
+        return positions
+
+    # The mesh (and its MeshPositions) whose vertices are closest to the points altogether.
+    def nearestMesh(self, meshes, points):
+        best = (None, None)
+        best_distance = float('inf')
+        for mesh in meshes:
+            positions = self.get(mesh)
+            distance = sum(positions.nearest(x)[1] for x in points)
+            if distance < best_distance:
+                best = (mesh, positions)
+                best_distance = distance
+        return best